@@ -1,6 +1,8 @@
 # --- START OF FILE add_module.py ---
 
 import json
+import os
+import random
 import uuid
 import sys
 
@@ -57,25 +59,29 @@ OP_TYPE_STR_ALIASES = {
 }
 
 
-def _uses_string_schema(existing_nodes: list) -> bool:
-    for n in existing_nodes or []:
-        op = n.get("OperationType")
-        # VariableNodeViewModel 在很多存档里天生就是字符串 OperationType="Variable"（且端口 DataType 也是字符串），
-        # 但这并不代表整个 chip_graph 需要切换到“字符串 schema”。
-        # 如果把它当作全局信号，会导致后续普通模块（如 Angle/Add 等）也被错误地用字符串 OperationType 生成，
-        # 进而出现 int/str 混合 schema，游戏侧往往直接加载失败。
-        if isinstance(op, str) and op.strip().lower() == "variable":
-            continue
-        if isinstance(op, str):
-            return True
-        if isinstance(n.get("GateDataType"), str):
+def _node_forces_string_schema(n: dict) -> bool:
+    """单个节点是否表明 chip_graph 使用字符串 schema。"""
+    op = n.get("OperationType")
+    # VariableNodeViewModel 在很多存档里天生就是字符串 OperationType="Variable"（且端口 DataType 也是字符串），
+    # 但这并不代表整个 chip_graph 需要切换到“字符串 schema”。
+    # 如果把它当作全局信号，会导致后续普通模块（如 Angle/Add 等）也被错误地用字符串 OperationType 生成，
+    # 进而出现 int/str 混合 schema，游戏侧往往直接加载失败。
+    if isinstance(op, str) and op.strip().lower() == "variable":
+        return False
+    if isinstance(op, str):
+        return True
+    if isinstance(n.get("GateDataType"), str):
+        return True
+    for p in (n.get("Inputs") or []) + (n.get("Outputs") or []):
+        if isinstance(p.get("DataType"), str):
             return True
-        for p in (n.get("Inputs") or []) + (n.get("Outputs") or []):
-            if isinstance(p.get("DataType"), str):
-                return True
     return False
 
 
+def _uses_string_schema(existing_nodes: list) -> bool:
+    return any(_node_forces_string_schema(n) for n in existing_nodes or [])
+
+
 def _canonical_type_str(t: object) -> str | None:
     if t is None or isinstance(t, bool):
         return None
@@ -113,26 +119,42 @@ def _coerce_operation_type_value(op: object) -> object:
 
 # --- 核心功能 ---
 
-def create_new_node(module_name, module_info, existing_nodes):
+# 批量生成 UUID 时每次预取的个数
+ID_BATCH_SIZE = 1024
+
+
+class IdAllocator:
     """
-    【函数已修改】
-    根据从 moduledef.json 读取的模块信息，创建一个新的、带有唯一ID的节点字典。
-    不再需要 datatype_map 参数，因为所有信息都在 module_info 中。
-    
-    Args:
-        module_name (str): 模块的ViewModel名称, e.g., "ConstantNodeViewModel".
-        module_info (dict): 从 moduledef.json 中获取的该模块的完整定义。
-        existing_nodes (list): 芯片图中已存在的节点列表。
+    UUID4 字符串分配器：一次取一批随机字节再切分，避免每个端口都单独调用 uuid.uuid4()。
+    给出 seed 时使用确定性的伪随机序列（同一输入得到同一批 Id，便于测试与复现构建）。
     """
-    
-    use_string = _uses_string_schema(existing_nodes)
 
-    # 1) OperationType: 旧版为 int，新版为 str（常见为 module 的 nodename）
+    def __init__(self, seed: int | None = None, batch_size: int = ID_BATCH_SIZE):
+        self._rng = random.Random(seed) if seed is not None else None
+        self._batch_size = batch_size
+        self._pool: list = []
+
+    def _refill(self) -> None:
+        n = self._batch_size
+        raw = self._rng.randbytes(16 * n) if self._rng is not None else os.urandom(16 * n)
+        # 倒序存放，pop() 时按生成顺序取出
+        self._pool = [
+            str(uuid.UUID(bytes=raw[i:i + 16], version=4)) for i in range(16 * (n - 1), -1, -16)
+        ]
+
+    def new_id(self) -> str:
+        if not self._pool:
+            self._refill()
+        return self._pool.pop()
+
+
+def _resolve_op_type_code(module_name, module_info, use_string):
     module_id = module_info.get("id")
     if module_id is None:
         print(f"错误: 模块 '{module_name}' 的 'id' 缺失。")
         return None
 
+    # OperationType: 旧版为 int，新版为 str（常见为 module 的 nodename）
     if use_string:
         if isinstance(module_id, str) and not module_id.strip().isdigit():
             op_type_code = module_id.strip()
@@ -163,74 +185,129 @@ def create_new_node(module_name, module_info, existing_nodes):
                     or str(module_id)
                 )
 
-    op_type_code = _coerce_operation_type_value(op_type_code)
-
-    # 2. 生成唯一的节点ID
-    node_id = f"{module_name} : {uuid.uuid4()}"
-    print(f"为新节点生成ID: {node_id}")
-
-    # 3. 【修改】根据新的输入/输出格式创建端口
-    inputs = []
-    for port_info in module_info.get("inputs", []):
-        port_type = port_info.get("type", "DECIMAL")
-        port_name = port_info.get("name", "Input")
-        port_id = f"{node_id}\\nInput : {port_name} {uuid.uuid4()}"
-        dt_value = _coerce_type_value(port_type, use_string_types=use_string)
-        inputs.append({
-            "Id": port_id,
-            "DataType": dt_value,
-            "connectedOutputIdModel": None
-        })
-
-    # 4. 【修改】创建输出端口
-    outputs = []
-    for port_info in module_info.get("outputs", []):
-        port_type = port_info.get("type", "DECIMAL")
-        port_name = port_info.get("name", "Output")
-        port_id = f"{node_id}\\nOutput : {port_name} {uuid.uuid4()}"
-        dt_value = _coerce_type_value(port_type, use_string_types=use_string)
-        outputs.append({
-            "Id": port_id,
-            "DataType": dt_value,
-            "ConnectedInputsIds": []
-        })
-        
-    # 5. 计算新节点的位置，避免重叠 (逻辑不变)
-    max_y = -float('inf')
-    if not existing_nodes:
-        max_y = 0 
-    else:
-        for node in existing_nodes:
-            y_pos = node.get("VisualPosition", {}).get("y", 0)
-            if y_pos > max_y:
-                max_y = y_pos
-    
-    new_y = max_y + Y_SPACING if existing_nodes else 180.0
-    new_position = {
-        "x": DEFAULT_X_POS,
-        "y": new_y
-    }
-
-    # 6. 【修改】直接从 module_info 获取 GateDataType
-    raw_gate_type = module_info.get("gate_data_type", 2) # 提供一个默认值以防万一
-    gate_data_type = _coerce_type_value(raw_gate_type, use_string_types=use_string)
-
-    # 7. 组装完整的节点对象 (逻辑不变, 删除了不必要的字段)
-    new_node = {
-        "Id": node_id,
-        "ModelVersion": 1,
-        "Version": "0.1",
-        "OperationType": op_type_code,
-        "Inputs": inputs,
-        "Outputs": outputs,
-        "VisualPosition": new_position,
-        "VisualCollapsed": False,
-        "MechanicConnectionId": None,
-        "GateDataType": gate_data_type,
-        "SaveData": None
-    }
+    return _coerce_operation_type_value(op_type_code)
+
+
+class NodeFactory:
+    """
+    批量创建模块节点。
+
+    create_new_node 每创建一个节点都要重新扫描全部已有节点（判断 schema、求最大 y），
+    批量添加 N 个模块因此是 O(N²)。NodeFactory 只在构造时扫描一次已有节点，之后：
+    - 通过 observe() 增量维护 schema 标志与最大 y（新加入的任何节点都应 observe）；
+    - 按 (模块, schema) 缓存端口模板，创建节点时只需填入新 Id；
+    - 使用 IdAllocator 批量生成 UUID。
+    生成的节点与逐个调用 create_new_node 的结果一致（Id 除外）。
+    """
+
+    def __init__(self, existing_nodes, *, id_allocator: IdAllocator | None = None, verbosity: int = 0):
+        self.use_string = False
+        self._max_y = None
+        self._ids = id_allocator or IdAllocator()
+        self._templates: dict = {}
+        self.verbosity = verbosity
+        for node in existing_nodes or []:
+            self.observe(node)
+
+    def observe(self, node: dict) -> None:
+        """记录一个已加入 chip_graph 的节点（更新 schema 标志与最大 y）。"""
+        if not self.use_string and _node_forces_string_schema(node):
+            self.use_string = True
+        y_pos = node.get("VisualPosition", {}).get("y", 0)
+        if self._max_y is None or y_pos > self._max_y:
+            self._max_y = y_pos
+
+    def _template(self, module_name, module_info):
+        key = (module_name, str(module_info.get("id")), self.use_string)
+        tpl = self._templates.get(key)
+        if tpl is None:
+            op_type_code = _resolve_op_type_code(module_name, module_info, self.use_string)
+            if op_type_code is None:
+                return None
+            inputs = [
+                (
+                    port_info.get("name", "Input"),
+                    _coerce_type_value(port_info.get("type", "DECIMAL"), use_string_types=self.use_string),
+                )
+                for port_info in module_info.get("inputs", [])
+            ]
+            outputs = [
+                (
+                    port_info.get("name", "Output"),
+                    _coerce_type_value(port_info.get("type", "DECIMAL"), use_string_types=self.use_string),
+                )
+                for port_info in module_info.get("outputs", [])
+            ]
+            # 直接从 module_info 获取 GateDataType，提供一个默认值以防万一
+            gate_data_type = _coerce_type_value(
+                module_info.get("gate_data_type", 2), use_string_types=self.use_string
+            )
+            tpl = (op_type_code, inputs, outputs, gate_data_type)
+            self._templates[key] = tpl
+        return tpl
+
+    def create(self, module_name, module_info):
+        """创建一个新节点（不会加入 chip_graph，但会被视为已加入并参与后续位置计算）。"""
+        tpl = self._template(module_name, module_info)
+        if tpl is None:
+            return None
+        op_type_code, input_tpl, output_tpl, gate_data_type = tpl
+
+        new_id = self._ids.new_id
+        node_id = f"{module_name} : {new_id()}"
+        if self.verbosity >= 1:
+            print(f"为新节点生成ID: {node_id}")
+
+        inputs = [
+            {
+                "Id": f"{node_id}\\nInput : {port_name} {new_id()}",
+                "DataType": dt_value,
+                "connectedOutputIdModel": None,
+            }
+            for port_name, dt_value in input_tpl
+        ]
+        outputs = [
+            {
+                "Id": f"{node_id}\\nOutput : {port_name} {new_id()}",
+                "DataType": dt_value,
+                "ConnectedInputsIds": [],
+            }
+            for port_name, dt_value in output_tpl
+        ]
+
+        # 计算新节点的位置，避免重叠
+        new_y = self._max_y + Y_SPACING if self._max_y is not None else 180.0
+
+        new_node = {
+            "Id": node_id,
+            "ModelVersion": 1,
+            "Version": "0.1",
+            "OperationType": op_type_code,
+            "Inputs": inputs,
+            "Outputs": outputs,
+            "VisualPosition": {"x": DEFAULT_X_POS, "y": new_y},
+            "VisualCollapsed": False,
+            "MechanicConnectionId": None,
+            "GateDataType": gate_data_type,
+            "SaveData": None
+        }
+        self.observe(new_node)
+        return new_node
+
+
+def create_new_node(module_name, module_info, existing_nodes):
+    """
+    【函数已修改】
+    根据从 moduledef.json 读取的模块信息，创建一个新的、带有唯一ID的节点字典。
+    不再需要 datatype_map 参数，因为所有信息都在 module_info 中。
+    批量创建请使用 NodeFactory，避免每个节点都重新扫描 existing_nodes。
     
-    return new_node
+    Args:
+        module_name (str): 模块的ViewModel名称, e.g., "ConstantNodeViewModel".
+        module_info (dict): 从 moduledef.json 中获取的该模块的完整定义。
+        existing_nodes (list): 芯片图中已存在的节点列表。
+    """
+    return NodeFactory(existing_nodes, verbosity=1).create(module_name, module_info)
 
 def main():
     """主执行函数（用于独立测试）"""
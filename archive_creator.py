@@ -4,16 +4,20 @@
 archive_creator.py
 ==================
 新阶段：将 ungraph.json、MetaData 和 Icon 文件压缩并重命名为 .melsave 后缀
+
+也支持直接传入内存中的存档字典，此时 Data 条目由字典序列化后写入，
+不再需要先落盘 ungraph.json。
 """
 
+import json
 import zipfile
 import os
 import random
 import string
 from pathlib import Path
-from typing import List
+from typing import Any, Dict, List, Optional
 
-from src.config import FINAL_SAVE_PATH, OUTPUT_DIR, ensure_output_dir
+from src.build_context import BuildContext
 
 def generate_random_filename(length: int = 8) -> str:
     """
@@ -75,31 +79,77 @@ def create_melsave_archive(ungraph_path: Path, metadata_path: Path, icon_path: P
         print(f"❌ 创建压缩文件时发生错误: {e}")
         return False
 
-def run_archive_creation_stage() -> bool:
+def create_melsave_archive_from_data(save_data: Dict[str, Any], metadata_path: Path, icon_path: Path, output_path: Path) -> bool:
+    """
+    将内存中的存档字典序列化为 Data，并与 MetaData 和 Icon 一起压缩成 .melsave 文件
+
+    Args:
+        save_data: 完整的存档字典（即 ungraph.json 的内容）
+        metadata_path: MetaData 文件路径
+        icon_path: Icon 文件路径
+        output_path: 输出的 .melsave 文件路径
+
+    Returns:
+        bool: 是否成功创建压缩文件
+    """
+    for file_path, name in ((metadata_path, "MetaData"), (icon_path, "Icon")):
+        if not file_path.exists():
+            print(f"❌ 错误：未找到必需文件 '{name}' 在路径 '{file_path}'")
+            return False
+
+    try:
+        data_bytes = json.dumps(save_data, separators=(",", ":")).encode("utf-8")
+        with zipfile.ZipFile(output_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
+            print(f"📦 添加内存存档 ({len(data_bytes)} 字节) 为 'Data'")
+            zipf.writestr('Data', data_bytes)
+
+            print(f"📦 添加 '{metadata_path}' 为 'MetaData'")
+            zipf.write(metadata_path, 'MetaData')
+
+            print(f"📦 添加 '{icon_path}' 为 'Icon'")
+            zipf.write(icon_path, 'Icon')
+
+        print(f"✅ 成功创建压缩文件: '{output_path}'")
+        return True
+
+    except Exception as e:
+        print(f"❌ 创建压缩文件时发生错误: {e}")
+        return False
+
+def run_archive_creation_stage(
+    save_data: Optional[Dict[str, Any]] = None,
+    ctx: Optional[BuildContext] = None,
+) -> bool:
     """
     执行归档创建阶段
     
+    Args:
+        save_data: 内存中的最终存档字典；为 None 时回退为读取 ctx.final_save_path (ungraph.json)
+        ctx: 构建上下文；MetaData / Icon 取 ctx 中的路径（默认项目根目录，与 CWD 无关），
+            输出写到 ctx.output_dir，文件名为 ctx.melsave_name（未指定时随机生成）
+
     Returns:
         bool: 是否成功完成
     """
+    ctx = ctx or BuildContext()
     print("\n--- 阶段 7: 创建 .melsave 归档文件 ---")
 
-    # 确保输出目录存在，统一写到 output/ 目录下
-    ensure_output_dir()
+    # 确保输出目录存在
+    ctx.ensure_output_dir()
 
-    # 定义文件路径
-    ungraph_path = FINAL_SAVE_PATH
-    metadata_path = Path("MetaData")
-    icon_path = Path("Icon")
-
-    # 生成随机文件名
-    random_name = generate_random_filename()
-    output_path = OUTPUT_DIR / f"{random_name}.melsave"
-
-    print(f"📁 生成随机文件名: {output_path.name}")
+    if ctx.melsave_name:
+        output_path = ctx.output_dir / f"{ctx.melsave_name}.melsave"
+    else:
+        # 生成随机文件名
+        random_name = generate_random_filename()
+        output_path = ctx.output_dir / f"{random_name}.melsave"
+        print(f"📁 生成随机文件名: {output_path.name}")
     
     # 创建归档
-    success = create_melsave_archive(ungraph_path, metadata_path, icon_path, output_path)
+    if save_data is not None:
+        success = create_melsave_archive_from_data(save_data, ctx.metadata_path, ctx.icon_path, output_path)
+    else:
+        success = create_melsave_archive(ctx.final_save_path, ctx.metadata_path, ctx.icon_path, output_path)
     
     if success:
         print("✅ 归档创建阶段完成！")
@@ -12,13 +12,12 @@
 - 不再执行文件读写或打印关键信息到 stdout，实现了逻辑与 I/O 的分离。
 """
 import argparse
-from difflib import get_close_matches
 import importlib
 import json
 import re
 import sys
 from pathlib import Path
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Optional, Tuple
 import copy
 
 # ... (动态导入和复用工具部分保持不变) ...
@@ -33,6 +32,10 @@ except ModuleNotFoundError:
     print(" 无法找到 chip_modifier.py，请确保它与本脚本位于同一目录。")
     sys.exit(1)
 
+from src.fuzzy import get_matcher
+from src.module_catalog import ModuleCatalog
+from src.save_document import SaveDocument
+
 # 变量模块：使用新的 VariableManager
 try:
     from src.variable_manager import VariableManager
@@ -73,8 +76,7 @@ def parse_special_notation(item: str) -> Dict[str, Any] | None:
 def fuzzy_best_match(name: str, candidates: List[str], cutoff: float = 0.5) -> str | None:
     """返回与 ``name`` 最接近的候选者；若低于 ``cutoff`` 返回 ``None``。忽略大小写。"""
     name_lower = name.lower().strip()
-    match = get_close_matches(name_lower, candidates, n=1, cutoff=cutoff)
-    return match[0] if match else None
+    return get_matcher(tuple(candidates)).match(name_lower, cutoff)
 
 
 # build_serialized_value_for_variable 已移除，改用 VariableManager 内部逻辑
@@ -88,15 +90,19 @@ def add_modules(
     game_data: Dict[str, Any],
     module_definitions: Dict[str, Any], # 【修改】合并后的单一模块定义文件
     cutoff: float = 0.5,
+    catalog: Optional[ModuleCatalog] = None,
+    verbosity: int = 0,
 ) -> Tuple[Dict[str, Any], List[Dict[str, str]]]:
     """
     主流程：处理模块添加请求并返回修改后的数据和新节点信息。
 
     Args:
         modules_wanted: 待添加模块的指令列表。
-        game_data: 已加载的游戏存档 (data.json 内容)。
+        game_data: 已加载的游戏存档 (data.json 内容)，也可以是 SaveDocument。
         module_definitions: 已加载的模块定义 (moduledef.json 内容)。
         cutoff: 模糊匹配阈值。
+        catalog: 预编译的模块目录（可选），给出时直接复用其中的匹配映射。
+        verbosity: 为 1 及以上时逐个打印新节点的 ID。
 
     Returns:
         一个元组 (updated_game_data, created_nodes_info):
@@ -106,7 +112,6 @@ def add_modules(
     created_nodes_info: List[Dict[str, str]] = []
     
     # ---------- 1. 分类指令 (无变化) ----------
-    internal_module_requests: List[str] = []
     special_node_defs: List[Dict[str, Any]] = []
     original_request_order = [] 
 
@@ -142,26 +147,18 @@ def add_modules(
                 special_node_defs.append(special)
                 original_request_order.append(special)
             else:
-                internal_module_requests.append(item)
                 original_request_order.append(item)
         else:
             print(f" 警告: 跳过无法识别的指令: {item}")
 
-    # ---------- 2. 定位 chip_graph (无变化) ----------
-    chip_graph_meta = None
-    for container in game_data.get("saveObjectContainers", []):
-        for meta in container.get("saveObjects", {}).get("saveMetaDatas", []):
-            if meta.get("key") == "chip_graph":
-                chip_graph_meta = meta
-                break
-        if chip_graph_meta:
-            break
-    
-    if chip_graph_meta is None:
+    # ---------- 2. 定位 chip_graph ----------
+    # 传入普通字典时由本函数包装并在结束时回写；传入 SaveDocument 时由调用方统一 flush。
+    doc = SaveDocument.wrap(game_data)
+    chip_graph_data = doc.chip_graph
+    if chip_graph_data is None:
         raise ValueError("在 data.json 中找不到 'chip_graph'，请确认存档文件正确。")
 
-    chip_graph_data = json.loads(chip_graph_meta["stringValue"])
-    existing_nodes = chip_graph_data["Nodes"]
+    existing_nodes = doc.nodes
 
     # 新版存档：OperationType/GateDataType/DataType 可能为字符串
     # 注意：VariableNodeViewModel 往往天然是 OperationType="Variable"(str)，但这不代表全图需要切换到 string schema。
@@ -185,73 +182,62 @@ def add_modules(
                 break
     
     # ---------- 3. 【核心修改】从 moduledef.json 构建模块匹配映射 ----------
-    candidate_map: Dict[str, str] = {}
-    for internal_id, mod_info in module_definitions.items():
-        source_info = mod_info.get("source_info", {})
-        
-        # 使用 allmod_viewmodel (游戏存档名) 作为匹配项
-        view_model = source_info.get("allmod_viewmodel")
-        if view_model and str(view_model).strip():
-            candidate_map.setdefault(str(view_model).strip().lower(), internal_id)
-            
-        # 使用 chip_names_friendly_name (友好名称) 作为匹配项
-        friendly_name = source_info.get("chip_names_friendly_name")
-        if friendly_name and str(friendly_name).strip():
-            candidate_map.setdefault(str(friendly_name).strip().lower(), internal_id)
-            
-    candidate_names = list(candidate_map.keys())
-
-    # 创建处理队列，以保持原始顺序 (逻辑无大变化)
+    # allmod_viewmodel (游戏存档名) 与 chip_names_friendly_name (友好名称) 都作为匹配项
+    if catalog is None:
+        catalog = ModuleCatalog(module_definitions)
+    candidate_map = catalog.candidate_map
+    candidate_names = catalog.candidate_names
+
+    # 创建处理队列，以保持原始顺序。
+    # 同名请求（大设计里常有成百上千个相同的门）只做一次模糊匹配：请求名 -> 模块 id（未匹配为 None）
     processing_queue = []
-    temp_requests = list(internal_module_requests)
+    resolved_requests: Dict[str, Optional[str]] = {}
     for req in original_request_order:
-        if isinstance(req, str) and req in temp_requests:
-            match_key_lower = fuzzy_best_match(req, candidate_names, cutoff)
-            if match_key_lower:
-                internal_id = candidate_map[match_key_lower]
+        if isinstance(req, str):
+            if req in resolved_requests:
+                internal_id = resolved_requests[req]
+            else:
+                match_key_lower = fuzzy_best_match(req, candidate_names, cutoff)
+                internal_id = candidate_map[match_key_lower] if match_key_lower else None
+                resolved_requests[req] = internal_id
+            if internal_id is not None:
                 processing_queue.append({"type": "internal", "id": internal_id, "info": module_definitions[internal_id]})
-                temp_requests.remove(req)
             else:
                 print(f"️ 未找到与 '{req}' 相近的模块，跳过。")
         elif isinstance(req, dict):
             processing_queue.append(req)
 
     # 定位 I/O / 变量 元数据
-    meta_datas = None
-    chip_inputs_meta = None
-    chip_outputs_meta = None
-    chip_variables_meta = None
-
-    if any(p.get("type") in ["input", "output", "variable"] for p in processing_queue):
-        try:
-            save_objects = game_data["saveObjectContainers"][0]["saveObjects"]
-            meta_datas = save_objects["saveMetaDatas"]
-        except (KeyError, IndexError):
-            raise ValueError("存档文件结构异常，无法定位 meta 数据区。")
-
     chip_inputs_data: List[Dict[str, Any]] = []
     chip_outputs_data: List[Dict[str, Any]] = []
     chip_variables_data: List[Dict[str, Any]] = []
 
-    if meta_datas is not None:
-        if any(p.get("type") == "input" for p in processing_queue):
-            chip_inputs_meta = find_meta_data(meta_datas, "chip_inputs")
-            raw = chip_inputs_meta.get("stringValue") if chip_inputs_meta else None
-            chip_inputs_data = json.loads(raw) if raw else []
-
-        if any(p.get("type") == "output" for p in processing_queue):
-            chip_outputs_meta = find_meta_data(meta_datas, "chip_outputs")
-            raw = chip_outputs_meta.get("stringValue") if chip_outputs_meta else None
-            chip_outputs_data = json.loads(raw) if raw else []
-
-        if any(p.get("type") == "variable" for p in processing_queue):
-            var_meta_list, var_index = find_variable_meta_data(game_data, "chip_variables")
-            if var_meta_list is None or var_index is None:
-                raise ValueError("在 data.json 中找不到 'chip_variables'，请确认存档文件正确。")
-            chip_variables_meta = var_meta_list[var_index]
-            raw = chip_variables_meta.get("stringValue")
-            chip_variables_data = json.loads(raw) if raw else []
+    queued_types = {p.get("type") for p in processing_queue}
+    try:
+        if "input" in queued_types:
+            chip_inputs_data = doc.section("chip_inputs", create=True)
+            doc.mark_dirty("chip_inputs")
+        if "output" in queued_types:
+            chip_outputs_data = doc.section("chip_outputs", create=True)
+            doc.mark_dirty("chip_outputs")
+    except KeyError:
+        raise ValueError("存档文件结构异常，无法定位 meta 数据区。")
+
+    # 变量定义 Key -> chip_variables_data 下标（重复 Key 取第一个，与逐个查找一致）
+    variable_def_index: Dict[str, int] = {}
+    if "variable" in queued_types:
+        chip_variables_data = doc.section("chip_variables")
+        if chip_variables_data is None:
+            raise ValueError("在 data.json 中找不到 'chip_variables'，请确认存档文件正确。")
+        doc.mark_dirty("chip_variables")
+        for i, vd in enumerate(chip_variables_data):
+            key = vd.get("Key")
+            if isinstance(key, str):
+                variable_def_index.setdefault(key, i)
     
+    # 只扫描一次已有节点；之后新增的每个节点都通过 factory.observe() 增量登记
+    factory = add_module.NodeFactory(existing_nodes, verbosity=verbosity)
+
     max_y = max((n.get("VisualPosition", {}).get("y", 0) for n in existing_nodes), default=180.0)
     y_pos_counter = max_y + 200
 
@@ -263,13 +249,13 @@ def add_modules(
             module_info = req_item["info"]
             view_model_name = module_info.get("source_info", {}).get("allmod_viewmodel", f"Module_{req_item['id']}")
 
-            # 调用更新后的 create_new_node，它不再需要 datatype_map
-            new_node = create_new_node(view_model_name, module_info, existing_nodes)
+            new_node = factory.create(view_model_name, module_info)
             if new_node is None:
                 continue
 
-            existing_nodes.append(new_node)
-            print(f" 已添加: {view_model_name}")
+            doc.add_node(new_node)
+            if verbosity >= 1:
+                print(f" 已添加: {view_model_name}")
             created_nodes_info.append({"class_name": view_model_name, "full_id": new_node["Id"]})
         
         # 处理 input/output/constant 的逻辑不变
@@ -279,9 +265,12 @@ def add_modules(
             input_entry, graph_node = create_input_node(name, data_type, use_string_schema=use_string_schema)
             chip_inputs_data.append(input_entry)
             node_id = graph_node["Id"]
-            print(f"为新节点生成ID: RootNodeViewModel : {node_id.split(' : ')[-1]}")
+            if verbosity >= 1:
+                print(f"为新节点生成ID: RootNodeViewModel : {node_id.split(' : ')[-1]}")
             y_pos_counter = add_node_to_graph(chip_graph_data, graph_node, y_pos_counter)
-            print(f" 已添加: RootNodeViewModel")
+            factory.observe(graph_node)
+            if verbosity >= 1:
+                print(f" 已添加: RootNodeViewModel")
             created_nodes_info.append({"class_name": "RootNodeViewModel", "full_id": node_id})
         
         elif node_type == "output":
@@ -290,9 +279,12 @@ def add_modules(
             output_entry, graph_node = create_output_node(name, data_type, use_string_schema=use_string_schema)
             chip_outputs_data.append(output_entry)
             node_id = graph_node["Id"]
-            print(f"为新节点生成ID: ExitNodeViewModel : {node_id.split(' : ')[-1]}")
+            if verbosity >= 1:
+                print(f"为新节点生成ID: ExitNodeViewModel : {node_id.split(' : ')[-1]}")
             y_pos_counter = add_node_to_graph(chip_graph_data, graph_node, y_pos_counter)
-            print(f" 已添加: ExitNodeViewModel")
+            factory.observe(graph_node)
+            if verbosity >= 1:
+                print(f" 已添加: ExitNodeViewModel")
             created_nodes_info.append({"class_name": "ExitNodeViewModel", "full_id": node_id})
 
         elif node_type == "constant":
@@ -301,9 +293,12 @@ def add_modules(
             graph_node = create_constant_node(value, data_type, use_string_schema=use_string_schema)
             node_id = graph_node["Id"]
             class_name = node_id.split(" : ")[0]
-            print(f"为新节点生成ID: {node_id}")
+            if verbosity >= 1:
+                print(f"为新节点生成ID: {node_id}")
             y_pos_counter = add_node_to_graph(chip_graph_data, graph_node, y_pos_counter)
-            print(f" 已添加: {class_name}")
+            factory.observe(graph_node)
+            if verbosity >= 1:
+                print(f" 已添加: {class_name}")
             created_nodes_info.append({"class_name": class_name, "full_id": node_id})
 
         elif node_type == "variable":
@@ -318,11 +313,7 @@ def add_modules(
             # 使用 VariableManager (如果可用)
             if 'VariableManager' in globals():
                 # 1) chip_variables 中追加 / 更新变量定义
-                existing_def_idx = -1
-                for i, vd in enumerate(chip_variables_data):
-                    if vd.get("Key") == var_key:
-                        existing_def_idx = i
-                        break
+                existing_def_idx = variable_def_index.get(var_key, -1)
 
                 # 无论是否存在，都尝试生成一个新的定义（包含可能更新的 Value）
                 # 注意：VariableManager.create_definition 会自动处理类型转换(str->int)
@@ -346,6 +337,7 @@ def add_modules(
                         # 确保 GateDataType 也更新 (特别是修复 bug 时)
                         chip_variables_data[existing_def_idx]["GateDataType"] = new_var_def["GateDataType"]
                 else:
+                    variable_def_index[var_key] = len(chip_variables_data)
                     chip_variables_data.append(new_var_def)
 
                 # 2) chip_graph 中生成 Variable 节点
@@ -357,23 +349,22 @@ def add_modules(
                     use_string_schema=var_string_schema,
                 )
                 node_id = graph_node["Id"]
-                print(f"为新节点生成ID: {node_id}")
+                if verbosity >= 1:
+                    print(f"为新节点生成ID: {node_id}")
                 y_pos_counter = add_node_to_graph(chip_graph_data, graph_node, y_pos_counter)
-                print(" 已添加: VariableNodeViewModel (via Manager)")
+                factory.observe(graph_node)
+                if verbosity >= 1:
+                    print(" 已添加: VariableNodeViewModel (via Manager)")
                 created_nodes_info.append({"class_name": "VariableNodeViewModel", "full_id": node_id})
             else:
                 # 严重错误：VariableManager 不可用
                 print("错误：VariableManager 未加载，无法创建变量模块。")
 
-    # ---------- 5. 写回修改 (无变化) ----------
-    if chip_inputs_meta:
-        chip_inputs_meta["stringValue"] = json.dumps(chip_inputs_data, separators=(',', ':'))
-    if chip_outputs_meta:
-        chip_outputs_meta["stringValue"] = json.dumps(chip_outputs_data, separators=(',', ':'))
-    if chip_variables_meta:
-        chip_variables_meta["stringValue"] = json.dumps(chip_variables_data, separators=(',', ':'))
-    
-    chip_graph_meta["stringValue"] = json.dumps(chip_graph_data, ensure_ascii=False, indent=2)
+    # ---------- 5. 写回修改 ----------
+    doc.mark_dirty("chip_graph")
+    doc.invalidate_node_index()
+    if doc is not game_data:
+        doc.flush()
 
     return game_data, created_nodes_info
 
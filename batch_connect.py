@@ -11,7 +11,9 @@ import json
 import os
 import re  # <-- 导入正则表达式模块
 import sys
-from typing import Dict, Any
+from typing import Dict, Any, List
+
+from src.save_document import SaveDocument
 
 # ------------ 配置区（仅在独立运行时生效）------------
 GRAPH_IN      = "Data_modified.json"
@@ -76,16 +78,18 @@ def read_json(path: str, desc: str) -> Dict[str, Any]:
 
 
 # ======================= 核心逻辑函数 (已修改) =======================
-def apply_connections(input_graph_path: str, connections_path: str, output_graph_path: str) -> bool:
+def apply_connections_to_data(data: "Dict[str, Any] | SaveDocument", connections: List[Dict[str, Any]]) -> bool:
     """
-    读取存档文件和连接指令，应用连接，并写回存档。
+    在内存中的存档字典（或 SaveDocument）上应用连接指令（不读写任何文件）。
+    返回 False 表示存档中找不到 chip_graph。
     """
-    data = read_json(input_graph_path, "图数据")
-    connections = read_json(connections_path, "连接指令")
-
-    graph_data, graph_meta = find_chip_graph(data)
+    doc = SaveDocument.wrap(data)
+    try:
+        graph_data = doc.chip_graph
+    except json.JSONDecodeError:
+        graph_data = None
     if graph_data is None:
-        print(f"错误：未在 '{input_graph_path}' 中找到 chip_graph 字段")
+        print("错误：未在存档数据中找到 chip_graph 字段")
         return False
 
     node_lookup, _ = build_node_lookup(graph_data)
@@ -126,11 +130,28 @@ def apply_connections(input_graph_path: str, connections_path: str, output_graph
             # 错误信息现在会显示原始ID，更易于理解
             print(f"  第 {idx} 条连接失败: 指令 {conn} -> 错误: {e}")
 
-    graph_meta["stringValue"] = json.dumps(graph_data, ensure_ascii=False)
+    doc.mark_dirty("chip_graph")
+    if doc is not data:
+        doc.flush()
+    print(f"\n批量连接完成, {success_count}/{len(connections)} 条成功。")
+    return True
+
+
+def apply_connections(input_graph_path: str, connections_path: str, output_graph_path: str) -> bool:
+    """
+    读取存档文件和连接指令，应用连接，并写回存档。
+    """
+    data = read_json(input_graph_path, "图数据")
+    connections = read_json(connections_path, "连接指令")
+
+    if not apply_connections_to_data(data, connections):
+        print(f"错误：未在 '{input_graph_path}' 中找到 chip_graph 字段")
+        return False
+
     with open(output_graph_path, "w", encoding="utf-8") as f:
         json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
 
-    print(f"\n批量连接完成, {success_count}/{len(connections)} 条成功。结果已写入 “{output_graph_path}”")
+    print(f"结果已写入 “{output_graph_path}”")
     return True
 
 
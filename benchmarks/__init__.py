@@ -0,0 +1,6 @@
+"""
+合成 DSL 基准测试（`python -m benchmarks.run`）。
+
+- benchmarks.generators：按形状与规模生成 input.py 源码
+- benchmarks.run：逐阶段计时并与 benchmarks/baseline.json 比较
+"""
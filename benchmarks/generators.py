@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+benchmarks.generators
+=====================
+
+生成指定规模与形状的合成 DSL（input.py 的内容），供基准测试使用。
+
+每个生成器接受目标节点数 n，返回 DSL 源码字符串；生成的节点数（经过常量折叠 / CSE / DCE 之后）
+与 n 同一量级，但不保证精确相等，实际节点数以基准结果里的 "nodes" 为准。
+生成结果只由参数决定（不使用随机数），同一参数总是得到同一份源码，便于与基线比较。
+
+形状：
+- fan_in：大量 INPUT 经两两相加的加法树汇聚到一个 OUTPUT（宽扇入，布局层宽度大）
+- deep_chain：一条很长的依赖链（关键路径长度约等于节点数）
+- constants：大量互不相同的字面量常量（常量修改阶段的压力）
+- variables：大量全局变量的读取与 SET（变量节点与变量定义分区）
+- if_else：大量 if/else 分支（IfElseConverter 生成 Select 结构）
+- big_arrays：带大数组初值的全局变量（大数组初值序列化的压力）
+"""
+
+from __future__ import annotations
+
+from typing import Callable, Dict, List
+
+
+def _main_block(lines: List[str]) -> List[str]:
+    return ['if __name__ == "__main__":'] + [f"    {line}" for line in lines]
+
+
+def _sum_tree(names: List[str], prefix: str) -> tuple:
+    """把 names 两两相加成一棵平衡加法树，返回 (语句列表, 树根变量名)。"""
+    lines: List[str] = []
+    level = list(names)
+    depth = 0
+    while len(level) > 1:
+        nxt = []
+        for i in range(0, len(level) - 1, 2):
+            name = f"{prefix}{depth}_{i // 2}"
+            lines.append(f"{name} = ADD({level[i]}, {level[i + 1]})")
+            nxt.append(name)
+        if len(level) % 2:
+            nxt.append(level[-1])
+        level = nxt
+        depth += 1
+    return lines, level[0]
+
+
+def fan_in(n: int) -> str:
+    """n/2 个 INPUT 汇聚到一个 OUTPUT：约 n/2 个 Input + n/2 个 Add。"""
+    width = max(2, n // 2)
+    header = [f'in_{i} = INPUT("In{i}", "Number")' for i in range(width)]
+    body, root = _sum_tree([f"in_{i}" for i in range(width)], "s")
+    body.append(f'OUTPUT({root}, "Sum")')
+    return "\n".join(header + [""] + _main_block(body)) + "\n"
+
+
+def deep_chain(n: int) -> str:
+    """交替的加法 / 乘法组成的长链：约 n 个运算节点串成一条关键路径。"""
+    header = ['a = INPUT("A", "Number")', 'b = INPUT("B", "Number")']
+    body = ["x0 = ADD(a, b)"]
+    for i in range(1, max(1, n - 4)):
+        op = "MULTIPLY" if i % 2 else "ADD"
+        body.append(f"x{i} = {op}(x{i - 1}, {'b' if i % 2 else 'a'})")
+    body.append(f'OUTPUT(x{len(body) - 1}, "Chain")')
+    return "\n".join(header + [""] + _main_block(body)) + "\n"
+
+
+def constants(n: int) -> str:
+    """每项是一个不同的字面量加到输入上再输出：约 n/3 组 (Constant, Add, Output)。"""
+    count = max(1, n // 3)
+    header = ['a = INPUT("A", "Number")']
+    body = []
+    for i in range(count):
+        body.append(f"c{i} = ADD(a, {i + 0.25})")
+        body.append(f'OUTPUT(c{i}, "C{i}")')
+    return "\n".join(header + [""] + _main_block(body)) + "\n"
+
+
+def variables(n: int) -> str:
+    """每个全局变量累加一次输入：约 n/3 组 (读 Variable, Add, 写 Variable)。"""
+    count = max(1, n // 3)
+    header = ['a = INPUT("A", "Number")']
+    header += [f"v{i}: Number = {i}" for i in range(count)]
+    body = [f"SET(v{i}, ADD(v{i}, a))" for i in range(count)]
+    return "\n".join(header + [""] + _main_block(body)) + "\n"
+
+
+def if_else(n: int) -> str:
+    """每个分支比较一次输入并在两个分支里各算一个值，结果再汇总到一个 OUTPUT。"""
+    count = max(1, n // 6)
+    header = ['a = INPUT("A", "Number")', 'b = INPUT("B", "Number")']
+    body: List[str] = []
+    for i in range(count):
+        body += [
+            f"if a > {i}:",
+            f"    r{i} = ADD(b, {i})",
+            "else:",
+            f"    r{i} = SUBTRACT(b, {i})",
+        ]
+    tree, root = _sum_tree([f"r{i}" for i in range(count)], "t")
+    body += tree
+    body.append(f'OUTPUT({root}, "Branches")')
+    return "\n".join(header + [""] + _main_block(body)) + "\n"
+
+
+ARRAY_LENGTH = 256
+
+
+def big_arrays(n: int) -> str:
+    """
+    每组一个带 ARRAY_LENGTH 个初值的全局数组，按输入下标取一个元素与输入相加后输出，
+    约 n/4 组 (Variable, ArraysGet, Add, Output)。
+    """
+    count = max(1, n // 4)
+    header = ['i = INPUT("I", "Number")']
+    for k in range(count):
+        values = ", ".join(str(float(k + j)) for j in range(ARRAY_LENGTH))
+        header.append(f"arr{k}: List[Number] = [{values}]")
+    body = []
+    for k in range(count):
+        body.append(f'e{k} = ArraysGet(arr{k}, i)["Value"]')
+        body.append(f'OUTPUT(ADD(e{k}, i), "E{k}")')
+    return "\n".join(header + [""] + _main_block(body)) + "\n"
+
+
+SHAPES: Dict[str, Callable[[int], str]] = {
+    "fan_in": fan_in,
+    "deep_chain": deep_chain,
+    "constants": constants,
+    "variables": variables,
+    "if_else": if_else,
+    "big_arrays": big_arrays,
+}
+
+
+def generate(shape: str, n: int) -> str:
+    """按形状名生成 DSL 源码。"""
+    try:
+        return SHAPES[shape](n)
+    except KeyError:
+        raise ValueError(f"未知的基准形状 '{shape}'，可选：{', '.join(SHAPES)}") from None
+
+
+__all__ = ["SHAPES", "ARRAY_LENGTH", "generate"] + list(SHAPES)
@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+benchmarks.run
+==============
+
+按形状与规模生成合成 DSL，逐阶段计时整条流水线，并与保存的基线比较。
+
+用法（在项目根目录）：
+
+    python -m benchmarks.run                          # 全部形状，10/100/1000/10000 节点
+    python -m benchmarks.run --sizes 10 100 --shapes fan_in deep_chain
+    python -m benchmarks.run --update-baseline        # 把本次结果写为新基线
+    python -m benchmarks.run --json result.json       # 额外写出本次结果
+
+计时的阶段与 `main.py --profile` 相同（见 src.profiling），只是不开 tracemalloc，
+每个用例重复 --repeat 次取各阶段的最小值以压低噪声；模块目录与规则只加载一次，不计入。
+布局阶段不读写布局缓存，归档写到临时目录。
+布局是超线性的：按上一规模的耗时二次外推，预计超过 --budget 秒（默认 60）的规模会被跳过并在输出中列出。
+
+某个阶段同时满足下面两个条件时判为退化，进程以 1 退出：
+- 比基线慢了 --threshold 以上（默认 1.0，即耗时超过基线的 2 倍）；
+- 绝对差值超过 --min-delta 秒（默认 0.02，避免几十毫秒以内的阶段因调度噪声误报）。
+阈值故意放得较宽：同一台机器上重复运行，短阶段的耗时本身就会有 1.5 倍左右的抖动，
+而需要拦住的是复杂度级别的退化（例如某阶段从线性变成平方），在 1k / 10k 规模上远超这个阈值。
+基线与机器相关，换机器后请先用 --update-baseline 重新生成。
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import json
+import sys
+import tempfile
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from archive_creator import run_archive_creation_stage
+from src.build_context import BuildContext
+from src.config import DATA_PATH, MODULE_DEF_PATH, ROOT_DIR, RULES_PATH
+from src.module_catalog import ModuleCatalog, load_module_catalog
+from src.pipeline import build_save_document
+from src.profiling import PipelineProfiler
+from src.utils import load_json
+
+from benchmarks.generators import SHAPES, generate
+
+BASELINE_PATH = Path(__file__).resolve().parent / "baseline.json"
+DEFAULT_SIZES = (10, 100, 1000, 10000)
+
+
+@dataclass
+class CaseResult:
+    """一个 (形状, 规模) 用例的结果：各阶段耗时取多次重复中的最小值。"""
+    shape: str
+    size: int
+    nodes: int
+    stages: Dict[str, float] = field(default_factory=dict)
+
+    @property
+    def key(self) -> str:
+        return f"{self.shape}/{self.size}"
+
+    @property
+    def total(self) -> float:
+        return sum(self.stages.values())
+
+
+@dataclass
+class Regression:
+    key: str
+    stage: str
+    baseline: float
+    current: float
+
+    @property
+    def ratio(self) -> float:
+        return self.current / self.baseline if self.baseline > 0 else float("inf")
+
+
+def _base_save_path() -> Path:
+    """DATA_PATH 不存在时（例如大小写敏感的文件系统上只有 Data.json），按文件名忽略大小写查找。"""
+    if DATA_PATH.exists():
+        return DATA_PATH
+    for candidate in ROOT_DIR.iterdir():
+        if candidate.name.lower() == DATA_PATH.name.lower():
+            return candidate
+    return DATA_PATH
+
+
+def compile_once(
+    dsl_path: Path,
+    catalog: ModuleCatalog,
+    rules: dict,
+    profiler: PipelineProfiler,
+    work_dir: Path,
+) -> int:
+    """按 run_full_pipeline 的阶段编译一次（不用布局缓存，归档写到 work_dir），返回存档节点数。"""
+    ctx = BuildContext.for_output_dir(
+        work_dir,
+        dsl_path=dsl_path,
+        data_path=_base_save_path(),
+        layout_cache=False,
+        melsave_name="bench",
+    )
+    save = build_save_document(ctx, catalog, rules, profiler=profiler)
+    with profiler.stage("archive"):
+        run_archive_creation_stage(save.flush(), ctx)
+    return len(save.nodes)
+
+
+def run_case(shape: str, size: int, catalog: ModuleCatalog, rules: dict, repeat: int = 3) -> CaseResult:
+    """生成一个用例的 DSL 并重复编译 repeat 次，各阶段取最小耗时。"""
+    result = CaseResult(shape=shape, size=size, nodes=0)
+    with tempfile.TemporaryDirectory(prefix="melsave-bench-") as tmp:
+        work_dir = Path(tmp)
+        dsl_path = work_dir / "input.py"
+        dsl_path.write_text(generate(shape, size), encoding="utf-8")
+        for _ in range(max(1, repeat)):
+            profiler = PipelineProfiler(True)
+            # 流水线各阶段的进度输出对基准没有意义，统一丢弃
+            with contextlib.redirect_stdout(io.StringIO()):
+                result.nodes = compile_once(dsl_path, catalog, rules, profiler, work_dir)
+            for stage in profiler.stages:
+                best = result.stages.get(stage.name)
+                result.stages[stage.name] = stage.wall_s if best is None else min(best, stage.wall_s)
+    return result
+
+
+def run_benchmarks(
+    shapes: Sequence[str],
+    sizes: Sequence[int],
+    *,
+    repeat: int = 3,
+    budget: Optional[float] = None,
+    catalog: Optional[ModuleCatalog] = None,
+    progress: bool = False,
+) -> Tuple[List[CaseResult], List[str]]:
+    """
+    依次运行各 (形状, 规模) 用例，返回 (结果列表, 被跳过的用例名列表)。
+    给出 budget（秒）时，按上一个规模的总耗时做二次外推，预计超过 budget 的规模（以及该形状更大的规模）
+    直接跳过——布局等阶段是超线性的，按固定规模硬跑会让一次基准耗上几个小时。
+    """
+    catalog = catalog or load_module_catalog(MODULE_DEF_PATH)
+    rules = load_json(RULES_PATH, "数据类型规则文件")
+    results: List[CaseResult] = []
+    skipped: List[str] = []
+    for shape in shapes:
+        previous: Optional[CaseResult] = None
+        for size in sorted(sizes):
+            if budget is not None and previous is not None:
+                estimate = previous.total * (size / previous.size) ** 2
+                if estimate > budget:
+                    skipped.extend(f"{shape}/{s}" for s in sorted(sizes) if s >= size)
+                    break
+            result = run_case(shape, size, catalog, rules, repeat=repeat)
+            if progress:
+                print(f"  {result.key:<20} {result.nodes:>6} 节点  {result.total:>8.3f}s", flush=True)
+            results.append(result)
+            previous = result
+    return results, skipped
+
+
+# ----------------------------------------------------------------------
+# 基线
+# ----------------------------------------------------------------------
+
+def results_to_dict(results: Sequence[CaseResult]) -> dict:
+    return {
+        "cases": {
+            r.key: {"nodes": r.nodes, "stages": {k: round(v, 6) for k, v in r.stages.items()}}
+            for r in results
+        }
+    }
+
+
+def load_baseline(path: Path) -> Dict[str, dict]:
+    if not path.exists():
+        return {}
+    return load_json(path, "基准基线").get("cases", {})
+
+
+def save_baseline(path: Path, results: Sequence[CaseResult]) -> None:
+    """合并写入：只覆盖本次跑过的用例，保留基线里其它用例。"""
+    cases = load_baseline(path)
+    cases.update(results_to_dict(results)["cases"])
+    path.write_text(
+        json.dumps({"cases": dict(sorted(cases.items()))}, ensure_ascii=False, indent=2) + "\n",
+        encoding="utf-8",
+    )
+
+
+def compare_to_baseline(
+    results: Sequence[CaseResult],
+    baseline: Dict[str, dict],
+    *,
+    threshold: float = 1.0,
+    min_delta: float = 0.02,
+) -> List[Regression]:
+    regressions = []
+    for r in results:
+        base_stages = baseline.get(r.key, {}).get("stages", {})
+        for stage, current in r.stages.items():
+            base = base_stages.get(stage)
+            if base is None:
+                continue
+            if current > base * (1.0 + threshold) and current - base > min_delta:
+                regressions.append(Regression(r.key, stage, base, current))
+    return regressions
+
+
+def format_results(results: Sequence[CaseResult], baseline: Dict[str, dict]) -> str:
+    lines = [f"{'用例':<18}{'节点':>8}{'总耗时(s)':>12}{'基线(s)':>12}  最慢阶段"]
+    for r in results:
+        base = baseline.get(r.key)
+        base_total = f"{sum(base['stages'].values()):.3f}" if base else "-"
+        slowest = max(r.stages, key=r.stages.get) if r.stages else "-"
+        lines.append(f"{r.key:<20}{r.nodes:>8}{r.total:>12.3f}{base_total:>12}  {slowest}")
+    return "\n".join(lines)
+
+
+# ----------------------------------------------------------------------
+# 命令行
+# ----------------------------------------------------------------------
+
+def build_arg_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.run",
+        description="合成 DSL 的逐阶段基准测试，与基线比较并在退化时失败",
+    )
+    parser.add_argument("--shapes", nargs="+", choices=sorted(SHAPES), default=list(SHAPES))
+    parser.add_argument("--sizes", nargs="+", type=int, default=list(DEFAULT_SIZES))
+    parser.add_argument("--repeat", type=int, default=3, help="每个用例重复次数，取各阶段最小值")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH, help="基线文件路径")
+    parser.add_argument("--update-baseline", action="store_true", help="把本次结果写入基线，不做比较")
+    parser.add_argument("--threshold", type=float, default=1.0, help="相对基线允许的变慢比例")
+    parser.add_argument("--min-delta", type=float, default=0.02, help="判为退化的最小绝对差值（秒）")
+    parser.add_argument(
+        "--budget",
+        type=float,
+        default=60.0,
+        help="按上一规模二次外推，预计超过该秒数的规模直接跳过；0 表示不限制",
+    )
+    parser.add_argument("--json", type=Path, default=None, help="把本次结果写到指定 JSON 文件")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_arg_parser().parse_args(argv)
+    print(f"运行基准：形状 {', '.join(args.shapes)}；规模 {', '.join(map(str, args.sizes))}")
+    results, skipped = run_benchmarks(
+        args.shapes,
+        args.sizes,
+        repeat=args.repeat,
+        budget=args.budget or None,
+        progress=True,
+    )
+    if skipped:
+        print(f"ℹ️ 超出 --budget {args.budget:g}s，跳过：{', '.join(skipped)}")
+
+    if args.json is not None:
+        args.json.write_text(
+            json.dumps(results_to_dict(results), ensure_ascii=False, indent=2), encoding="utf-8"
+        )
+
+    if args.update_baseline:
+        save_baseline(args.baseline, results)
+        print(f"✔ 已更新基线 {args.baseline}")
+        return 0
+
+    baseline = load_baseline(args.baseline)
+    print()
+    print(format_results(results, baseline))
+    regressions = compare_to_baseline(
+        results, baseline, threshold=args.threshold, min_delta=args.min_delta
+    )
+    if not regressions:
+        print("\n✔ 没有阶段超过退化阈值")
+        return 0
+    print(f"\n❌ {len(regressions)} 个阶段比基线慢了 {args.threshold:.0%} 以上：")
+    for reg in regressions:
+        print(f"  {reg.key:<20} {reg.stage:<22} {reg.baseline:.4f}s -> {reg.current:.4f}s (x{reg.ratio:.2f})")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,6 +4,8 @@ import json
 import math
 from typing import Dict, List, Any, Union, Tuple
 
+from src.save_document import SaveDocument
+
 # --- 辅助函数 (无变化) ---
 
 
@@ -42,171 +44,216 @@ def create_vector_json_string(x: float, y: float, z: float) -> str:
     return json.dumps(vector_data, separators=(',', ':'))
 
 
-# --- 核心修改函数 (重构为内存操作) ---
+# --- 核心修改函数 (批量、单次解码) ---
+
+# value_type -> 常量节点 GateDataType 的字符串名称
+_VALUE_TYPE_TO_GATE_TYPE = {
+    "string": "String",
+    "decimal": "Number",
+    "vector": "Vector",
+    "array_string": "ArrayString",
+    "array_number": "ArrayNumber",
+    "array_vector": "ArrayVector",
+}
+
+_TYPE_STR_TO_INT = {
+    "Entity": 1,
+    "Number": 2,
+    "String": 4,
+    "Vector": 8,
+    "ArrayNumber": 128,
+    "ArrayString": 256,
+    "ArrayVector": 512,
+    "ArrayEntity": 1024,
+}
+
+# 日志级别：0 = 只输出汇总；1 = 每条指令一行（值做截断）；2 = 每条指令输出完整值
+DEFAULT_VERBOSITY = 0
+_LOG_VALUE_MAX_CHARS = 80
+
+
+def _node_uses_string_schema(node: Dict[str, Any]) -> bool:
+    if isinstance(node.get("GateDataType"), str):
+        return True
+    for p in (node.get("Inputs") or []) + (node.get("Outputs") or []):
+        if isinstance(p.get("DataType"), str):
+            return True
+    return False
+
+
+def _encode_data_value(new_value: Any, value_type: str) -> Tuple[str, bool]:
+    """
+    将常量值编码为 SaveData.DataValue 字符串。
+    返回 (DataValue, is_array)；数组类型需要额外写入 IsMultiline=None。
+    """
+    if value_type == "string":
+        return str(new_value), False
+
+    if value_type == "decimal":
+        return str(float(new_value)), False
+
+    if value_type == "vector":
+        return _compact_json({
+            "x": new_value[0],
+            "y": new_value[1],
+            "z": new_value[2],
+            "w": 0.0,
+            "magnitude": 0.0,
+            "sqrMagnitude": 0.0
+        }), False
+
+    if value_type == "array_string":
+        return _compact_json(new_value), True
+
+    if value_type == "array_number":
+        return _compact_json([float(v) for v in new_value]), True
+
+    if value_type == "array_vector":
+        vecs = []
+        for v in new_value:
+            if isinstance(v, dict):
+                x, y, z = v["x"], v["y"], v["z"]
+                w = v.get("w", 0.0)
+            else:
+                # 支持3维或4维向量
+                if len(v) == 4:
+                    x, y, z, w = v[0], v[1], v[2], v[3]
+                else:
+                    x, y, z = v[0], v[1], v[2]
+                    w = 0.0
+            vecs.append({
+                "x": x, "y": y, "z": z, "w": w,
+                "magnitude": 0.0,
+                "sqrMagnitude": 0.0
+            })
+        return _compact_json(vecs), True
+
+    raise KeyError(value_type)
+
+
+def _apply_constant_to_node(
+    target_node: Dict[str, Any],
+    new_value: Union[str, float, int, List[Any]],
+    value_type: str,
+) -> None:
+    """将常量值与对应的 DataType 写入单个 Constant 节点（含 ArrayXxx）。"""
+    gate_type = _VALUE_TYPE_TO_GATE_TYPE[value_type]
+    use_string_schema = _node_uses_string_schema(target_node)
+    gate_type_value = gate_type if use_string_schema else _TYPE_STR_TO_INT.get(gate_type, 0)
+
+    # 先完成所有可能失败的解析 / 编码，再改动节点，避免出错时留下半修改的节点
+    save_data_obj = json.loads(target_node["SaveData"]) if target_node.get("SaveData") else {}
+    data_value, is_array = _encode_data_value(new_value, value_type)
+
+    # ---- 更新 GateDataType 与输出端口类型 ----
+    target_node["GateDataType"] = gate_type_value
+    for port in target_node.get("Outputs", []):
+        port["DataType"] = gate_type_value
+
+    # ---- 更新 SaveData ----
+    save_data_obj["DataValue"] = data_value
+    if is_array:
+        save_data_obj["IsMultiline"] = None
+    target_node["SaveData"] = _compact_json(save_data_obj)
+
+
+def _find_target_node(doc: SaveDocument, node_id: str) -> Dict[str, Any] | None:
+    """
+    先按完整 Id 走索引查找；找不到时退回旧版的 “Id 包含 node_id” 子串匹配，
+    兼容只给出 UUID 片段的调用方。
+    """
+    node = doc.node_by_id(node_id)
+    if node is not None:
+        return node
+    return next((n for n in doc.nodes if node_id in n.get('Id', '')), None)
+
+
+def _describe_value(value: Any, verbosity: int) -> str:
+    if verbosity >= 2:
+        return repr(value)
+    if isinstance(value, (list, tuple)):
+        return f"<{len(value)} 个元素>"
+    text = repr(value)
+    if len(text) > _LOG_VALUE_MAX_CHARS:
+        text = text[:_LOG_VALUE_MAX_CHARS] + "…"
+    return text
+
 
 def _modify_single_node(
-    game_data: Dict[str, Any],
+    game_data: Union[Dict[str, Any], SaveDocument],
     node_id: str,
     new_value: Union[str, float, int, List[Any]],
     value_type: str
 ) -> bool:
     """
-    修改 Constant 节点（含 ArrayXxx 和 DataType 更新）
+    修改单个 Constant 节点（含 ArrayXxx 和 DataType 更新）。
+    批量修改请使用 apply_constant_modifications，它只解码 / 编码一次 chip_graph。
     """
+    return _apply_constant_instructions(
+        game_data,
+        [{"node_id": node_id, "new_value": new_value, "value_type": value_type}],
+        verbosity=0,
+    ) == 1
+
+
+def _apply_constant_instructions(
+    game_data: Union[Dict[str, Any], SaveDocument],
+    instructions: List[Dict],
+    *,
+    verbosity: int,
+) -> int:
+    """批量修改的核心：解码一次、按 Id 索引逐条应用、最多编码一次。返回成功条数。"""
+    doc = SaveDocument.wrap(game_data)
     try:
-        save_object = game_data['saveObjectContainers'][0]['saveObjects']
-        meta_datas = save_object['saveMetaDatas']
-
-        chip_graph_meta = next((meta for meta in meta_datas if meta.get('key') == 'chip_graph'), None)
-        if not chip_graph_meta:
+        if doc.chip_graph is None:
             print("未找到 chip_graph")
-            return False
-
-        graph_data = json.loads(chip_graph_meta['stringValue'])
-        nodes = graph_data.get('Nodes', [])
+            return 0
+    except (KeyError, json.JSONDecodeError) as e:
+        print(f"解析 chip_graph 时出错，存档可能已损坏。错误详情: {e}")
+        return 0
 
-        target_node = next((n for n in nodes if node_id in n.get('Id','')), None)
+    num_success = 0
+    for inst in instructions:
+        node_id = inst['node_id']
+        if verbosity >= 1:
+            print(
+                f"  > 正在修改常量节点 {node_id[:8]}... 类型: {inst['value_type']}, "
+                f"值: {_describe_value(inst['new_value'], verbosity)}"
+            )
+
+        target_node = _find_target_node(doc, node_id)
         if not target_node:
             print(f"找不到节点 {node_id}")
-            return False
-
-        # ---- 先准备 DataType 的字符串名称 ----
-        type_map = {
-            "string": "String",
-            "decimal": "Number",
-            "vector": "Vector",
-            "array_string": "ArrayString",
-            "array_number": "ArrayNumber",
-            "array_vector": "ArrayVector",
-        }
-        gate_type = type_map[value_type]
-
-        def _uses_string_schema(node: Dict[str, Any]) -> bool:
-            if isinstance(node.get("GateDataType"), str):
-                return True
-            for p in (node.get("Inputs") or []) + (node.get("Outputs") or []):
-                if isinstance(p.get("DataType"), str):
-                    return True
-            return False
-
-        type_str_to_int = {
-            "Entity": 1,
-            "Number": 2,
-            "String": 4,
-            "Vector": 8,
-            "ArrayNumber": 128,
-            "ArrayString": 256,
-            "ArrayVector": 512,
-            "ArrayEntity": 1024,
-        }
-        use_string_schema = _uses_string_schema(target_node)
-        gate_type_value = gate_type if use_string_schema else type_str_to_int.get(gate_type, 0)
-
-        # ---- 更新 GateDataType ----
-        target_node["GateDataType"] = gate_type_value
-
-        # ---- 更新输出端口类型 ----
-        for port in target_node.get("Outputs", []):
-            port["DataType"] = gate_type_value
-
-        # ---- 解析原 SaveData ----
-        save_data_obj = json.loads(target_node["SaveData"]) if target_node.get("SaveData") else {}
-
-        # ==========================
-        #   标量处理
-        # ==========================
-        if value_type == "string":
-            save_data_obj["DataValue"] = str(new_value)
-
-        elif value_type == "decimal":
-            save_data_obj["DataValue"] = str(float(new_value))
-
-        elif value_type == "vector":
-            save_data_obj["DataValue"] = _compact_json({
-                "x": new_value[0],
-                "y": new_value[1],
-                "z": new_value[2],
-                "w": 0.0,
-                "magnitude": 0.0,
-                "sqrMagnitude": 0.0
-            })
-
-        # ==========================
-        #     ArrayString
-        # ==========================
-        elif value_type == "array_string":
-            save_data_obj["DataValue"] = _compact_json(new_value)
-            save_data_obj["IsMultiline"] = None
-
-        # ==========================
-        #     ArrayNumber
-        # ==========================
-        elif value_type == "array_number":
-            arr = [float(v) for v in new_value]
-            save_data_obj["DataValue"] = _compact_json(arr)
-            save_data_obj["IsMultiline"] = None
-
-        # ==========================
-        #     ArrayVector
-        # ==========================
-        elif value_type == "array_vector":
-            vecs = []
-            for v in new_value:
-                if isinstance(v, dict):
-                    x, y, z = v["x"], v["y"], v["z"]
-                    w = v.get("w", 0.0)
-                else:
-                    # 支持3维或4维向量
-                    if len(v) == 4:
-                        x, y, z, w = v[0], v[1], v[2], v[3]
-                    else:
-                        x, y, z = v[0], v[1], v[2]
-                        w = 0.0
-                vecs.append({
-                    "x": x, "y": y, "z": z, "w": w,
-                    "magnitude": 0.0,
-                    "sqrMagnitude": 0.0
-                })
-            save_data_obj["DataValue"] = _compact_json(vecs)
-            save_data_obj["IsMultiline"] = None
-
-        # ---------------- 更新 SaveData ----------------
-        target_node["SaveData"] = _compact_json(save_data_obj)
-        chip_graph_meta["stringValue"] = _compact_json(graph_data)
-
-        return True
-
-    except Exception as e:
-        print("修改常量错误:", e)
-        return False
-
-    except (KeyError, IndexError, StopIteration) as e:
-        print(f"处理JSON时发生错误：找不到预期的键或索引。路径可能不正确。错误详情: {e}")
-        return False
-    except json.JSONDecodeError as e:
-        print(f"解析内嵌JSON字符串时出错。文件可能已损坏。错误详情: {e}")
-        return False
-
-
-def apply_constant_modifications(game_data: Dict[str, Any], instructions: List[Dict]) -> Dict[str, Any]:
+            continue
+
+        try:
+            _apply_constant_to_node(target_node, inst['new_value'], inst['value_type'])
+        except Exception as e:
+            print(f"修改常量错误 ({node_id}):", e)
+            continue
+        num_success += 1
+
+    if num_success:
+        doc.mark_dirty("chip_graph")
+        if doc is not game_data:
+            doc.flush()
+    return num_success
+
+
+def apply_constant_modifications(
+    game_data: Union[Dict[str, Any], SaveDocument],
+    instructions: List[Dict],
+    *,
+    verbosity: int = DEFAULT_VERBOSITY,
+) -> Union[Dict[str, Any], SaveDocument]:
     """
     根据指令列表，批量修改内存中的游戏存档数据。
 
-    :param game_data: 游戏存档内容的Python字典。
+    :param game_data: 游戏存档内容的Python字典，或 SaveDocument。
     :param instructions: 一个指令列表，每个指令是包含 'node_id', 'new_value', 'value_type' 的字典。
-    :return: 修改后的游戏存档字典。
+    :param verbosity: 日志级别，0 只输出汇总，1 每条指令一行（值截断），2 输出完整值。
+    :return: 修改后的游戏存档（与传入对象相同）。
     """
-    num_success = 0
-    for inst in instructions:
-        print(f"  > 正在修改常量节点 {inst['node_id'][:8]}... 类型: {inst['value_type']}, 值: {inst['new_value']}")
-        success = _modify_single_node(
-            game_data=game_data,
-            node_id=inst['node_id'],
-            new_value=inst['new_value'],
-            value_type=inst['value_type']
-        )
-        if success:
-            num_success += 1
-    
+    num_success = _apply_constant_instructions(game_data, instructions, verbosity=verbosity)
     print(f"常量修改完成: {num_success}/{len(instructions)} 个成功。")
     return game_data
@@ -15,7 +15,7 @@ from __future__ import annotations
 import sys
 from pathlib import Path
 
-from src.converter.api import convert_dsl_to_graph
+from src.converter.api import convert_dsl_to_graph, convert_dsl_to_graph_dict
 
 
 def _write_demo_dsl(path: Path) -> None:
@@ -34,7 +34,7 @@ def _write_demo_dsl(path: Path) -> None:
     )
 
 
-__all__ = ["convert_dsl_to_graph"]
+__all__ = ["convert_dsl_to_graph", "convert_dsl_to_graph_dict"]
 
 
 if __name__ == "__main__":
@@ -1,7 +1,11 @@
 import json
-from collections import defaultdict
+from bisect import bisect_left
+from collections import defaultdict, deque
 from typing import List, Dict, Any, Tuple, Set
 
+from src.layout_numpy import HAS_NUMPY, NUMPY_MIN_NODES, bary_sweeps_numpy
+from src.save_document import SaveDocument
+
 # --- 布局配置 ---
 # 您可以根据最终效果微调这些值
 X_SPACING = 800.0  # 节点“列”之间的水平距离
@@ -115,41 +119,126 @@ def _insert_dummies_and_build_adj(predecessors, successors, col_node, cols):
                     prev = d
     return cols_aug, pred_adj, succ_adj
 
-def _bary_sweeps_with_dummies(cols_aug, col_node, pred_adj, succ_adj, passes=4):
-    # 多轮：Left→Right 用左邻列的中位秩；Right→Left 用右邻列的中位秩
-    def order_maps(cols):
-        return {c: {nid: i for i, nid in enumerate(cols.get(c, []))} for c in cols}
+# —— 交叉数统计：Barth–Jünger–Mutzel 双层计数（排序 + 树状数组），O(E log V) ——
+def count_bilayer_crossings(edges: List[Tuple[int, int]], lower_size: int) -> int:
+    """
+    统计两相邻列之间的边交叉数。
+    edges: [(左列中的秩, 右列中的秩)]；lower_size: 右列节点数。
+    按 (左秩, 右秩) 排序后，交叉数即右秩序列的逆序对数，用树状数组累加。
+    """
+    if len(edges) < 2:
+        return 0
+    tree = [0] * (lower_size + 1)
+    crossings = 0
+    inserted = 0
+    for _, pos in sorted(edges):
+        # 已插入且右秩严格大于 pos 的边都与当前边交叉
+        i = pos + 1
+        not_greater = 0
+        while i > 0:
+            not_greater += tree[i]
+            i -= i & -i
+        crossings += inserted - not_greater
+        i = pos + 1
+        while i <= lower_size:
+            tree[i] += 1
+            i += i & -i
+        inserted += 1
+    return crossings
+
+def count_layer_crossings(cols: Dict[int, List[str]],
+                          col_node: Dict[str, int],
+                          succ_adj: Dict[str, List[str]],
+                          rank_maps: Dict[int, Dict[str, int]] | None = None) -> int:
+    """统计所有相邻列之间的交叉总数（要求边已拆成相邻列边，见 _insert_dummies_and_build_adj）。"""
+    if rank_maps is None:
+        rank_maps = _rebuild_order_maps(cols)
+    edges_by_col: Dict[int, List[Tuple[int, int]]] = defaultdict(list)
+    for u, outs in succ_adj.items():
+        cu = col_node.get(u)
+        if cu is None:
+            continue
+        for v in outs:
+            cv = col_node.get(v)
+            if cv is None or abs(cv - cu) != 1:
+                continue
+            left, right = (u, v) if cu < cv else (v, u)
+            c = min(cu, cv)
+            edges_by_col[c].append((rank_maps[c][left], rank_maps[c + 1][right]))
+    return sum(
+        count_bilayer_crossings(edges, len(cols.get(c + 1, [])))
+        for c, edges in edges_by_col.items()
+    )
 
+def _bary_sweeps_with_dummies(cols_aug, col_node, pred_adj, succ_adj, passes=4):
+    """
+    多轮：Left→Right 用左邻列的秩做重心；Right→Left 用右邻列的秩做重心。
+    秩映射只在开始时构建一次，之后每排好一列就只更新该列；
+    每轮结束后统计交叉数，最终保留交叉最少的列内顺序。返回该交叉数。
+    """
     col_keys = sorted(cols_aug.keys())
+    om = _rebuild_order_maps(cols_aug)
+    crossings = best_crossings = count_layer_crossings(cols_aug, col_node, succ_adj, om)
+    best_cols = {c: list(arr) for c, arr in cols_aug.items()}
     for _ in range(passes):
-        om = order_maps(cols_aug)
+        if crossings == 0:
+            break
         # ---- L → R ----
         for c in col_keys[1:]:
             arr = cols_aug.get(c, [])
             if not arr: 
                 continue
             left = om.get(c - 1, {})
+            cur = om[c]
             def bary_left(nid):
                 idxs = [left[x] for x in pred_adj.get(nid, []) if x in left]
-                return (sum(idxs) / len(idxs)) if idxs else om[c].get(nid, 0)
-            arr.sort(key=lambda nid: (bary_left(nid), om[c][nid]))
+                return (sum(idxs) / len(idxs)) if idxs else cur.get(nid, 0)
+            arr.sort(key=lambda nid: (bary_left(nid), cur[nid]))
             om[c] = {nid: i for i, nid in enumerate(arr)}
-        # ---- R → L ----
-        om = order_maps(cols_aug)
+        # ---- R → L ----（om 已随每列排序同步更新，无需重建）
         for c in reversed(col_keys[:-1]):
             arr = cols_aug.get(c, [])
             if not arr: 
                 continue
             right = om.get(c + 1, {})
+            cur = om[c]
             def bary_right(nid):
                 idxs = [right[x] for x in succ_adj.get(nid, []) if x in right]
-                return (sum(idxs) / len(idxs)) if idxs else om[c].get(nid, 0)
-            arr.sort(key=lambda nid: (bary_right(nid), om[c][nid]))
+                return (sum(idxs) / len(idxs)) if idxs else cur.get(nid, 0)
+            arr.sort(key=lambda nid: (bary_right(nid), cur[nid]))
             om[c] = {nid: i for i, nid in enumerate(arr)}
 
-def iterative_barycenter_positioning(layers: dict, predecessors: dict, successors: dict) -> dict:
+        crossings = count_layer_crossings(cols_aug, col_node, succ_adj, om)
+        if crossings <= best_crossings:
+            best_crossings = crossings
+            best_cols = {c: list(arr) for c, arr in cols_aug.items()}
+
+    # 最后一轮比之前更差时，回退到交叉最少的那一轮
+    if crossings > best_crossings:
+        for c, arr in best_cols.items():
+            cols_aug[c][:] = arr
+    return best_crossings
+
+def _seeded_sort_key(seed_y: Dict[str, float], predecessors: dict, successors: dict):
+    """
+    增量布局的初始列内顺序：有旧坐标的节点按旧 y 排；
+    新节点取有旧坐标的邻居 y 的平均值，没有这样的邻居时排在列尾。
+    """
+    def key(nid):
+        if nid in seed_y:
+            return (0, seed_y[nid], nid)
+        neis = list(predecessors.get(nid, [])) + list(successors.get(nid, []))
+        ys = [seed_y[x] for x in neis if x in seed_y]
+        if ys:
+            return (0, sum(ys) / len(ys), nid)
+        return (1, 0.0, nid)
+    return key
+
+def iterative_barycenter_positioning(layers: dict, predecessors: dict, successors: dict,
+                                     seed_y: Dict[str, float] | None = None) -> dict:
     """
     核心升级：使用虚拟拆边和双向多轮中位数扫掠优化垂直位置，以最大程度减少线条交叉。
+    seed_y 为旧布局中的 y 坐标（见 src.layout_cache），给出时用作初始列内顺序。
     """
     positions = {}
     
@@ -160,15 +249,20 @@ def iterative_barycenter_positioning(layers: dict, predecessors: dict, successor
         for node_id in nodes:
             cols[layer].append(node_id)
             col_node[node_id] = layer
+    initial_key = _seeded_sort_key(seed_y, predecessors, successors) if seed_y else None
     for c in cols:
-        cols[c].sort()  # 初始稳定序
+        cols[c].sort(key=initial_key)  # 初始稳定序
 
     # 2) 先"虚拟拆边"为相邻列边，再做双向多轮中位数扫掠，得到更好的列内顺序
     col_node_aug = dict(col_node)  # 会加 dummy 的列号
     cols_aug, pred_adj, succ_adj = _insert_dummies_and_build_adj(
         predecessors, successors, col_node_aug, cols
     )
-    _bary_sweeps_with_dummies(cols_aug, col_node_aug, pred_adj, succ_adj, passes=4)
+    #    大图且安装了 NumPy 时走向量化后端（结果与纯 Python 版本一致）
+    if HAS_NUMPY and len(col_node_aug) >= NUMPY_MIN_NODES:
+        bary_sweeps_numpy(cols_aug, col_node_aug, pred_adj, succ_adj, passes=4)
+    else:
+        _bary_sweeps_with_dummies(cols_aug, col_node_aug, pred_adj, succ_adj, passes=4)
 
     # 3) 扫掠完成后，只对"真实节点"赋 y（dummy 仅参与排序，不输出坐标）
     y_order: Dict[str, float] = {}
@@ -283,26 +377,26 @@ def resolve_overlaps_and_finalize(layers: dict, temp_positions: dict) -> dict:
     return final_positions
 
 
-def find_and_update_chip_graph(data: dict, final_positions: dict) -> bool:
-    """在JSON中找到芯片图数据并更新节点坐标。"""
+def find_and_update_chip_graph(data, final_positions: dict) -> bool:
+    """在JSON（存档字典或 SaveDocument）中找到芯片图数据并更新节点坐标。"""
     try:
-        # 路径可能因存档结构而异，这里假设是标准结构
-        save_obj = data['saveObjectContainers'][0]['saveObjects']
-        for meta_data in save_obj['saveMetaDatas']:
-            if meta_data.get('key') == 'chip_graph':
-                graph_data = json.loads(meta_data['stringValue'])
-                nodes_updated = 0
-                for node in graph_data.get('Nodes', []):
-                    if node['Id'] in final_positions:
-                        pos = final_positions[node['Id']]
-                        node['VisualPosition']['x'] = pos['x'] + GLOBAL_X_OFFSET
-                        node['VisualPosition']['y'] = pos['y']
-                        nodes_updated += 1
-                
-                if nodes_updated > 0:
-                    meta_data['stringValue'] = json.dumps(graph_data, separators=(',', ':'))
-                    print(f"   在'chip_graph'中更新了 {nodes_updated} 个节点的位置。")
-                    return True
+        doc = SaveDocument.wrap(data)
+        graph_data = doc.chip_graph
+        if graph_data is not None:
+            nodes_updated = 0
+            for node in graph_data.get('Nodes', []):
+                if node['Id'] in final_positions:
+                    pos = final_positions[node['Id']]
+                    node['VisualPosition']['x'] = pos['x'] + GLOBAL_X_OFFSET
+                    node['VisualPosition']['y'] = pos['y']
+                    nodes_updated += 1
+
+            if nodes_updated > 0:
+                doc.mark_dirty('chip_graph')
+                if doc is not data:
+                    doc.flush()
+                print(f"   在'chip_graph'中更新了 {nodes_updated} 个节点的位置。")
+                return True
         print("   警告: 在JSON中找到了'chip_graph'，但没有需要更新坐标的匹配节点。")
         return False
     except (KeyError, IndexError, TypeError) as e:
@@ -347,86 +441,110 @@ def _build_cluster_columns_for_positions(cluster: List[str],
     return cols, col_of, rank_maps
 
 
-def _count_inversions(A: List[str], B: List[str], rank_map: Dict[str, int]) -> int:
-    """统计集合 A 的端点是否“在 rank 上方于”集合 B 的端点（ra > rb）→ 表示存在交叉。"""
-    inv = 0
-    for a in A:
-        ra = rank_map.get(a)
-        if ra is None: 
-            continue
-        for b in B:
-            rb = rank_map.get(b)
-            if rb is None:
-                continue
-            if ra > rb:
-                inv += 1
-    return inv
-
-
-def _median_or_bary_rank(neis: List[str], rank_map: Dict[str, int]) -> float | None:
-    vals = [rank_map[n] for n in neis if n in rank_map]
+def _median_of_sorted(vals: List[int]) -> float | None:
     if not vals:
         return None
-    vals.sort()
     m = len(vals)
     if m % 2:
         return float(vals[m // 2])
     return 0.5 * (vals[m // 2 - 1] + vals[m // 2])
 
 
-def _score_delta_if_swap(u: str, v: str, cur_col: int,
-                         predecessors: Dict[str, List[str]],
-                         successors: Dict[str, List[str]],
-                         col_of: Dict[str, int],
-                         cols: Dict[int, List[str]],
-                         rank_maps: Dict[int, Dict[str, int]],
-                         w_c: float = 1.0, w_m: float = 0.5) -> float:
+def _count_greater_pairs(A: List[int], B: List[int]) -> int:
+    """A、B 为已排序的秩列表，统计 ra > rb 的对数。"""
+    if not A or not B:
+        return 0
+    return sum(bisect_left(B, ra) for ra in A)
+
+
+def _bary_cost(pos: int, m1: float | None, m2: float | None) -> float:
+    """pos 与左右中位秩平均值的距离；两侧都没有邻居时为 0。"""
+    if m1 is None:
+        return 0.0 if m2 is None else abs(pos - m2)
+    if m2 is None:
+        return abs(pos - m1)
+    return abs(pos - (m1 + m2) / 2)
+
+
+class _SwapScorer:
     """
-    只比较与 u,v 相关的边与秩：交叉项 + 重心项。
-    返回 Δscore = after - before（负表示更好）
+    为局部交换阶段缓存每个节点在相邻列中的邻居：
+      - 邻居 id 列表在 cluster 内固定，只计算一次；
+      - 邻居的已排序秩列表按需计算，某列发生交换时只失效受影响节点的缓存。
     """
-    # 当前列内 rank
-    rank_cur = rank_maps[cur_col]
-    pos_u, pos_v = rank_cur[u], rank_cur[v]
-
-    # 左列 / 右列的 rank
-    rank_left  = rank_maps.get(cur_col - 1, {})
-    rank_right = rank_maps.get(cur_col + 1, {})
-
-    # 相邻列中的邻居
-    Lu = [p for p in predecessors.get(u, []) if col_of.get(p) == cur_col - 1]
-    Lv = [p for p in predecessors.get(v, []) if col_of.get(p) == cur_col - 1]
-    Ru = [s for s in successors.get(u, [])   if col_of.get(s) == cur_col + 1]
-    Rv = [s for s in successors.get(v, [])   if col_of.get(s) == cur_col + 1]
-
-    # 交叉数（左右两侧独立统计）
-    before_left  = _count_inversions(Lu, Lv, rank_left)
-    after_left   = _count_inversions(Lv, Lu, rank_left)
-    before_right = _count_inversions(Ru, Rv, rank_right)
-    after_right  = _count_inversions(Rv, Ru, rank_right)
-
-    cross_before = before_left + before_right
-    cross_after  = after_left  + after_right
-
-    # 重心（把左右的中位秩做平均）
-    mu_left  = _median_or_bary_rank(Lu, rank_left)
-    mv_left  = _median_or_bary_rank(Lv, rank_left)
-    mu_right = _median_or_bary_rank(Ru, rank_right)
-    mv_right = _median_or_bary_rank(Rv, rank_right)
-
-    def bary_cost(pos, m1, m2):
-        mm = [m for m in (m1, m2) if m is not None]
-        if not mm:
-            return 0.0
-        avg = sum(mm) / len(mm)
-        return abs(pos - avg)
-
-    median_before = bary_cost(pos_u, mu_left, mu_right) + bary_cost(pos_v, mv_left, mv_right)
-    median_after  = bary_cost(pos_v, mu_left, mu_right) + bary_cost(pos_u, mv_left, mv_right)
-
-    score_before = w_c * cross_before + w_m * median_before
-    score_after  = w_c * cross_after  + w_m * median_after
-    return score_after - score_before
+
+    def __init__(self,
+                 predecessors: Dict[str, List[str]],
+                 successors: Dict[str, List[str]],
+                 col_of: Dict[str, int],
+                 rank_maps: Dict[int, Dict[str, int]]):
+        self.col_of = col_of
+        self.rank_maps = rank_maps
+        self.left: Dict[str, List[str]] = {}
+        self.right: Dict[str, List[str]] = {}
+        for n, c in col_of.items():
+            self.left[n] = [p for p in predecessors.get(n, []) if col_of.get(p) == c - 1]
+            self.right[n] = [q for q in successors.get(n, []) if col_of.get(q) == c + 1]
+        self._left_ranks: Dict[str, Tuple[List[int], float | None]] = {}
+        self._right_ranks: Dict[str, Tuple[List[int], float | None]] = {}
+
+    def _ranks(self, n: str, side: str) -> Tuple[List[int], float | None]:
+        """返回 (已排序的邻居秩列表, 中位秩)。"""
+        cache = self._left_ranks if side == "left" else self._right_ranks
+        entry = cache.get(n)
+        if entry is None:
+            c = self.col_of[n] + (-1 if side == "left" else 1)
+            rank_map = self.rank_maps.get(c, {})
+            neis = self.left[n] if side == "left" else self.right[n]
+            ranks = sorted(rank_map[x] for x in neis if x in rank_map)
+            entry = (ranks, _median_of_sorted(ranks))
+            cache[n] = entry
+        return entry
+
+    def delta(self, u: str, v: str, cur_col: int, w_c: float = 1.0, w_m: float = 0.5) -> float:
+        """
+        只比较与 u,v 相关的边与秩：交叉项 + 重心项。
+        返回 Δscore = after - before（负表示更好）
+        """
+        rank_cur = self.rank_maps[cur_col]
+        pos_u, pos_v = rank_cur[u], rank_cur[v]
+
+        Lu, mu_left = self._ranks(u, "left")
+        Lv, mv_left = self._ranks(v, "left")
+        Ru, mu_right = self._ranks(u, "right")
+        Rv, mv_right = self._ranks(v, "right")
+
+        # 交叉数（左右两侧独立统计）
+        cross_before = _count_greater_pairs(Lu, Lv) + _count_greater_pairs(Ru, Rv)
+        cross_after = _count_greater_pairs(Lv, Lu) + _count_greater_pairs(Rv, Ru)
+
+        # 重心（把左右的中位秩做平均）
+        median_before = _bary_cost(pos_u, mu_left, mu_right) + _bary_cost(pos_v, mv_left, mv_right)
+        median_after = _bary_cost(pos_v, mu_left, mu_right) + _bary_cost(pos_u, mv_left, mv_right)
+
+        score_before = w_c * cross_before + w_m * median_before
+        score_after = w_c * cross_after + w_m * median_after
+        return score_after - score_before
+
+    def on_swap(self, u: str, v: str) -> None:
+        """u,v 的秩变了：右侧邻居的“左秩列表”与左侧邻居的“右秩列表”失效。"""
+        for n in (u, v):
+            for q in self.right[n]:
+                self._left_ranks.pop(q, None)
+            for p in self.left[n]:
+                self._right_ranks.pop(p, None)
+
+    def crossings(self, cols: Dict[int, List[str]]) -> int:
+        """cluster 内相邻列之间的交叉总数。"""
+        total = 0
+        for c, arr in cols.items():
+            if c + 1 not in cols:
+                continue
+            rank_here = self.rank_maps[c]
+            rank_next = self.rank_maps[c + 1]
+            edges = [(rank_here[n], rank_next[q]) for n in arr for q in self.right[n]]
+            total += count_bilayer_crossings(edges, len(cols[c + 1]))
+        return total
 
 
 def _apply_swap_in_column(u: str, v: str, col: int,
@@ -450,57 +568,86 @@ def _apply_swap_in_column(u: str, v: str, col: int,
     rank_maps[col][arr[iv]] = iv
 
 
+# 局部交换阶段的轮数上限：正常情况下在“某轮无任何交换”时提前收敛
+FISHSCHOOL_MAX_PASSES = 20
+
+
 def _fishschool_local_swaps(predecessors: Dict[str, List[str]],
                             successors: Dict[str, List[str]],
                             undirected: Dict[str, Set[str]],
                             clusters: List[List[str]],
                             final_positions: Dict[str, Dict[str, float]],
-                            max_pass: int = 3) -> Dict[str, Dict[str, float]]:
+                            max_pass: int = FISHSCHOOL_MAX_PASSES
+                            ) -> Tuple[Dict[str, Dict[str, float]], Dict[str, Any]]:
     """
     在现有坐标基础上进行“同列相邻对”的一次性交换启发式：
       - 逐 cluster / 逐列遍历；
       - 对相邻对 (u,v) 若 Δscore < 0 且此对未交换过 → 交换，加入队列的邻近对继续评估；
-      - 同一对在整个阶段至多交换一次（避免抖动）。
+      - 同一对在整个阶段至多交换一次（避免抖动）；
+      - 重复多轮直到某一轮没有发生交换（收敛），最多 max_pass 轮。
+    返回 (final_positions, stats)，stats 记录轮数、评估次数、交换次数、得分改善与交叉数变化。
     """
-    swapped_once: Set[int] = set()  # 以 hash_pair 记录“全局只交换一次”
-    def hash_pair(a: str, b: str) -> int:
-        if a > b: a, b = b, a
-        return (hash(a) << 1) ^ hash(b)
+    swapped_once: Set[Tuple[str, str]] = set()  # 记录“全局只交换一次”的无序对
+    stats: Dict[str, Any] = {
+        "passes": 0,
+        "evaluated": 0,
+        "swaps": 0,
+        "score_gain": 0.0,
+        "crossings_before": 0,
+        "crossings_after": 0,
+    }
+
+    # 列与秩只在每个 cluster 上构建一次；交换时由 _apply_swap_in_column 同步维护
+    prepared = []
+    for cluster in clusters:
+        cols, col_of, rank_maps = _build_cluster_columns_for_positions(cluster, final_positions)
+        if not cols:
+            continue
+        scorer = _SwapScorer(predecessors, successors, col_of, rank_maps)
+        stats["crossings_before"] += scorer.crossings(cols)
+        prepared.append((cols, rank_maps, scorer))
 
     for _ in range(max_pass):
-        # 遍历每个 cluster
-        for cluster in clusters:
-            # 基于最终坐标重建该 cluster 的列与秩
-            cols, col_of, rank_maps = _build_cluster_columns_for_positions(cluster, final_positions)
-            if not cols:
-                continue
-
+        stats["passes"] += 1
+        swaps_this_pass = 0
+        for cols, rank_maps, scorer in prepared:
             # 每列做“冒泡式”邻对评估
             for c, arr in cols.items():
                 if len(arr) <= 1:
                     continue
                 # 初始化相邻对队列
-                Q = [(i, i+1) for i in range(len(arr) - 1)]
+                Q = deque((i, i + 1) for i in range(len(arr) - 1))
                 while Q:
-                    i, j = Q.pop(0)
+                    i, j = Q.popleft()
                     u, v = arr[i], arr[j]
-                    key = hash_pair(u, v)
+                    key = (u, v) if u < v else (v, u)
                     if key in swapped_once:
                         continue
-                    delta = _score_delta_if_swap(u, v, c, predecessors, successors, col_of, cols, rank_maps)
+                    stats["evaluated"] += 1
+                    delta = scorer.delta(u, v, c)
                     if delta < 0:  # 更优 → 交换，并标记一次性
                         _apply_swap_in_column(u, v, c, cols, rank_maps, final_positions)
+                        scorer.on_swap(u, v)
                         swapped_once.add(key)
+                        swaps_this_pass += 1
+                        stats["score_gain"] -= delta
                         # 受影响的邻对入队
-                        if i-1 >= 0: Q.append((i-1, i))
-                        if j+1 < len(arr): Q.append((j, j+1))
-    return final_positions
+                        if i - 1 >= 0: Q.append((i - 1, i))
+                        if j + 1 < len(arr): Q.append((j, j + 1))
+        stats["swaps"] += swaps_this_pass
+        if swaps_this_pass == 0:
+            break
+
+    stats["crossings_after"] = sum(scorer.crossings(cols) for cols, _, scorer in prepared)
+    return final_positions, stats
 
 # --- 新增：可供外部调用的主函数 ---
-def run_layout_engine(chip_nodes: List[Dict[str, Any]]) -> Dict[str, Dict[str, float]]:
+def run_layout_engine(chip_nodes: List[Dict[str, Any]],
+                      seed_y: Dict[str, float] | None = None) -> Dict[str, Dict[str, float]]:
     """
     接收节点列表，执行完整的布局算法，并返回最终位置。
     这是被 main.py 调用的核心入口。
+    seed_y: 可选的旧布局 y 坐标（节点 Id -> y），用于增量布局时保持大致的相对顺序。
     """
     print("1. 核心步骤: 执行 ALAP 分层...")
     predecessors, successors, node_ids = parse_graph(chip_nodes)
@@ -508,7 +655,7 @@ def run_layout_engine(chip_nodes: List[Dict[str, Any]]) -> Dict[str, Dict[str, f
     print(f"   完成。图被分为 {len(layers)} 个层级。")
 
     print("2. 核心步骤: 执行多轮质心迭代...")
-    temp_positions = iterative_barycenter_positioning(layers, predecessors, successors)
+    temp_positions = iterative_barycenter_positioning(layers, predecessors, successors, seed_y)
     print("   完成。")
     
     print("3. 最终整理: 解决重叠并垂直居中...")
@@ -531,8 +678,14 @@ def run_layout_engine(chip_nodes: List[Dict[str, Any]]) -> Dict[str, Dict[str, f
     all_node_ids = list(final_positions.keys())
     simple_clusters = [all_node_ids] if all_node_ids else []
 
-    final_positions = _fishschool_local_swaps(predecessors, successors, undirected_graph, simple_clusters, final_positions, max_pass=3)
-    print("   局部交换优化完成。")
+    final_positions, swap_stats = _fishschool_local_swaps(
+        predecessors, successors, undirected_graph, simple_clusters, final_positions
+    )
+    print(
+        f"   局部交换优化完成：{swap_stats['passes']} 轮，评估 {swap_stats['evaluated']} 对，"
+        f"交换 {swap_stats['swaps']} 次，得分改善 {swap_stats['score_gain']:.1f}，"
+        f"相邻列交叉 {swap_stats['crossings_before']} → {swap_stats['crossings_after']}。"
+    )
 
     return final_positions
 
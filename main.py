@@ -8,15 +8,39 @@ main.py
 
 职责：
 - 处理与运行环境相关的事项（例如 Windows 控制台编码）
-- 调用 `src.pipeline.run_full_pipeline` 执行完整 DSL -> .melsave 流水线
+- 解析命令行参数，并调用 `src.pipeline.run_full_pipeline` 执行完整 DSL -> .melsave 流水线
+
+命令行参数：
+- `--debug-artifacts`：额外写出 graph.json / output.json / data_after_modify.json /
+  ungraph.json 等中间产物（默认只在内存中传递，仅写出最终 .melsave）
+- `-v` / `-vv`：输出逐条常量修改等详细日志（`-vv` 输出完整值）
+- `--no-layout-cache`：不读写布局缓存
+- `--no-cse`：不合并重复的无副作用节点（公共子表达式消除）
+- `--no-fold`：不在编译期折叠输入全为常量的运算节点
+- `--no-dce`：保留结果未被使用的节点（死节点消除）
+- `--dce-report`：列出死节点消除删掉的每个节点
+- `--rebalance`：把 `a + b + c + d` 这类结合律运算链重排为平衡树，降低信号经过的门层数
+- `--profile`：记录各阶段的墙钟 / CPU 时间、峰值内存与对象数变化，写到 output/profile.json 与 profile.csv
+- `--profile-cprofile`：配合 `--profile`，每个阶段另存一份 cProfile 结果到 output/profile/
+- `--watch`：常驻监视 input.py / moduledef.json 等输入，变化后增量重建（见 src.watch）；
+  `--watch-interval` 设置轮询间隔（秒）
+
+子命令：
+- `chip-stats <graph.json | 存档>`：统计门数量、关键路径、扇出与每 tick 开销（见 src.chip_stats）
+- `compile-many <目录 | glob | 文件>...`：多进程并行编译多份 DSL，每份独立输出目录（见 src.compile_many）
+- `serve [--port 8765 | --unix 路径] [-j N]`：常驻本地编译服务，HTTP + JSON-RPC 2.0 提供
+  compile / check / layout，供编辑器插件与构建机复用（见 src.compile_server）
 
 具体的 DSL 解析、graph 处理与存档生成逻辑已全部迁移到 `src/` 下的模块中，
 方便后续维护和扩展，不再在 main.py 中堆积业务代码。
 """
 
+import argparse
 import os
 import sys
+from typing import List, Optional
 
+from src.build_context import BuildContext
 from src.pipeline import run_full_pipeline
 
 
@@ -30,10 +54,109 @@ if os.name == "nt":
         pass
 
 
-def main() -> None:
-    """命令行入口：委托给 src.pipeline.run_full_pipeline。"""
-    run_full_pipeline()
+def build_arg_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="将 DSL (input.py) 编译为 .melsave 存档")
+    parser.add_argument(
+        "--debug-artifacts",
+        action="store_true",
+        help="写出 graph.json / output.json / data_after_modify.json / ungraph.json 等中间产物",
+    )
+    parser.add_argument(
+        "-v",
+        "--verbose",
+        action="count",
+        default=0,
+        help="输出逐条修改日志；重复两次 (-vv) 时输出完整的常量值",
+    )
+    parser.add_argument(
+        "--no-layout-cache",
+        action="store_true",
+        help="不读写 output/.cache 下的布局缓存，每次都重新计算完整布局",
+    )
+    parser.add_argument(
+        "--no-cse",
+        action="store_true",
+        help="关闭公共子表达式消除（保留 DSL 中重复的无副作用节点）",
+    )
+    parser.add_argument(
+        "--no-fold",
+        action="store_true",
+        help="关闭常量折叠（保留输入全为常量的运算节点）",
+    )
+    parser.add_argument(
+        "--no-dce",
+        action="store_true",
+        help="关闭死节点消除（保留结果到达不了 OUTPUT / 变量 / 有副作用模块的节点）",
+    )
+    parser.add_argument(
+        "--dce-report",
+        action="store_true",
+        help="列出死节点消除删掉的每个节点",
+    )
+    parser.add_argument(
+        "--rebalance",
+        action="store_true",
+        help="把 Add / Multiply / Max / And / Or 运算链重排为平衡树，降低关键路径深度",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="记录每个阶段的耗时与内存，写到 output/profile.json 和 output/profile.csv",
+    )
+    parser.add_argument(
+        "--profile-cprofile",
+        action="store_true",
+        help="配合 --profile，每个阶段另存一份 cProfile 结果到 output/profile/",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="常驻监视输入文件，变化后增量重建（仅常量变化时直接修改缓存的存档）",
+    )
+    parser.add_argument(
+        "--watch-interval",
+        type=float,
+        default=0.5,
+        help="--watch 模式下轮询文件变化的间隔秒数（默认 0.5）",
+    )
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """命令行入口：解析参数后委托给 src.pipeline.run_full_pipeline（或对应的子命令）。"""
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if argv and argv[0] == "chip-stats":
+        from src.chip_stats import main as chip_stats_main
+
+        sys.exit(chip_stats_main(argv[1:]))
+    if argv and argv[0] == "compile-many":
+        from src.compile_many import main as compile_many_main
+
+        sys.exit(compile_many_main(argv[1:]))
+    if argv and argv[0] == "serve":
+        from src.compile_server import main as serve_main
+
+        sys.exit(serve_main(argv[1:]))
+
+    args = build_arg_parser().parse_args(argv)
+    ctx = BuildContext(
+        debug_artifacts=args.debug_artifacts,
+        verbosity=args.verbose,
+        layout_cache=not args.no_layout_cache,
+        cse=not args.no_cse,
+        fold=not args.no_fold,
+        dce=not args.no_dce,
+        dce_report=args.dce_report,
+        rebalance=args.rebalance,
+        profile=args.profile or args.profile_cprofile,
+        profile_cprofile=args.profile_cprofile,
+    )
+    if args.watch:
+        from src.watch import run_watch
 
+        run_watch(ctx.replace(profile=False, profile_cprofile=False), args.watch_interval)
+        return
+    run_full_pipeline(ctx)
 
 if __name__ == "__main__":
     main()
@@ -2,6 +2,9 @@ import json
 import argparse
 from typing import Dict, List, Any, Optional
 
+from src.module_catalog import build_moduledef_key_index
+from src.save_document import SaveDocument
+
 # --- 数据类型常量 ---
 # 便于理解和维护
 DATA_TYPE_MAP = {
@@ -174,10 +177,15 @@ def get_default_gate_data(data_type: int) -> Optional[str]:
     return values.get(data_type)
 
 
-def _resolve_moduledef_key(op_type: Any, module_defs: Dict[str, Any]) -> str | None:
+def _resolve_moduledef_key(
+    op_type: Any,
+    module_defs: Dict[str, Any],
+    key_index: Dict[str, str] | None = None,
+) -> str | None:
     """
     将新版字符串 OperationType（如 "Add"）映射回 moduledef.json 的 key（如 "2304"）。
     若本身就是 key（数字字符串/数组模块字符串 key），则原样返回。
+    key_index 为 build_moduledef_key_index 的结果；不提供时临时构建。
     """
     if op_type is None:
         return None
@@ -192,16 +200,9 @@ def _resolve_moduledef_key(op_type: Any, module_defs: Dict[str, Any]) -> str | N
     if not key_norm:
         return raw
 
-    for mid, mod in module_defs.items():
-        if not isinstance(mod, dict):
-            continue
-        si = mod.get("source_info") or {}
-        if not isinstance(si, dict):
-            continue
-        for cand in (si.get("datatype_map_nodename"), si.get("chip_names_friendly_name")):
-            if isinstance(cand, str) and cand.strip().lower() == key_norm:
-                return str(mid)
-    return raw
+    if key_index is None:
+        key_index = build_moduledef_key_index(module_defs)
+    return key_index.get(key_norm, raw)
 
 
 # 新版数组模块（OperationType 为字符串）
@@ -232,330 +233,321 @@ def apply_data_type_modifications(
     game_data: Dict[str, Any],
     mod_instructions: List[Dict[str, Any]],
     rules: Dict[str, Any],
-    module_defs: Dict[str, Any]
+    module_defs: Dict[str, Any],
+    *,
+    moduledef_key_index: Dict[str, str] | None = None,
 ) -> Dict[str, Any]:
     """
     根据规则文件，读取游戏数据和修改指令，并应用数据类型修改。
+
+    这是批量接口：一次接收全部指令，节点通过 Id 索引定位、OperationType 通过
+    moduledef 索引解析，整体耗时与 “指令数 + 节点数” 成线性关系。
+
+    game_data 可以是存档字典，也可以是 SaveDocument（此时不在函数内回写字符串）。
+    moduledef_key_index 可传入预先构建好的 build_moduledef_key_index 结果以便复用。
     """
+    # 传入普通字典时由本函数包装并在结束时回写；传入 SaveDocument 时由调用方统一 flush。
+    doc = SaveDocument.wrap(game_data)
     connections_to_update = {}
     modification_made = False
+    graph_touched = False
 
-    main_data = game_data
+    if moduledef_key_index is None:
+        moduledef_key_index = build_moduledef_key_index(module_defs)
 
-    for container in main_data.get('saveObjectContainers', []):
-        save_objects = container.get('saveObjects', {})
-        meta_datas = save_objects.get('saveMetaDatas', [])
-        mechanic_data_list = save_objects.get('mechanicData', [])
+    print("\n--- 阶段 1: 分析并修改 chip_graph ---")
+    for instruction in mod_instructions:
+        node_id = instruction['node_id']
+        new_node_type = instruction['new_data_type']
 
-        if not meta_datas:
-            continue
+        node_found = doc.node_by_id(node_id)
 
-        print("\n--- 阶段 1: 分析并修改 chip_graph ---")
-        for meta_data in meta_datas:
-            if meta_data.get('key') == 'chip_graph':
-                graph_string = meta_data.get('stringValue')
-                if not graph_string:
-                    continue
-
-                graph_data = json.loads(graph_string)
-                nodes_list = graph_data.get('Nodes', [])
-
-                for instruction in mod_instructions:
-                    node_id = instruction['node_id']
-                    new_node_type = instruction['new_data_type']
-
-                    node_found = next((n for n in nodes_list if n.get('Id') == node_id), None)
-
-                    if not node_found:
-                        continue
-                    
-                    print(f"  -> 找到节点: {node_id}")
-                    op_type = node_found.get('OperationType')
-                    use_string_types = _node_uses_string_schema(node_found)
-                    new_gate_value = _coerce_gate_type_value(new_node_type, use_string_types=use_string_types)
-                    op_key = _resolve_moduledef_key(op_type, module_defs)
-                    module_name = get_friendly_module_name(op_key if op_key is not None else op_type, module_defs)
-
-                    # moduledef.json 中可通过 can_modify_data_type 控制该模块是否允许类型修改
-                    mod_def = module_defs.get(op_key, {}) if op_key is not None else {}
-                    if isinstance(mod_def, dict) and not _as_bool_flag(mod_def.get("can_modify_data_type", True), True):
-                        print(f"     skip: module '{module_name}' (OpType: {op_type}) is marked as non-modifiable")
-                        continue
-
-                    # --- 逻辑修正点 ---
-                    # 1. 无论节点类型如何，只要它是外部IO，就必须先记录下来以便同步
-                    conn_id = node_found.get('MechanicConnectionId')
-                    if conn_id:
-                        print(f"     发现外部连接 '{conn_id}'。将加入同步列表。")
-                        connections_to_update[conn_id] = new_node_type
-                        modification_made = True # 只要有IO连接要更新，就视为有修改
-
-                    # 2. 现在再判断是否要跳过对节点内部的修改
-                    if op_type in IGNORED_OPERATION_TYPES:
-                        print(f"     跳过对特殊模块 '{module_name}' (ID: {node_id}) 的内部修改。外部连接已记录。")
-                        # (可选) 对于 Input/Output，可以只更新它们在chip_graph中的主类型，因为这有时是必要的
-                        node_found['GateDataType'] = new_gate_value
-                        # 简单的IO节点通常只有一个输出/输入，可以安全地也更新一下
-                        for port in node_found.get('Outputs', []): port['DataType'] = new_gate_value
-                        for port in node_found.get('Inputs', []): port['DataType'] = new_gate_value
-                        continue # 跳过后续复杂的规则应用
-
-                    op_name = str(op_type)
-                    if op_name in ARRAY_OPERATION_TYPES:
-                        # 数组模块：GateDataType 代表 ArrayXxx，自身端口 DataType 需要按“数组元素类型”特殊处理
-                        node_found['GateDataType'] = new_gate_value
-                        node_found['SaveData'] = get_default_save_data(new_node_type)
-                        modification_made = True
-
-                        elem_type = _element_type_from_array_type(new_node_type)
-                        int_port_type = "IntegerNumber" if use_string_types else 2
-
-                        def set_port_type(port: Dict[str, Any], t: int | None, *, integer: bool = False) -> None:
-                            if integer:
-                                port['DataType'] = int_port_type
-                                return
-                            if t is None:
-                                return
-                            port['DataType'] = _coerce_gate_type_value(t, use_string_types=use_string_types)
-
-                        if op_name == "ArraysGet":
-                            ins = node_found.get("Inputs", []) or []
-                            outs = node_found.get("Outputs", []) or []
-                            if len(ins) > 0:
-                                set_port_type(ins[0], new_node_type)
-                            if len(ins) > 1:
-                                set_port_type(ins[1], None, integer=True)
-                            if len(outs) > 0:
-                                set_port_type(outs[0], elem_type)
-                            if len(outs) > 1:
-                                set_port_type(outs[1], None, integer=True)
-                            continue
-
-                        if op_name == "ArraysLength":
-                            ins = node_found.get("Inputs", []) or []
-                            outs = node_found.get("Outputs", []) or []
-                            if len(ins) > 0:
-                                set_port_type(ins[0], new_node_type)
-                            if len(outs) > 0:
-                                set_port_type(outs[0], None, integer=True)
-                            continue
-
-                        if op_name == "ArraysAdd":
-                            ins = node_found.get("Inputs", []) or []
-                            outs = node_found.get("Outputs", []) or []
-                            if len(ins) > 0:
-                                set_port_type(ins[0], new_node_type)
-                            if len(ins) > 1:
-                                set_port_type(ins[1], elem_type)
-                            if len(ins) > 2:
-                                set_port_type(ins[2], None, integer=True)
-                            if len(ins) > 3:
-                                set_port_type(ins[3], None, integer=True)
-                            if len(outs) > 0:
-                                set_port_type(outs[0], new_node_type)
-                            if len(outs) > 1:
-                                set_port_type(outs[1], None, integer=True)
-                            continue
-
-                        if op_name == "ArraysSet":
-                            ins = node_found.get("Inputs", []) or []
-                            outs = node_found.get("Outputs", []) or []
-                            if len(ins) > 0:
-                                set_port_type(ins[0], new_node_type)
-                            if len(ins) > 1:
-                                set_port_type(ins[1], None, integer=True)
-                            if len(ins) > 2:
-                                set_port_type(ins[2], elem_type)
-                            if len(ins) > 3:
-                                set_port_type(ins[3], None, integer=True)
-                            if len(outs) > 0:
-                                set_port_type(outs[0], new_node_type)
-                            continue
-
-                        if op_name == "ArraysRemoveAllByValue":
-                            ins = node_found.get("Inputs", []) or []
-                            outs = node_found.get("Outputs", []) or []
-                            if len(ins) > 0:
-                                set_port_type(ins[0], new_node_type)
-                            if len(ins) > 1:
-                                set_port_type(ins[1], elem_type)
-                            if len(ins) > 2:
-                                set_port_type(ins[2], None, integer=True)
-                            if len(outs) > 0:
-                                set_port_type(outs[0], new_node_type)
-                            continue
+        if not node_found:
+            continue
 
-                        if op_name == "ArraysRemoveByIndex":
-                            ins = node_found.get("Inputs", []) or []
-                            outs = node_found.get("Outputs", []) or []
-                            if len(ins) > 0:
-                                set_port_type(ins[0], new_node_type)
-                            if len(ins) > 1:
-                                set_port_type(ins[1], None, integer=True)
-                            if len(ins) > 2:
-                                set_port_type(ins[2], None, integer=True)
-                            if len(outs) > 0:
-                                set_port_type(outs[0], new_node_type)
-                            continue
+        graph_touched = True
+        print(f"  -> 找到节点: {node_id}")
+        op_type = node_found.get('OperationType')
+        use_string_types = _node_uses_string_schema(node_found)
+        new_gate_value = _coerce_gate_type_value(new_node_type, use_string_types=use_string_types)
+        op_key = _resolve_moduledef_key(op_type, module_defs, moduledef_key_index)
+        module_name = get_friendly_module_name(op_key if op_key is not None else op_type, module_defs)
+
+        # moduledef.json 中可通过 can_modify_data_type 控制该模块是否允许类型修改
+        mod_def = module_defs.get(op_key, {}) if op_key is not None else {}
+        if isinstance(mod_def, dict) and not _as_bool_flag(mod_def.get("can_modify_data_type", True), True):
+            print(f"     skip: module '{module_name}' (OpType: {op_type}) is marked as non-modifiable")
+            continue
 
-                        if op_name == "ArraysFind":
-                            ins = node_found.get("Inputs", []) or []
-                            outs = node_found.get("Outputs", []) or []
-                            if len(ins) > 0:
-                                set_port_type(ins[0], new_node_type)
-                            if len(ins) > 1:
-                                set_port_type(ins[1], elem_type)
-                            if len(ins) > 2:
-                                set_port_type(ins[2], None, integer=True)
-                            if len(ins) > 3:
-                                set_port_type(ins[3], None, integer=True)
-                            if len(outs) > 0:
-                                set_port_type(outs[0], None, integer=True)
+        # --- 逻辑修正点 ---
+        # 1. 无论节点类型如何，只要它是外部IO，就必须先记录下来以便同步
+        conn_id = node_found.get('MechanicConnectionId')
+        if conn_id:
+            print(f"     发现外部连接 '{conn_id}'。将加入同步列表。")
+            connections_to_update[conn_id] = new_node_type
+            modification_made = True # 只要有IO连接要更新，就视为有修改
+
+        # 2. 现在再判断是否要跳过对节点内部的修改
+        if op_type in IGNORED_OPERATION_TYPES:
+            print(f"     跳过对特殊模块 '{module_name}' (ID: {node_id}) 的内部修改。外部连接已记录。")
+            # (可选) 对于 Input/Output，可以只更新它们在chip_graph中的主类型，因为这有时是必要的
+            node_found['GateDataType'] = new_gate_value
+            # 简单的IO节点通常只有一个输出/输入，可以安全地也更新一下
+            for port in node_found.get('Outputs', []): port['DataType'] = new_gate_value
+            for port in node_found.get('Inputs', []): port['DataType'] = new_gate_value
+            continue # 跳过后续复杂的规则应用
+
+        op_name = str(op_type)
+        if op_name in ARRAY_OPERATION_TYPES:
+            # 数组模块：GateDataType 代表 ArrayXxx，自身端口 DataType 需要按“数组元素类型”特殊处理
+            node_found['GateDataType'] = new_gate_value
+            node_found['SaveData'] = get_default_save_data(new_node_type)
+            modification_made = True
+
+            elem_type = _element_type_from_array_type(new_node_type)
+            int_port_type = "IntegerNumber" if use_string_types else 2
+
+            def set_port_type(port: Dict[str, Any], t: int | None, *, integer: bool = False) -> None:
+                if integer:
+                    port['DataType'] = int_port_type
+                    return
+                if t is None:
+                    return
+                port['DataType'] = _coerce_gate_type_value(t, use_string_types=use_string_types)
+
+            if op_name == "ArraysGet":
+                ins = node_found.get("Inputs", []) or []
+                outs = node_found.get("Outputs", []) or []
+                if len(ins) > 0:
+                    set_port_type(ins[0], new_node_type)
+                if len(ins) > 1:
+                    set_port_type(ins[1], None, integer=True)
+                if len(outs) > 0:
+                    set_port_type(outs[0], elem_type)
+                if len(outs) > 1:
+                    set_port_type(outs[1], None, integer=True)
+                continue
+
+            if op_name == "ArraysLength":
+                ins = node_found.get("Inputs", []) or []
+                outs = node_found.get("Outputs", []) or []
+                if len(ins) > 0:
+                    set_port_type(ins[0], new_node_type)
+                if len(outs) > 0:
+                    set_port_type(outs[0], None, integer=True)
+                continue
+
+            if op_name == "ArraysAdd":
+                ins = node_found.get("Inputs", []) or []
+                outs = node_found.get("Outputs", []) or []
+                if len(ins) > 0:
+                    set_port_type(ins[0], new_node_type)
+                if len(ins) > 1:
+                    set_port_type(ins[1], elem_type)
+                if len(ins) > 2:
+                    set_port_type(ins[2], None, integer=True)
+                if len(ins) > 3:
+                    set_port_type(ins[3], None, integer=True)
+                if len(outs) > 0:
+                    set_port_type(outs[0], new_node_type)
+                if len(outs) > 1:
+                    set_port_type(outs[1], None, integer=True)
+                continue
+
+            if op_name == "ArraysSet":
+                ins = node_found.get("Inputs", []) or []
+                outs = node_found.get("Outputs", []) or []
+                if len(ins) > 0:
+                    set_port_type(ins[0], new_node_type)
+                if len(ins) > 1:
+                    set_port_type(ins[1], None, integer=True)
+                if len(ins) > 2:
+                    set_port_type(ins[2], elem_type)
+                if len(ins) > 3:
+                    set_port_type(ins[3], None, integer=True)
+                if len(outs) > 0:
+                    set_port_type(outs[0], new_node_type)
+                continue
+
+            if op_name == "ArraysRemoveAllByValue":
+                ins = node_found.get("Inputs", []) or []
+                outs = node_found.get("Outputs", []) or []
+                if len(ins) > 0:
+                    set_port_type(ins[0], new_node_type)
+                if len(ins) > 1:
+                    set_port_type(ins[1], elem_type)
+                if len(ins) > 2:
+                    set_port_type(ins[2], None, integer=True)
+                if len(outs) > 0:
+                    set_port_type(outs[0], new_node_type)
+                continue
+
+            if op_name == "ArraysRemoveByIndex":
+                ins = node_found.get("Inputs", []) or []
+                outs = node_found.get("Outputs", []) or []
+                if len(ins) > 0:
+                    set_port_type(ins[0], new_node_type)
+                if len(ins) > 1:
+                    set_port_type(ins[1], None, integer=True)
+                if len(ins) > 2:
+                    set_port_type(ins[2], None, integer=True)
+                if len(outs) > 0:
+                    set_port_type(outs[0], new_node_type)
+                continue
+
+            if op_name == "ArraysFind":
+                ins = node_found.get("Inputs", []) or []
+                outs = node_found.get("Outputs", []) or []
+                if len(ins) > 0:
+                    set_port_type(ins[0], new_node_type)
+                if len(ins) > 1:
+                    set_port_type(ins[1], elem_type)
+                if len(ins) > 2:
+                    set_port_type(ins[2], None, integer=True)
+                if len(ins) > 3:
+                    set_port_type(ins[3], None, integer=True)
+                if len(outs) > 0:
+                    set_port_type(outs[0], None, integer=True)
+                continue
+
+            if op_name == "ArraysClear":
+                ins = node_found.get("Inputs", []) or []
+                outs = node_found.get("Outputs", []) or []
+                if len(ins) > 0:
+                    set_port_type(ins[0], new_node_type)
+                if len(ins) > 1:
+                    set_port_type(ins[1], None, integer=True)
+                if len(outs) > 0:
+                    set_port_type(outs[0], new_node_type)
+                continue
+
+        # --- 原有逻辑 (适用于普通模块) ---
+        print(f"     模块类型: '{module_name}' (OpType: {op_type}), 准备更新主类型为 {get_friendly_type_name(new_node_type)}")
+
+        # 更新节点本身的主数据类型和存档数据
+        node_found['GateDataType'] = new_gate_value
+        node_found['SaveData'] = get_default_save_data(new_node_type)
+        modification_made = True
+
+        # 根据规则更新端口
+        rule = rules.get(op_key) if op_key is not None else None
+        if rule:
+            print(f"     应用 '{rule.get('module_name', '未知')}' 规则:")
+
+            def resolve_rule_type(port_rule: Any) -> int | None:
+                if port_rule is None or port_rule == "any":
+                    return None
+                if port_rule == "same":
+                    return new_node_type
+                if isinstance(port_rule, int):
+                    return port_rule
+                if isinstance(port_rule, str):
+                    return TYPE_STR_TO_INT.get(port_rule)
+                return None
+
+            # 更新输入端口
+            if 'Inputs' in node_found and 'inputs' in rule:
+                for i, port in enumerate(node_found['Inputs']):
+                    if i < len(rule['inputs']):
+                        port_rule = rule['inputs'][i]
+                        final_type_int = resolve_rule_type(port_rule)
+                        if final_type_int is None:
                             continue
-
-                        if op_name == "ArraysClear":
-                            ins = node_found.get("Inputs", []) or []
-                            outs = node_found.get("Outputs", []) or []
-                            if len(ins) > 0:
-                                set_port_type(ins[0], new_node_type)
-                            if len(ins) > 1:
-                                set_port_type(ins[1], None, integer=True)
-                            if len(outs) > 0:
-                                set_port_type(outs[0], new_node_type)
+                        port['DataType'] = _coerce_gate_type_value(final_type_int, use_string_types=use_string_types)
+                        print(f"       - 输入端口 {i}: 规则='{port_rule}', 更新为 -> {get_friendly_type_name(final_type_int)}")
+
+            # 更新输出端口
+            if 'Outputs' in node_found and 'outputs' in rule:
+                for i, port in enumerate(node_found['Outputs']):
+                    if i < len(rule['outputs']):
+                        port_rule = rule['outputs'][i]
+                        final_type_int = resolve_rule_type(port_rule)
+                        if final_type_int is None:
                             continue
-
-                    # --- 原有逻辑 (适用于普通模块) ---
-                    print(f"     模块类型: '{module_name}' (OpType: {op_type}), 准备更新主类型为 {get_friendly_type_name(new_node_type)}")
-
-                    # 更新节点本身的主数据类型和存档数据
-                    node_found['GateDataType'] = new_gate_value
-                    node_found['SaveData'] = get_default_save_data(new_node_type)
-                    modification_made = True
-
-                    # 根据规则更新端口
-                    rule = rules.get(op_key) if op_key is not None else None
-                    if rule:
-                        print(f"     应用 '{rule.get('module_name', '未知')}' 规则:")
-
-                        def resolve_rule_type(port_rule: Any) -> int | None:
-                            if port_rule is None or port_rule == "any":
-                                return None
-                            if port_rule == "same":
-                                return new_node_type
-                            if isinstance(port_rule, int):
-                                return port_rule
-                            if isinstance(port_rule, str):
-                                return TYPE_STR_TO_INT.get(port_rule)
-                            return None
-
-                        # 更新输入端口
-                        if 'Inputs' in node_found and 'inputs' in rule:
-                            for i, port in enumerate(node_found['Inputs']):
-                                if i < len(rule['inputs']):
-                                    port_rule = rule['inputs'][i]
-                                    final_type_int = resolve_rule_type(port_rule)
-                                    if final_type_int is None:
-                                        continue
-                                    port['DataType'] = _coerce_gate_type_value(final_type_int, use_string_types=use_string_types)
-                                    print(f"       - 输入端口 {i}: 规则='{port_rule}', 更新为 -> {get_friendly_type_name(final_type_int)}")
-
-                        # 更新输出端口
-                        if 'Outputs' in node_found and 'outputs' in rule:
-                            for i, port in enumerate(node_found['Outputs']):
-                                if i < len(rule['outputs']):
-                                    port_rule = rule['outputs'][i]
-                                    final_type_int = resolve_rule_type(port_rule)
-                                    if final_type_int is None:
-                                        continue
-                                    port['DataType'] = _coerce_gate_type_value(final_type_int, use_string_types=use_string_types)
-                                    print(f"       - 输出端口 {i}: 规则='{port_rule}', 更新为 -> {get_friendly_type_name(final_type_int)}")
-                    else:
-                        # 如果没有找到规则，优先尊重 moduledef 中的固定端口类型。
-                        print(
-                            f"     警告: 未找到 OpType {op_type} 的特定规则。将优先使用 moduledef 端口定义，Dynamic/未知端口才回退到 {get_friendly_type_name(new_node_type)}。"
-                        )
-                        mod_def_inputs = mod_def.get("inputs", []) if isinstance(mod_def, dict) else []
-                        mod_def_outputs = mod_def.get("outputs", []) if isinstance(mod_def, dict) else []
-
-                        for i, port in enumerate(node_found.get('Inputs', [])):
-                            declared_type = None
-                            if i < len(mod_def_inputs):
-                                declared_type = _type_from_moduledef_port(mod_def_inputs[i])
-                            port['DataType'] = _coerce_gate_type_value(
-                                declared_type if declared_type is not None else new_node_type,
-                                use_string_types=use_string_types,
-                            )
-
-                        for i, port in enumerate(node_found.get('Outputs', [])):
-                            declared_type = None
-                            if i < len(mod_def_outputs):
-                                declared_type = _type_from_moduledef_port(mod_def_outputs[i])
-                            port['DataType'] = _coerce_gate_type_value(
-                                declared_type if declared_type is not None else new_node_type,
-                                use_string_types=use_string_types,
-                            )
-                    
-                    # (这部分逻辑已移到前面)
-                    # conn_id = node_found.get('MechanicConnectionId') ...
-
-                meta_data['stringValue'] = json.dumps(graph_data, separators=(',', ':'))
-                break 
-
-        if not connections_to_update and modification_made:
-            print("\n警告: 进行了内部修改，但未找到需要同步的外部连接。可能修改的是非IO节点。")
-
-        # ... 后续的 阶段 2 和 阶段 3 无需改动 ...
-        print("\n--- 阶段 2: 同步 chip_inputs / chip_outputs (编辑器UI) ---")
-        # ... (代码不变)
-        for meta_data in meta_datas:
-            if meta_data.get('key') in ['chip_inputs', 'chip_outputs']:
-                key_name = meta_data['key']
-                io_list_str = meta_data.get('stringValue')
-                if not io_list_str: continue
-
-                io_list = json.loads(io_list_str)
-                updated = False
-                for item in io_list:
-                    if item.get('Key') in connections_to_update:
-                        new_type = connections_to_update[item.get('Key')]
-                        print(f"  -> 在 {key_name} 中更新 '{item.get('Key')}' 的类型为 {get_friendly_type_name(new_type)}")
-                        if isinstance(item.get("GateDataType"), str):
-                            item['GateDataType'] = TYPE_INT_TO_STR.get(new_type, new_type)
-                        else:
-                            item['GateDataType'] = new_type
-                        item['SerializedValue'] = get_default_serialized_value(new_type)
-                        updated = True
-                if updated:
-                    # 注意：chip_inputs/outputs最好保持格式化，方便阅读
-                    meta_data['stringValue'] = json.dumps(io_list, indent=2)
-
-        print("\n--- 阶段 3: 同步 mechanicSerializedInputs (游戏运行时) ---")
-        # ... (代码不变)
-        for mechanic_item in mechanic_data_list:
-            mech_inputs_str = mechanic_item.get('mechanicSerializedInputs')
-            if not mech_inputs_str: continue
-
-            mech_inputs = json.loads(mech_inputs_str)
-            updated = False
-            for item in mech_inputs:
-                if item.get('Key') in connections_to_update:
-                    new_type = connections_to_update[item.get('Key')]
-                    print(f"  -> 在 mechanicSerializedInputs 中更新 '{item.get('Key')}' 的类型为 {get_friendly_type_name(new_type)}")
-                    if isinstance(item.get("DataType"), str):
-                        item['DataType'] = TYPE_INT_TO_STR.get(new_type, new_type)
-                    else:
-                        item['DataType'] = new_type
-                    item['GateData'] = get_default_gate_data(new_type)
-                    updated = True
-            if updated:
-                # 这个通常不需要格式化
-                mechanic_item['mechanicSerializedInputs'] = json.dumps(mech_inputs)
-
+                        port['DataType'] = _coerce_gate_type_value(final_type_int, use_string_types=use_string_types)
+                        print(f"       - 输出端口 {i}: 规则='{port_rule}', 更新为 -> {get_friendly_type_name(final_type_int)}")
+        else:
+            # 如果没有找到规则，优先尊重 moduledef 中的固定端口类型。
+            print(
+                f"     警告: 未找到 OpType {op_type} 的特定规则。将优先使用 moduledef 端口定义，Dynamic/未知端口才回退到 {get_friendly_type_name(new_node_type)}。"
+            )
+            mod_def_inputs = mod_def.get("inputs", []) if isinstance(mod_def, dict) else []
+            mod_def_outputs = mod_def.get("outputs", []) if isinstance(mod_def, dict) else []
+
+            for i, port in enumerate(node_found.get('Inputs', [])):
+                declared_type = None
+                if i < len(mod_def_inputs):
+                    declared_type = _type_from_moduledef_port(mod_def_inputs[i])
+                port['DataType'] = _coerce_gate_type_value(
+                    declared_type if declared_type is not None else new_node_type,
+                    use_string_types=use_string_types,
+                )
+
+            for i, port in enumerate(node_found.get('Outputs', [])):
+                declared_type = None
+                if i < len(mod_def_outputs):
+                    declared_type = _type_from_moduledef_port(mod_def_outputs[i])
+                port['DataType'] = _coerce_gate_type_value(
+                    declared_type if declared_type is not None else new_node_type,
+                    use_string_types=use_string_types,
+                )
+
+        # (这部分逻辑已移到前面)
+        # conn_id = node_found.get('MechanicConnectionId') ...
+
+    if graph_touched:
+        doc.mark_dirty('chip_graph')
+
+    if not connections_to_update and modification_made:
+        print("\n警告: 进行了内部修改，但未找到需要同步的外部连接。可能修改的是非IO节点。")
+
+    print("\n--- 阶段 2: 同步 chip_inputs / chip_outputs (编辑器UI) ---")
+    for key_name in ('chip_inputs', 'chip_outputs'):
+        io_list = doc.section(key_name)
+        if not io_list: continue
+
+        updated = False
+        for item in io_list:
+            if item.get('Key') in connections_to_update:
+                new_type = connections_to_update[item.get('Key')]
+                print(f"  -> 在 {key_name} 中更新 '{item.get('Key')}' 的类型为 {get_friendly_type_name(new_type)}")
+                if isinstance(item.get("GateDataType"), str):
+                    item['GateDataType'] = TYPE_INT_TO_STR.get(new_type, new_type)
+                else:
+                    item['GateDataType'] = new_type
+                item['SerializedValue'] = get_default_serialized_value(new_type)
+                updated = True
+        if updated:
+            # 注意：chip_inputs/outputs最好保持格式化，方便阅读
+            doc.mark_dirty(key_name, indent=2)
+
+    print("\n--- 阶段 3: 同步 mechanicSerializedInputs (游戏运行时) ---")
+    for mechanic_item in doc.mechanic_data:
+        mech_inputs_str = mechanic_item.get('mechanicSerializedInputs')
+        if not mech_inputs_str: continue
+
+        mech_inputs = json.loads(mech_inputs_str)
+        updated = False
+        for item in mech_inputs:
+            if item.get('Key') in connections_to_update:
+                new_type = connections_to_update[item.get('Key')]
+                print(f"  -> 在 mechanicSerializedInputs 中更新 '{item.get('Key')}' 的类型为 {get_friendly_type_name(new_type)}")
+                if isinstance(item.get("DataType"), str):
+                    item['DataType'] = TYPE_INT_TO_STR.get(new_type, new_type)
+                else:
+                    item['DataType'] = new_type
+                item['GateData'] = get_default_gate_data(new_type)
+                updated = True
+        if updated:
+            # 这个通常不需要格式化
+            mechanic_item['mechanicSerializedInputs'] = json.dumps(mech_inputs)
 
     if not modification_made:
         print("警告: 根据指令，没有执行任何修改。请检查节点ID是否正确。")
 
-    return main_data
+    if doc is not game_data:
+        doc.flush()
+    return game_data
 
 # --- 程序主入口 (用于独立运行) ---
 if __name__ == "__main__":
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+src.build_context
+=================
+
+一次构建（DSL -> .melsave）用到的全部路径与选项。
+
+过去各阶段直接引用 `src.config` 中的模块级常量（output/graph.json、output/ungraph.json 等），
+归档阶段还按当前工作目录查找 MetaData / Icon，同一份检出里同时跑两次构建就会互相覆盖。
+现在 `src.pipeline` 的各个 run_* 函数都接收一个 BuildContext：
+- 输入文件（DSL、moduledef.json、底包存档、规则、MetaData / Icon）默认取自项目根目录，与 CWD 无关；
+- 所有写出的文件（调试中间产物、性能报告、布局缓存、.melsave）都落在 output_dir / cache_dir 下，
+  给每次构建不同的 output_dir 即可在线程或进程中并发执行而不争用同一个文件。
+
+BuildContext 是不可变的，派生新上下文请用 `ctx.replace(...)`。
+"""
+
+from __future__ import annotations
+
+import dataclasses
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Optional
+
+from src.config import (
+    CACHE_DIR,
+    CONNECT_OUT_PATH,
+    DATA_PATH,
+    DSL_INPUT_PATH,
+    FINAL_SAVE_PATH,
+    GRAPH_PATH,
+    MODIFIED_SAVE_PATH,
+    MODULE_DEF_PATH,
+    OUTPUT_DIR,
+    PROFILE_CSV_PATH,
+    PROFILE_JSON_PATH,
+    PROFILE_STATS_DIR,
+    ROOT_DIR,
+    RULES_PATH,
+)
+from src.layout_cache import LAYOUT_CACHE_FILENAME
+
+
+@dataclass(frozen=True)
+class BuildContext:
+    # ---- 输入 ----
+    dsl_path: Path = DSL_INPUT_PATH
+    module_def_path: Path = MODULE_DEF_PATH
+    data_path: Path = DATA_PATH
+    rules_path: Path = RULES_PATH
+    metadata_path: Path = ROOT_DIR / "MetaData"
+    icon_path: Path = ROOT_DIR / "Icon"
+
+    # ---- 输出 ----
+    output_dir: Path = OUTPUT_DIR
+    # 模块目录与布局缓存所在目录；为 None 时不读写任何磁盘缓存
+    cache_dir: Optional[Path] = CACHE_DIR
+    # .melsave 文件名（不含扩展名）；为 None 时每次生成随机文件名
+    melsave_name: Optional[str] = None
+
+    # ---- 选项 ----
+    debug_artifacts: bool = False
+    verbosity: int = 0
+    layout_cache: bool = True
+    cse: bool = True
+    fold: bool = True
+    dce: bool = True
+    dce_report: bool = False
+    rebalance: bool = False
+    profile: bool = False
+    profile_cprofile: bool = False
+
+    def replace(self, **changes: Any) -> "BuildContext":
+        return dataclasses.replace(self, **changes)
+
+    @classmethod
+    def for_output_dir(cls, output_dir: Path | str, **changes: Any) -> "BuildContext":
+        """输出与缓存都放在 output_dir 下的上下文（并发构建时每个构建给一个独立目录）。"""
+        output_dir = Path(output_dir)
+        return cls(output_dir=output_dir, cache_dir=output_dir / ".cache", **changes)
+
+    # ---- 派生路径（文件名与 src.config 中的默认路径一致，只是换到 output_dir 下）----
+
+    @property
+    def graph_path(self) -> Path:
+        return self.output_dir / GRAPH_PATH.name
+
+    @property
+    def connect_out_path(self) -> Path:
+        return self.output_dir / CONNECT_OUT_PATH.name
+
+    @property
+    def modified_save_path(self) -> Path:
+        return self.output_dir / MODIFIED_SAVE_PATH.name
+
+    @property
+    def final_save_path(self) -> Path:
+        return self.output_dir / FINAL_SAVE_PATH.name
+
+    @property
+    def profile_json_path(self) -> Path:
+        return self.output_dir / PROFILE_JSON_PATH.name
+
+    @property
+    def profile_csv_path(self) -> Path:
+        return self.output_dir / PROFILE_CSV_PATH.name
+
+    @property
+    def profile_stats_dir(self) -> Path:
+        return self.output_dir / PROFILE_STATS_DIR.name
+
+    @property
+    def layout_cache_path(self) -> Optional[Path]:
+        """不使用布局缓存（layout_cache=False 或没有 cache_dir）时为 None。"""
+        if not self.layout_cache or self.cache_dir is None:
+            return None
+        return self.cache_dir / LAYOUT_CACHE_FILENAME
+
+    def ensure_output_dir(self) -> None:
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+
+
+__all__ = ["BuildContext"]
@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+src.chip_stats
+==============
+
+芯片静态分析（`python main.py chip-stats <文件>`）。
+
+读取转换器产出的 graph.json，或存档（Data.json / ungraph.json / .melsave）中的 chip_graph，
+在进游戏之前给出：
+- 按 OperationType 统计的门数量；
+- 关键路径深度（最长的源 -> 汇路径上的节点数）及路径本身，以及布局的列数
+  （复用 layout_chip.parse_graph / calculate_alap_layers）；
+- 扇出最大的节点；
+- 按模块开销表加权的每 tick 开销估算；已知 chip_tps 时再换算为每秒开销。
+
+开销表是相对单位的经验估算（普通运算门记 1），不是游戏内的实测耗时；
+可通过 `--costs` 传入 {模块名: 开销} 的 JSON 覆盖其中任意条目。
+"""
+
+from __future__ import annotations
+
+import argparse
+import heapq
+import json
+import sys
+import zipfile
+from collections import Counter, defaultdict
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+from layout_chip import calculate_alap_layers, parse_graph
+from src.error_handler import ChipSynthesisError, FileIOError, handle_error
+from src.graph_passes.common import resolve_chip_entries, resolve_module_names
+from src.module_catalog import ModuleCatalog, load_module_catalog
+from src.save_document import SaveDocument
+
+DEFAULT_COST = 1.0
+
+# 模块名（datatype_map_nodename）-> 每 tick 相对开销；未列出的模块记 DEFAULT_COST
+DEFAULT_MODULE_COSTS: Dict[str, float] = {
+    # 不参与运算
+    "Constant": 0.0, "Pi": 0.0, "E": 0.0, "Identity": 0.0, "Input": 0.0, "Output": 0.0, "Exit": 0.0,
+    # 超越函数 / 三角
+    "Pow": 2.0, "Sqrt": 2.0, "Exp": 2.0, "ExpPow": 2.0, "Log": 2.0,
+    "Sin": 2.0, "Cos": 2.0, "Tan": 2.0, "Ctan": 2.0, "Asin": 2.0, "Acos": 2.0, "Atan": 2.0, "Actan": 2.0,
+    "VectorRotate": 2.0, "VectorAngleBetween": 2.0, "Normalize": 2.0, "Magnitude": 2.0,
+    "RgbToHsv": 2.0, "HsvToRgb": 2.0,
+    # 字符串（分配新字符串）
+    "ToString": 3.0, "ToNumber": 3.0, "ToAscii": 3.0, "StringFind": 3.0, "StringReplace": 3.0,
+    "StringRepeat": 3.0, "Substring": 3.0, "StringTrim": 3.0, "StringLowercase": 3.0,
+    "StringUppercase": 3.0, "StringReverse": 3.0,
+    # 数组
+    "ArraysAdd": 4.0, "ArraysClear": 4.0, "ArraysFind": 4.0, "ArraysGet": 2.0, "ArraysLength": 2.0,
+    "ArraysRemoveAllByValue": 4.0, "ArraysRemoveByIndex": 4.0, "ArraysSet": 4.0,
+    # 实体读取
+    "Position": 4.0, "Velocity": 4.0, "AngularVelocity": 4.0, "AngleEntity": 4.0, "Mass": 4.0,
+    "MassCenter": 4.0, "Size": 4.0, "Temperature": 4.0, "Elevation": 4.0, "EntityNormal": 4.0,
+    "VelocityAtPosition": 4.0, "WorldPositionToLocal": 4.0, "WorldAngleToLocal": 4.0,
+    "LocalPositionToWorld": 4.0, "LocalAngleToWorld": 4.0, "IDToEntity": 4.0, "Collision": 4.0,
+    # 物理写入
+    "AddForce": 6.0, "AddForceAtPosition": 6.0, "AddAngularForceEntity": 6.0,
+    "Follow": 6.0, "LookAtEntity": 6.0,
+}
+
+
+@dataclass
+class ChipStats:
+    """一次分析的结果；to_dict() 即 `--json` 输出的内容。"""
+    source: str
+    node_count: int
+    edge_count: int
+    gates_by_type: List[Dict[str, Any]] = field(default_factory=list)
+    depth: int = 0
+    critical_path: List[Dict[str, Any]] = field(default_factory=list)
+    layout_columns: int = 0
+    fan_out: List[Dict[str, Any]] = field(default_factory=list)
+    cost_per_tick: float = 0.0
+    chip_tps: Optional[int] = None
+    cost_per_second: Optional[float] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+@dataclass
+class ChipGraph:
+    """与输入格式无关的内部表示：节点、模块名、OperationType 与邻接表。"""
+    node_ids: List[str]
+    modules: Dict[str, str]
+    op_types: Dict[str, Any]
+    predecessors: Dict[str, List[str]]
+    successors: Dict[str, List[str]]
+    chip_tps: Optional[int] = None
+
+
+# =========================== 读取 ===========================
+
+def read_chip_file(path: Path) -> Any:
+    """读取 JSON 文件；.melsave 则读取压缩包中的 Data。"""
+    try:
+        if path.suffix.lower() == ".melsave":
+            with zipfile.ZipFile(path) as zf:
+                return json.loads(zf.read("Data").decode("utf-8"))
+        with path.open("r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, KeyError, zipfile.BadZipFile, ValueError) as e:
+        raise FileIOError("读取芯片文件失败", file_path=str(path), original_error=e)
+
+
+def _from_converter_graph(graph: dict, catalog: ModuleCatalog) -> ChipGraph:
+    names = resolve_module_names(graph, catalog)
+    entries = resolve_chip_entries(graph, catalog)
+    node_ids = [n["id"] for n in graph.get("nodes", [])]
+    known = set(node_ids)
+    preds: Dict[str, List[str]] = defaultdict(list)
+    succs: Dict[str, List[str]] = defaultdict(list)
+    for e in graph.get("edges", []):
+        src, dst = e["from_node"], e["to_node"]
+        if src in known and dst in known:
+            succs[src].append(dst)
+            preds[dst].append(src)
+    modules = {}
+    op_types = {}
+    for n in graph.get("nodes", []):
+        entry = entries.get(n["id"])
+        modules[n["id"]] = names.get(n["id"]) or str(n.get("type"))
+        op_types[n["id"]] = entry.get("op_type") if entry else None
+    return ChipGraph(node_ids, modules, op_types, preds, succs)
+
+
+def _view_model_name(node_id: str) -> str:
+    """moduledef 中没有的节点（如输出节点 Exit）从 Id 前缀取名："ExitNodeViewModel : ..." -> "Exit"。"""
+    prefix = str(node_id).split(" : ", 1)[0]
+    return prefix[: -len("NodeViewModel")] if prefix.endswith("NodeViewModel") else ""
+
+
+def _from_save(data: Any, catalog: ModuleCatalog) -> ChipGraph:
+    doc = SaveDocument.wrap(data)
+    nodes = doc.nodes
+    preds, succs, node_ids = parse_graph(nodes)
+    modules = {}
+    op_types = {}
+    for node in nodes:
+        op = node.get("OperationType")
+        module = catalog.module(op) or {}
+        modules[node["Id"]] = (
+            (module.get("source_info") or {}).get("datatype_map_nodename")
+            or _view_model_name(node["Id"])
+            or str(op)
+        )
+        op_types[node["Id"]] = op
+    tps_meta = doc.meta("chip_tps")
+    tps = tps_meta.get("intValue") if tps_meta else None
+    return ChipGraph(node_ids, modules, op_types, preds, succs, chip_tps=tps or None)
+
+
+def load_chip_graph(path: Path | str, catalog: ModuleCatalog) -> ChipGraph:
+    """读取 graph.json（含 nodes / edges）或存档（含 saveObjectContainers），统一为内部表示。"""
+    data = read_chip_file(Path(path))
+    if isinstance(data, dict) and isinstance(data.get("nodes"), list) and isinstance(data.get("edges"), list):
+        return _from_converter_graph(data, catalog)
+    if isinstance(data, dict) and "saveObjectContainers" in data:
+        return _from_save(data, catalog)
+    raise FileIOError("无法识别的芯片文件：既不是 graph.json，也不是存档", file_path=str(path))
+
+
+# =========================== 分析 ===========================
+
+def _longest_path(chip: ChipGraph) -> List[str]:
+    """按拓扑序求最长路径（节点数最多）；环上的节点不参与。"""
+    position = {nid: i for i, nid in enumerate(chip.node_ids)}
+    indegree = {nid: len(chip.predecessors.get(nid, ())) for nid in chip.node_ids}
+    ready = [position[nid] for nid, d in indegree.items() if d == 0]
+    heapq.heapify(ready)
+    depth: Dict[str, int] = {}
+    best_pred: Dict[str, Optional[str]] = {}
+    while ready:
+        nid = chip.node_ids[heapq.heappop(ready)]
+        preds = [p for p in chip.predecessors.get(nid, ()) if p in depth]
+        best = max(preds, key=lambda p: depth[p], default=None)
+        depth[nid] = depth[best] + 1 if best is not None else 1
+        best_pred[nid] = best
+        for nxt in chip.successors.get(nid, ()):
+            indegree[nxt] -= 1
+            if indegree[nxt] == 0:
+                heapq.heappush(ready, position[nxt])
+    if not depth:
+        return []
+    node: Optional[str] = max(depth, key=lambda n: (depth[n], -position[n]))
+    path: List[str] = []
+    while node is not None:
+        path.append(node)
+        node = best_pred[node]
+    return path[::-1]
+
+
+def analyze_chip(
+    chip: ChipGraph,
+    *,
+    source: str = "",
+    costs: Optional[Dict[str, float]] = None,
+    top: int = 10,
+    tps: Optional[int] = None,
+) -> ChipStats:
+    """统计门数量、关键路径、扇出与每 tick 开销。"""
+    cost_table = {**DEFAULT_MODULE_COSTS, **(costs or {})}
+
+    counts = Counter(chip.modules[nid] for nid in chip.node_ids)
+    op_of_module = {chip.modules[nid]: chip.op_types.get(nid) for nid in chip.node_ids}
+    gates = [
+        {
+            "operation_type": op_of_module[module],
+            "module": module,
+            "count": count,
+            "cost": count * cost_table.get(module, DEFAULT_COST),
+        }
+        for module, count in sorted(counts.items(), key=lambda kv: (-kv[1], kv[0]))
+    ]
+
+    path = _longest_path(chip)
+    layers = calculate_alap_layers(
+        chip.node_ids, defaultdict(list, chip.predecessors), defaultdict(list, chip.successors)
+    )
+
+    fan_out = sorted(
+        (
+            {"id": nid, "module": chip.modules[nid], "fan_out": len(chip.successors.get(nid, ()))}
+            for nid in chip.node_ids
+            if chip.successors.get(nid)
+        ),
+        key=lambda item: -item["fan_out"],
+    )[:top]
+
+    cost_per_tick = sum(g["cost"] for g in gates)
+    chip_tps = tps if tps is not None else chip.chip_tps
+    return ChipStats(
+        source=source,
+        node_count=len(chip.node_ids),
+        edge_count=sum(len(v) for v in chip.successors.values()),
+        gates_by_type=gates,
+        depth=len(path),
+        critical_path=[{"id": nid, "module": chip.modules[nid]} for nid in path],
+        layout_columns=len(layers),
+        fan_out=fan_out,
+        cost_per_tick=cost_per_tick,
+        chip_tps=chip_tps,
+        cost_per_second=cost_per_tick * chip_tps if chip_tps else None,
+    )
+
+
+def format_report(stats: ChipStats) -> str:
+    """人类可读的文本报告。"""
+    lines = [
+        f"芯片统计：{stats.source}",
+        f"  节点 {stats.node_count} 个，连线 {stats.edge_count} 条",
+        f"  关键路径深度 {stats.depth}，布局列数 {stats.layout_columns}",
+        f"  每 tick 开销估算 {stats.cost_per_tick:g}",
+    ]
+    if stats.cost_per_second is not None:
+        lines.append(f"  chip_tps = {stats.chip_tps}，每秒开销估算 {stats.cost_per_second:g}")
+    lines.append("  按 OperationType 统计：")
+    for g in stats.gates_by_type:
+        lines.append(f"    {g['module']:<24} op={g['operation_type']!s:<6} x{g['count']:<5} 开销 {g['cost']:g}")
+    if stats.critical_path:
+        lines.append("  关键路径：" + " -> ".join(item["module"] for item in stats.critical_path))
+    if stats.fan_out:
+        lines.append("  扇出最大的节点：")
+        for item in stats.fan_out:
+            lines.append(f"    {item['fan_out']:>4}  {item['module']}  {item['id']}")
+    return "\n".join(lines)
+
+
+# =========================== 命令行 ===========================
+
+def build_arg_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="main.py chip-stats",
+        description="统计 graph.json 或存档中芯片的门数量、关键路径、扇出与每 tick 开销",
+    )
+    parser.add_argument("path", help="graph.json，或 Data.json / ungraph.json / .melsave 存档")
+    parser.add_argument("--json", action="store_true", help="以 JSON 输出到标准输出")
+    parser.add_argument("-o", "--output", help="另外把 JSON 结果写到该文件")
+    parser.add_argument("--costs", help="模块开销表 JSON（{模块名: 开销}），覆盖默认值")
+    parser.add_argument("--tps", type=int, help="覆盖存档中的 chip_tps")
+    parser.add_argument("--top", type=int, default=10, help="列出扇出最大的前 N 个节点（默认 10）")
+    return parser
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    args = build_arg_parser().parse_args(argv)
+    try:
+        costs = read_chip_file(Path(args.costs)) if args.costs else None
+        catalog = load_module_catalog()
+        chip = load_chip_graph(args.path, catalog)
+        stats = analyze_chip(chip, source=str(args.path), costs=costs, top=args.top, tps=args.tps)
+        payload = json.dumps(stats.to_dict(), ensure_ascii=False, indent=2)
+        if args.output:
+            try:
+                Path(args.output).write_text(payload, encoding="utf-8")
+            except OSError as e:
+                raise FileIOError("写入统计结果失败", file_path=args.output, original_error=e)
+    except ChipSynthesisError as e:
+        handle_error(e)
+        return 1
+    print(payload if args.json else format_report(stats))
+    return 0
+
+
+__all__ = [
+    "ChipGraph",
+    "ChipStats",
+    "DEFAULT_MODULE_COSTS",
+    "read_chip_file",
+    "load_chip_graph",
+    "analyze_chip",
+    "format_report",
+    "main",
+]
+
+
+if __name__ == "__main__":
+    sys.exit(main())
+
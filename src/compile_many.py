@@ -0,0 +1,321 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+src.compile_many
+================
+
+批量并行编译（`python main.py compile-many <目录 | glob | 文件>...`）。
+
+把多份 DSL 设计分别编译为 .melsave，每份一个任务，在 ProcessPoolExecutor 中并行执行：
+- 每个任务有独立的输出目录 `<输出根目录>/<任务名>/`（即该任务 BuildContext 的 output_dir），
+  其中包含 `<任务名>.melsave`、该任务的完整日志 `build.log` 以及任务私有的布局缓存
+  （并发任务之间不会互相覆盖）；
+- 模块目录在主进程中加载一次（顺带预热 output/.cache 下的磁盘缓存），经进程池的
+  initializer 交给每个工作进程，所有任务共享这一份只读的目录，任务代码不得修改它；
+- 每个任务单独给出状态与退出码（0 成功；1 编译失败；2 工作进程异常退出），
+  汇总写到 `<输出根目录>/summary.json`。任一任务失败时命令以 1 退出。
+
+输入可以是目录（取其中的 *.py）、glob（支持 `**`）或单个文件；同名文件会自动加序号区分任务名。
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import glob
+import json
+import os
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Set
+
+from archive_creator import run_archive_creation_stage
+from src.build_context import BuildContext
+from src.config import OUTPUT_DIR
+from src.error_handler import ChipSynthesisError, FileIOError, PipelineError, handle_error
+from src.module_catalog import ModuleCatalog
+from src.pipeline import build_save_document
+from src.utils import load_json
+
+DEFAULT_BATCH_DIR = OUTPUT_DIR / "batch"
+JOB_LOG_FILENAME = "build.log"
+SUMMARY_FILENAME = "summary.json"
+
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_CRASHED = 2
+
+
+@dataclass
+class CompileJob:
+    name: str
+    source: Path
+    out_dir: Path
+
+
+@dataclass
+class JobResult:
+    name: str
+    source: str
+    exit_code: int
+    seconds: float = 0.0
+    melsave: Optional[str] = None
+    log: Optional[str] = None
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.exit_code == EXIT_OK
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+# ----------------------------------------------------------------------
+# 任务规划
+# ----------------------------------------------------------------------
+
+def discover_sources(patterns: Sequence[str]) -> List[Path]:
+    """把目录 / glob / 文件展开为去重后的 DSL 文件列表（保持给出的顺序）。"""
+    found: List[Path] = []
+    seen = set()
+    for pattern in patterns:
+        path = Path(pattern)
+        if path.is_dir():
+            matches = sorted(path.glob("*.py"))
+        elif glob.has_magic(pattern):
+            matches = sorted(Path(p) for p in glob.glob(pattern, recursive=True))
+        else:
+            matches = [path]
+        if not matches:
+            raise FileIOError("没有找到匹配的 DSL 文件", file_path=pattern)
+        for match in matches:
+            if not match.is_file():
+                raise FileIOError("DSL 文件不存在", file_path=str(match))
+            key = match.resolve()
+            if key not in seen:
+                seen.add(key)
+                found.append(match)
+    return found
+
+
+def plan_jobs(sources: Sequence[Path], out_root: Path) -> List[CompileJob]:
+    """
+    以文件名（不含扩展名）作为任务名；重名时依次加 _2、_3 后缀，直到得到未被占用的名字
+    （a/x.py、b/x.py、c/x_2.py 得到 x、x_2、x_2_2）。
+    名字按不区分大小写比较，避免在 Windows 上输出到同一目录。
+    """
+    jobs: List[CompileJob] = []
+    assigned: Set[str] = set()
+    for source in sources:
+        name = candidate = source.stem
+        suffix = 1
+        while name.casefold() in assigned:
+            suffix += 1
+            name = f"{candidate}_{suffix}"
+        assigned.add(name.casefold())
+        jobs.append(CompileJob(name=name, source=source, out_dir=out_root / name))
+    return jobs
+
+
+# ----------------------------------------------------------------------
+# 工作进程
+# ----------------------------------------------------------------------
+
+# 工作进程内的共享状态，由进程池 initializer（init_worker_state）设置一次，之后只读
+WORKER_STATE: Dict[str, Any] = {}
+
+
+def init_worker_state(
+    state: Dict[str, Any], setup: Optional[Callable[[Dict[str, Any]], None]] = None
+) -> None:
+    """
+    进程池 initializer：把主进程加载好的热数据（模块目录、规则等）放入本进程的 WORKER_STATE。
+    setup 随后在工作进程内调用，用于创建每个进程私有的对象（须为模块级函数，才能传给子进程）。
+    编译服务（src.compile_server）也使用这里的进程池初始化方式。
+    """
+    WORKER_STATE.clear()
+    WORKER_STATE.update(state)
+    if setup is not None:
+        setup(WORKER_STATE)
+
+
+def job_context(job: CompileJob, base_ctx: BuildContext) -> BuildContext:
+    """任务的构建上下文：输入与选项取自 base_ctx，输出与布局缓存都放在任务目录下。"""
+    return base_ctx.replace(
+        dsl_path=job.source,
+        output_dir=job.out_dir,
+        cache_dir=job.out_dir,
+        melsave_name=job.name,
+        debug_artifacts=False,
+        profile=False,
+        profile_cprofile=False,
+    )
+
+
+def run_job(job: CompileJob) -> JobResult:
+    """在当前进程中编译一个任务；输出全部写入任务目录下的 build.log，异常转为失败结果。"""
+    started = time.perf_counter()
+    job.out_dir.mkdir(parents=True, exist_ok=True)
+    ctx = job_context(job, WORKER_STATE["base_ctx"])
+    log_path = job.out_dir / JOB_LOG_FILENAME
+    melsave_path = ctx.output_dir / f"{ctx.melsave_name}.melsave"
+    result = JobResult(name=job.name, source=str(job.source), exit_code=EXIT_FAILED, log=str(log_path))
+
+    with log_path.open("w", encoding="utf-8") as log, \
+            contextlib.redirect_stdout(log), contextlib.redirect_stderr(log):
+        try:
+            save = build_save_document(ctx, WORKER_STATE["catalog"], WORKER_STATE["rules"])
+            if not run_archive_creation_stage(save.flush(), ctx):
+                raise PipelineError("创建 .melsave 归档失败", stage="归档")
+        except ChipSynthesisError as e:
+            result.error = str(e)
+            print(f"\n❌ {e}")
+        except Exception as e:  # noqa: BLE001 - 任务之间互不影响，任何异常都只记为该任务失败
+            result.error = f"{type(e).__name__}: {e}"
+            traceback.print_exc()
+        else:
+            result.exit_code = EXIT_OK
+            result.melsave = str(melsave_path)
+
+    result.seconds = time.perf_counter() - started
+    return result
+
+
+# ----------------------------------------------------------------------
+# 调度
+# ----------------------------------------------------------------------
+
+def compile_many(
+    jobs: Sequence[CompileJob],
+    *,
+    workers: Optional[int] = None,
+    base_ctx: Optional[BuildContext] = None,
+    catalog: Optional[ModuleCatalog] = None,
+    on_result=None,
+) -> List[JobResult]:
+    """
+    并行编译全部任务，按任务顺序返回结果。
+    base_ctx 提供底包存档、模块定义等输入路径与 fold / cse / dce / rebalance 等选项，
+    每个任务在此基础上换成自己的 DSL 与输出目录（见 job_context）；
+    on_result(result) 在每个任务完成时于主进程中调用，用于实时输出进度。
+    """
+    base_ctx = base_ctx or BuildContext()
+    catalog = catalog or ModuleCatalog.load(base_ctx.module_def_path, cache_dir=base_ctx.cache_dir)
+    rules = load_json(base_ctx.rules_path, "数据类型规则文件")
+    results: Dict[str, JobResult] = {}
+    workers = max(1, min(workers or os.cpu_count() or 1, len(jobs) or 1))
+
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=init_worker_state,
+        initargs=({"catalog": catalog, "rules": rules, "base_ctx": base_ctx},),
+    ) as pool:
+        futures = {pool.submit(run_job, job): job for job in jobs}
+        for future in as_completed(futures):
+            job = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:  # noqa: BLE001 - 例如工作进程被杀导致的 BrokenProcessPool
+                result = JobResult(
+                    name=job.name,
+                    source=str(job.source),
+                    exit_code=EXIT_CRASHED,
+                    error=f"工作进程异常退出: {type(e).__name__}: {e}",
+                )
+            results[job.name] = result
+            if on_result is not None:
+                on_result(result)
+    return [results[job.name] for job in jobs]
+
+
+def write_summary(results: Sequence[JobResult], out_root: Path) -> Path:
+    path = out_root / SUMMARY_FILENAME
+    payload = {
+        "total": len(results),
+        "failed": sum(1 for r in results if not r.ok),
+        "jobs": [r.to_dict() for r in results],
+    }
+    try:
+        out_root.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
+    except OSError as e:
+        raise FileIOError("写入批量编译汇总失败", file_path=str(path), original_error=e)
+    return path
+
+
+# ----------------------------------------------------------------------
+# 命令行
+# ----------------------------------------------------------------------
+
+def build_arg_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="main.py compile-many",
+        description="并行把多份 DSL 设计编译为 .melsave，每份一个独立输出目录",
+    )
+    parser.add_argument("inputs", nargs="+", help="DSL 文件、包含 *.py 的目录，或 glob（如 'designs/**/*.py'）")
+    parser.add_argument("-o", "--out-dir", default=str(DEFAULT_BATCH_DIR), help="输出根目录（默认 output/batch）")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="并行进程数（默认 CPU 核数）")
+    parser.add_argument("--data", default=None, help="底包存档路径（默认项目根目录的 data.json）")
+    parser.add_argument("--no-cse", action="store_true", help="关闭公共子表达式消除")
+    parser.add_argument("--no-fold", action="store_true", help="关闭常量折叠")
+    parser.add_argument("--no-dce", action="store_true", help="关闭死节点消除")
+    parser.add_argument("--rebalance", action="store_true", help="把结合律运算链重排为平衡树")
+    return parser
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    args = build_arg_parser().parse_args(argv)
+    out_root = Path(args.out_dir)
+    base_ctx = BuildContext(
+        cse=not args.no_cse,
+        fold=not args.no_fold,
+        dce=not args.no_dce,
+        rebalance=args.rebalance,
+    )
+    if args.data:
+        base_ctx = base_ctx.replace(data_path=Path(args.data))
+
+    def report(result: JobResult) -> None:
+        if result.ok:
+            print(f"✔ {result.name}  ({result.seconds:.1f}s) -> {result.melsave}", flush=True)
+        else:
+            print(f"❌ {result.name}  [退出码 {result.exit_code}] {result.error}", flush=True)
+
+    try:
+        jobs = plan_jobs(discover_sources(args.inputs), out_root)
+        print(f"📦 共 {len(jobs)} 个设计，输出到 {out_root}")
+        results = compile_many(
+            jobs, workers=args.jobs, base_ctx=base_ctx, on_result=report
+        )
+        summary = write_summary(results, out_root)
+    except ChipSynthesisError as e:
+        handle_error(e)
+        return 1
+
+    failed = [r for r in results if not r.ok]
+    print(f"\n{'🎉' if not failed else '⚠️'} 完成 {len(results) - len(failed)}/{len(results)} 个，汇总见 {summary}")
+    return 1 if failed else 0
+
+
+__all__ = [
+    "CompileJob",
+    "JobResult",
+    "discover_sources",
+    "plan_jobs",
+    "WORKER_STATE",
+    "init_worker_state",
+    "job_context",
+    "run_job",
+    "compile_many",
+    "write_summary",
+    "main",
+]
+
+
+if __name__ == "__main__":
+    sys.exit(main())
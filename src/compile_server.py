@@ -0,0 +1,630 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+src.compile_server
+==================
+
+本地常驻编译服务（`python main.py serve`），供编辑器插件与构建机复用同一个“热”进程，
+不必每次都付出 Python 启动与加载模块目录的开销。
+
+协议：HTTP/1.1 上的 JSON-RPC 2.0（仅用标准库 asyncio 实现），默认监听 127.0.0.1:8765，
+也可以用 `--unix <路径>` 监听 UNIX socket（如 `curl --unix-socket`）。
+- `POST /`（或 `/rpc`）：JSON-RPC 请求，支持批量请求；连接默认保持（keep-alive）。
+- `GET /health`：返回服务状态（工作进程数、排队中的请求数）。
+
+方法：
+- `compile {source, name?, options?}` -> `{melsave: base64, size, seconds}`：
+  编译 DSL 源码为 .melsave 字节（JSON 中以 base64 传输）；失败时返回错误码 COMPILE_FAILED，
+  error.data 中带 diagnostics 与构建日志。
+- `check {source, options?}` -> `{ok, diagnostics, stats}`：只做解析 / 类型推断 / 连线检查，不建存档、不布局。
+- `layout {graph}` -> `{positions: {节点 Id: {x, y}}}`：graph 可以是 chip_graph（含 `Nodes`），
+  也可以是 graph.json 形式的 DSL graph（含 `nodes` / `edges`）。
+options 可覆盖 fold / cse / dce / rebalance（布尔值）。
+
+实现要点：
+- 模块目录、数据类型规则与底包存档在启动时加载一次，经进程池 initializer 交给每个工作进程
+  （与 compile-many 共用 init_worker_state），布局缓存对象在每个工作进程内常驻；
+  各工作进程共用同一个缓存文件，写入时与其它进程的条目合并（见 LayoutCache.store）；
+- 每个工作进程还常驻一个增量 DSL 转换器：编辑器反复提交同一份设计时，只重新访问第一条变化语句之后的部分；
+- 编译 / 检查 / 布局都在有界的 ProcessPoolExecutor 中执行，不阻塞事件循环，
+  排队中的请求超过 max_pending 时直接返回 SERVER_BUSY，由调用方稍后重试；
+- 工作进程内的构建日志写入内存缓冲，不输出到服务的终端。
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import base64
+import contextlib
+import io
+import json
+import os
+import re
+import sys
+import tempfile
+import time
+import urllib.request
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from http import HTTPStatus
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from archive_creator import run_archive_creation_stage
+from src.build_context import BuildContext
+from src.compile_many import WORKER_STATE, init_worker_state
+from src.converter.incremental import IncrementalConverter
+from src.error_handler import (
+    ChipSynthesisError,
+    CompileServerError,
+    ErrorModule,
+    FileIOError,
+    PipelineError,
+    handle_error,
+)
+from src.layout_cache import LayoutCache
+from src.module_catalog import ModuleCatalog
+from src.pipeline import compute_layout_positions, run_build_stages, run_check_stages
+from src.utils import load_json
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_URL = f"http://{DEFAULT_HOST}:{DEFAULT_PORT}/"
+
+# 单个请求体上限（DSL 源码 / graph）
+MAX_BODY_BYTES = 64 * 1024 * 1024
+
+# JSON-RPC 2.0 标准错误码
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+INTERNAL_ERROR = -32603
+# 服务自定义错误码
+SERVER_BUSY = -32000
+COMPILE_FAILED = 1
+
+# options 中允许覆盖的 BuildContext 字段
+OPTION_KEYS = ("fold", "cse", "dce", "rebalance")
+
+_NAME_RE = re.compile(r"^[A-Za-z0-9_][A-Za-z0-9_.-]{0,63}$")
+
+
+class _RpcError(Exception):
+    def __init__(self, code: int, message: str, data: Any = None):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+        self.data = data
+
+
+class _HttpError(Exception):
+    def __init__(self, status: HTTPStatus, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+# ----------------------------------------------------------------------
+# 诊断信息
+# ----------------------------------------------------------------------
+
+def error_diagnostic(error: Exception) -> Dict[str, Any]:
+    """把构建中抛出的异常转为 JSON 友好的诊断条目（行号取自上下文或原始的 SyntaxError）。"""
+    if isinstance(error, ChipSynthesisError):
+        line = error.context.get("line")
+        column = None
+        original = error.original_error
+        if line is None and isinstance(original, SyntaxError):
+            line, column = original.lineno, original.offset
+        return {
+            "severity": "error",
+            "message": error.message,
+            "module": error.module.value,
+            "line": line,
+            "column": column,
+            "context": {
+                k: v if isinstance(v, (int, float, bool)) or v is None else str(v)
+                for k, v in error.context.items()
+            },
+        }
+    return {
+        "severity": "error",
+        "message": f"{type(error).__name__}: {error}",
+        "module": ErrorModule.UNKNOWN.value,
+        "line": None,
+        "column": None,
+        "context": {},
+    }
+
+
+def layout_nodes(graph: Any) -> List[Dict[str, Any]]:
+    """
+    把 layout 请求中的 graph 转为布局引擎使用的 chip_graph 节点列表：
+    - chip_graph（{"Nodes": [...]}，节点含 Id 与 Inputs[*].connectedOutputIdModel）原样使用；
+    - DSL graph（{"nodes": [...], "edges": [...]}）按 edges 构造最小的 chip 节点。
+    """
+    if isinstance(graph, dict) and isinstance(graph.get("Nodes"), list):
+        nodes = graph["Nodes"]
+        if not all(isinstance(n, dict) and "Id" in n for n in nodes):
+            raise CompileServerError("chip_graph 的每个节点都需要 Id 字段")
+        return nodes
+    if isinstance(graph, dict) and isinstance(graph.get("nodes"), list):
+        inputs: Dict[str, List[dict]] = {}
+        for edge in graph.get("edges") or []:
+            if not isinstance(edge, dict) or "from_node" not in edge or "to_node" not in edge:
+                raise CompileServerError("graph 的每条边都需要 from_node 与 to_node 字段")
+            inputs.setdefault(edge["to_node"], []).append(
+                {"connectedOutputIdModel": {"NodeId": edge["from_node"]}}
+            )
+        nodes = []
+        for node in graph["nodes"]:
+            if not isinstance(node, dict) or "id" not in node:
+                raise CompileServerError("graph 的每个节点都需要 id 字段")
+            nodes.append(
+                {
+                    "Id": node["id"],
+                    "OperationType": node.get("type"),
+                    "Inputs": inputs.get(node["id"], []),
+                }
+            )
+        return nodes
+    raise CompileServerError("graph 需要是 chip_graph（含 Nodes）或 DSL graph（含 nodes / edges）")
+
+
+# ----------------------------------------------------------------------
+# 工作进程
+# ----------------------------------------------------------------------
+
+def _setup_worker(state: Dict[str, Any]) -> None:
+    """init_worker_state 的 setup：每个工作进程私有的布局缓存对象与增量 DSL 转换器。"""
+    cache_path = state["base_ctx"].layout_cache_path
+    state.update(
+        layout_cache=LayoutCache(cache_path) if cache_path is not None else None,
+        converter=IncrementalConverter(),
+    )
+
+
+@contextlib.contextmanager
+def _captured_output():
+    buffer = io.StringIO()
+    with contextlib.redirect_stdout(buffer), contextlib.redirect_stderr(buffer):
+        yield buffer
+
+
+def _job_context(tmp: Path, name: str, options: Dict[str, bool]) -> BuildContext:
+    return WORKER_STATE["base_ctx"].replace(
+        dsl_path=tmp / "input.py",
+        output_dir=tmp,
+        melsave_name=name,
+        debug_artifacts=False,
+        profile=False,
+        profile_cprofile=False,
+        **options,
+    )
+
+
+def _source_diagnostic(error: Exception) -> Dict[str, Any]:
+    diagnostic = error_diagnostic(error)
+    # 源码是临时文件，其路径对调用方没有意义
+    diagnostic["context"].pop("file", None)
+    return diagnostic
+
+
+def _compile_in_worker(source: str, name: str, options: Dict[str, bool]) -> Dict[str, Any]:
+    started = time.perf_counter()
+    with tempfile.TemporaryDirectory(prefix="melsave-serve-") as tmp, _captured_output() as log:
+        ctx = _job_context(Path(tmp), name, options)
+        try:
+            ctx.dsl_path.write_text(source, encoding="utf-8")
+            result = run_build_stages(
+                ctx,
+                WORKER_STATE["catalog"],
+                WORKER_STATE["rules"],
+                layout_cache=WORKER_STATE["layout_cache"],
+                base_save=WORKER_STATE["base_save"],
+                incremental=WORKER_STATE["converter"],
+            )
+            if not run_archive_creation_stage(result.save.flush(), ctx):
+                raise PipelineError("创建 .melsave 归档失败", stage="归档")
+            data = (ctx.output_dir / f"{name}.melsave").read_bytes()
+        except Exception as e:  # noqa: BLE001 - 失败以诊断信息返回给调用方
+            return {"ok": False, "diagnostics": [_source_diagnostic(e)], "log": log.getvalue()}
+    return {"ok": True, "melsave": data, "seconds": time.perf_counter() - started}
+
+
+def _check_in_worker(source: str, options: Dict[str, bool]) -> Dict[str, Any]:
+    with tempfile.TemporaryDirectory(prefix="melsave-serve-") as tmp, _captured_output():
+        ctx = _job_context(Path(tmp), "check", options)
+        try:
+            ctx.dsl_path.write_text(source, encoding="utf-8")
+            stats = run_check_stages(
+                ctx, WORKER_STATE["catalog"], WORKER_STATE["rules"], incremental=WORKER_STATE["converter"]
+            )
+        except Exception as e:  # noqa: BLE001
+            return {"ok": False, "diagnostics": [_source_diagnostic(e)], "stats": None}
+    return {"ok": True, "diagnostics": [], "stats": stats}
+
+
+def _layout_in_worker(chip_nodes: List[Dict[str, Any]]) -> Dict[str, Any]:
+    with _captured_output():
+        positions = compute_layout_positions(chip_nodes, WORKER_STATE["layout_cache"]) if chip_nodes else {}
+    return {"positions": positions}
+
+
+# ----------------------------------------------------------------------
+# 服务
+# ----------------------------------------------------------------------
+
+def _options(params: Dict[str, Any]) -> Dict[str, bool]:
+    options = params.get("options") or {}
+    if not isinstance(options, dict):
+        raise _RpcError(INVALID_PARAMS, "options 需要是对象")
+    unknown = sorted(set(options) - set(OPTION_KEYS))
+    if unknown:
+        raise _RpcError(INVALID_PARAMS, f"未知的选项: {', '.join(unknown)}（可用: {', '.join(OPTION_KEYS)}）")
+    if not all(isinstance(v, bool) for v in options.values()):
+        raise _RpcError(INVALID_PARAMS, "options 的取值需要是布尔值")
+    return dict(options)
+
+
+def _source(params: Dict[str, Any]) -> str:
+    source = params.get("source")
+    if not isinstance(source, str):
+        raise _RpcError(INVALID_PARAMS, "缺少字符串参数 source（DSL 源码）")
+    return source
+
+
+def _rpc_error(req_id: Any, code: int, message: str, data: Any = None) -> Dict[str, Any]:
+    error: Dict[str, Any] = {"code": code, "message": message}
+    if data is not None:
+        error["data"] = data
+    return {"jsonrpc": "2.0", "id": req_id, "error": error}
+
+
+class CompileServer:
+    """
+    编译服务：start() 加载热数据、创建进程池并开始监听，close() 停止。
+    handle_rpc() 不依赖 HTTP，可直接在事件循环中调用。
+    """
+
+    def __init__(
+        self,
+        base_ctx: Optional[BuildContext] = None,
+        *,
+        workers: Optional[int] = None,
+        max_pending: Optional[int] = None,
+        catalog: Optional[ModuleCatalog] = None,
+    ):
+        self.base_ctx = base_ctx or BuildContext()
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self.max_pending = max_pending or self.workers * 8
+        self.catalog = catalog
+        self.pending = 0
+        self._initargs: Optional[Tuple[Any, ...]] = None
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._methods: Dict[str, Callable[[Dict[str, Any]], Any]] = {
+            "compile": self._rpc_compile,
+            "check": self._rpc_check,
+            "layout": self._rpc_layout,
+        }
+
+    # ---- 生命周期 ----
+
+    def _load_warm_state(self) -> None:
+        ctx = self.base_ctx
+        catalog = self.catalog or ModuleCatalog.load(ctx.module_def_path, cache_dir=ctx.cache_dir)
+        rules = load_json(ctx.rules_path, "数据类型规则文件")
+        try:
+            base_save = ctx.data_path.read_bytes()
+        except OSError as e:
+            raise FileIOError("读取底包存档失败", file_path=str(ctx.data_path), original_error=e)
+        self.catalog = catalog
+        state = {"catalog": catalog, "rules": rules, "base_save": base_save, "base_ctx": ctx}
+        self._initargs = (state, _setup_worker)
+
+    def _new_pool(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(
+            max_workers=self.workers, initializer=init_worker_state, initargs=self._initargs
+        )
+
+    async def start(
+        self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, *, unix_path: Optional[str] = None
+    ) -> None:
+        self._load_warm_state()
+        self._pool = self._new_pool()
+        if unix_path is not None:
+            self._server = await asyncio.start_unix_server(self._handle_connection, path=unix_path)
+        else:
+            self._server = await asyncio.start_server(self._handle_connection, host, port)
+
+    @property
+    def address(self) -> str:
+        """实际监听的地址（port=0 时为系统分配的端口）。"""
+        sockname = self._server.sockets[0].getsockname()
+        if isinstance(sockname, str):
+            return sockname
+        return f"http://{sockname[0]}:{sockname[1]}/"
+
+    async def serve_forever(self) -> None:
+        await self._server.serve_forever()
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+
+    # ---- JSON-RPC ----
+
+    async def _submit(self, fn: Callable[..., Any], *args: Any) -> Any:
+        if self.pending >= self.max_pending:
+            raise _RpcError(SERVER_BUSY, f"服务繁忙：已有 {self.pending} 个请求在排队，请稍后重试")
+        self.pending += 1
+        pool = self._pool
+        try:
+            return await asyncio.get_running_loop().run_in_executor(pool, fn, *args)
+        except BrokenProcessPool as e:
+            # 工作进程异常退出（例如被系统杀掉）：换一个新的进程池，本次请求返回内部错误
+            if self._pool is pool:
+                pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = self._new_pool()
+            raise _RpcError(INTERNAL_ERROR, f"工作进程异常退出: {e}")
+        finally:
+            self.pending -= 1
+
+    async def _rpc_compile(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        source = _source(params)
+        name = params.get("name", "input")
+        if not isinstance(name, str) or not _NAME_RE.match(name):
+            raise _RpcError(INVALID_PARAMS, "name 只能包含字母、数字、_ . -，且不超过 64 个字符")
+        outcome = await self._submit(_compile_in_worker, source, name, _options(params))
+        if not outcome["ok"]:
+            diagnostics = outcome["diagnostics"]
+            raise _RpcError(
+                COMPILE_FAILED,
+                diagnostics[0]["message"],
+                {"diagnostics": diagnostics, "log": outcome["log"]},
+            )
+        return {
+            "melsave": base64.b64encode(outcome["melsave"]).decode("ascii"),
+            "size": len(outcome["melsave"]),
+            "seconds": round(outcome["seconds"], 4),
+        }
+
+    async def _rpc_check(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        return await self._submit(_check_in_worker, _source(params), _options(params))
+
+    async def _rpc_layout(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        try:
+            chip_nodes = layout_nodes(params.get("graph"))
+        except CompileServerError as e:
+            raise _RpcError(INVALID_PARAMS, e.message)
+        return await self._submit(_layout_in_worker, chip_nodes)
+
+    async def _handle_one(self, request: Any) -> Optional[Dict[str, Any]]:
+        if not isinstance(request, dict) or request.get("jsonrpc") != "2.0" or not isinstance(
+            request.get("method"), str
+        ):
+            return _rpc_error(None, INVALID_REQUEST, "不是合法的 JSON-RPC 2.0 请求")
+        req_id = request.get("id")
+        notification = "id" not in request
+        params = request.get("params", {})
+        try:
+            if not isinstance(params, dict):
+                raise _RpcError(INVALID_PARAMS, "params 需要是对象（按名称传参）")
+            method = self._methods.get(request["method"])
+            if method is None:
+                raise _RpcError(METHOD_NOT_FOUND, f"未知方法: {request['method']}")
+            result = await method(params)
+        except _RpcError as e:
+            response = _rpc_error(req_id, e.code, e.message, e.data)
+        except Exception as e:  # noqa: BLE001 - 任何异常都只影响本次请求
+            response = _rpc_error(req_id, INTERNAL_ERROR, f"{type(e).__name__}: {e}")
+        else:
+            response = {"jsonrpc": "2.0", "id": req_id, "result": result}
+        return None if notification else response
+
+    async def handle_rpc(self, body: bytes) -> Any:
+        """处理一个 JSON-RPC 请求体（单个或批量），返回响应对象；全部为通知时返回 None。"""
+        try:
+            request = json.loads(body)
+        except ValueError as e:
+            return _rpc_error(None, PARSE_ERROR, f"请求不是合法的 JSON: {e}")
+        if isinstance(request, list):
+            if not request:
+                return _rpc_error(None, INVALID_REQUEST, "批量请求不能为空")
+            responses = await asyncio.gather(*(self._handle_one(r) for r in request))
+            return [r for r in responses if r is not None] or None
+        return await self._handle_one(request)
+
+    # ---- HTTP ----
+
+    def health(self) -> Dict[str, Any]:
+        return {"status": "ok", "workers": self.workers, "pending": self.pending}
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                try:
+                    request = await _read_http_request(reader)
+                except _HttpError as e:
+                    body = json.dumps({"error": e.message}, ensure_ascii=False).encode("utf-8")
+                    writer.write(_http_response(e.status, body, keep_alive=False))
+                    await writer.drain()
+                    return
+                if request is None:
+                    return
+                method, path, headers, body = request
+                status, payload = await self._route(method, path, body)
+                keep_alive = headers.get("connection", "").lower() != "close"
+                data = b"" if payload is None else json.dumps(payload, ensure_ascii=False).encode("utf-8")
+                writer.write(_http_response(status, data, keep_alive=keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    return
+        except (ConnectionError, asyncio.IncompleteReadError):
+            return
+        finally:
+            writer.close()
+
+    async def _route(self, method: str, path: str, body: bytes) -> Tuple[HTTPStatus, Any]:
+        path = path.split("?", 1)[0]
+        if path == "/health":
+            if method != "GET":
+                return HTTPStatus.METHOD_NOT_ALLOWED, {"error": "请使用 GET"}
+            return HTTPStatus.OK, self.health()
+        if path in ("/", "/rpc"):
+            if method != "POST":
+                return HTTPStatus.METHOD_NOT_ALLOWED, {"error": "JSON-RPC 请求请使用 POST"}
+            response = await self.handle_rpc(body)
+            return (HTTPStatus.NO_CONTENT, None) if response is None else (HTTPStatus.OK, response)
+        return HTTPStatus.NOT_FOUND, {"error": f"未知路径: {path}"}
+
+
+async def _read_http_request(
+    reader: asyncio.StreamReader,
+) -> Optional[Tuple[str, str, Dict[str, str], bytes]]:
+    """读取一个 HTTP/1.1 请求；连接在请求之间正常关闭时返回 None。"""
+    try:
+        head = await reader.readuntil(b"\r\n\r\n")
+    except asyncio.IncompleteReadError as e:
+        if not e.partial.strip():
+            return None
+        raise _HttpError(HTTPStatus.BAD_REQUEST, "请求头不完整")
+    except asyncio.LimitOverrunError:
+        raise _HttpError(HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE, "请求头过大")
+
+    lines = head.decode("latin-1").split("\r\n")
+    try:
+        method, target, _version = lines[0].split(" ", 2)
+    except ValueError:
+        raise _HttpError(HTTPStatus.BAD_REQUEST, "请求行格式错误")
+    headers: Dict[str, str] = {}
+    for line in lines[1:]:
+        if ":" in line:
+            key, value = line.split(":", 1)
+            headers[key.strip().lower()] = value.strip()
+
+    body = b""
+    if method == "POST":
+        if "content-length" not in headers:
+            raise _HttpError(HTTPStatus.LENGTH_REQUIRED, "缺少 Content-Length")
+        try:
+            length = int(headers["content-length"])
+        except ValueError:
+            raise _HttpError(HTTPStatus.BAD_REQUEST, "Content-Length 不是整数")
+        if length < 0 or length > MAX_BODY_BYTES:
+            raise _HttpError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, f"请求体超过 {MAX_BODY_BYTES} 字节")
+        body = await reader.readexactly(length)
+    return method, target, headers, body
+
+
+def _http_response(status: HTTPStatus, body: bytes, *, keep_alive: bool) -> bytes:
+    head = [
+        f"HTTP/1.1 {status.value} {status.phrase}",
+        f"Content-Length: {len(body)}",
+        f"Connection: {'keep-alive' if keep_alive else 'close'}",
+    ]
+    if body:
+        head.append("Content-Type: application/json; charset=utf-8")
+    return ("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + body
+
+
+# ----------------------------------------------------------------------
+# 客户端
+# ----------------------------------------------------------------------
+
+def call(method: str, params: Optional[Dict[str, Any]] = None, *, url: str = DEFAULT_URL,
+         timeout: float = 600.0) -> Any:
+    """
+    同步调用编译服务的一个方法并返回 result（供脚本 / 构建机使用）。
+    请求失败或服务返回错误时抛出 CompileServerError（context 中带 code 与 data）。
+    """
+    payload = json.dumps({"jsonrpc": "2.0", "id": 1, "method": method, "params": params or {}})
+    request = urllib.request.Request(
+        url, data=payload.encode("utf-8"), headers={"Content-Type": "application/json"}
+    )
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            reply = json.loads(response.read())
+    except (OSError, ValueError) as e:
+        raise CompileServerError("请求编译服务失败", context={"url": url}, original_error=e)
+    if "error" in reply:
+        error = reply["error"]
+        raise CompileServerError(
+            error.get("message", "未知错误"),
+            context={"url": url, "code": error.get("code"), "data": error.get("data")},
+        )
+    return reply["result"]
+
+
+# ----------------------------------------------------------------------
+# 命令行
+# ----------------------------------------------------------------------
+
+def build_arg_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="main.py serve",
+        description="常驻本地编译服务（HTTP + JSON-RPC 2.0）：compile / check / layout",
+    )
+    parser.add_argument("--host", default=DEFAULT_HOST, help=f"监听地址（默认 {DEFAULT_HOST}）")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"监听端口（默认 {DEFAULT_PORT}）")
+    parser.add_argument("--unix", default=None, help="改为监听该路径的 UNIX socket")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="工作进程数（默认 CPU 核数）")
+    parser.add_argument(
+        "--max-pending", type=int, default=None, help="最多排队的请求数，超出时返回 SERVER_BUSY（默认 8 × 进程数）"
+    )
+    parser.add_argument("--data", default=None, help="底包存档路径（默认项目根目录的 data.json）")
+    parser.add_argument("--no-layout-cache", action="store_true", help="不读写布局缓存")
+    return parser
+
+
+async def _serve(server: CompileServer, args: argparse.Namespace) -> None:
+    await server.start(args.host, args.port, unix_path=args.unix)
+    print(f"🚀 编译服务已启动：{server.address}（{server.workers} 个工作进程，Ctrl+C 退出）", flush=True)
+    try:
+        await server.serve_forever()
+    finally:
+        await server.close()
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    args = build_arg_parser().parse_args(argv)
+    base_ctx = BuildContext(layout_cache=not args.no_layout_cache)
+    if args.data:
+        base_ctx = base_ctx.replace(data_path=Path(args.data))
+    server = CompileServer(base_ctx, workers=args.jobs, max_pending=args.max_pending)
+    try:
+        asyncio.run(_serve(server, args))
+    except ChipSynthesisError as e:
+        handle_error(e)
+        return 1
+    except KeyboardInterrupt:
+        print("\n👋 编译服务已停止")
+    return 0
+
+
+__all__ = [
+    "CompileServer",
+    "call",
+    "error_diagnostic",
+    "layout_nodes",
+    "main",
+    "DEFAULT_HOST",
+    "DEFAULT_PORT",
+    "DEFAULT_URL",
+    "PARSE_ERROR",
+    "COMPILE_FAILED",
+    "SERVER_BUSY",
+    "INVALID_PARAMS",
+    "METHOD_NOT_FOUND",
+]
+
+
+if __name__ == "__main__":
+    sys.exit(main())
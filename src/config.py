@@ -43,6 +43,14 @@ CONNECT_OUT_PATH = OUTPUT_DIR / "output.json"
 MODIFIED_SAVE_PATH = OUTPUT_DIR / "data_after_modify.json"
 FINAL_SAVE_PATH = OUTPUT_DIR / "ungraph.json"
 
+# 可安全删除的构建缓存（例如预编译的模块目录）
+CACHE_DIR = OUTPUT_DIR / ".cache"
+
+# --profile 的各阶段耗时 / 内存报告，以及 cProfile 结果目录
+PROFILE_JSON_PATH = OUTPUT_DIR / "profile.json"
+PROFILE_CSV_PATH = OUTPUT_DIR / "profile.csv"
+PROFILE_STATS_DIR = OUTPUT_DIR / "profile"
+
 
 # ---------------------- 其它常量配置 ----------------------
 
@@ -70,6 +78,10 @@ __all__ = [
     "CONNECT_OUT_PATH",
     "MODIFIED_SAVE_PATH",
     "FINAL_SAVE_PATH",
+    "CACHE_DIR",
+    "PROFILE_JSON_PATH",
+    "PROFILE_CSV_PATH",
+    "PROFILE_STATS_DIR",
     "FUZZY_CUTOFF_NODE",
     "FUZZY_CUTOFF_PORT",
     "ensure_output_dir",
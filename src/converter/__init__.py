@@ -7,9 +7,17 @@ src.converter
 DSL(AST) -> graph.json 的转换实现（从旧版 converter_v2.py 拆分出来）。
 """
 
-from src.converter.api import convert_dsl_to_graph
+from src.converter.api import convert_dsl_to_graph, convert_dsl_to_graph_dict
 from src.converter.dedup_converter import DedupConverter
+from src.converter.incremental import IncrementalConverter, IncrementalStats
 from src.converter.logical_converter import LogicalConverter
 
-__all__ = ["convert_dsl_to_graph", "DedupConverter", "LogicalConverter"]
+__all__ = [
+    "convert_dsl_to_graph",
+    "convert_dsl_to_graph_dict",
+    "DedupConverter",
+    "LogicalConverter",
+    "IncrementalConverter",
+    "IncrementalStats",
+]
 
@@ -4,18 +4,19 @@ import ast
 import json
 import sys
 from pathlib import Path
+from typing import TYPE_CHECKING
 
 from src.converter.dedup_converter import DedupConverter
-from src.error_handler import DSLError, FileIOError, ASTError, handle_error
+from src.error_handler import ChipSynthesisError, DSLError, FileIOError, ASTError, handle_error
 
+if TYPE_CHECKING:
+    from src.converter.incremental import IncrementalConverter
 
-def convert_dsl_to_graph(dsl_script_path: Path | str, output_path: Path | str) -> None:
-    """
-    使用 AST 转换器将 DSL 转为 graph.json（不需要 module_defs）。
-    """
+
+def read_dsl_source(dsl_script_path: Path | str) -> str:
+    """读取 DSL 源码；Windows 上常见的 UTF-8 BOM 会导致 ast.parse 报 U+FEFF，用 utf-8-sig 自动剥离。"""
     try:
-        # Windows 上常见的 UTF-8 BOM 会导致 ast.parse 报 U+FEFF；用 utf-8-sig 自动剥离 BOM。
-        code = Path(dsl_script_path).read_text(encoding="utf-8-sig")
+        return Path(dsl_script_path).read_text(encoding="utf-8-sig")
     except Exception as e:
         raise FileIOError(
             f"读取 DSL 文件失败",
@@ -23,6 +24,43 @@ def convert_dsl_to_graph(dsl_script_path: Path | str, output_path: Path | str) -
             original_error=e
         )
 
+
+def conversion_error(e: Exception, dsl_script_path: Path | str) -> ChipSynthesisError:
+    """把转换过程中的异常（ASTError 除外）转为带提示信息的 DSLError。"""
+    error_msg = str(e)
+
+    if "name" in error_msg and "is not defined" in error_msg:
+        import re as _re
+
+        match = _re.search(r"name '(\w+)' is not defined", error_msg)
+        if match:
+            undefined_var = match.group(1)
+            return DSLError(
+                f"变量 '{undefined_var}' 未定义。在使用变量前，请先通过函数调用或赋值来定义它，例如: {undefined_var} = SOME_FUNCTION(...)",
+                context={"variable": undefined_var, "file": str(dsl_script_path)},
+                original_error=e
+            )
+
+    if isinstance(e, TypeError):
+        return DSLError(
+            f"DSL 参数错误: {error_msg}",
+            context={"file": str(dsl_script_path)},
+            original_error=e
+        )
+
+    return DSLError(
+        f"DSL 执行错误: {error_msg}",
+        context={"file": str(dsl_script_path)},
+        original_error=e
+    )
+
+
+def convert_dsl_to_graph_dict(dsl_script_path: Path | str) -> dict:
+    """
+    使用 AST 转换器将 DSL 转为 graph 字典（nodes/edges/variables），不落盘。
+    """
+    code = read_dsl_source(dsl_script_path)
+
     try:
         tree = ast.parse(code, filename=str(dsl_script_path))
         cvt = DedupConverter()
@@ -33,35 +71,30 @@ def convert_dsl_to_graph(dsl_script_path: Path | str, output_path: Path | str) -
         # ASTError 已经包含了模块信息，直接抛出
         raise
     except Exception as e:  # noqa: BLE001
-        error_msg = str(e)
-
-        if "name" in error_msg and "is not defined" in error_msg:
-            import re as _re
-
-            match = _re.search(r"name '(\w+)' is not defined", error_msg)
-            if match:
-                undefined_var = match.group(1)
-                raise DSLError(
-                    f"变量 '{undefined_var}' 未定义。在使用变量前，请先通过函数调用或赋值来定义它，例如: {undefined_var} = SOME_FUNCTION(...)",
-                    context={"variable": undefined_var, "file": str(dsl_script_path)},
-                    original_error=e
-                )
-
-        if isinstance(e, TypeError):
-            raise DSLError(
-                f"DSL 参数错误: {error_msg}",
-                context={"file": str(dsl_script_path)},
-                original_error=e
-            )
+        raise conversion_error(e, dsl_script_path)
 
-        raise DSLError(
-            f"DSL 执行错误: {error_msg}",
-            context={"file": str(dsl_script_path)},
-            original_error=e
-        )
+    return cvt.g.to_dict()
+
+
+def convert_dsl_to_graph(
+    dsl_script_path: Path | str,
+    output_path: Path | str | None = None,
+    incremental: IncrementalConverter | None = None,
+) -> dict:
+    """
+    使用 AST 转换器将 DSL 转为 graph.json（不需要 module_defs）。
+
+    返回 graph 字典；仅当给出 output_path 时才写出 graph.json。
+    给出 incremental 时由它转换：只重新访问与上一次转换相比发生变化的语句及其之后的部分，结果与完整转换相同。
+    """
+    if incremental is not None:
+        out = incremental.convert(dsl_script_path)
+    else:
+        out = convert_dsl_to_graph_dict(dsl_script_path)
+    if output_path is None:
+        return out
 
     try:
-        out = cvt.g.to_dict()
         Path(output_path).write_text(
             json.dumps(out, ensure_ascii=False, indent=2),
             encoding="utf-8",
@@ -72,6 +105,7 @@ def convert_dsl_to_graph(dsl_script_path: Path | str, output_path: Path | str) -
             file_path=str(output_path),
             original_error=e
         )
+    return out
 
 
-__all__ = ["convert_dsl_to_graph"]
+__all__ = ["convert_dsl_to_graph", "convert_dsl_to_graph_dict"]
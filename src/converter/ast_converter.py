@@ -2,7 +2,7 @@ from __future__ import annotations
 
 import ast
 from dataclasses import dataclass
-from typing import Any, Dict, List, Set, Tuple
+from typing import Any, Dict, Iterator, List, Set, Tuple
 
 from src.converter.graph import Graph
 from src.converter.utils import _ast_is_none, _auto_label, _func_name
@@ -148,6 +148,16 @@ class Converter(ast.NodeVisitor):
         return isinstance(lit, dict) and {"Key", "GateDataType", "Value"} <= set(lit.keys())
 
     def visit_Module(self, node: ast.Module) -> None:  # noqa: N802
+        for stmt, in_main in self.module_steps(node):
+            self._in_main_block = in_main
+            self.visit(stmt)
+        self._in_main_block = False
+
+    def module_steps(self, node: ast.Module) -> Iterator[Tuple[ast.stmt, bool]]:
+        """
+        按转换顺序逐条产出需要访问的语句 (stmt, 是否位于 main 块内)，边产出边做作用域校验。
+        visit_Module 与增量转换（src.converter.incremental）共用这一顺序。
+        """
         main_if: ast.If | None = None
         for stmt in node.body:
             if isinstance(stmt, ast.If) and self._is_main_guard_test(stmt.test):
@@ -160,7 +170,7 @@ class Converter(ast.NodeVisitor):
 
         if main_if is None:
             for stmt in node.body:
-                self.visit(stmt)
+                yield stmt, False
             return
 
         self._has_main_guard = True
@@ -178,13 +188,13 @@ class Converter(ast.NodeVisitor):
             if isinstance(stmt, (ast.Import, ast.ImportFrom, ast.Pass)):
                 continue
             if isinstance(stmt, ast.AnnAssign):
-                self.visit(stmt)
+                yield stmt, False
                 continue
             if isinstance(stmt, ast.Assign) and self._is_input_call(stmt):
-                self.visit(stmt)
+                yield stmt, False
                 continue
             if isinstance(stmt, ast.Expr) and self._is_variable_def_dict_expr(stmt):
-                self.visit(stmt)
+                yield stmt, False
                 continue
 
             raise ASTError(
@@ -198,15 +208,13 @@ class Converter(ast.NodeVisitor):
                 context={"line": getattr(main_if, "lineno", None)},
             )
 
-        self._in_main_block = True
         for stmt in main_if.body:
             if isinstance(stmt, (ast.For, ast.While, ast.Try, ast.With, ast.Match)):
                 raise ASTError(
                     "Control flow is not supported inside main block; express logic via nodes/connections.",
                     context={"line": getattr(stmt, "lineno", None)},
                 )
-            self.visit(stmt)
-        self._in_main_block = False
+            yield stmt, True
 
     def visit_AnnAssign(self, node: ast.AnnAssign) -> None:  # noqa: N802
         if not isinstance(node.target, ast.Name):
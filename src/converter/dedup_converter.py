@@ -5,12 +5,30 @@
 在DSL解析阶段就避免创建重复的常量节点
 """
 
+from __future__ import annotations
+
 import json
 from typing import Any, Dict
 
 from src.converter.logical_converter import LogicalConverter
 
 
+def constant_cache_key(lit: Any, data_type: str | None = None) -> str:
+    """
+    常量去重键：使用 JSON 序列化确保不同类型的值不会冲突，
+    例如：1 (int) vs "1" (str) vs True (bool)。
+    """
+    try:
+        return json.dumps(
+            {"value": lit, "data_type": data_type},
+            sort_keys=True,
+            ensure_ascii=False,
+        )
+    except Exception:
+        # 如果序列化失败，使用字符串表示作为 fallback
+        return f"{data_type}:{lit}"
+
+
 class DedupConverter(LogicalConverter):
     """
     扩展 LogicalConverter，添加常量节点去重功能。
@@ -33,18 +51,7 @@ class DedupConverter(LogicalConverter):
         Returns:
             常量节点的 ID
         """
-        # 生成常量的唯一标识符
-        # 使用 JSON 序列化确保不同类型的值不会冲突
-        # 例如：1 (int) vs "1" (str) vs True (bool)
-        try:
-            cache_key = json.dumps(
-                {"value": lit, "data_type": data_type},
-                sort_keys=True,
-                ensure_ascii=False,
-            )
-        except Exception:
-            # 如果序列化失败，使用字符串表示作为 fallback
-            cache_key = f"{data_type}:{lit}"
+        cache_key = constant_cache_key(lit, data_type)
 
         # 检查缓存中是否已存在相同值的常量
         if cache_key in self._constant_cache:
@@ -62,4 +69,4 @@ class DedupConverter(LogicalConverter):
         return nid
 
 
-__all__ = ["DedupConverter"]
+__all__ = ["DedupConverter", "constant_cache_key"]
@@ -1,8 +1,6 @@
 from __future__ import annotations
 
 import ast
-import json
-from pathlib import Path
 from dataclasses import dataclass
 from typing import Any, Dict, List, Set
 
@@ -32,6 +30,12 @@ class IfElseConverter(Converter):
         super().__init__()
         self._module_output_types: Dict[str, str | None] | None = None
 
+    def __getstate__(self) -> Dict[str, Any]:
+        # 模块输出类型表来自 moduledef.json，随时可以重新加载，不随转换进度一起序列化
+        state = self.__dict__.copy()
+        state["_module_output_types"] = None
+        return state
+
     @staticmethod
     def _normalize_type_name(type_name: Any) -> str | None:
         if isinstance(type_name, bool) or type_name is None:
@@ -73,36 +77,16 @@ class IfElseConverter(Converter):
             return self._module_output_types
 
         out: Dict[str, str | None] = {}
-        moduledef_path = Path(__file__).resolve().parents[2] / "moduledef.json"
         try:
-            data = json.loads(moduledef_path.read_text(encoding="utf-8"))
+            from src.module_catalog import load_module_catalog
+
+            output_type_names = load_module_catalog().output_type_names
         except Exception:
             self._module_output_types = out
             return out
 
-        if isinstance(data, dict):
-            for key, rec in data.items():
-                if not isinstance(rec, dict):
-                    continue
-                outputs = rec.get("outputs") or []
-                out_type = None
-                if isinstance(outputs, list) and outputs:
-                    first = outputs[0]
-                    if isinstance(first, dict):
-                        out_type = self._normalize_type_name(first.get("type"))
-
-                names = [key, rec.get("id")]
-                source = rec.get("source_info")
-                if isinstance(source, dict):
-                    names.extend(
-                        [
-                            source.get("datatype_map_nodename"),
-                            source.get("chip_names_friendly_name"),
-                        ]
-                    )
-                for name in names:
-                    if isinstance(name, str) and name.strip():
-                        out[self._type_key(self._canonical_type_name(name))] = out_type
+        for name, raw_type in output_type_names:
+            out[self._type_key(self._canonical_type_name(name))] = self._normalize_type_name(raw_type)
 
         self._module_output_types = out
         return out
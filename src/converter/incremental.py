@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+src.converter.incremental
+=========================
+
+增量 DSL 前端：反复转换同一份（很长的）input.py 时，只重新访问变化之后的语句。
+
+转换按 `Converter.module_steps` 的顺序逐条访问语句（模块作用域声明在前，main 块语句在后），
+访问第 k 条语句时依赖前面所有语句留下的状态（var2node、常量去重表、Graph.next_id 的计数器等），
+因此可以安全复用的是“未变化的前缀”：
+- 每条语句的指纹 = 前一条的指纹 + 本语句的源码行、起止位置与是否位于 main 块，逐条链式累积；
+- 转换器快照（pickle，检查点）保存在每次转换的第一条变化语句之前，另外在新访问的区段上均匀取少量几个；
+  快照本身的开销与访问几百条语句相当，因此数量有上限，超出时去掉最密集处的检查点；
+- 再次转换时找到第一条指纹不同的语句，从它之前最近的检查点恢复，重放检查点到该语句之间的
+  未变化语句，然后继续访问剩余部分。反复修改同一处时，只需恢复快照并访问该处之后的语句。
+
+结果与 `convert_dsl_to_graph_dict` 的完整转换逐字节一致：前缀中的节点 / 边保持原样，
+节点 ID 来自恢复出来的 Graph.next_id 计数器，因此变化点之前的 ID 完全不变，之后的 ID 也与完整转换相同，
+后续阶段与布局缓存可以直接按 ID 对比前后两次的 graph。
+模块输出类型表（来自 moduledef.json）的摘要也参与指纹，moduledef 变化后所有检查点自动失效。
+"""
+
+from __future__ import annotations
+
+import ast
+import hashlib
+import math
+import pickle
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, List, Optional, Tuple
+
+from src.converter.api import conversion_error, read_dsl_source
+from src.converter.ast_converter import Converter
+from src.converter.dedup_converter import DedupConverter
+from src.error_handler import ASTError
+
+# 最多保留的检查点数（内存占用约为该值 × 单个快照大小）
+DEFAULT_MAX_CHECKPOINTS = 8
+# 每次新访问的区段上沿途均匀新建的检查点数
+SPAN_CHECKPOINTS = 3
+# 检查点之间至少间隔的语句数
+MIN_CHECKPOINT_INTERVAL = 32
+
+# 快照 / 指纹格式变化时递增，使旧检查点失效
+_FORMAT_VERSION = 1
+
+
+@dataclass
+class _Checkpoint:
+    step: int      # 快照前已访问的语句数
+    state: bytes   # 此时转换器的 pickle
+
+
+@dataclass
+class IncrementalStats:
+    statements: int = 0                 # 本次转换涉及的语句总数
+    reused: int = 0                     # 直接从检查点恢复、未重新访问的语句数
+    visited: int = 0                    # 实际访问的语句数（含重放的未变化语句）
+    first_changed_line: Optional[int] = None  # 第一条变化语句的行号；没有变化时为 None
+
+
+def _digest(*parts: Any) -> str:
+    return hashlib.blake2b(repr(parts).encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _step_fingerprint(prev: str, stmt: ast.stmt, in_main: bool, lines: List[str]) -> str:
+    # 起止行列一致且覆盖的源码行相同，则语句的 AST 一定相同
+    start, end = stmt.lineno, stmt.end_lineno or stmt.lineno
+    position = (start, stmt.col_offset, end, stmt.end_col_offset)
+    return _digest(prev, in_main, position, "".join(lines[start - 1:end]))
+
+
+class IncrementalConverter:
+    """
+    保存上一次成功转换的逐语句链式指纹与若干检查点；convert() 的用法与 convert_dsl_to_graph_dict 相同。
+    一个实例对应一份 DSL（交替转换不同的文件也能得到正确结果，只是没有复用）。转换失败时保留上一次的缓存。
+    """
+
+    def __init__(
+        self,
+        max_checkpoints: int = DEFAULT_MAX_CHECKPOINTS,
+        min_interval: int = MIN_CHECKPOINT_INTERVAL,
+    ):
+        self.max_checkpoints = max(1, max_checkpoints)
+        self.min_interval = max(1, min_interval)
+        self.stats = IncrementalStats()
+        self._head: Optional[str] = None
+        self._chain: List[str] = []
+        self._checkpoints: List[_Checkpoint] = []
+        self._catalog: Any = None
+        self._catalog_digest = ""
+
+    def reset(self) -> None:
+        """丢弃所有缓存，下一次转换将完整进行。"""
+        self._head = None
+        self._chain = []
+        self._checkpoints = []
+
+    def convert(self, dsl_script_path: Path | str) -> dict:
+        """转换 DSL 文件为 graph 字典（nodes/edges/variables），出错时抛出与完整转换相同的异常。"""
+        code = read_dsl_source(dsl_script_path)
+        try:
+            tree = ast.parse(code, filename=str(dsl_script_path))
+            return self._convert_tree(tree, code)
+        except ASTError:
+            raise
+        except Exception as e:  # noqa: BLE001
+            raise conversion_error(e, dsl_script_path)
+
+    # ------------------------------------------------------------------
+
+    def _output_types_digest(self) -> str:
+        """IfElseConverter 用到的模块输出类型表的摘要（与其加载方式一致，目录对象变化时才重新计算）。"""
+        try:
+            from src.module_catalog import load_module_catalog
+
+            catalog = load_module_catalog()
+        except Exception:  # noqa: BLE001 - 与 IfElseConverter 一样，加载失败时按空表处理
+            return "none"
+        if catalog is not self._catalog:
+            self._catalog = catalog
+            self._catalog_digest = _digest(catalog.output_type_names)
+        return self._catalog_digest
+
+    def _trim(self, checkpoints: List[_Checkpoint]) -> List[_Checkpoint]:
+        """检查点超过上限时，反复去掉与前一个检查点间隔最小的那个。"""
+        checkpoints = sorted(checkpoints, key=lambda cp: cp.step)
+        while len(checkpoints) > self.max_checkpoints:
+            gaps = [checkpoints[k].step - checkpoints[k - 1].step for k in range(1, len(checkpoints))]
+            del checkpoints[1 + gaps.index(min(gaps))]
+        return checkpoints
+
+    def _convert_tree(self, tree: ast.Module, code: str) -> dict:
+        lines = code.splitlines(keepends=True)
+        main_ifs = [
+            stmt for stmt in tree.body
+            if isinstance(stmt, ast.If) and Converter._is_main_guard_test(stmt.test)
+        ]
+        total_estimate = len(tree.body) + sum(len(stmt.body) for stmt in main_ifs)
+        head = _digest(_FORMAT_VERSION, bool(main_ifs), self._output_types_digest())
+        old_chain = self._chain if head == self._head else []
+        old_checkpoints = self._checkpoints if head == self._head else []
+
+        stats = IncrementalStats()
+        fresh = DedupConverter()
+        cvt: Optional[DedupConverter] = None
+        chain: List[str] = []
+        checkpoints: List[_Checkpoint] = []
+        done: List[Tuple[ast.stmt, bool]] = []  # 未变化的前缀语句
+        fingerprint = head
+        interval = span_start = 0
+
+        for step, (stmt, in_main) in enumerate(fresh.module_steps(tree)):
+            fingerprint = _step_fingerprint(fingerprint, stmt, in_main, lines)
+            chain.append(fingerprint)
+            if cvt is None:
+                if step < len(old_chain) and old_chain[step] == fingerprint:
+                    done.append((stmt, in_main))
+                    continue
+                stats.first_changed_line = stmt.lineno
+                cvt, checkpoints = _restore(step, fresh, done, old_checkpoints, stats)
+                last = checkpoints[-1].step if checkpoints else 0
+                if step - last >= self.min_interval:
+                    checkpoints.append(_Checkpoint(step, pickle.dumps(cvt, pickle.HIGHEST_PROTOCOL)))
+                interval = max(
+                    self.min_interval, math.ceil((total_estimate - step) / (SPAN_CHECKPOINTS + 1))
+                )
+                span_start = step
+            _visit(cvt, stmt, in_main)
+            stats.visited += 1
+            if (step + 1 - span_start) % interval == 0:
+                checkpoints.append(_Checkpoint(step + 1, pickle.dumps(cvt, pickle.HIGHEST_PROTOCOL)))
+
+        if cvt is None:
+            # 所有语句都未变化，或只删除了末尾的语句
+            if len(chain) != len(old_chain):
+                stats.first_changed_line = (done[-1][0].end_lineno or 0) + 1 if done else 1
+            cvt, checkpoints = _restore(len(done), fresh, done, old_checkpoints, stats)
+
+        cvt.resolve_unresolved()
+        cvt.finalize_outputs()
+
+        stats.statements = len(chain)
+        self.stats = stats
+        self._head = head
+        self._chain = chain
+        self._checkpoints = self._trim(checkpoints)
+        return cvt.g.to_dict()
+
+
+def _restore(
+    step: int,
+    fresh: DedupConverter,
+    done: List[Tuple[ast.stmt, bool]],
+    checkpoints: List[_Checkpoint],
+    stats: IncrementalStats,
+) -> Tuple[DedupConverter, List[_Checkpoint]]:
+    """
+    从 step 之前最近的检查点恢复转换器（没有时使用 fresh），并重放检查点到 step 之间的未变化语句。
+    返回转换器与仍然有效（不晚于 step）的检查点。
+    """
+    kept = [cp for cp in checkpoints if cp.step <= step]
+    cvt, start = fresh, 0
+    if kept:
+        cvt, start = pickle.loads(kept[-1].state), kept[-1].step
+    stats.reused = start
+    for stmt, in_main in done[start:step]:
+        _visit(cvt, stmt, in_main)
+        stats.visited += 1
+    return cvt, kept
+
+
+def _visit(cvt: Converter, stmt: ast.stmt, in_main: bool) -> None:
+    # 与 Converter.visit_Module 相同：按语句所在的作用域设置 _in_main_block 后访问
+    cvt._in_main_block = in_main
+    cvt.visit(stmt)
+    cvt._in_main_block = False
+
+
+__all__ = ["IncrementalConverter", "IncrementalStats"]
@@ -50,6 +50,12 @@ class ErrorModule(Enum):
     
     # 文件 I/O
     FILE_IO = "文件读写"
+
+    # 离线仿真
+    SIMULATOR = "仿真器"
+
+    # 本地编译服务
+    COMPILE_SERVER = "编译服务"
     
     # 通用
     UNKNOWN = "未知模块"
@@ -255,6 +261,40 @@ class FileIOError(ChipSynthesisError):
         )
 
 
+class SimulationError(ChipSynthesisError):
+    """离线仿真错误"""
+    
+    def __init__(
+        self,
+        message: str,
+        context: Optional[dict[str, Any]] = None,
+        original_error: Optional[Exception] = None
+    ):
+        super().__init__(
+            message=message,
+            module=ErrorModule.SIMULATOR,
+            context=context,
+            original_error=original_error
+        )
+
+
+class CompileServerError(ChipSynthesisError):
+    """本地编译服务的请求 / 响应错误"""
+    
+    def __init__(
+        self,
+        message: str,
+        context: Optional[dict[str, Any]] = None,
+        original_error: Optional[Exception] = None
+    ):
+        super().__init__(
+            message=message,
+            module=ErrorModule.COMPILE_SERVER,
+            context=context,
+            original_error=original_error
+        )
+
+
 def format_error_trace(error: Exception) -> str:
     """
     格式化错误追踪信息，包含完整的调用栈。
@@ -394,6 +434,8 @@ __all__ = [
     "ConnectionError",
     "TypeInferenceError",
     "FileIOError",
+    "SimulationError",
+    "CompileServerError",
     "format_error_trace",
     "handle_error",
     "wrap_error",
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+src.fuzzy
+=========
+
+带索引与缓存的模糊匹配。除“归一化后唯一命中”的快捷路径外，结果与
+`difflib.get_close_matches(name, candidates, n=1, cutoff)` 完全一致。
+
+`get_close_matches` 每次调用都要对全部候选者各建一次 SequenceMatcher；流水线中同一个模块名、
+同一组端口名会被反复查询。`FuzzyMatcher` 为一组候选者预先建立：
+- 精确命中表（命中时相似度必为 1.0，直接返回）；
+- 归一化命中表（忽略大小写 / 空格 / 标点后唯一对应的候选者）；
+- 字符计数索引：由它算出的 quick_ratio 是 SequenceMatcher.ratio 的上界，
+  候选者按上界降序逐个计算真实相似度，上界低于当前最优分时即可提前结束；
+- 按 (query, cutoff) 缓存查询结果的 LRU 表。
+
+候选集合本身通过 `get_matcher` 以元组为键缓存，相同候选列表只建一次索引。
+"""
+
+from __future__ import annotations
+
+from collections import Counter, OrderedDict
+from difflib import SequenceMatcher
+from functools import lru_cache
+from typing import Dict, Iterable, List, Tuple
+
+from src.utils import normalize
+
+# 单个匹配器最多缓存的查询结果数
+QUERY_CACHE_SIZE = 4096
+
+
+class FuzzyMatcher:
+    """对一组固定候选者做 “最接近匹配”。"""
+
+    def __init__(self, candidates: Iterable[str]):
+        self.candidates: Tuple[str, ...] = tuple(candidates)
+        self._exact = frozenset(self.candidates)
+
+        by_normalized: Dict[str, List[str]] = {}
+        for c in self.candidates:
+            by_normalized.setdefault(normalize(c), []).append(c)
+        self._normalized = {k: v[0] for k, v in by_normalized.items() if len(set(v)) == 1}
+
+        unique = list(dict.fromkeys(self.candidates))
+        self._indexed: List[Tuple[str, Counter]] = [(c, Counter(c)) for c in unique]
+        self._cache: "OrderedDict[Tuple[str, float], str | None]" = OrderedDict()
+
+    def match(self, query: str, cutoff: float) -> str | None:
+        key = (query, cutoff)
+        cache = self._cache
+        if key in cache:
+            cache.move_to_end(key)
+            return cache[key]
+
+        result = self._match_uncached(query, cutoff)
+        cache[key] = result
+        if len(cache) > QUERY_CACHE_SIZE:
+            cache.popitem(last=False)
+        return result
+
+    def _match_uncached(self, query: str, cutoff: float) -> str | None:
+        if query in self._exact:
+            return query
+        hit = self._normalized.get(normalize(query))
+        if hit is not None:
+            return hit
+        return self._best_by_ratio(query, cutoff)
+
+    def _best_by_ratio(self, query: str, cutoff: float) -> str | None:
+        """
+        与 get_close_matches 相同的打分（seq1=候选者，seq2=query）与平分规则
+        （相似度相同时取字符串较大者），但用字符计数上界剪枝。
+        """
+        q_counts = Counter(query)
+        q_len = len(query)
+
+        bounds: List[Tuple[float, str]] = []
+        for cand, c_counts in self._indexed:
+            total = q_len + len(cand)
+            if not total:
+                continue
+            if len(c_counts) < len(q_counts):
+                inter = sum(min(n, q_counts.get(ch, 0)) for ch, n in c_counts.items())
+            else:
+                inter = sum(min(n, c_counts.get(ch, 0)) for ch, n in q_counts.items())
+            bound = 2.0 * inter / total
+            if bound >= cutoff:
+                bounds.append((bound, cand))
+        bounds.sort(reverse=True)
+
+        best: Tuple[float, str] | None = None
+        s = SequenceMatcher()
+        s.set_seq2(query)
+        for bound, cand in bounds:
+            if best is not None and bound < best[0]:
+                break
+            s.set_seq1(cand)
+            score = s.ratio()
+            if score >= cutoff and (best is None or (score, cand) > best):
+                best = (score, cand)
+        return best[1] if best is not None else None
+
+
+@lru_cache(maxsize=256)
+def get_matcher(candidates: Tuple[str, ...]) -> FuzzyMatcher:
+    """按候选集合（元组）缓存匹配器。"""
+    return FuzzyMatcher(candidates)
+
+
+@lru_cache(maxsize=1024)
+def _port_lookup(port_list: Tuple[str, ...]) -> Tuple[FuzzyMatcher, Dict[str, int]]:
+    normalized_ports = [normalize(p) for p in port_list]
+    positions: Dict[str, int] = {}
+    for i, p in enumerate(normalized_ports):
+        positions.setdefault(p, i)
+    return FuzzyMatcher(normalized_ports), positions
+
+
+def match_port_position(port_name: str, port_list: Iterable[str], cutoff: float) -> int | None:
+    """
+    在端口名列表中模糊匹配 port_name，返回端口下标；找不到返回 None。
+    归一化后的端口列表与匹配器按 port_list 缓存，同一模块的端口只处理一次。
+    """
+    matcher, positions = _port_lookup(tuple(port_list))
+    best = matcher.match(normalize(str(port_name)), cutoff)
+    return positions[best] if best is not None else None
+
+
+__all__ = ["FuzzyMatcher", "get_matcher", "match_port_position", "QUERY_CACHE_SIZE"]
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+src.graph_passes
+================
+
+在 DSL -> graph 转换之后、parse_graph_v2 建模块之前，对 graph 字典做的优化 pass。
+
+每个 pass 原地修改 graph（nodes / edges），返回一个 `PassReport`。
+目前包括（按执行顺序）：
+- fold：常量折叠（默认开启）
+- cse：公共子表达式消除（默认开启）
+- rebalance：把结合律运算链重排为平衡树以降低关键路径深度（默认关闭）
+- dce：删除结果到达不了 OUTPUT / 变量 / 有副作用模块的死节点（默认开启）
+"""
+
+from __future__ import annotations
+
+from typing import List
+
+from src.graph_passes.common import PURE_MODULES, PassReport
+from src.graph_passes.cse import eliminate_common_subexpressions
+from src.graph_passes.dce import eliminate_dead_nodes
+from src.graph_passes.fold import fold_constants
+from src.graph_passes.rebalance import rebalance_associative_chains
+from src.module_catalog import ModuleCatalog
+
+
+def run_graph_passes(
+    graph: dict,
+    catalog: ModuleCatalog,
+    *,
+    fold: bool = True,
+    cse: bool = True,
+    dce: bool = True,
+    rebalance: bool = False,
+) -> List[PassReport]:
+    """按固定顺序执行启用的 pass，返回各 pass 的结果。"""
+    reports: List[PassReport] = []
+    if fold:
+        reports.append(fold_constants(graph, catalog))
+    if cse:
+        reports.append(eliminate_common_subexpressions(graph, catalog))
+    if rebalance:
+        reports.append(rebalance_associative_chains(graph, catalog))
+    if dce:
+        reports.append(eliminate_dead_nodes(graph, catalog))
+    return reports
+
+
+__all__ = [
+    "run_graph_passes",
+    "eliminate_common_subexpressions",
+    "eliminate_dead_nodes",
+    "fold_constants",
+    "rebalance_associative_chains",
+    "PassReport",
+    "PURE_MODULES",
+]
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+src.graph_passes.common
+=======================
+
+各个 graph 优化 pass 共用的工具：
+- 把 graph 节点的 DSL 类型名解析为 moduledef 中的规范模块名（与 parse_graph_v2 的匹配规则一致），
+  以及把入边端口名解析为模块输入端口下标（与 build_connections 一致）；
+- 无副作用模块表；
+- 按连线求拓扑序、关键路径深度，按目标节点索引入边；
+- 统一的 pass 结果记录 `PassReport`。
+"""
+
+from __future__ import annotations
+
+import heapq
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List
+
+from src.config import FUZZY_CUTOFF_NODE, FUZZY_CUTOFF_PORT
+from src.fuzzy import get_matcher, match_port_position
+from src.module_catalog import ModuleCatalog
+from src.utils import normalize
+
+# 无副作用、输出只取决于输入端口的模块（moduledef 中的 datatype_map_nodename）。
+# 不在表中的模块（Time / Random / 实体读写 / Delay、Counter 等带状态模块 / 变量 / 数组修改 / I/O）
+# 一律视为有副作用或不可合并。
+PURE_MODULES = frozenset({
+    # 常量
+    "Constant", "Pi", "E", "Identity",
+    # 数学
+    "Abs", "Add", "Average", "Ceil", "Clamp", "Clamp01", "Divide", "Exp", "ExpPow",
+    "Negate", "Percent", "Round", "Sign", "Sqr", "Sqrt", "Subtract", "Floor", "Inverse",
+    "Interpolate", "Log", "Remainder", "Multiply", "Pow", "Max",
+    # 三角
+    "DeltaAngle", "Acos", "Asin", "Atan", "Actan", "Cos", "Sin", "Tan", "Ctan",
+    "DegToRad", "RadToDeg", "CosineFormulaSide", "CosineFormulaAngle",
+    "PythagoreanCathetus", "PythagoreanSide",
+    # 逻辑 / 比较 / 位运算
+    "And", "Or", "Nand", "Nor", "Not", "Xor", "Nxor", "Branch",
+    "Equal", "NotEqual", "GreaterOrEqual", "Greater", "LessOrEqual", "Less",
+    "InRangeExclusive", "InRangeInclusive",
+    "BitAnd", "BitNot", "BitOr", "BitXor", "BitShiftLeft", "BitShiftRight",
+    # 向量
+    "Combine", "Split", "VectorCross", "VectorDot", "Normalize", "VectorPositive",
+    "VectorRotate", "VectorShiftLeft", "VectorShiftRight", "VectorAngleBetween",
+    "Magnitude", "SqrMagnitude", "RgbToHsv", "HsvToRgb",
+    # 字符串 / 转换
+    "StringFind", "StringLength", "StringLowercase", "StringUppercase", "StringReverse",
+    "StringReplace", "StringRepeat", "Substring", "StringTrim", "ToString", "ToAscii",
+    "ToNumber",
+    # 数组（只读）
+    "ArraysLength", "Select",
+})
+
+
+@dataclass
+class PassReport:
+    """一个 pass 的执行结果：删除了哪些节点，以及 pass 自己的统计信息。"""
+    name: str
+    removed_nodes: List[str] = field(default_factory=list)
+    details: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.removed_nodes) or bool(self.details.get("changed"))
+
+
+def resolve_chip_entries(graph: dict, catalog: ModuleCatalog) -> Dict[str, dict | None]:
+    """
+    节点 id -> chip_index 中的模块信息（无法识别时为 None）。
+    类型名的匹配方式与 parse_graph_v2 相同，保证 pass 与后续建模块看到的是同一个模块。
+    """
+    chip_index = catalog.chip_index
+    matcher = get_matcher(tuple(chip_index.keys()))
+    entries: Dict[str, dict | None] = {}
+    for node in graph.get("nodes", []):
+        key = matcher.match(normalize(str(node.get("type", ""))), FUZZY_CUTOFF_NODE)
+        entries[node["id"]] = chip_index[key] if key is not None else None
+    return entries
+
+
+def resolve_module_names(graph: dict, catalog: ModuleCatalog) -> Dict[str, str | None]:
+    """节点 id -> moduledef 中的 datatype_map_nodename（无法识别时为 None）。"""
+    names: Dict[str, str | None] = {}
+    for nid, entry in resolve_chip_entries(graph, catalog).items():
+        if entry is None:
+            names[nid] = None
+            continue
+        module = catalog.module_defs.get(str(entry.get("op_type"))) or {}
+        source_info = module.get("source_info") or {}
+        names[nid] = source_info.get("datatype_map_nodename") or entry.get("friendly_name")
+    return names
+
+
+def input_port_position(port_name: str, port_list: List[str]) -> int | None:
+    """
+    与 pipeline.port_index 相同的端口解析规则（单端口 / 数字序号 / 模糊匹配），
+    无法解析时返回 None 而不是抛异常。
+    """
+    if not port_list:
+        return None
+    if len(port_list) == 1:
+        return 0
+    if isinstance(port_name, str) and port_name.isdigit():
+        idx = int(port_name)
+        return idx if idx < len(port_list) else None
+    return match_port_position(port_name, port_list, FUZZY_CUTOFF_PORT)
+
+
+def edges_by_target(edges: Iterable[dict]) -> Dict[str, List[dict]]:
+    """目标节点 id -> 入边列表（保持原顺序）。"""
+    out: Dict[str, List[dict]] = {}
+    for e in edges:
+        out.setdefault(e["to_node"], []).append(e)
+    return out
+
+
+def topological_order(graph: dict) -> List[str]:
+    """
+    按连线求拓扑序；同时就绪的节点按其在 nodes 中的先后出列，保证结果确定。
+    处在环上（以及只能经由环到达）的节点不会出现在结果中。
+    """
+    nodes = graph.get("nodes", [])
+    position = {n["id"]: i for i, n in enumerate(nodes)}
+    indegree = {nid: 0 for nid in position}
+    succs: Dict[str, List[str]] = {}
+    for e in graph.get("edges", []):
+        src, dst = e["from_node"], e["to_node"]
+        if src in position and dst in position:
+            succs.setdefault(src, []).append(dst)
+            indegree[dst] += 1
+
+    ready = [position[nid] for nid, d in indegree.items() if d == 0]
+    heapq.heapify(ready)
+    order: List[str] = []
+    while ready:
+        nid = nodes[heapq.heappop(ready)]["id"]
+        order.append(nid)
+        for nxt in succs.get(nid, ()):
+            indegree[nxt] -= 1
+            if indegree[nxt] == 0:
+                heapq.heappush(ready, position[nxt])
+    return order
+
+
+def critical_path_depth(graph: dict) -> int:
+    """
+    关键路径深度：从任一源节点到任一汇节点的最长路径上的节点数（与布局的 ASAP 分层一致，
+    即 calculate_alap_layers 的总层数）。环上的节点不计入。
+    """
+    depth: Dict[str, int] = {}
+    preds: Dict[str, List[str]] = {}
+    for e in graph.get("edges", []):
+        preds.setdefault(e["to_node"], []).append(e["from_node"])
+    for nid in topological_order(graph):
+        depth[nid] = 1 + max((depth[p] for p in preds.get(nid, ()) if p in depth), default=0)
+    return max(depth.values(), default=0)
+
+
+def merge_output_ports(keep: dict, drop: dict) -> None:
+    """把被合并节点引用过的输出端口并入保留节点（格式同 Converter.finalize_outputs）。"""
+    names = {p.get("name") for p in keep.get("outputs") or []}
+    names |= {p.get("name") for p in drop.get("outputs") or []}
+    keep["outputs"] = [{"name": p, "type": ""} for p in sorted(names, key=str)]
+
+
+__all__ = [
+    "PURE_MODULES",
+    "PassReport",
+    "resolve_chip_entries",
+    "resolve_module_names",
+    "input_port_position",
+    "edges_by_target",
+    "topological_order",
+    "critical_path_depth",
+    "merge_output_ports",
+]
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+src.graph_passes.cse
+====================
+
+公共子表达式消除（hash-consing）。
+
+DedupConverter 只合并相同值的常量；两个 `Add(a, b)`、同一个向量的多次 `Split` 仍会各自生成一个门。
+本 pass 按拓扑序遍历 graph，为每个无副作用节点计算键：
+
+    (规范模块名, attrs, 输入端口列表, 按端口排序的入边 (端口, 上游代表节点, 上游端口))
+
+上游节点若已被合并，键中使用其代表节点，因此整条重复链会被逐级合并。
+键相同的后出现节点被删除，其出边改接到先出现的节点上。
+"""
+
+from __future__ import annotations
+
+import json
+from typing import Any, Dict, List, Tuple
+
+from src.graph_passes.common import (
+    PURE_MODULES,
+    PassReport,
+    edges_by_target,
+    merge_output_ports,
+    resolve_module_names,
+    topological_order,
+)
+from src.module_catalog import ModuleCatalog
+
+# 对任意数据类型都满足交换律的双输入模块：A/B 两个输入可以互换。
+# Add（字符串拼接）、Multiply / Subtract 等不在此列。
+COMMUTATIVE_MODULES = frozenset({
+    "And", "Or", "Nand", "Nor", "Xor", "Nxor",
+    "Equal", "NotEqual", "Max", "Average",
+    "BitAnd", "BitOr", "BitXor", "VectorDot",
+})
+
+
+def _attrs_key(attrs: Dict[str, Any]) -> str:
+    # 1 与 1.0、"1" 序列化结果不同，不会被误合并
+    return json.dumps(attrs or {}, sort_keys=True, ensure_ascii=False, default=str)
+
+
+def _node_key(node: dict, module: str, incoming: List[dict], rep: Dict[str, str]) -> Tuple:
+    wires = [(e["to_port"], rep.get(e["from_node"], e["from_node"]), e["from_port"]) for e in incoming]
+    if module in COMMUTATIVE_MODULES and sorted(w[0] for w in wires) == ["A", "B"]:
+        sources = sorted((w[1], w[2]) for w in wires)
+        wires = [("A",) + sources[0], ("B",) + sources[1]]
+    declared = tuple(str(p.get("name")) for p in node.get("inputs") or [])
+    return (module, _attrs_key(node.get("attrs")), declared, tuple(sorted(wires, key=repr)))
+
+
+def eliminate_common_subexpressions(graph: dict, catalog: ModuleCatalog) -> PassReport:
+    """
+    原地合并 graph 中的重复无副作用节点，返回 PassReport。
+    details["merged"] 记录 被删除节点 -> 保留节点。
+    """
+    report = PassReport("cse")
+    modules = resolve_module_names(graph, catalog)
+    nodes_by_id = {n["id"]: n for n in graph.get("nodes", [])}
+    incoming = edges_by_target(graph.get("edges", []))
+
+    rep: Dict[str, str] = {}
+    seen: Dict[Tuple, str] = {}
+    for nid in topological_order(graph):
+        module = modules.get(nid)
+        if module not in PURE_MODULES:
+            continue
+        key = _node_key(nodes_by_id[nid], module, incoming.get(nid, []), rep)
+        keep = seen.setdefault(key, nid)
+        if keep != nid:
+            rep[nid] = keep
+            merge_output_ports(nodes_by_id[keep], nodes_by_id[nid])
+
+    if not rep:
+        return report
+
+    graph["nodes"] = [n for n in graph["nodes"] if n["id"] not in rep]
+    new_edges: List[dict] = []
+    for e in graph.get("edges", []):
+        if e["to_node"] in rep:
+            continue
+        if e["from_node"] in rep:
+            e = {**e, "from_node": rep[e["from_node"]]}
+        new_edges.append(e)
+    graph["edges"] = new_edges
+
+    report.removed_nodes = list(rep)
+    report.details["merged"] = dict(rep)
+    return report
+
+
+__all__ = ["eliminate_common_subexpressions", "COMMUTATIVE_MODULES"]
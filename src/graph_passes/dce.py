@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+src.graph_passes.dce
+====================
+
+死节点消除（liveness）。
+
+从“根”节点出发沿连线反向遍历，删除结果到达不了任何根的节点及其连线：
+- 根：OUTPUT / INPUT、变量（读写都算）、实体写入、Delay / Counter 等带状态模块，
+  以及无法识别的节点——即除 PURE_MODULES 与 READ_ONLY_MODULES 之外的全部模块；
+- PURE_MODULES 中的纯运算，以及 READ_ONLY_MODULES 中只读取游戏状态的模块，
+  结果没人使用时删除不会改变存档行为。
+"""
+
+from __future__ import annotations
+
+from typing import Dict, List, Set
+
+from src.graph_passes.common import PURE_MODULES, PassReport, resolve_module_names
+from src.module_catalog import ModuleCatalog
+
+# 不是纯函数（结果随时间 / 实体状态变化），但没有任何写入效果的模块
+READ_ONLY_MODULES = frozenset({
+    "Random", "Time",
+    "EntityID", "IDIsValid", "IDToEntity", "CanBeActivated",
+    "Mass", "MassCenter", "EntityNormal", "Elevation", "VelocityAtPosition",
+    "WorldPositionToLocal", "WorldAngleToLocal", "LocalPositionToWorld", "LocalAngleToWorld",
+    "ArraysGet", "ArraysFind",
+})
+
+
+def eliminate_dead_nodes(graph: dict, catalog: ModuleCatalog) -> PassReport:
+    """
+    原地删除 graph 中结果到达不了根节点的节点与连线，返回 PassReport。
+    details["removed"] 按原顺序记录被删节点的 {id, type, label}，供报告输出。
+    """
+    report = PassReport("dce")
+    nodes = graph.get("nodes", [])
+    edges = graph.get("edges", [])
+    modules = resolve_module_names(graph, catalog)
+
+    preds: Dict[str, List[str]] = {}
+    for e in edges:
+        preds.setdefault(e["to_node"], []).append(e["from_node"])
+
+    live: Set[str] = set()
+    stack = [
+        n["id"] for n in nodes
+        if modules.get(n["id"]) not in PURE_MODULES and modules.get(n["id"]) not in READ_ONLY_MODULES
+    ]
+    while stack:
+        nid = stack.pop()
+        if nid in live:
+            continue
+        live.add(nid)
+        stack.extend(p for p in preds.get(nid, ()) if p not in live)
+
+    dead = [n for n in nodes if n["id"] not in live]
+    if not dead:
+        return report
+
+    dead_ids = {n["id"] for n in dead}
+    graph["nodes"] = [n for n in nodes if n["id"] in live]
+    graph["edges"] = [e for e in edges if e["from_node"] not in dead_ids and e["to_node"] not in dead_ids]
+
+    report.removed_nodes = [n["id"] for n in dead]
+    report.details["removed"] = [
+        {"id": n["id"], "type": n.get("type"), "label": n.get("label")} for n in dead
+    ]
+    return report
+
+
+__all__ = ["eliminate_dead_nodes", "READ_ONLY_MODULES"]
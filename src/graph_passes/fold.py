@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+src.graph_passes.fold
+=====================
+
+编译期常量折叠。
+
+所有输入端口都接自 Constant 节点的数学 / 比较 / 逻辑门，在编译期求值后替换为一个 Constant：
+- 按拓扑序处理，折叠出的常量可以继续参与下游折叠（整棵常量子树收缩为一个常量）；
+- 新常量与 DedupConverter 使用同一个去重键（constant_cache_key），已有同值常量时直接复用；
+- 原来只供被折叠节点使用的 Constant 在失去全部下游后一并删除。
+
+求值语义尽量与游戏一致（游戏按 C# 浮点运算）：
+- Mod 即游戏的 Remainder，为截断取余（math.fmod，符号跟随被除数），而不是 Python 的 %；
+- Round 为四舍六入五成双（Mathf.Round），与 Python 的 round 一致；
+- 比较 / 逻辑结果为 1.0 / 0.0，逻辑输入非 0 即真；
+- Equal / NotEqual 与大小比较在两边差值落在单精度容差附近时不折叠（相等时 Equal 仍折叠为真），
+  避免双精度与游戏的单精度得出相反的结果；
+- 除零、定义域错误、结果非有限值时不折叠，保留原门由游戏在运行时处理。
+游戏内部按单精度计算，折叠结果按双精度求值，末位可能与运行时略有差别。
+"""
+
+from __future__ import annotations
+
+import math
+from typing import Any, Callable, Dict, List
+
+from src.converter.dedup_converter import constant_cache_key
+from src.converter.utils import _auto_label
+from src.graph_passes.common import (
+    PassReport,
+    edges_by_target,
+    input_port_position,
+    resolve_chip_entries,
+    resolve_module_names,
+    topological_order,
+)
+from src.module_catalog import ModuleCatalog
+
+
+class _NoFold(Exception):
+    """该组输入不能在编译期安全求值。"""
+
+
+def _num(v: Any) -> float:
+    if isinstance(v, bool) or not isinstance(v, (int, float)):
+        raise _NoFold
+    return float(v)
+
+
+def _truth(v: Any) -> bool:
+    return _num(v) != 0.0
+
+
+def _flag(b: bool) -> float:
+    return 1.0 if b else 0.0
+
+
+def _add(a: Any, b: Any) -> Any:
+    if isinstance(a, str) and isinstance(b, str):
+        return a + b
+    return _num(a) + _num(b)
+
+
+def _divide(a: Any, b: Any) -> float:
+    if _num(b) == 0.0:
+        raise _NoFold
+    return _num(a) / _num(b)
+
+
+def _remainder(a: Any, b: Any) -> float:
+    if _num(b) == 0.0:
+        raise _NoFold
+    return math.fmod(_num(a), _num(b))
+
+
+def _sqrt(a: Any) -> float:
+    if _num(a) < 0.0:
+        raise _NoFold
+    return math.sqrt(_num(a))
+
+
+def _log(value: Any, base: Any) -> float:
+    v, b = _num(value), _num(base)
+    if v <= 0.0 or b <= 0.0 or b == 1.0:
+        raise _NoFold
+    return math.log(v, b)
+
+
+def _clamp(x: Any, lo: Any, hi: Any) -> float:
+    x, lo, hi = _num(x), _num(lo), _num(hi)
+    if x < lo:
+        return lo
+    if x > hi:
+        return hi
+    return x
+
+
+def _near(x: float, y: float) -> bool:
+    """差值落在单精度容差以内（游戏按 float 运算，结果可能与双精度不同）。"""
+    return abs(x - y) <= 1e-5 * max(1.0, abs(x), abs(y))
+
+
+def _approx_equal(a: Any, b: Any) -> bool:
+    if isinstance(a, str) and isinstance(b, str):
+        return a == b
+    x, y = _num(a), _num(b)
+    if x == y:
+        return True
+    # 明显不相等才折叠；落在单精度容差附近的交给运行时判断
+    if not _near(x, y):
+        return False
+    raise _NoFold
+
+
+def _compare(a: Any, b: Any, op: Callable[[float, float], bool]) -> float:
+    x, y = _num(a), _num(b)
+    # 例如 0.1 + 0.2 > 0.3：双精度为真，游戏的单精度结果为假；两边接近时交给运行时判断
+    if _near(x, y):
+        raise _NoFold
+    return _flag(op(x, y))
+
+
+# 模块名 -> 按 moduledef 输入端口顺序接收参数的求值函数
+FOLDERS: Dict[str, Callable[..., Any]] = {
+    "Add": _add,
+    "Subtract": lambda a, b: _num(a) - _num(b),
+    "Multiply": lambda a, b: _num(a) * _num(b),
+    "Divide": _divide,
+    "Remainder": _remainder,
+    "Pow": lambda a, b: math.pow(_num(a), _num(b)),
+    "Sqrt": _sqrt,
+    "Sqr": lambda a: _num(a) * _num(a),
+    "Negate": lambda a: -_num(a),
+    "Abs": lambda a: abs(_num(a)),
+    "Floor": lambda a: float(math.floor(_num(a))),
+    "Ceil": lambda a: float(math.ceil(_num(a))),
+    "Round": lambda a: float(round(_num(a))),
+    "Max": lambda a, b: max(_num(a), _num(b)),
+    "Average": lambda a, b: (_num(a) + _num(b)) / 2.0,
+    "Clamp": _clamp,
+    "Clamp01": lambda a: _clamp(a, 0.0, 1.0),
+    "Inverse": lambda a: _divide(1.0, a),
+    "Exp": lambda a: math.exp(_num(a)),
+    "Log": _log,
+    "Greater": lambda a, b: _compare(a, b, lambda x, y: x > y),
+    "Less": lambda a, b: _compare(a, b, lambda x, y: x < y),
+    "GreaterOrEqual": lambda a, b: _compare(a, b, lambda x, y: x >= y),
+    "LessOrEqual": lambda a, b: _compare(a, b, lambda x, y: x <= y),
+    "Equal": lambda a, b: _flag(_approx_equal(a, b)),
+    "NotEqual": lambda a, b: _flag(not _approx_equal(a, b)),
+    "And": lambda a, b: _flag(_truth(a) and _truth(b)),
+    "Or": lambda a, b: _flag(_truth(a) or _truth(b)),
+    "Nand": lambda a, b: _flag(not (_truth(a) and _truth(b))),
+    "Nor": lambda a, b: _flag(not (_truth(a) or _truth(b))),
+    "Xor": lambda a, b: _flag(_truth(a) != _truth(b)),
+    "Nxor": lambda a, b: _flag(_truth(a) == _truth(b)),
+    "Not": lambda a: _flag(not _truth(a)),
+    "Branch": lambda cond, a, b: a if _truth(cond) else b,
+}
+
+# 这些模块的结果是“数值运算”结果：全部输入为整数且结果为整数时保留 int，便于与 DSL 中的整数常量去重
+_ARITHMETIC = frozenset({"Add", "Subtract", "Multiply", "Remainder", "Negate", "Abs", "Sqr", "Max"})
+
+
+def _is_foldable_value(v: Any) -> bool:
+    if isinstance(v, bool):
+        return False
+    if isinstance(v, (int, float)):
+        return math.isfinite(v)
+    return isinstance(v, str)
+
+
+def _finalize(module: str, result: Any, args: List[Any]) -> Any:
+    if isinstance(result, str):
+        return result
+    if not isinstance(result, (int, float)) or not math.isfinite(result):
+        raise _NoFold
+    if (
+        module in _ARITHMETIC
+        and all(isinstance(a, int) and not isinstance(a, bool) for a in args)
+        and float(result).is_integer()
+        and abs(result) < 2 ** 53
+    ):
+        return int(result)
+    return result
+
+
+def evaluate(module: str, args: List[Any]) -> Any:
+    """按游戏语义求值一个模块；不能安全折叠时抛出 _NoFold。"""
+    fn = FOLDERS.get(module)
+    if fn is None or not all(_is_foldable_value(a) for a in args):
+        raise _NoFold
+    try:
+        result = fn(*args)
+    except (ArithmeticError, ValueError, TypeError):
+        raise _NoFold
+    return _finalize(module, result, args)
+
+
+def _new_constant_id(used: set) -> str:
+    i = 0
+    while f"constant_{i}" in used:
+        i += 1
+    nid = f"constant_{i}"
+    used.add(nid)
+    return nid
+
+
+def fold_constants(graph: dict, catalog: ModuleCatalog) -> PassReport:
+    """
+    原地折叠 graph 中输入全为常量的纯运算节点，返回 PassReport。
+    details["folded"] 记录 被折叠节点 -> 替代它的 Constant 节点 id。
+    """
+    report = PassReport("fold")
+    nodes = graph.get("nodes", [])
+    nodes_by_id = {n["id"]: n for n in nodes}
+    modules = resolve_module_names(graph, catalog)
+    chips = resolve_chip_entries(graph, catalog)
+    incoming = edges_by_target(graph.get("edges", []))
+
+    # 常量节点 id -> 值；去重键 -> 常量节点 id
+    constant_values: Dict[str, Any] = {}
+    by_cache_key: Dict[str, str] = {}
+    for n in nodes:
+        attrs = n.get("attrs") or {}
+        if modules.get(n["id"]) == "Constant" and "value" in attrs:
+            constant_values[n["id"]] = attrs["value"]
+            by_cache_key.setdefault(constant_cache_key(attrs["value"], attrs.get("data_type")), n["id"])
+
+    used_ids = set(nodes_by_id)
+    replaced: Dict[str, str] = {}       # 被折叠节点 -> 常量节点
+    created: Dict[str, dict] = {}       # 被折叠节点 -> 原位置插入的新常量
+    for nid in topological_order(graph):
+        module = modules.get(nid)
+        chip = chips.get(nid)
+        if module not in FOLDERS or chip is None:
+            continue
+        ports = chip.get("inputs") or []
+        node = nodes_by_id[nid]
+        declared = node.get("inputs") or []
+        edges = incoming.get(nid, [])
+        if len(edges) != len(ports) or len(declared) != len(ports):
+            continue
+
+        args: List[Any] = [None] * len(ports)
+        filled = [False] * len(ports)
+        for e in edges:
+            src = replaced.get(e["from_node"], e["from_node"])
+            idx = input_port_position(e["to_port"], ports)
+            if idx is None or filled[idx] or src not in constant_values:
+                break
+            args[idx] = constant_values[src]
+            filled[idx] = True
+        if not all(filled):
+            continue
+
+        try:
+            value = evaluate(module, args)
+        except _NoFold:
+            continue
+
+        data_type = (node.get("attrs") or {}).get("data_type")
+        key = constant_cache_key(value, data_type)
+        const_id = by_cache_key.get(key)
+        if const_id is None:
+            const_id = _new_constant_id(used_ids)
+            attrs: Dict[str, Any] = {"value": value}
+            if data_type:
+                attrs["data_type"] = data_type
+            created[nid] = {
+                "id": const_id,
+                "type": "Constant",
+                "label": _auto_label("Constant", attrs),
+                "attrs": attrs,
+                "inputs": [],
+                "outputs": [{"name": "Output", "type": ""}],
+            }
+            by_cache_key[key] = const_id
+            constant_values[const_id] = value
+        replaced[nid] = const_id
+
+    if not replaced:
+        return report
+
+    # 改接出边，删除被折叠节点的入边
+    had_consumers = {e["from_node"] for e in graph.get("edges", [])}
+    new_edges: List[dict] = []
+    for e in graph.get("edges", []):
+        if e["to_node"] in replaced:
+            continue
+        if e["from_node"] in replaced:
+            e = {**e, "from_node": replaced[e["from_node"]], "from_port": "Output"}
+        new_edges.append(e)
+    graph["edges"] = new_edges
+
+    # 只为被折叠节点服务的常量：折叠前有下游、折叠后没有了
+    still_used = {e["from_node"] for e in new_edges}
+    orphaned = {
+        cid for cid in constant_values
+        if cid in nodes_by_id and cid in had_consumers and cid not in still_used
+    }
+
+    new_nodes: List[dict] = []
+    for n in nodes:
+        nid = n["id"]
+        if nid in created:
+            # 中间结果的常量若已被下游继续折叠掉，就不再插入
+            if created[nid]["id"] in still_used:
+                new_nodes.append(created[nid])
+        elif nid in replaced or nid in orphaned:
+            continue
+        else:
+            new_nodes.append(n)
+    graph["nodes"] = new_nodes
+
+    report.removed_nodes = [nid for nid in replaced] + sorted(orphaned)
+    report.details["folded"] = dict(replaced)
+    report.details["values"] = {nid: constant_values[cid] for nid, cid in replaced.items()}
+    return report
+
+
+__all__ = ["fold_constants", "evaluate", "FOLDERS"]
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+src.graph_passes.rebalance
+==========================
+
+结合律运算链重平衡（可选，默认关闭）。
+
+`a + b + c + d + e` 在 graph 中是一条左深的 Add 链，信号要经过 4 层门才能到达输出。
+本 pass 把同一种结合律运算（Add / Multiply / Max / And / Or）首尾相接、中间结果没有其他使用者的链，
+按原操作数顺序重新加括号为平衡二叉树，链深从 n-1 降到 ceil(log2 n)：
+- 只改变结合方式，不交换操作数顺序，因此字符串拼接（Add 的字符串重载）结果不变；
+- 复用链上原有的节点，节点数不变，链根的 id 与出边保持不变；
+- 浮点加法 / 乘法重新结合后，末位舍入可能与原链不同。
+"""
+
+from __future__ import annotations
+
+import math
+from typing import Dict, List, Optional, Tuple
+
+from src.graph_passes.common import (
+    PassReport,
+    critical_path_depth,
+    edges_by_target,
+    input_port_position,
+    resolve_chip_entries,
+    resolve_module_names,
+)
+from src.module_catalog import ModuleCatalog
+
+# moduledef 中没有 Min 模块，因此不在表中
+ASSOCIATIVE_MODULES = frozenset({"Add", "Multiply", "Max", "And", "Or"})
+
+
+def _ordered_operands(node: dict, edges: List[dict], chip: Optional[dict]) -> Optional[List[dict]]:
+    """按输入端口顺序返回两条入边；端口不是恰好各接一条时返回 None。"""
+    ports = (chip or {}).get("inputs") or []
+    if len(ports) != 2 or len(edges) != 2 or len(node.get("inputs") or []) != 2:
+        return None
+    ordered: List[Optional[dict]] = [None, None]
+    for e in edges:
+        idx = input_port_position(e["to_port"], ports)
+        if idx is None or ordered[idx] is not None:
+            return None
+        ordered[idx] = e
+    return ordered  # type: ignore[return-value]
+
+
+def rebalance_associative_chains(graph: dict, catalog: ModuleCatalog) -> PassReport:
+    """
+    原地把结合律运算链改写为平衡树，返回 PassReport。
+    details 中记录 chains（改写的链数）、depth_before / depth_after（全图关键路径深度）。
+    """
+    report = PassReport("rebalance")
+    nodes = graph.get("nodes", [])
+    edges = graph.get("edges", [])
+    nodes_by_id = {n["id"]: n for n in nodes}
+    modules = resolve_module_names(graph, catalog)
+    chips = resolve_chip_entries(graph, catalog)
+    incoming = edges_by_target(edges)
+
+    outgoing: Dict[str, List[dict]] = {}
+    for e in edges:
+        outgoing.setdefault(e["from_node"], []).append(e)
+
+    operands: Dict[str, List[dict]] = {}
+    for n in nodes:
+        if modules.get(n["id"]) in ASSOCIATIVE_MODULES:
+            ordered = _ordered_operands(n, incoming.get(n["id"], []), chips.get(n["id"]))
+            if ordered is not None:
+                operands[n["id"]] = ordered
+
+    def is_interior(nid: str) -> bool:
+        """nid 的结果只被同一条链上的下一个同类节点使用。"""
+        outs = outgoing.get(nid, [])
+        if nid not in operands or len(outs) != 1:
+            return False
+        consumer = outs[0]["to_node"]
+        return (
+            consumer in operands
+            and modules[consumer] == modules[nid]
+            and (nodes_by_id[consumer].get("attrs") or {}) == (nodes_by_id[nid].get("attrs") or {})
+        )
+
+    depth_before = critical_path_depth(graph)
+    removed_edges: set = set()
+    added_edges: List[dict] = []
+    chains = 0
+
+    for root in (n["id"] for n in nodes):
+        if root not in operands or is_interior(root):
+            continue
+
+        # 按操作数原顺序展开整条链：leaves 为叶子入边，members 为链上的节点
+        leaves: List[dict] = []
+        members: List[str] = [root]
+        chain_depth = 1
+        stack: List[Tuple[dict, int]] = [(e, 1) for e in reversed(operands[root])]
+        while stack:
+            edge, level = stack.pop()
+            src = edge["from_node"]
+            if is_interior(src):
+                members.append(src)
+                chain_depth = max(chain_depth, level + 1)
+                stack.extend((e, level + 1) for e in reversed(operands[src]))
+            else:
+                leaves.append(edge)
+        if chain_depth <= math.ceil(math.log2(len(leaves))):
+            continue
+
+        chains += 1
+        for nid in members:
+            removed_edges.update(id(e) for e in operands[nid])
+        out_port = {nid: outgoing[nid][0]["from_port"] for nid in members[1:]}
+        pool = members[1:]
+
+        def build(lo: int, hi: int, target: str) -> None:
+            """把 leaves[lo:hi] 平衡地接到 target 上（target 为链节点）。"""
+            mid = (lo + hi) // 2
+            for slot, (a, b) in enumerate(((lo, mid), (mid, hi))):
+                port = operands[target][slot]["to_port"]
+                if b - a == 1:
+                    added_edges.append({**leaves[a], "to_node": target, "to_port": port})
+                    continue
+                child = pool.pop()
+                added_edges.append({
+                    "from_node": child,
+                    "from_port": out_port[child],
+                    "to_node": target,
+                    "to_port": port,
+                })
+                build(a, b, child)
+
+        build(0, len(leaves), root)
+
+    report.details["chains"] = chains
+    report.details["depth_before"] = depth_before
+    if chains:
+        graph["edges"] = [e for e in edges if id(e) not in removed_edges] + added_edges
+        report.details["changed"] = True
+    report.details["depth_after"] = critical_path_depth(graph)
+    return report
+
+
+__all__ = ["rebalance_associative_chains", "ASSOCIATIVE_MODULES"]
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+src.layout_cache
+================
+
+按芯片拓扑缓存 `layout_chip.run_layout_engine` 的布局结果。
+
+节点 Id 每次构建都会重新生成（uuid），因此缓存键不使用 Id，而是使用：
+- 拓扑摘要：节点数 + 按节点下标表示的连线列表（布局只依赖这些信息）；
+- 节点结构键：OperationType 加上两轮邻居类型的哈希（WL 风格），同键节点再按出现次序编号。
+
+只改常量值等不影响连线的修改会命中完全相同的拓扑摘要，直接复用坐标；
+拓扑有少量变化时，用结构键匹配上的旧坐标作为初始列内顺序，再做一次完整布局。
+"""
+
+from __future__ import annotations
+
+import hashlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+from src.config import CACHE_DIR
+from src.utils import read_pickle_cache, write_pickle_atomic
+
+LAYOUT_CACHE_VERSION = 1
+LAYOUT_CACHE_FILENAME = "layout_cache.pickle"
+
+# 最多保留的布局条目数（按最近使用淘汰）
+MAX_ENTRIES = 32
+# 结构键匹配上的节点比例不低于该值时，才用旧布局作为种子
+PARTIAL_MIN_OVERLAP = 0.5
+
+
+@dataclass(frozen=True)
+class LayoutSignature:
+    digest: str                 # 拓扑摘要（完全命中的键）
+    node_keys: Tuple[str, ...]  # 与 chip_nodes 顺序对齐的结构键（部分命中时使用）
+
+
+def _edges_by_index(chip_nodes: List[Dict[str, Any]]) -> List[Tuple[int, int]]:
+    """与 layout_chip.parse_graph 相同的取边规则，但用节点下标表示端点。"""
+    index = {node["Id"]: i for i, node in enumerate(chip_nodes)}
+    edges: List[Tuple[int, int]] = []
+    for i, node in enumerate(chip_nodes):
+        for input_port in node.get("Inputs", []):
+            connection = input_port.get("connectedOutputIdModel")
+            if connection and "NodeId" in connection:
+                src = index.get(connection["NodeId"])
+                if src is not None:
+                    edges.append((src, i))
+    return edges
+
+
+def _hash(*parts: Any) -> str:
+    return hashlib.sha1(repr(parts).encode("utf-8")).hexdigest()[:16]
+
+
+def layout_signature(chip_nodes: List[Dict[str, Any]]) -> LayoutSignature:
+    edges = _edges_by_index(chip_nodes)
+    digest = hashlib.sha256(repr((len(chip_nodes), edges)).encode("utf-8")).hexdigest()
+
+    preds: List[List[int]] = [[] for _ in chip_nodes]
+    succs: List[List[int]] = [[] for _ in chip_nodes]
+    for s, t in edges:
+        succs[s].append(t)
+        preds[t].append(s)
+
+    keys = [str(node.get("OperationType")) for node in chip_nodes]
+    for _ in range(2):
+        keys = [
+            _hash(keys[i], sorted(keys[p] for p in preds[i]), sorted(keys[q] for q in succs[i]))
+            for i in range(len(chip_nodes))
+        ]
+
+    seen: Dict[str, int] = {}
+    numbered: List[str] = []
+    for k in keys:
+        n = seen.get(k, 0)
+        seen[k] = n + 1
+        numbered.append(f"{k}#{n}")
+    return LayoutSignature(digest, tuple(numbered))
+
+
+class LayoutCache:
+    """
+    磁盘上的布局缓存（pickle，原子写入；写入时与磁盘上其它进程的条目合并）。
+    条目：拓扑摘要 -> {"node_keys": 结构键元组, "positions": [(x, y) 或 None，按节点下标]}
+    """
+
+    def __init__(self, path: Path | str = CACHE_DIR / LAYOUT_CACHE_FILENAME):
+        self.path = Path(path)
+        self._entries: "OrderedDict[str, Dict[str, Any]] | None" = None
+
+    def _read(self) -> "OrderedDict[str, Dict[str, Any]]":
+        payload = read_pickle_cache(self.path)
+        if isinstance(payload, dict) and payload.get("version") == LAYOUT_CACHE_VERSION:
+            return OrderedDict(payload.get("entries") or {})
+        return OrderedDict()
+
+    def _load(self) -> "OrderedDict[str, Dict[str, Any]]":
+        if self._entries is None:
+            self._entries = self._read()
+        return self._entries
+
+    def lookup(self, sig: LayoutSignature,
+               chip_nodes: List[Dict[str, Any]]) -> Dict[str, Dict[str, float]] | None:
+        """拓扑完全相同时返回按当前节点 Id 映射的坐标，否则返回 None。"""
+        entry = self._load().get(sig.digest)
+        if entry is None or len(entry["positions"]) != len(chip_nodes):
+            return None
+        self._entries.move_to_end(sig.digest)
+        positions: Dict[str, Dict[str, float]] = {}
+        for node, pos in zip(chip_nodes, entry["positions"]):
+            if pos is not None:
+                positions[node["Id"]] = {"x": pos[0], "y": pos[1]}
+        return positions
+
+    def seed(self, sig: LayoutSignature,
+             chip_nodes: List[Dict[str, Any]]) -> Dict[str, float] | None:
+        """
+        从结构键重合度最高的旧布局中取出匹配节点的 y 坐标，作为增量布局的初始顺序。
+        重合度低于 PARTIAL_MIN_OVERLAP 时返回 None。
+        """
+        if not chip_nodes:
+            return None
+        best: Dict[str, float] | None = None
+        for entry in self._load().values():
+            old = {k: pos for k, pos in zip(entry["node_keys"], entry["positions"]) if pos is not None}
+            matched = {
+                node["Id"]: old[k][1]
+                for node, k in zip(chip_nodes, sig.node_keys)
+                if k in old
+            }
+            if best is None or len(matched) > len(best):
+                best = matched
+        if best is None or len(best) < PARTIAL_MIN_OVERLAP * len(chip_nodes):
+            return None
+        return best
+
+    def store(self, sig: LayoutSignature, chip_nodes: List[Dict[str, Any]],
+              positions: Dict[str, Dict[str, float]]) -> bool:
+        entries = self._load()
+        entries[sig.digest] = {
+            "node_keys": sig.node_keys,
+            "positions": [
+                (positions[n["Id"]]["x"], positions[n["Id"]]["y"]) if n["Id"] in positions else None
+                for n in chip_nodes
+            ],
+        }
+        entries.move_to_end(sig.digest)
+        # 同一个缓存文件可能被多个进程共用（编译服务的各工作进程、同时运行的构建）：
+        # 写入前合并其它进程在此期间写入的条目（视为较旧），而不是用本进程的视图整体覆盖。
+        # 读与写之间仍可能有别的进程写入，此时最多丢失它的一个条目，只会导致一次缓存未命中。
+        for digest, entry in reversed(self._read().items()):
+            if digest not in entries:
+                entries[digest] = entry
+                entries.move_to_end(digest, last=False)
+        while len(entries) > MAX_ENTRIES:
+            entries.popitem(last=False)
+        return write_pickle_atomic(
+            self.path, {"version": LAYOUT_CACHE_VERSION, "entries": dict(entries)}
+        )
+
+
+__all__ = [
+    "LayoutCache",
+    "LayoutSignature",
+    "layout_signature",
+    "LAYOUT_CACHE_FILENAME",
+    "LAYOUT_CACHE_VERSION",
+]
@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+src.module_catalog
+==================
+
+moduledef.json 的“预编译”模块目录。
+
+过去同一份 moduledef.json 会被多处分别解析并各自建索引：
+- `src.pipeline.build_chip_index_from_moduledef`（归一化友好名 -> 模块信息）
+- `batch_add_modules.add_modules` 中的 candidate_map（存档名 / 友好名 -> 模块 id）
+- `IfElseConverter._load_module_output_types`（模块名 -> 首个输出类型）
+- `modifier._resolve_moduledef_key`（OperationType 字符串 -> 模块 id）
+
+`ModuleCatalog` 一次性构建全部查找表，并以 pickle 形式缓存在 `output/.cache/` 下。
+缓存以 moduledef.json 的 mtime / 大小 与内容 sha256 作为键：mtime 未变化时直接复用，
+mtime 变化但内容哈希相同（例如 git checkout）时同样复用，只有内容真正改变才重建。
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+from src.config import CACHE_DIR, MODULE_DEF_PATH
+from src.error_handler import FileIOError
+from src.utils import as_bool_flag, normalize, read_pickle_cache, write_pickle_atomic
+
+# 查找表结构变化时递增，使旧缓存自动失效
+CATALOG_FORMAT_VERSION = 1
+
+CATALOG_CACHE_FILENAME = "module_catalog.pickle"
+
+# 进程内缓存：同一进程（watch / server 模式）重复加载时只需一次 stat
+_LOADED: Dict[str, Tuple[int, int, "ModuleCatalog"]] = {}
+
+
+def _build_chip_index(module_defs: Dict[str, Any]) -> Dict[str, dict]:
+    """
+    构建索引：归一化友好名 -> {op_type, friendly_name, game_name, inputs, outputs, can_modify_data_type}
+    """
+    chip_index: Dict[str, dict] = {}
+    for _mod_id, mod_data in module_defs.items():
+        source_info = mod_data.get("source_info", {})
+        friendly_name = source_info.get("chip_names_friendly_name")
+        game_name = source_info.get("allmod_viewmodel")
+        if not friendly_name or not game_name:
+            continue
+
+        entry = {
+            "op_type": _mod_id,
+            "friendly_name": friendly_name,
+            "game_name": game_name,
+            "inputs": [p.get("name", "Input") for p in mod_data.get("inputs", [])],
+            "outputs": [p.get("name", "Output") for p in mod_data.get("outputs", [])],
+            "can_modify_data_type": as_bool_flag(mod_data.get("can_modify_data_type", True), True),
+        }
+
+        # 1. 优先使用友好名作为索引
+        chip_index[normalize(friendly_name)] = entry
+        # Compatibility alias: some game versions expect modulo op name.
+        if normalize(friendly_name) == normalize("Remainder"):
+            chip_index.setdefault(normalize("Modulo"), entry)
+            chip_index.setdefault(normalize("Mod"), entry)
+
+        # 2. 如果 ID 不是纯数字（如 "ArraysGet"），也将其作为一种有效的查找方式
+        if not _mod_id.isdigit():
+            chip_index[normalize(_mod_id)] = entry
+
+    # 补充内置节点（Input / Output / Constant）
+    # 说明：
+    # - 新版 moduledef.json 已包含这些模块（例如 Output 通常是 255，而不是旧版的 512）
+    # - 但为了兼容缺失/裁剪过的 moduledef，这里仅在缺失时才补充兜底定义
+    if normalize("Input") not in chip_index:
+        chip_index[normalize("Input")] = {
+            "op_type": "256",
+            "friendly_name": "Input",
+            "game_name": "RootNodeViewModel",
+            "inputs": [],
+            "outputs": ["Number"],
+            "can_modify_data_type": True,
+        }
+    if normalize("Output") not in chip_index:
+        chip_index[normalize("Output")] = {
+            "op_type": "255",
+            "friendly_name": "Output",
+            "game_name": "ExitNodeViewModel",
+            "inputs": ["Number"],
+            "outputs": [],
+            "can_modify_data_type": True,
+        }
+    if normalize("Constant") not in chip_index:
+        chip_index[normalize("Constant")] = {
+            "op_type": "257",
+            "friendly_name": "Constant",
+            "game_name": "ConstantNodeViewModel",
+            "inputs": [],
+            "outputs": ["Output"],
+            "can_modify_data_type": True,
+        }
+    # 变量节点：不在 moduledef.json 中，手动补充
+    # Inputs:  Value, Set
+    # Outputs: Value（唯一输出端口，方便裸节点变量自动端口）
+    chip_index[normalize("Variable")] = {
+        "op_type": None,
+        "friendly_name": "Variable",
+        "game_name": "VariableNodeViewModel",
+        "inputs": ["Value", "Set"],
+        "outputs": ["Value"],
+        "can_modify_data_type": True,
+    }
+    return chip_index
+
+
+def _build_candidate_map(module_defs: Dict[str, Any]) -> Dict[str, str]:
+    """存档名（allmod_viewmodel）/ 友好名的小写形式 -> 模块 id，供 add_modules 匹配请求。"""
+    candidate_map: Dict[str, str] = {}
+    for internal_id, mod_info in module_defs.items():
+        source_info = mod_info.get("source_info", {})
+
+        view_model = source_info.get("allmod_viewmodel")
+        if view_model and str(view_model).strip():
+            candidate_map.setdefault(str(view_model).strip().lower(), internal_id)
+
+        friendly_name = source_info.get("chip_names_friendly_name")
+        if friendly_name and str(friendly_name).strip():
+            candidate_map.setdefault(str(friendly_name).strip().lower(), internal_id)
+    return candidate_map
+
+
+def build_moduledef_key_index(module_defs: Dict[str, Any]) -> Dict[str, str]:
+    """
+    预先构建 “归一化的 datatype_map_nodename / chip_names_friendly_name -> moduledef key” 索引，
+    避免每条修改指令都线性扫描整个 module_defs。
+    同名冲突时保留 module_defs 中先出现的条目（与逐个扫描的结果一致）。
+    """
+    index: Dict[str, str] = {}
+    for mid, mod in module_defs.items():
+        if not isinstance(mod, dict):
+            continue
+        si = mod.get("source_info") or {}
+        if not isinstance(si, dict):
+            continue
+        for cand in (si.get("datatype_map_nodename"), si.get("chip_names_friendly_name")):
+            if isinstance(cand, str) and cand.strip():
+                index.setdefault(cand.strip().lower(), str(mid))
+    return index
+
+
+def _build_output_type_names(module_defs: Dict[str, Any]) -> List[Tuple[str, Any]]:
+    """
+    (模块名, 首个输出端口的原始 type) 列表，按 moduledef 顺序排列。
+    名称包括 key / id / nodename / 友好名，保留原始写法，由使用方自行归一化。
+    """
+    out: List[Tuple[str, Any]] = []
+    for key, rec in module_defs.items():
+        if not isinstance(rec, dict):
+            continue
+        outputs = rec.get("outputs") or []
+        out_type = None
+        if isinstance(outputs, list) and outputs:
+            first = outputs[0]
+            if isinstance(first, dict):
+                out_type = first.get("type")
+
+        names = [key, rec.get("id")]
+        source = rec.get("source_info")
+        if isinstance(source, dict):
+            names.extend([source.get("datatype_map_nodename"), source.get("chip_names_friendly_name")])
+        for name in names:
+            if isinstance(name, str) and name.strip():
+                out.append((name, out_type))
+    return out
+
+
+def _build_port_indexes(module_defs: Dict[str, Any]) -> Dict[str, Dict[str, Dict[str, int]]]:
+    """模块 id -> {"inputs": {归一化端口名: 下标}, "outputs": {...}}；重名端口保留第一个下标。"""
+    ports: Dict[str, Dict[str, Dict[str, int]]] = {}
+    for mid, mod in module_defs.items():
+        if not isinstance(mod, dict):
+            continue
+        entry: Dict[str, Dict[str, int]] = {}
+        for side in ("inputs", "outputs"):
+            side_index: Dict[str, int] = {}
+            for i, port in enumerate(mod.get(side) or []):
+                if isinstance(port, dict) and isinstance(port.get("name"), str):
+                    side_index.setdefault(normalize(port["name"]), i)
+            entry[side] = side_index
+        ports[str(mid)] = entry
+    return ports
+
+
+class ModuleCatalog:
+    """
+    moduledef.json 的全部查找表：
+
+    - module_defs:          原始模块定义（moduledef.json 内容）
+    - chip_index:           归一化友好名 -> 模块信息（见 `_build_chip_index`）
+    - candidate_map:        存档名 / 友好名（小写）-> 模块 id
+    - candidate_names:      candidate_map 的键列表（模糊匹配候选）
+    - moduledef_key_index:  OperationType 字符串（小写）-> 模块 id
+    - port_indexes:         模块 id -> 端口名 -> 下标
+    - output_type_names:    [(模块名, 首个输出端口 type)]
+    """
+
+    def __init__(self, module_defs: Dict[str, Any]):
+        self.module_defs = module_defs
+        self.chip_index = _build_chip_index(module_defs)
+        self.candidate_map = _build_candidate_map(module_defs)
+        self.candidate_names = list(self.candidate_map.keys())
+        self.moduledef_key_index = build_moduledef_key_index(module_defs)
+        self.port_indexes = _build_port_indexes(module_defs)
+        self.output_type_names = _build_output_type_names(module_defs)
+
+    # ------------------------------------------------------------------
+    # 查询
+    # ------------------------------------------------------------------
+
+    def module(self, op_type: Any) -> Dict[str, Any] | None:
+        """按 op_type（模块 id 或 OperationType 字符串）取模块定义。"""
+        key = self.resolve_key(op_type)
+        return self.module_defs.get(key) if key is not None else None
+
+    def resolve_key(self, op_type: Any) -> str | None:
+        if op_type is None:
+            return None
+        raw = str(op_type)
+        if raw in self.module_defs:
+            return raw
+        if isinstance(op_type, str):
+            return self.moduledef_key_index.get(op_type.strip().lower(), raw)
+        return raw
+
+    def port_position(self, op_type: Any, port_name: str, *, side: str = "inputs") -> int | None:
+        key = self.resolve_key(op_type)
+        if key is None or key not in self.port_indexes:
+            return None
+        return self.port_indexes[key][side].get(normalize(port_name))
+
+    # ------------------------------------------------------------------
+    # 构建 / 缓存
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def load(
+        cls,
+        path: Path | str = MODULE_DEF_PATH,
+        *,
+        cache_dir: Path | str | None = CACHE_DIR,
+    ) -> "ModuleCatalog":
+        """
+        加载模块目录：优先使用进程内缓存，其次使用磁盘 pickle 缓存，最后才重新解析 JSON。
+        cache_dir 为 None 时不读写磁盘缓存。
+        """
+        path = Path(path)
+        try:
+            st = path.stat()
+        except OSError as e:
+            raise FileIOError("读取模块定义文件失败", file_path=str(path), original_error=e)
+
+        memo_key = str(path.resolve())
+        memo = _LOADED.get(memo_key)
+        if memo is not None and memo[0] == st.st_mtime_ns and memo[1] == st.st_size:
+            return memo[2]
+
+        catalog = cls._load_uncached(path, st, Path(cache_dir) if cache_dir is not None else None)
+        _LOADED[memo_key] = (st.st_mtime_ns, st.st_size, catalog)
+        return catalog
+
+    @classmethod
+    def _load_uncached(cls, path: Path, st: os.stat_result, cache_dir: Path | None) -> "ModuleCatalog":
+        cache_path = cache_dir / CATALOG_CACHE_FILENAME if cache_dir is not None else None
+        cached = _read_cache(cache_path) if cache_path is not None else None
+        if cached is not None and cached["source"] == str(path.resolve()):
+            if cached["mtime_ns"] == st.st_mtime_ns and cached["size"] == st.st_size:
+                return cached["catalog"]
+
+        try:
+            raw = path.read_bytes()
+        except OSError as e:
+            raise FileIOError("读取模块定义文件失败", file_path=str(path), original_error=e)
+        digest = hashlib.sha256(raw).hexdigest()
+
+        if cached is not None and cached["source"] == str(path.resolve()) and cached["sha256"] == digest:
+            catalog = cached["catalog"]
+        else:
+            try:
+                module_defs = json.loads(raw.decode("utf-8", errors="ignore"))
+            except json.JSONDecodeError as e:
+                raise FileIOError("模块定义文件解析失败", file_path=str(path), original_error=e)
+            catalog = cls(module_defs)
+
+        if cache_path is not None:
+            # 缓存只是加速手段，写入失败（如只读目录）时静默跳过
+            write_pickle_atomic(
+                cache_path,
+                {
+                    "version": CATALOG_FORMAT_VERSION,
+                    "source": str(path.resolve()),
+                    "mtime_ns": st.st_mtime_ns,
+                    "size": st.st_size,
+                    "sha256": digest,
+                    "catalog": catalog,
+                },
+            )
+        return catalog
+
+
+def _read_cache(cache_path: Path) -> Dict[str, Any] | None:
+    payload = read_pickle_cache(cache_path)
+    if not isinstance(payload, dict) or payload.get("version") != CATALOG_FORMAT_VERSION:
+        return None
+    if not isinstance(payload.get("catalog"), ModuleCatalog):
+        return None
+    return payload
+
+
+def load_module_catalog(path: Path | str = MODULE_DEF_PATH) -> ModuleCatalog:
+    """加载（并在需要时缓存）默认位置的模块目录。"""
+    return ModuleCatalog.load(path)
+
+
+__all__ = [
+    "ModuleCatalog",
+    "load_module_catalog",
+    "build_moduledef_key_index",
+    "CATALOG_FORMAT_VERSION",
+]
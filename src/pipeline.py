@@ -9,24 +9,34 @@ src.pipeline
 职责划分：
 - 本模块负责“业务逻辑”：各阶段如何串联、如何从 graph.json 解析出模块与连线等。
 - `main.py` 仅负责处理运行环境（如 Windows 控制台编码）并调用 `run_full_pipeline()`。
+
+各阶段之间直接传递内存中的 graph 字典、连线指令列表与存档字典，
+默认只写出最终的 `.melsave`；graph.json / output.json / data_after_modify.json /
+ungraph.json 等中间产物仅在 `debug_artifacts=True`（命令行 `--debug-artifacts`）时落盘。
+
+一次构建的全部路径与选项放在 `src.build_context.BuildContext` 中，由各 run_* 函数接收；
+不同构建使用不同的 output_dir 即可并发执行（见 BuildContext 的说明）。
 """
 
 from __future__ import annotations
 
 import json
 import sys
+from dataclasses import dataclass
 from pathlib import Path
 from typing import Any, Dict, List, Tuple
 
 from converter_v2 import convert_dsl_to_graph
+from src.converter.incremental import IncrementalConverter
 from constantvalue import apply_constant_modifications
 from batch_add_modules import add_modules
 from modifier import apply_data_type_modifications
 from layout_chip import run_layout_engine, find_and_update_chip_graph
-from batch_connect import apply_connections
+from batch_connect import apply_connections_to_data
 from archive_creator import run_archive_creation_stage
 from src.special_modules import build_special_module, append_unused_variable_definitions
 from src.data_types import GateDataType
+from src.save_document import SaveDocument
 from src.type_inference import infer_gate_data_types
 from src.error_handler import (
     PipelineError,
@@ -38,47 +48,98 @@ from src.error_handler import (
     ErrorModule,
 )
 
+from src.build_context import BuildContext
 from src.config import (
-    DSL_INPUT_PATH,
-    GRAPH_PATH,
-    MODULE_DEF_PATH,
-    DATA_PATH,
-    CONNECT_OUT_PATH,
-    RULES_PATH,
-    MODIFIED_SAVE_PATH,
-    FINAL_SAVE_PATH,
     FUZZY_CUTOFF_NODE,
     FUZZY_CUTOFF_PORT,
-    ensure_output_dir,
 )
-from src.utils import load_json, normalize, fuzzy_match
+from src.utils import load_json, normalize, as_bool_flag as _as_bool_flag
+from src.fuzzy import get_matcher, match_port_position
+from src.layout_cache import LayoutCache, layout_signature
+from src.module_catalog import ModuleCatalog
+from src.graph_passes import run_graph_passes
+from src.profiling import PipelineProfiler
 
 
 # =========================== 阶段 0：DSL -> graph.json ===========================
 
 
-def _as_bool_flag(value: Any, default: bool = True) -> bool:
-    if isinstance(value, bool):
-        return value
-    if value is None:
-        return default
-    if isinstance(value, (int, float)):
-        return bool(value)
-    if isinstance(value, str):
-        v = value.strip().lower()
-        if v in {"true", "1", "yes", "y", "on"}:
-            return True
-        if v in {"false", "0", "no", "n", "off", ""}:
-            return False
-    return default
+def _dump_debug_artifact(path: Path, data: Any, **dump_kwargs: Any) -> None:
+    """将中间产物写到磁盘，仅供 --debug-artifacts 调试使用。"""
+    dump_kwargs.setdefault("ensure_ascii", False)
+    try:
+        with path.open("w", encoding="utf-8") as f:
+            json.dump(data, f, **dump_kwargs)
+    except OSError as e:
+        raise FileIOError(
+            f"写入调试产物失败",
+            file_path=str(path),
+            original_error=e
+        )
+    print(f"ℹ️ [debug] 已写出中间产物 '{path}'")
+
+
+def run_stage0_convert_dsl_to_graph(
+    ctx: BuildContext,
+    incremental: IncrementalConverter | None = None,
+) -> dict:
+    """
+    使用 converter_v2.convert_dsl_to_graph 将 ctx.dsl_path 转为 graph 字典。
+    仅当 ctx.debug_artifacts 为 True 时才额外写出 graph.json。
+    给出 incremental 时复用上一次转换中未变化的语句前缀（watch 模式、编译服务反复转换同一份设计时使用）。
+    """
+    dsl_path = ctx.dsl_path
+    out_graph_path = ctx.graph_path if ctx.debug_artifacts else None
+    print("--- 阶段 0: 将 input.py 转换为 graph ---")
+    graph = convert_dsl_to_graph(
+        dsl_script_path=dsl_path, output_path=out_graph_path, incremental=incremental
+    )
+    if incremental is not None and incremental.stats.reused:
+        stats = incremental.stats
+        print(f"ℹ️  增量转换：复用 {stats.reused}/{stats.statements} 条语句，重新访问 {stats.visited} 条")
+    if out_graph_path is not None:
+        print(f"✔ 已从 '{dsl_path}' 生成 '{out_graph_path}'")
+    else:
+        print(f"✔ 已从 '{dsl_path}' 生成 graph（{len(graph.get('nodes', []))} 个节点）")
+    return graph
+
+
+# =========================== graph 优化 ===========================
 
-def run_stage0_convert_dsl_to_graph(dsl_path: Path, out_graph_path: Path) -> None:
+def run_graph_optimizations(
+    graph: dict,
+    catalog: ModuleCatalog,
+    ctx: BuildContext | None = None,
+) -> dict:
     """
-    使用 converter_v2.convert_dsl_to_graph 将 DSL 脚本转为 graph.json。
+    在建模块之前对 graph 执行优化 pass（见 src.graph_passes），原地修改并返回 graph。
+    启用哪些 pass 由 ctx 的 fold / cse / dce / rebalance 决定；
+    ctx.dce_report 为 True 时逐个列出死节点消除删掉的节点。
     """
-    print("--- 阶段 0: 将 input.py 转换为 graph.json ---")
-    convert_dsl_to_graph(dsl_script_path=dsl_path, output_path=out_graph_path)
-    print(f"✔ 已从 '{dsl_path}' 生成 '{out_graph_path}'")
+    ctx = ctx or BuildContext()
+    dce_report = ctx.dce_report
+    before = len(graph.get("nodes", []))
+    for report in run_graph_passes(
+        graph, catalog, fold=ctx.fold, cse=ctx.cse, dce=ctx.dce, rebalance=ctx.rebalance
+    ):
+        if report.name == "fold" and report.removed_nodes:
+            print(f"✔ 常量折叠：{len(report.details['folded'])} 个运算节点在编译期求值为常量")
+        if report.name == "cse" and report.removed_nodes:
+            print(f"✔ 公共子表达式消除：合并了 {len(report.removed_nodes)} 个重复节点")
+        if report.name == "rebalance":
+            print(
+                f"✔ 运算链重平衡：改写了 {report.details['chains']} 条链，关键路径深度 "
+                f"{report.details['depth_before']} -> {report.details['depth_after']}"
+            )
+        if report.name == "dce" and report.removed_nodes:
+            print(f"✔ 死节点消除：删除了 {len(report.removed_nodes)} 个结果未被使用的节点")
+            if dce_report:
+                for item in report.details["removed"]:
+                    print(f"    - {item['id']} ({item['type']}) {item['label'] or ''}".rstrip())
+    after = len(graph.get("nodes", []))
+    if after != before:
+        print(f"ℹ️ graph 优化后节点数：{before} -> {after}")
+    return graph
 
 
 # =========================== graph.json 解析相关 ===========================
@@ -87,78 +148,9 @@ def build_chip_index_from_moduledef(module_defs: Dict[str, Any]) -> Dict[str, di
     """
     从 moduledef.json 构建一个索引：
         归一化友好名 -> {friendly_name, game_name, inputs, outputs}
+    流水线内请直接使用 `ModuleCatalog.chip_index`（带磁盘缓存）。
     """
-    chip_index: Dict[str, dict] = {}
-    for _mod_id, mod_data in module_defs.items():
-        source_info = mod_data.get("source_info", {})
-        friendly_name = source_info.get("chip_names_friendly_name")
-        game_name = source_info.get("allmod_viewmodel")
-        if not friendly_name or not game_name:
-            continue
-            
-        entry = {
-            "op_type": _mod_id,
-            "friendly_name": friendly_name,
-            "game_name": game_name,
-            "inputs": [p.get("name", "Input") for p in mod_data.get("inputs", [])],
-            "outputs": [p.get("name", "Output") for p in mod_data.get("outputs", [])],
-            "can_modify_data_type": _as_bool_flag(mod_data.get("can_modify_data_type", True), True),
-        }
-        
-        # 1. 优先使用友好名作为索引
-        chip_index[normalize(friendly_name)] = entry
-        # Compatibility alias: some game versions expect modulo op name.
-        if normalize(friendly_name) == normalize("Remainder"):
-            chip_index.setdefault(normalize("Modulo"), entry)
-            chip_index.setdefault(normalize("Mod"), entry)
-        
-        # 2. 如果 ID 不是纯数字（如 "ArraysGet"），也将其作为一种有效的查找方式
-        if not _mod_id.isdigit():
-            chip_index[normalize(_mod_id)] = entry
-
-    # 补充内置节点（Input / Output / Constant）
-    # 说明：
-    # - 新版 moduledef.json 已包含这些模块（例如 Output 通常是 255，而不是旧版的 512）
-    # - 但为了兼容缺失/裁剪过的 moduledef，这里仅在缺失时才补充兜底定义
-    if normalize("Input") not in chip_index:
-        chip_index[normalize("Input")] = {
-            "op_type": "256",
-            "friendly_name": "Input",
-            "game_name": "RootNodeViewModel",
-            "inputs": [],
-            "outputs": ["Number"],
-            "can_modify_data_type": True,
-        }
-    if normalize("Output") not in chip_index:
-        chip_index[normalize("Output")] = {
-            "op_type": "255",
-            "friendly_name": "Output",
-            "game_name": "ExitNodeViewModel",
-            "inputs": ["Number"],
-            "outputs": [],
-            "can_modify_data_type": True,
-        }
-    if normalize("Constant") not in chip_index:
-        chip_index[normalize("Constant")] = {
-            "op_type": "257",
-            "friendly_name": "Constant",
-            "game_name": "ConstantNodeViewModel",
-            "inputs": [],
-            "outputs": ["Output"],
-            "can_modify_data_type": True,
-        }
-    # 变量节点：不在 moduledef.json 中，手动补充
-    # Inputs:  Value, Set
-    # Outputs: Value（唯一输出端口，方便裸节点变量自动端口）
-    chip_index[normalize("Variable")] = {
-        "op_type": None,
-        "friendly_name": "Variable",
-        "game_name": "VariableNodeViewModel",
-        "inputs": ["Value", "Set"],
-        "outputs": ["Value"],
-        "can_modify_data_type": True,
-    }
-    return chip_index
+    return ModuleCatalog(module_defs).chip_index
 
 
 def parse_graph_v2(graph: dict, chip_index: Dict[str, dict]) -> Tuple[List[Any], Dict[str, dict]]:
@@ -169,7 +161,7 @@ def parse_graph_v2(graph: dict, chip_index: Dict[str, dict]) -> Tuple[List[Any],
     """
     modules: List[Any] = []
     node_map: Dict[str, dict] = {}
-    all_chip_keys = list(chip_index.keys())
+    chip_key_matcher = get_matcher(tuple(chip_index.keys()))
 
     # 从 graph.json 中取出可选的变量定义列表（由 converter_v2 收集）
     variable_defs: List[dict] = graph.get("variables") or []
@@ -259,7 +251,7 @@ def parse_graph_v2(graph: dict, chip_index: Dict[str, dict]) -> Tuple[List[Any],
 
     for node in graph["nodes"]:
         key = normalize(node["type"])
-        best_match_key = fuzzy_match(key, all_chip_keys, FUZZY_CUTOFF_NODE)
+        best_match_key = chip_key_matcher.match(key, FUZZY_CUTOFF_NODE)
         if best_match_key is None:
             raise PipelineError(
                 f"无法识别模块类型 \"{node['type']}\"",
@@ -317,28 +309,49 @@ def parse_graph_v2(graph: dict, chip_index: Dict[str, dict]) -> Tuple[List[Any],
 
 # =========================== 批量添加模块 ===========================
 
-def run_batch_add(modules_to_add: List[Any], node_map: Dict[str, dict]) -> Dict[str, Any]:
+def run_batch_add(
+    modules_to_add: List[Any],
+    node_map: Dict[str, dict],
+    catalog: ModuleCatalog | None = None,
+    ctx: BuildContext | None = None,
+    *,
+    base_save: bytes | None = None,
+) -> SaveDocument:
     """
-    调用 batch_add_modules.add_modules，将 DSL 中的节点实际添加到存档 data.json 里。
+    调用 batch_add_modules.add_modules，将 DSL 中的节点实际添加到底包存档（ctx.data_path）里。
     同时回填 node_map[*]["new_full_id"]。
+    catalog 为空时从 ctx.module_def_path 加载（带缓存）；ctx.verbosity >= 1 时逐个打印新节点。
+    base_save 为已读入内存的底包存档内容（watch / 服务模式下复用，避免每次读盘）；
+    每次都会重新解析出一份新的字典，调用方的缓存不会被修改。
+
+    返回包装了存档的 SaveDocument，后续阶段共享同一份已解码的 chip_graph 等分区。
     """
+    ctx = ctx or BuildContext()
+    data_path = ctx.data_path
+    verbosity = ctx.verbosity
     print("📦 正在执行模块添加...")
     try:
-        game_data = load_json(DATA_PATH, "原始游戏存档")
-        module_defs = load_json(MODULE_DEF_PATH, "模块定义")
+        if base_save is not None:
+            game_data = json.loads(base_save)
+        else:
+            game_data = load_json(data_path, "原始游戏存档")
+        if catalog is None:
+            catalog = ModuleCatalog.load(ctx.module_def_path, cache_dir=ctx.cache_dir)
     except Exception as e:
         raise FileIOError(
             f"加载游戏存档或模块定义失败",
-            file_path=str(DATA_PATH),
+            file_path=str(data_path),
             original_error=e
         )
 
     try:
         updated_game_data, created_nodes_info = add_modules(
             modules_wanted=modules_to_add,
-            game_data=game_data,
-            module_definitions=module_defs,
+            game_data=SaveDocument(game_data),
+            module_definitions=catalog.module_defs,
             cutoff=FUZZY_CUTOFF_NODE,
+            catalog=catalog,
+            verbosity=verbosity,
         )
     except ValueError as e:
         raise ModuleAddError(
@@ -481,14 +494,13 @@ def port_index(port_name: str, port_list: List[str]) -> int:
         )
 
     # 旧版：按端口"名字"做模糊匹配
-    normalized_ports = [normalize(p) for p in port_list]
-    best = fuzzy_match(normalize(str(port_name)), normalized_ports, FUZZY_CUTOFF_PORT)
-    if best is None:
+    idx = match_port_position(port_name, port_list, FUZZY_CUTOFF_PORT)
+    if idx is None:
         raise ConnectionError(
             f"无法匹配端口 \"{port_name}\"",
             context={"port_name": port_name, "candidates": port_list}
         )
-    return normalized_ports.index(best)
+    return idx
 
 
 def build_connections(graph: dict, node_map: Dict[str, dict], chip_index: Dict[str, dict]) -> List[dict]:
@@ -548,20 +560,13 @@ def build_connections(graph: dict, node_map: Dict[str, dict], chip_index: Dict[s
 
 # =========================== 批量连线 & 自动布局 ===========================
 
-def run_batch_connect(input_path: Path) -> None:
+def run_batch_connect(game_data: SaveDocument, connections: List[dict]) -> SaveDocument:
+    """
+    在内存中的存档上执行批量连线，返回同一个存档对象。
+    """
     print("🔗 正在执行批量连线 ...")
-    if not input_path.exists():
-        raise FileIOError(
-            f"在执行连线前，未找到输入存档文件",
-            file_path=str(input_path)
-        )
-
     try:
-        success = apply_connections(
-            input_graph_path=str(input_path),
-            connections_path=str(CONNECT_OUT_PATH),
-            output_graph_path=str(FINAL_SAVE_PATH),
-        )
+        success = apply_connections_to_data(game_data, connections)
     except Exception as e:
         raise ConnectionError(
             f"批量连线过程中发生错误: {str(e)}",
@@ -570,41 +575,67 @@ def run_batch_connect(input_path: Path) -> None:
     
     if not success:
         raise ConnectionError("批量连线过程中发生错误，流程终止")
+    return game_data
 
 
-def run_auto_layout() -> None:
-    print("🎨 正在对最终存档文件进行自动布局...")
-    if not FINAL_SAVE_PATH.exists():
-        print(f"⚠️ 警告：找不到最终存档文件 '{FINAL_SAVE_PATH}'，跳过自动布局步骤")
-        return
-
-    full_save_data = load_json(FINAL_SAVE_PATH, "最终游戏存档")
+def compute_layout_positions(
+    chip_nodes: List[Dict[str, Any]],
+    layout_cache: LayoutCache | None = None,
+) -> Dict[str, Dict[str, float]]:
+    """
+    计算 chip_graph 节点的坐标（节点 Id -> {"x", "y"}），不修改节点本身。
+    给出 layout_cache 时：拓扑未变则直接复用缓存坐标；否则以最相近的旧布局为种子重新布局并写回缓存。
+    """
+    final_positions = None
+    signature = None
+    if layout_cache is not None:
+        signature = layout_signature(chip_nodes)
+        final_positions = layout_cache.lookup(signature, chip_nodes)
+        if final_positions is not None:
+            print("   拓扑未变化，复用布局缓存")
+
+    if final_positions is None:
+        seed_y = layout_cache.seed(signature, chip_nodes) if layout_cache is not None else None
+        if seed_y:
+            print(f"   以布局缓存中的 {len(seed_y)} 个节点坐标为种子进行增量布局")
+        final_positions = run_layout_engine(chip_nodes, seed_y)
+        if layout_cache is not None:
+            layout_cache.store(signature, chip_nodes, final_positions)
+    return final_positions
+
+
+def run_auto_layout(
+    game_data: SaveDocument,
+    ctx: BuildContext | None = None,
+    *,
+    layout_cache: LayoutCache | None = None,
+) -> SaveDocument:
+    """
+    对内存中的存档执行自动布局，原地更新 chip_graph 中的节点坐标并返回同一个存档对象。
+    显式给出 layout_cache，或 ctx.layout_cache_path 不为 None 时使用布局缓存（见 compute_layout_positions）。
+    """
+    if layout_cache is None and ctx is not None and ctx.layout_cache_path is not None:
+        layout_cache = LayoutCache(ctx.layout_cache_path)
+    print("🎨 正在对最终存档进行自动布局...")
     try:
-        save_obj = full_save_data["saveObjectContainers"][0]["saveObjects"]
-        chip_graph_str = next(
-            md["stringValue"] for md in save_obj["saveMetaDatas"] if md.get("key") == "chip_graph"
-        )
-        chip_nodes = json.loads(chip_graph_str).get("Nodes", [])
-    except (KeyError, IndexError, StopIteration, json.JSONDecodeError) as e:
-        print(
-            f"⚠️ 警告：在存档文件 '{FINAL_SAVE_PATH}' 中无法找到或解析 'chip_graph'，跳过布局。错误: {e}"
-        )
-        return
+        chip_nodes = game_data.nodes
+    except (KeyError, json.JSONDecodeError) as e:
+        print(f"⚠️ 警告：在存档中无法找到或解析 'chip_graph'，跳过布局。错误: {e}")
+        return game_data
 
     if not chip_nodes:
         print("ℹ️ 'chip_graph' 中没有节点，无需布局")
-        return
+        return game_data
 
     print(f"   从存档中找到 {len(chip_nodes)} 个节点进行布局")
-    final_positions = run_layout_engine(chip_nodes)
+    final_positions = compute_layout_positions(chip_nodes, layout_cache)
+
     print("   使用新坐标更新存档数据...")
-    updated = find_and_update_chip_graph(full_save_data, final_positions)
-    if updated:
-        with FINAL_SAVE_PATH.open("w", encoding="utf-8") as f:
-            json.dump(full_save_data, f, separators=(",", ":"))
-        print(f"✔ 自动布局完成，已更新存档文件: '{FINAL_SAVE_PATH}'")
+    if find_and_update_chip_graph(game_data, final_positions):
+        print("✔ 自动布局完成")
     else:
-        print("⚠️ 错误：布局计算完成，但在存档中更新坐标失败。文件未被修改")
+        print("⚠️ 错误：布局计算完成，但在存档中更新坐标失败。存档坐标未被修改")
+    return game_data
 
 
 # =========================== 常量修改指令生成 ===========================
@@ -718,37 +749,91 @@ def generate_constant_instructions(graph: dict, node_map: Dict[str, dict]) -> Li
 
 # =========================== 总入口 ===========================
 
-def run_full_pipeline() -> None:
+@dataclass
+class BuildResult:
     """
-    执行从 DSL 到 .melsave 的完整流水线。
+    run_build_stages 的产物：
+    - save:     已连线、已布局的存档
+    - graph:    优化后的 graph 字典
+    - node_map: graph 节点 id -> 模块信息（含存档中的 new_full_id）
     """
-    try:
-        # 确保输出目录存在
-        ensure_output_dir()
+    save: SaveDocument
+    graph: dict
+    node_map: Dict[str, dict]
+
 
-        # --- 阶段 0: DSL -> graph.json ---
-        run_stage0_convert_dsl_to_graph(DSL_INPUT_PATH, GRAPH_PATH)
+def build_save_document(
+    ctx: BuildContext,
+    catalog: ModuleCatalog,
+    rules: Dict[str, Any],
+    *,
+    profiler: PipelineProfiler | None = None,
+    layout_cache: LayoutCache | None = None,
+) -> SaveDocument:
+    """
+    把 ctx.dsl_path 编译为已连线、已布局的存档（阶段 0 到步骤 6，不含归档）。
+
+    与 run_full_pipeline 不同，这里不调用 handle_error（它会直接退出进程），
+    任何失败都以异常抛出，便于批量编译、基准测试等调用方按任务记录结果。
+    profiler 为 None 时不记录阶段数据；layout_cache 为 None 时按 ctx 决定是否使用布局缓存。
+    """
+    return run_build_stages(
+        ctx, catalog, rules, profiler=profiler, layout_cache=layout_cache
+    ).save
 
-        # --- 步骤 1: 解析输入文件 ---
-        print("\n--- 步骤 1: 解析输入文件 ---")
-        graph = load_json(GRAPH_PATH, "graph.json")
-        module_definitions = load_json(MODULE_DEF_PATH, "模块定义文件")
-        rules = load_json(RULES_PATH, "数据类型规则文件")
 
-        chip_index = build_chip_index_from_moduledef(module_definitions)
+def run_build_stages(
+    ctx: BuildContext,
+    catalog: ModuleCatalog,
+    rules: Dict[str, Any],
+    *,
+    profiler: PipelineProfiler | None = None,
+    layout_cache: LayoutCache | None = None,
+    base_save: bytes | None = None,
+    graph: dict | None = None,
+    incremental: IncrementalConverter | None = None,
+) -> BuildResult:
+    """
+    build_save_document 的完整版本：同时返回 graph 与 node_map，供增量重建复用。
+    base_save 见 run_batch_add；给出 graph（已经转换并做过 run_graph_optimizations）时
+    跳过阶段 0 与 graph 优化，直接从解析 graph 开始；incremental 见 run_stage0_convert_dsl_to_graph。
+    """
+    profiler = profiler or PipelineProfiler(False)
+    verbosity = ctx.verbosity
+    debug_artifacts = ctx.debug_artifacts
+    if debug_artifacts:
+        ctx.ensure_output_dir()
+
+    optimized = graph is not None
+    # --- 阶段 0: DSL -> graph ---
+    if not optimized:
+        with profiler.stage("dsl_to_graph"):
+            graph = run_stage0_convert_dsl_to_graph(ctx, incremental)
+
+    # --- 步骤 1: 解析输入文件 ---
+    print("\n--- 步骤 1: 解析输入文件 ---")
+    module_definitions = catalog.module_defs
+    if not optimized:
+        with profiler.stage("graph_passes"):
+            run_graph_optimizations(graph, catalog, ctx)
+
+    chip_index = catalog.chip_index
+    with profiler.stage("parse_graph_v2"):
         modules, node_map = parse_graph_v2(graph, chip_index)
-        print("✔ graph.json 解析完成")
+    print("✔ graph 解析完成")
 
-        # --- 步骤 2: 批量添加模块 ---
-        print("\n--- 步骤 2: 批量添加模块 ---")
-        current_save_data = run_batch_add(modules, node_map)
-        print("✔ 模块添加完成，并已获取新节点 ID")
+    # --- 步骤 2: 批量添加模块 ---
+    print("\n--- 步骤 2: 批量添加模块 ---")
+    with profiler.stage("batch_add"):
+        current_save_data = run_batch_add(modules, node_map, catalog, ctx, base_save=base_save)
+    print("✔ 模块添加完成，并已获取新节点 ID")
 
-        # --- 步骤 3: 节点修改阶段 ---
-        print("\n--- 步骤 3: 节点修改阶段 ---")
+    # --- 步骤 3: 节点修改阶段 ---
+    print("\n--- 步骤 3: 节点修改阶段 ---")
 
-        # 子步骤 3.1: 修改节点数据类型
-        print("\n--- 步骤 3.1: 修改节点数据类型 ---")
+    # 子步骤 3.1: 修改节点数据类型
+    print("\n--- 步骤 3.1: 修改节点数据类型 ---")
+    with profiler.stage("type_modification"):
         modify_instructions = generate_modify_instructions(
             graph,
             node_map,
@@ -763,51 +848,115 @@ def run_full_pipeline() -> None:
                 mod_instructions=modify_instructions,
                 rules=rules,
                 module_defs=module_definitions,
+                moduledef_key_index=catalog.moduledef_key_index,
             )
             print("✔ 数据类型修改完成")
         else:
             print("ℹ️ 无需修改数据类型，跳过此步骤")
 
-        # 子步骤 3.2: 修改常量节点
-        print("\n--- 步骤 3.2: 修改常量节点 ---")
+    # 子步骤 3.2: 修改常量节点
+    print("\n--- 步骤 3.2: 修改常量节点 ---")
+    with profiler.stage("constant_modification"):
         constant_instructions = generate_constant_instructions(graph, node_map)
         if constant_instructions:
             print(f"ℹ️  需要进行 {len(constant_instructions)} 项常量值修改")
             current_save_data = apply_constant_modifications(
                 game_data=current_save_data,
                 instructions=constant_instructions,
+                verbosity=verbosity,
             )
             print("✔ 常量值修改完成")
         else:
             print("ℹ️ 无需修改常量值，跳过此步骤")
 
-        # --- 步骤 4: 生成连线指令 ---
-        print("\n--- 步骤 4: 生成连线指令 ---")
+    # --- 步骤 4: 生成连线指令 ---
+    print("\n--- 步骤 4: 生成连线指令 ---")
+    with profiler.stage("build_connections"):
         conns = build_connections(graph, node_map, chip_index)
-        CONNECT_OUT_PATH.write_text(
-            json.dumps(conns, ensure_ascii=False, indent=2),
-            encoding="utf-8",
+    print(f"✔ 已生成 {len(conns)} 条连线指令")
+    if debug_artifacts:
+        _dump_debug_artifact(ctx.connect_out_path, conns, indent=2)
+        _dump_debug_artifact(ctx.modified_save_path, current_save_data.flush(), indent=4)
+
+    # --- 步骤 5: 执行批量连线 ---
+    print("\n--- 步骤 5: 执行批量连线 ---")
+    with profiler.stage("batch_connect"):
+        current_save_data = run_batch_connect(current_save_data, conns)
+
+    # --- 步骤 6: 执行自动布局 ---
+    print("\n--- 步骤 6: 执行自动布局 ---")
+    with profiler.stage("layout"):
+        current_save_data = run_auto_layout(current_save_data, ctx, layout_cache=layout_cache)
+    if debug_artifacts:
+        _dump_debug_artifact(
+            ctx.final_save_path, current_save_data.flush(), ensure_ascii=True, separators=(",", ":")
         )
-        print(f"✔ 已生成连线指令到 {CONNECT_OUT_PATH}")
+    return BuildResult(save=current_save_data, graph=graph, node_map=node_map)
 
-        # --- 步骤 5: 执行批量连线 ---
-        print("\n--- 步骤 5: 执行批量连线 ---")
-        print(f"ℹ️ 将当前存档状态写入到 '{MODIFIED_SAVE_PATH}' 以进行连线")
-        with MODIFIED_SAVE_PATH.open("w", encoding="utf-8") as f:
-            json.dump(current_save_data, f, ensure_ascii=False, indent=4)
 
-        run_batch_connect(MODIFIED_SAVE_PATH)
+def run_check_stages(
+    ctx: BuildContext,
+    catalog: ModuleCatalog,
+    rules: Dict[str, Any],
+    *,
+    incremental: IncrementalConverter | None = None,
+) -> Dict[str, int]:
+    """
+    只做静态检查：DSL -> graph -> graph 优化 -> 解析 -> 类型推断 -> 连线指令，
+    不添加模块、不连线、不布局，也不读底包存档。
+    此时模块还没有存档中的 ID，node_map 中的 new_full_id 先用 graph 节点 id 占位。
+    成功时返回节点 / 模块 / 连线数量，失败时抛出与完整构建相同的异常。
+    """
+    graph = run_stage0_convert_dsl_to_graph(ctx, incremental)
+    run_graph_optimizations(graph, catalog, ctx)
+    chip_index = catalog.chip_index
+    modules, node_map = parse_graph_v2(graph, chip_index)
+    for node_id, meta in node_map.items():
+        meta.setdefault("new_full_id", node_id)
+    generate_modify_instructions(
+        graph,
+        node_map,
+        chip_index=chip_index,
+        module_definitions=catalog.module_defs,
+        rules=rules,
+    )
+    conns = build_connections(graph, node_map, chip_index)
+    return {"nodes": len(graph["nodes"]), "modules": len(modules), "connections": len(conns)}
 
-        # --- 步骤 6: 执行自动布局 ---
-        print("\n--- 步骤 6: 执行自动布局 ---")
-        run_auto_layout()
 
-        if MODIFIED_SAVE_PATH.exists():
-            MODIFIED_SAVE_PATH.unlink()
+def run_full_pipeline(ctx: BuildContext | None = None) -> None:
+    """
+    执行从 DSL 到 .melsave 的完整流水线；出错时经 handle_error 打印并退出进程。
+
+    ctx 为 None 时使用默认上下文（项目根目录下的 input.py，输出到 output/）。选项说明：
+        debug_artifacts: 额外写出 graph.json / output.json / data_after_modify.json / ungraph.json。
+        verbosity: 逐条日志的详细程度（0 只输出汇总；1 逐条输出；2 输出完整值）。
+        layout_cache: 读写 cache_dir 下的布局缓存（见 src.layout_cache）。
+        cse / fold / dce / rebalance: 建模块前执行的 graph 优化（见 src.graph_passes）。
+        dce_report: 列出死节点消除删掉的每个节点。
+        profile: 记录每个阶段的墙钟 / CPU 时间、tracemalloc 峰值内存与对象数变化，
+            写到 output_dir 下的 profile.json 与 profile.csv（见 src.profiling）。
+        profile_cprofile: 与 profile 同时开启时，每个阶段另存一份 cProfile 结果到 output_dir/profile/。
+    """
+    ctx = ctx or BuildContext()
+    profiler = PipelineProfiler(
+        ctx.profile, ctx.profile_stats_dir if ctx.profile_cprofile else None
+    )
+    try:
+        # 确保输出目录存在
+        ctx.ensure_output_dir()
 
-        # --- 阶段 7: 创建 .melsave 归档文件 ---
-        print("\n--- 阶段 7: 创建 .melsave 归档文件 ---")
-        run_archive_creation_stage()
+        with profiler:
+            with profiler.stage("load_catalog"):
+                catalog = ModuleCatalog.load(ctx.module_def_path, cache_dir=ctx.cache_dir)
+                rules = load_json(ctx.rules_path, "数据类型规则文件")
+
+            current_save_data = build_save_document(ctx, catalog, rules, profiler=profiler)
+
+            # --- 阶段 7: 创建 .melsave 归档文件 ---
+            print("\n--- 阶段 7: 创建 .melsave 归档文件 ---")
+            with profiler.stage("archive"):
+                run_archive_creation_stage(current_save_data.flush(), ctx)
 
         print("\n🎉 全部流程完成！")
     
@@ -821,10 +970,29 @@ def run_full_pipeline() -> None:
             original_error=e
         )
         handle_error(pipeline_error)
+    finally:
+        # 失败时也写出已完成阶段的数据，便于定位卡在哪一步
+        if ctx.profile and profiler.stages:
+            _write_profile_report(profiler, ctx)
+
+
+def _write_profile_report(profiler: PipelineProfiler, ctx: BuildContext) -> None:
+    """写出 --profile 的 JSON / CSV 报告并打印汇总表。"""
+    profiler.write_json(ctx.profile_json_path)
+    profiler.write_csv(ctx.profile_csv_path)
+    print("\n--- 性能分析 ---")
+    print(profiler.format_summary())
+    print(f"✔ 性能报告已写入 {ctx.profile_json_path} / {ctx.profile_csv_path}")
+    if profiler.cprofile_dir is not None:
+        print(f"✔ 各阶段 cProfile 结果已写入 {profiler.cprofile_dir}")
 
 
 __all__ = [
     "run_full_pipeline",
+    "build_save_document",
+    "run_build_stages",
+    "run_check_stages",
+    "BuildResult",
     "run_stage0_convert_dsl_to_graph",
     "build_chip_index_from_moduledef",
     "parse_graph_v2",
@@ -834,4 +1002,5 @@ __all__ = [
     "build_connections",
     "run_batch_connect",
     "run_auto_layout",
+    "compute_layout_positions",
 ]
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+src.profiling
+=============
+
+流水线分阶段性能记录（`python main.py --profile`）。
+
+每个阶段用 `with profiler.stage("名称"):` 包起来，记录：
+- wall_s / cpu_s：墙钟时间与本进程 CPU 时间；
+- peak_alloc_bytes：阶段内 tracemalloc 观测到的峰值内存，相对阶段开始时的占用；
+- retained_bytes：阶段结束时比开始时多占用的内存；
+- gc_objects_delta：gc 跟踪的对象数的变化。
+结果写成 JSON 与 CSV；开启 cprofile 时，每个阶段另存一份 cProfile 统计（.prof，可用 pstats / snakeviz 查看）。
+
+未启用时 stage() 什么也不做，流水线可以无条件地包上这些上下文。
+tracemalloc 会让分配密集的阶段明显变慢，开启 --profile 时的耗时只适合做阶段间的相对比较。
+"""
+
+from __future__ import annotations
+
+import cProfile
+import csv
+import gc
+import json
+import re
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, fields
+from pathlib import Path
+from typing import Iterator, List, Optional
+
+from src.error_handler import FileIOError
+
+
+@dataclass
+class StageProfile:
+    """一个阶段的测量结果。"""
+    name: str
+    wall_s: float
+    cpu_s: float
+    peak_alloc_bytes: int
+    retained_bytes: int
+    gc_objects_delta: int
+    ok: bool = True
+
+
+class PipelineProfiler:
+    """
+    按阶段记录耗时与内存。enabled=False 时是一个空操作的替身。
+    cprofile_dir 不为 None 时，每个阶段在该目录写出一份 `<序号>_<阶段名>.prof`。
+    """
+
+    def __init__(self, enabled: bool = False, cprofile_dir: Optional[Path] = None):
+        self.enabled = enabled
+        self.cprofile_dir = cprofile_dir if enabled else None
+        self.stages: List[StageProfile] = []
+        self._started_tracemalloc = False
+
+    def __enter__(self) -> "PipelineProfiler":
+        if self.enabled and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        if not self.enabled:
+            yield
+            return
+
+        objects_before = len(gc.get_objects())
+        tracing = tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.reset_peak()
+            mem_before, _ = tracemalloc.get_traced_memory()
+        profile = cProfile.Profile() if self.cprofile_dir is not None else None
+        ok = False
+        wall0, cpu0 = time.perf_counter(), time.process_time()
+        if profile is not None:
+            profile.enable()
+        try:
+            yield
+            ok = True
+        finally:
+            if profile is not None:
+                profile.disable()
+            wall, cpu = time.perf_counter() - wall0, time.process_time() - cpu0
+            peak = retained = 0
+            if tracing:
+                mem_after, mem_peak = tracemalloc.get_traced_memory()
+                peak, retained = mem_peak - mem_before, mem_after - mem_before
+            self.stages.append(StageProfile(
+                name=name,
+                wall_s=wall,
+                cpu_s=cpu,
+                peak_alloc_bytes=peak,
+                retained_bytes=retained,
+                gc_objects_delta=len(gc.get_objects()) - objects_before,
+                ok=ok,
+            ))
+            if profile is not None:
+                self._dump_cprofile(profile, name)
+
+    def _dump_cprofile(self, profile: cProfile.Profile, name: str) -> None:
+        slug = re.sub(r"[^0-9A-Za-z_]+", "_", name).strip("_") or "stage"
+        path = self.cprofile_dir / f"{len(self.stages):02d}_{slug}.prof"
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            profile.dump_stats(str(path))
+        except OSError as e:
+            raise FileIOError("写出 cProfile 结果失败", file_path=str(path), original_error=e)
+
+    # ------------------------------------------------------------------
+    # 报告
+    # ------------------------------------------------------------------
+
+    def write_json(self, path: Path) -> None:
+        payload = {
+            "stages": [asdict(s) for s in self.stages],
+            "total_wall_s": sum(s.wall_s for s in self.stages),
+            "total_cpu_s": sum(s.cpu_s for s in self.stages),
+        }
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
+        except OSError as e:
+            raise FileIOError("写出性能报告失败", file_path=str(path), original_error=e)
+
+    def write_csv(self, path: Path) -> None:
+        columns = [f.name for f in fields(StageProfile)]
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with path.open("w", encoding="utf-8", newline="") as f:
+                writer = csv.DictWriter(f, fieldnames=columns)
+                writer.writeheader()
+                for s in self.stages:
+                    writer.writerow(asdict(s))
+        except OSError as e:
+            raise FileIOError("写出性能报告失败", file_path=str(path), original_error=e)
+
+    def format_summary(self) -> str:
+        lines = [f"{'阶段':<22}{'墙钟(s)':>10}{'CPU(s)':>10}{'峰值(MiB)':>12}{'对象数变化':>12}"]
+        for s in self.stages:
+            lines.append(
+                f"{s.name:<24}{s.wall_s:>10.3f}{s.cpu_s:>10.3f}"
+                f"{s.peak_alloc_bytes / 2**20:>12.2f}{s.gc_objects_delta:>+12d}"
+                + ("" if s.ok else "  (失败)")
+            )
+        return "\n".join(lines)
+
+
+__all__ = ["PipelineProfiler", "StageProfile"]
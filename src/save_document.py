@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+src.save_document
+=================
+
+存档（data.json / ungraph.json）中 `saveMetaDatas` 的 chip_graph / chip_inputs /
+chip_outputs / chip_variables 都是“JSON 里再套一层 JSON 字符串”。
+
+过去每个阶段（添加模块、修改类型、修改常量、连线、布局）都各自 `json.loads`
+一次、改完再 `json.dumps` 回去。`SaveDocument` 把这几个内嵌字符串按需解码一次，
+供所有阶段共享访问，最后只把被标记为 dirty 的部分重新编码。
+
+用法约定：
+- 各阶段函数既可以接收普通存档字典，也可以接收 `SaveDocument`。
+- 通过 `SaveDocument.wrap()` 取得文档对象；如果是函数自己包装出来的（传入的是字典），
+  函数结束前负责 `flush()`，保持旧接口“返回已写回的字典”的行为。
+- 修改了某个分区后调用 `mark_dirty(key)`，`flush()` 时只重新编码这些分区
+  （默认紧凑编码；`mark_dirty(key, indent=2)` 保留修改类型阶段对 chip_inputs / chip_outputs 的格式化输出）。
+"""
+
+from __future__ import annotations
+
+import json
+from typing import Any, Dict, List, Optional
+
+CHIP_GRAPH_KEY = "chip_graph"
+CHIP_INPUTS_KEY = "chip_inputs"
+CHIP_OUTPUTS_KEY = "chip_outputs"
+CHIP_VARIABLES_KEY = "chip_variables"
+
+SECTION_KEYS = (CHIP_GRAPH_KEY, CHIP_INPUTS_KEY, CHIP_OUTPUTS_KEY, CHIP_VARIABLES_KEY)
+
+# 分区缺失时（create=True）写入的默认内容，与 chip_modifier.find_meta_data 保持一致
+_EMPTY_SECTION_STRINGS = {
+    CHIP_GRAPH_KEY: '{"ValidationState":1,"Nodes":[]}',
+}
+
+
+def _encode_section(key: str, value: Any, indent: Optional[int] = None) -> str:
+    if indent is not None:
+        return json.dumps(value, indent=indent)
+    if key == CHIP_GRAPH_KEY:
+        return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+    return json.dumps(value, separators=(",", ":"))
+
+
+class SaveDocument:
+    """
+    对存档字典的一层轻量包装：惰性解码内嵌 JSON 分区，并只回写修改过的分区。
+    """
+
+    def __init__(self, data: Dict[str, Any]):
+        self.data = data
+        self._meta_datas: List[Dict[str, Any]] | None = None
+        self._save_objects: Dict[str, Any] | None = None
+        self._metas: Dict[str, Dict[str, Any]] = {}
+        self._sections: Dict[str, Any] = {}
+        self._dirty: Dict[str, Optional[int]] = {}  # dirty 分区 -> 回写时的缩进（None 为紧凑格式）
+        self._node_index: Dict[str, Dict[str, Any]] | None = None
+        self._locate_save_objects()
+
+    # ------------------------------------------------------------------
+    # 构造 / 定位
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def wrap(cls, game_data: "SaveDocument | Dict[str, Any]") -> "SaveDocument":
+        """若已是 SaveDocument 则原样返回，否则包装一个新的文档对象。"""
+        if isinstance(game_data, SaveDocument):
+            return game_data
+        return cls(game_data)
+
+    def _locate_save_objects(self) -> None:
+        containers = self.data.get("saveObjectContainers") or []
+        fallback: Dict[str, Any] | None = None
+        for container in containers:
+            save_objects = container.get("saveObjects")
+            if not isinstance(save_objects, dict):
+                continue
+            if fallback is None:
+                fallback = save_objects
+            for meta in save_objects.get("saveMetaDatas") or []:
+                if meta.get("key") == CHIP_GRAPH_KEY:
+                    self._save_objects = save_objects
+                    self._meta_datas = save_objects["saveMetaDatas"]
+                    return
+        if fallback is not None:
+            self._save_objects = fallback
+            self._meta_datas = fallback.setdefault("saveMetaDatas", [])
+
+    @property
+    def meta_datas(self) -> List[Dict[str, Any]]:
+        if self._meta_datas is None:
+            raise KeyError("存档结构异常：找不到 saveObjects.saveMetaDatas")
+        return self._meta_datas
+
+    @property
+    def mechanic_data(self) -> List[Dict[str, Any]]:
+        if self._save_objects is None:
+            return []
+        return self._save_objects.get("mechanicData") or []
+
+    def meta(self, key: str, *, create: bool = False) -> Optional[Dict[str, Any]]:
+        """返回 saveMetaDatas 中 key 对应的条目；create=True 时缺失则新建。"""
+        cached = self._metas.get(key)
+        if cached is not None:
+            return cached
+        if self._meta_datas is None:
+            if not create:
+                return None
+            raise KeyError("存档结构异常：找不到 saveObjects.saveMetaDatas")
+        for meta in self._meta_datas:
+            if meta.get("key") == key:
+                self._metas[key] = meta
+                return meta
+        if not create:
+            return None
+        meta = {"key": key, "stringValue": _EMPTY_SECTION_STRINGS.get(key, "[]")}
+        self._meta_datas.append(meta)
+        self._metas[key] = meta
+        return meta
+
+    # ------------------------------------------------------------------
+    # 分区访问
+    # ------------------------------------------------------------------
+
+    def has_section(self, key: str) -> bool:
+        return key in self._sections or self.meta(key) is not None
+
+    def section(self, key: str, *, create: bool = False) -> Any:
+        """
+        返回解码后的分区对象（同一文档内多次调用返回同一个对象）。
+        分区不存在且 create=False 时返回 None；stringValue 为空时视为空列表。
+        """
+        if key in self._sections:
+            return self._sections[key]
+        meta = self.meta(key, create=create)
+        if meta is None:
+            return None
+        raw = meta.get("stringValue")
+        value = json.loads(raw) if raw else []
+        self._sections[key] = value
+        return value
+
+    @property
+    def chip_graph(self) -> Optional[Dict[str, Any]]:
+        return self.section(CHIP_GRAPH_KEY)
+
+    @property
+    def nodes(self) -> List[Dict[str, Any]]:
+        graph = self.chip_graph
+        if graph is None:
+            return []
+        return graph.setdefault("Nodes", [])
+
+    def node_by_id(self, node_id: str) -> Optional[Dict[str, Any]]:
+        """按完整 Id 查找 chip_graph 节点（索引在首次调用时建立）。"""
+        if self._node_index is None:
+            index: Dict[str, Dict[str, Any]] = {}
+            for n in self.nodes:
+                # Id 重复时保留第一个，与线性查找的语义一致
+                index.setdefault(n.get("Id"), n)
+            self._node_index = index
+        return self._node_index.get(node_id)
+
+    def add_node(self, node: Dict[str, Any]) -> None:
+        self.nodes.append(node)
+        if self._node_index is not None:
+            self._node_index.setdefault(node.get("Id"), node)
+        self.mark_dirty(CHIP_GRAPH_KEY)
+
+    def invalidate_node_index(self) -> None:
+        """直接改动了 Nodes 列表（而非通过 add_node）后调用。"""
+        self._node_index = None
+
+    # ------------------------------------------------------------------
+    # 回写
+    # ------------------------------------------------------------------
+
+    def mark_dirty(self, key: str, *, indent: Optional[int] = None) -> None:
+        """
+        标记分区已修改。indent 为回写时的缩进（保持某些阶段原有的格式化输出），
+        默认紧凑编码；同一分区以最后一次标记为准。
+        """
+        if key not in self._sections:
+            raise KeyError(f"分区 '{key}' 尚未解码，无法标记为已修改")
+        self._dirty[key] = indent
+
+    def is_dirty(self, key: str) -> bool:
+        return key in self._dirty
+
+    def flush(self) -> Dict[str, Any]:
+        """将所有 dirty 分区重新编码写回 stringValue，返回底层存档字典。"""
+        for key, indent in list(self._dirty.items()):
+            meta = self.meta(key, create=True)
+            meta["stringValue"] = _encode_section(key, self._sections[key], indent)
+        self._dirty.clear()
+        return self.data
+
+    to_dict = flush
+
+
+__all__ = [
+    "SaveDocument",
+    "SECTION_KEYS",
+    "CHIP_GRAPH_KEY",
+    "CHIP_INPUTS_KEY",
+    "CHIP_OUTPUTS_KEY",
+    "CHIP_VARIABLES_KEY",
+]
@@ -0,0 +1,697 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+src.simulator
+=============
+
+离线芯片仿真器：不进游戏，按 tick 运行编译出的 graph.json 或存档中的 chip_graph，
+并一次性批量运行多组输入（每个输入值是一整列，列长即场景数）。
+
+用法::
+
+    sim = ChipSimulator.load("output/graph.json", catalog)
+    result = sim.run({"A": a_values, "B": 2.0, "V": (0.0, 1.0, 0.0)}, ticks=120)
+    result.outputs["Sum"][-1]          # 最后一个 tick 的整列输出
+
+输入值为列表 / NumPy 数组时表示整列（每个场景一个值），数字、字符串与元组（向量）
+表示所有场景共用的标量。
+
+求值语义（与 src.graph_passes.fold 共用同一张标量求值表，但按运行时处理异常值）：
+- 每个 tick 按拓扑序对所有节点求值一次；数字统一为 float；
+- 除零、负数开方、非法对数、0 的负数次幂等得到 inf / NaN（C# 浮点语义），而不是报错；
+  inf / NaN 经过取整类运算后原样传出，Remainder 的被除数为 inf 时得到 NaN，Max 的任一输入为 NaN 时得到 NaN；
+  两个后端对这些边界值的处理一致（有限值的运算结果末位可能因底层数学库不同而略有差别）；
+- Equal / NotEqual 按 Mathf.Approximately 比较；
+- 变量按“寄存器”处理：本 tick 内所有读取看到的都是 tick 开始时的值，
+  Set 输入非 0 的写入在 tick 结束时统一生效；
+- Time 输出 (t, dt, sin t, cos t)，dt = 1 / tps；Random 为 [Min, Max) 内的均匀分布（可设 seed，两个后端使用同一个随机数序列，结果与后端无关）；
+- 向量为 (x, y, z, w) 元组，支持 Split / Combine 与分量加减、数乘。
+不支持的模块（实体读写、数组、带状态模块等）在构造时抛出 SimulationError。
+
+后端：
+- "python"：每列是 Python 列表，逐元素求值；
+- "numpy"：纯数值列为 float64 数组，整列向量化求值；字符串 / 向量列退回逐元素求值；
+- "auto"（默认）：已安装 NumPy 且场景数不少于 NUMPY_MIN_BATCH 时用 NumPy。
+NumPy 不是必需依赖，未安装时只能使用 "python" 后端。
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import random
+from collections import defaultdict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
+
+try:  # 可选依赖
+    import numpy as np
+
+    HAS_NUMPY = True
+except ImportError:  # pragma: no cover - 取决于运行环境
+    np = None  # type: ignore[assignment]
+    HAS_NUMPY = False
+
+from src.chip_stats import read_chip_file
+from src.error_handler import SimulationError
+from src.graph_passes.common import input_port_position, resolve_chip_entries, resolve_module_names
+from src.graph_passes.fold import FOLDERS
+from src.module_catalog import ModuleCatalog
+from src.save_document import SaveDocument
+
+# 场景数低于该值时 NumPy 的转换开销大于收益，"auto" 后端走纯 Python
+NUMPY_MIN_BATCH = 64
+
+DEFAULT_TPS = 240
+
+# Mathf.Epsilon（float 最小正非规格化数）
+_FLOAT_EPSILON = 1.401298e-45
+
+
+# =========================== 标量语义 ===========================
+
+def _approximately(a: float, b: float) -> bool:
+    """Mathf.Approximately。"""
+    return abs(b - a) < max(1e-6 * max(abs(a), abs(b)), _FLOAT_EPSILON * 8)
+
+
+def _equal(a: Any, b: Any) -> float:
+    if isinstance(a, str) or isinstance(b, str) or isinstance(a, tuple) or isinstance(b, tuple):
+        return 1.0 if a == b else 0.0
+    return 1.0 if _approximately(float(a), float(b)) else 0.0
+
+
+def _div(a: float, b: float) -> float:
+    if b == 0.0:
+        if a == 0.0 or math.isnan(a):
+            return math.nan
+        return math.copysign(math.inf, a) * math.copysign(1.0, b)
+    return a / b
+
+
+def _vec(v: Any) -> Tuple[float, float, float, float]:
+    t = tuple(float(x) for x in v)[:4]
+    return t + (0.0,) * (4 - len(t))  # type: ignore[return-value]
+
+
+def _add(a: Any, b: Any) -> Any:
+    if isinstance(a, tuple) and isinstance(b, tuple):
+        return tuple(x + y for x, y in zip(a, b))
+    if isinstance(a, str) and isinstance(b, str):
+        return a + b
+    return float(a) + float(b)
+
+
+def _subtract(a: Any, b: Any) -> Any:
+    if isinstance(a, tuple) and isinstance(b, tuple):
+        return tuple(x - y for x, y in zip(a, b))
+    return float(a) - float(b)
+
+
+def _multiply(a: Any, b: Any) -> Any:
+    if isinstance(a, tuple) and not isinstance(b, tuple):
+        return tuple(x * float(b) for x in a)
+    if isinstance(b, tuple) and not isinstance(a, tuple):
+        return tuple(float(a) * y for y in b)
+    return float(a) * float(b)
+
+
+def _nan_on_error(fn: Callable[..., float]) -> Callable[..., float]:
+    def wrapped(*args: Any) -> float:
+        try:
+            return fn(*args)
+        except (ValueError, ZeroDivisionError):
+            return math.nan
+        except OverflowError:
+            return math.inf
+    return wrapped
+
+
+def _finite_only(fn: Callable[[float], float]) -> Callable[[Any], float]:
+    """
+    取整类运算：inf / NaN 原样传出（与 NumPy 一致），不让 math.floor / round 报错；
+    结果为 0 时保留输入的符号（Round(-0.4) 为 -0.0，与 np.round 相同）。
+    """
+    def wrapped(a: Any) -> float:
+        x = float(a)
+        return math.copysign(float(fn(x)), x) if math.isfinite(x) else x
+    return wrapped
+
+
+def _is_odd_integer(x: float) -> bool:
+    return math.isfinite(x) and x.is_integer() and x % 2.0 == 1.0
+
+
+def _pow(a: Any, b: Any) -> float:
+    """与 np.power / Mathf.Pow 相同：0 的负数次幂为 ±inf，溢出为 ±inf，只有负数的非整数次幂为 NaN。"""
+    x, y = float(a), float(b)
+    if x == 0.0 and y < 0.0:
+        # 负零的负奇数次幂为 -inf，其余为 +inf
+        return math.copysign(math.inf, x) if _is_odd_integer(y) else math.inf
+    try:
+        return math.pow(x, y)
+    except OverflowError:
+        return -math.inf if x < 0.0 and _is_odd_integer(y) else math.inf
+    except ValueError:
+        return math.nan
+
+
+def _max(a: Any, b: Any) -> float:
+    """任一输入为 NaN 时结果为 NaN（与 np.maximum 相同，结果与参数顺序无关）。"""
+    x, y = float(a), float(b)
+    if math.isnan(x) or math.isnan(y):
+        return math.nan
+    return x if x > y else y
+
+
+def _log(v: float, base: float) -> float:
+    if v <= 0.0 or base <= 0.0 or base == 1.0:
+        return math.nan
+    return math.log(v) / math.log(base)
+
+
+# 运行时与编译期折叠语义不同（折叠会跳过）的模块在这里覆盖
+_RUNTIME_OPS: Dict[str, Callable[..., Any]] = {
+    "Add": _add,
+    "Subtract": _subtract,
+    "Multiply": _multiply,
+    "Divide": lambda a, b: _div(float(a), float(b)),
+    "Inverse": lambda a: _div(1.0, float(a)),
+    # 被除数为 inf（例如来自除零）时 math.fmod 报错，与 np.fmod 一样得到 NaN
+    "Remainder": _nan_on_error(lambda a, b: math.nan if float(b) == 0.0 else math.fmod(float(a), float(b))),
+    "Sqrt": lambda a: math.nan if float(a) < 0.0 else math.sqrt(float(a)),
+    "Log": lambda v, b: _log(float(v), float(b)),
+    "Pow": _pow,
+    "Max": _max,
+    "Exp": _nan_on_error(lambda a: math.exp(float(a))),
+    "Floor": _finite_only(math.floor),
+    "Ceil": _finite_only(math.ceil),
+    "Round": _finite_only(round),
+    "Equal": _equal,
+    "NotEqual": lambda a, b: 1.0 - _equal(a, b),
+    "Greater": lambda a, b: 1.0 if float(a) > float(b) else 0.0,
+    "Less": lambda a, b: 1.0 if float(a) < float(b) else 0.0,
+    "GreaterOrEqual": lambda a, b: 1.0 if float(a) >= float(b) else 0.0,
+    "LessOrEqual": lambda a, b: 1.0 if float(a) <= float(b) else 0.0,
+    "Identity": lambda a: a,
+    "Combine": lambda x, y, z, w: (float(x), float(y), float(z), float(w)),
+}
+
+# 模块名 -> 逐元素求值函数（单输出）
+SCALAR_OPS: Dict[str, Callable[..., Any]] = {**FOLDERS, **_RUNTIME_OPS}
+
+# 由仿真器自身处理、不走 SCALAR_OPS 的模块
+_SPECIAL_MODULES = frozenset({"Constant", "Input", "Output", "Variable", "Time", "Random", "Split"})
+
+
+def _numpy_ops() -> Dict[str, Callable[..., Any]]:
+    """模块名 -> 整列 float64 数组上的向量化求值函数，语义与 SCALAR_OPS 一致。"""
+
+    def flag(mask):
+        return mask.astype(np.float64)
+
+    def truth(x):
+        return x != 0.0
+
+    def approx(a, b):
+        tol = np.maximum(1e-6 * np.maximum(np.abs(a), np.abs(b)), _FLOAT_EPSILON * 8)
+        return np.abs(b - a) < tol
+
+    def clamp(x, lo, hi):
+        return np.where(x < lo, lo, np.where(x > hi, hi, x))
+
+    def log(v, b):
+        with np.errstate(divide="ignore", invalid="ignore"):
+            out = np.log(v) / np.log(b)
+        return np.where((v <= 0.0) | (b <= 0.0) | (b == 1.0), np.nan, out)
+
+    def guarded(fn):
+        def wrapped(*args):
+            with np.errstate(all="ignore"):
+                return fn(*args)
+        return wrapped
+
+    ops = {
+        "Add": np.add,
+        "Subtract": np.subtract,
+        "Multiply": np.multiply,
+        "Divide": guarded(np.divide),
+        "Inverse": guarded(lambda a: np.divide(1.0, a)),
+        "Remainder": guarded(np.fmod),
+        "Pow": guarded(np.power),
+        "Sqrt": guarded(np.sqrt),
+        "Sqr": np.square,
+        "Negate": np.negative,
+        "Abs": np.abs,
+        "Floor": np.floor,
+        "Ceil": np.ceil,
+        "Round": np.round,
+        "Max": np.maximum,
+        "Average": lambda a, b: (a + b) / 2.0,
+        "Clamp": clamp,
+        "Clamp01": lambda a: clamp(a, 0.0, 1.0),
+        "Exp": guarded(np.exp),
+        "Log": log,
+        "Greater": lambda a, b: flag(a > b),
+        "Less": lambda a, b: flag(a < b),
+        "GreaterOrEqual": lambda a, b: flag(a >= b),
+        "LessOrEqual": lambda a, b: flag(a <= b),
+        "Equal": lambda a, b: flag(approx(a, b)),
+        "NotEqual": lambda a, b: flag(~approx(a, b)),
+        "And": lambda a, b: flag(truth(a) & truth(b)),
+        "Or": lambda a, b: flag(truth(a) | truth(b)),
+        "Nand": lambda a, b: flag(~(truth(a) & truth(b))),
+        "Nor": lambda a, b: flag(~(truth(a) | truth(b))),
+        "Xor": lambda a, b: flag(truth(a) ^ truth(b)),
+        "Nxor": lambda a, b: flag(~(truth(a) ^ truth(b))),
+        "Not": lambda a: flag(~truth(a)),
+        "Branch": lambda c, a, b: np.where(truth(c), a, b),
+        "Identity": lambda a: a,
+    }
+    return ops
+
+
+# =========================== 网表 ===========================
+
+@dataclass
+class SimNode:
+    """仿真用的节点：模块名、各输入端口的来源 (节点下标, 输出下标)、输出端口数与参数。"""
+    id: str
+    module: str
+    sources: List[Optional[Tuple[int, int]]]
+    n_outputs: int = 1
+    value: Any = None            # Constant 的值
+    name: Optional[str] = None   # Input / Output 的名称，Variable 的 Key
+
+
+@dataclass
+class SimulationResult:
+    """run() 的结果：每个输出名对应按 tick 排列的整列输出，以及结束时的变量值。"""
+    outputs: Dict[str, List[Any]] = field(default_factory=dict)
+    variables: Dict[str, Any] = field(default_factory=dict)
+
+
+def _normalize_value(v: Any) -> Any:
+    if isinstance(v, bool):
+        return 1.0 if v else 0.0
+    if isinstance(v, (int, float)):
+        return float(v)
+    if isinstance(v, (list, tuple)):
+        return _vec(v)
+    return v
+
+
+def _parse_serialized_value(raw: Any) -> Any:
+    """chip_inputs / chip_variables 中 SerializedValue 的 "Value"。"""
+    if not isinstance(raw, str):
+        return 0.0
+    try:
+        data = json.loads(raw)
+    except ValueError:
+        return 0.0
+    value = data.get("Value", 0.0) if isinstance(data, dict) else data
+    if isinstance(value, dict):
+        return _vec(value.get(k, 0.0) for k in ("x", "y", "z", "w"))
+    return _normalize_value(value)
+
+
+# 未给出输入值时按声明的数据类型取默认值
+_TYPE_DEFAULTS: Dict[str, Any] = {"Vector": (0.0, 0.0, 0.0, 0.0), "String": ""}
+
+
+def _netlist_from_graph(
+    graph: dict, catalog: ModuleCatalog
+) -> Tuple[List[SimNode], Dict[str, Any], Dict[str, Any]]:
+    modules = resolve_module_names(graph, catalog)
+    chips = resolve_chip_entries(graph, catalog)
+    nodes = graph.get("nodes", [])
+    index = {n["id"]: i for i, n in enumerate(nodes)}
+
+    variables: Dict[str, Any] = {}
+    key_of_dsl_name: Dict[str, str] = {}
+    for vd in graph.get("variables") or []:
+        key = vd.get("Key")
+        if isinstance(key, str):
+            variables[key] = _normalize_value(vd.get("Value", 0.0))
+            if isinstance(vd.get("dsl_name"), str):
+                key_of_dsl_name[vd["dsl_name"]] = key
+
+    input_defaults: Dict[str, Any] = {}
+    netlist: List[SimNode] = []
+    for n in nodes:
+        module = modules.get(n["id"])
+        chip = chips.get(n["id"])
+        if module is None or chip is None:
+            raise SimulationError("无法识别的节点类型", context={"node_id": n["id"], "node_type": n.get("type")})
+        attrs = n.get("attrs") or {}
+        sim = SimNode(
+            id=n["id"],
+            module=module,
+            sources=[None] * len(chip.get("inputs") or []),
+            n_outputs=len(chip.get("outputs") or []),
+        )
+        if module == "Constant":
+            sim.value = _normalize_value(attrs.get("value", 0.0))
+        elif module in ("Input", "Output"):
+            sim.name = attrs.get("name") or n["id"]
+            if module == "Input":
+                input_defaults[sim.name] = _TYPE_DEFAULTS.get(attrs.get("data_type"), 0.0)
+        elif module == "Variable":
+            dsl_name = attrs.get("dsl_name") or attrs.get("var_key")
+            sim.name = key_of_dsl_name.get(dsl_name, dsl_name)
+            variables.setdefault(sim.name, 0.0)
+        netlist.append(sim)
+
+    for e in graph.get("edges", []):
+        src, dst = index.get(e["from_node"]), index.get(e["to_node"])
+        if src is None or dst is None:
+            continue
+        in_ports = chips[e["to_node"]].get("inputs") or []
+        out_ports = chips[e["from_node"]].get("outputs") or []
+        in_idx = input_port_position(e["to_port"], in_ports)
+        if e["from_port"] == "__auto__":
+            out_idx = 0 if len(out_ports) == 1 else None
+        else:
+            out_idx = input_port_position(e["from_port"], out_ports)
+        if in_idx is None or out_idx is None:
+            raise SimulationError(
+                "无法解析连线端口",
+                context={"node_id": e["to_node"], "port": f"{e['from_port']} -> {e['to_port']}"},
+            )
+        netlist[dst].sources[in_idx] = (src, out_idx)
+    return netlist, variables, input_defaults
+
+
+def _port_uuid(port_id: Any) -> str:
+    # 存档里同一个端口 Id 的换行有时被转义成 "\\n"，只用末尾的 uuid 比较
+    return str(port_id).rsplit(" ", 1)[-1]
+
+
+def _netlist_from_save(
+    data: Any, catalog: ModuleCatalog
+) -> Tuple[List[SimNode], Dict[str, Any], Dict[str, Any], Optional[int]]:
+    doc = SaveDocument.wrap(data)
+    nodes = doc.nodes
+    out_port_at: Dict[str, Tuple[int, int]] = {}
+    for i, node in enumerate(nodes):
+        for j, port in enumerate(node.get("Outputs") or []):
+            out_port_at[_port_uuid(port.get("Id"))] = (i, j)
+
+    input_defaults = {
+        d.get("Key"): _parse_serialized_value(d.get("SerializedValue"))
+        for d in (doc.section("chip_inputs") or [])
+    }
+    variables = {
+        d.get("Key"): _parse_serialized_value(d.get("SerializedValue"))
+        for d in (doc.section("chip_variables") or [])
+    }
+
+    netlist: List[SimNode] = []
+    for node in nodes:
+        op = node.get("OperationType")
+        module_def = catalog.module(op) or {}
+        module = (module_def.get("source_info") or {}).get("datatype_map_nodename")
+        if module is None:
+            # 输出节点（Exit, 512）与变量节点不在 moduledef 的 op_type 索引中
+            module = {"512": "Output", "Variable": "Variable"}.get(str(op))
+        if module is None:
+            raise SimulationError("无法识别的节点类型", context={"node_id": node.get("Id"), "node_type": op})
+        sources: List[Optional[Tuple[int, int]]] = []
+        for port in node.get("Inputs") or []:
+            link = port.get("connectedOutputIdModel")
+            sources.append(out_port_at.get(_port_uuid(link.get("Id"))) if link else None)
+        sim = SimNode(id=node["Id"], module=module, sources=sources, n_outputs=len(node.get("Outputs") or []))
+        if module == "Constant":
+            try:
+                raw = json.loads(node.get("SaveData") or "{}").get("DataValue", "0")
+            except ValueError:
+                raw = "0"
+            try:
+                sim.value = float(raw)
+            except (TypeError, ValueError):
+                sim.value = raw
+        elif module in ("Input", "Output", "Variable"):
+            sim.name = node.get("MechanicConnectionId") or node["Id"]
+        netlist.append(sim)
+
+    tps_meta = doc.meta("chip_tps")
+    tps = tps_meta.get("intValue") if tps_meta else None
+    return netlist, variables, input_defaults, tps or None
+
+
+# =========================== 仿真器 ===========================
+
+class ChipSimulator:
+    """
+    批量逐 tick 仿真器。一次 reset() 设定场景数，之后每次 step() 推进一个 tick。
+    """
+
+    def __init__(
+        self,
+        netlist: List[SimNode],
+        *,
+        variables: Optional[Dict[str, Any]] = None,
+        input_defaults: Optional[Dict[str, Any]] = None,
+        tps: int = DEFAULT_TPS,
+        backend: str = "auto",
+        seed: Optional[int] = None,
+    ):
+        if backend not in ("auto", "python", "numpy"):
+            raise SimulationError(f"未知的仿真后端: {backend}")
+        if backend == "numpy" and not HAS_NUMPY:
+            raise SimulationError("未安装 NumPy，无法使用 numpy 后端")
+        unsupported = sorted({
+            n.module for n in netlist
+            if n.module not in SCALAR_OPS and n.module not in _SPECIAL_MODULES
+        })
+        if unsupported:
+            raise SimulationError(f"仿真器暂不支持这些模块: {', '.join(unsupported)}")
+
+        self.netlist = netlist
+        self.initial_variables = dict(variables or {})
+        self.input_defaults = dict(input_defaults or {})
+        self.tps = tps
+        self.requested_backend = backend
+        self.seed = seed
+        self.input_names = [n.name for n in netlist if n.module == "Input"]
+        self.output_names = [n.name for n in netlist if n.module == "Output"]
+        self._order = self._topological_order()
+        self.reset()
+
+    # ------------------------------------------------------------------
+    # 构造
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def from_graph(cls, graph: dict, catalog: ModuleCatalog, **kwargs: Any) -> "ChipSimulator":
+        """由转换器产出的 graph 字典构造。"""
+        netlist, variables, input_defaults = _netlist_from_graph(graph, catalog)
+        return cls(netlist, variables=variables, input_defaults=input_defaults, **kwargs)
+
+    @classmethod
+    def from_save(cls, data: Any, catalog: ModuleCatalog, **kwargs: Any) -> "ChipSimulator":
+        """由存档字典（或 SaveDocument）中的 chip_graph / chip_inputs / chip_variables 构造。"""
+        netlist, variables, input_defaults, tps = _netlist_from_save(data, catalog)
+        if tps is not None:
+            kwargs.setdefault("tps", tps)
+        return cls(netlist, variables=variables, input_defaults=input_defaults, **kwargs)
+
+    @classmethod
+    def load(cls, path: Path | str, catalog: ModuleCatalog, **kwargs: Any) -> "ChipSimulator":
+        """读取 graph.json 或 Data.json / ungraph.json / .melsave。"""
+        data = read_chip_file(Path(path))
+        if isinstance(data, dict) and isinstance(data.get("nodes"), list):
+            return cls.from_graph(data, catalog, **kwargs)
+        return cls.from_save(data, catalog, **kwargs)
+
+    def _topological_order(self) -> List[int]:
+        indegree = [0] * len(self.netlist)
+        succs: Dict[int, List[int]] = defaultdict(list)
+        for i, n in enumerate(self.netlist):
+            for src in n.sources:
+                if src is not None:
+                    succs[src[0]].append(i)
+                    indegree[i] += 1
+        ready = [i for i, d in enumerate(indegree) if d == 0]
+        order: List[int] = []
+        while ready:
+            i = ready.pop()
+            order.append(i)
+            for j in succs[i]:
+                indegree[j] -= 1
+                if indegree[j] == 0:
+                    ready.append(j)
+        if len(order) != len(self.netlist):
+            looped = [self.netlist[i].id for i, d in enumerate(indegree) if d > 0]
+            raise SimulationError("芯片中存在组合逻辑环，无法按 tick 求值", context={"node_id": looped[0]})
+        return order
+
+    # ------------------------------------------------------------------
+    # 列（一列 = 一个值在全部场景上的取值）
+    # ------------------------------------------------------------------
+
+    def _is_numeric(self, col: Any) -> bool:
+        return self.backend == "numpy" and isinstance(col, np.ndarray) and col.dtype == np.float64
+
+    def _to_list(self, col: Any) -> List[Any]:
+        return col.tolist() if self.backend == "numpy" else col
+
+    def _from_list(self, values: List[Any]) -> Any:
+        if self.backend == "python":
+            return values
+        if all(isinstance(v, float) for v in values):
+            return np.array(values, dtype=np.float64)
+        arr = np.empty(len(values), dtype=object)
+        for i, v in enumerate(values):
+            arr[i] = v
+        return arr
+
+    def _broadcast(self, value: Any) -> Any:
+        value = _normalize_value(value)
+        if self.backend == "numpy" and isinstance(value, float):
+            return np.full(self.batch_size, value)
+        return self._from_list([value] * self.batch_size)
+
+    @staticmethod
+    def _is_column(raw: Any) -> bool:
+        """列表 / 数组表示整列；数字、字符串、元组（向量）是广播到所有场景的标量。"""
+        return isinstance(raw, list) or (HAS_NUMPY and isinstance(raw, np.ndarray))
+
+    def _input_column(self, name: str, raw: Any) -> Any:
+        if not self._is_column(raw):
+            return self._broadcast(raw)
+        values = [_normalize_value(v) for v in (raw.tolist() if not isinstance(raw, list) else raw)]
+        if len(values) != self.batch_size:
+            raise SimulationError(
+                f"输入列长度 {len(values)} 与场景数 {self.batch_size} 不一致", context={"port": name}
+            )
+        return self._from_list(values)
+
+    @classmethod
+    def _batch_size_of(cls, inputs: Mapping[str, Any]) -> int:
+        for raw in inputs.values():
+            if cls._is_column(raw):
+                return len(raw)
+        return 1
+
+    # ------------------------------------------------------------------
+    # 运行
+    # ------------------------------------------------------------------
+
+    def reset(self, batch_size: int = 1) -> None:
+        """回到初始状态（tick 0、变量初值），并设定场景数。"""
+        self.batch_size = batch_size
+        if self.requested_backend == "auto":
+            self.backend = "numpy" if HAS_NUMPY and batch_size >= NUMPY_MIN_BATCH else "python"
+        else:
+            self.backend = self.requested_backend
+        self._vector_ops = _numpy_ops() if self.backend == "numpy" else {}
+        self._rng = random.Random(self.seed)
+        self.tick = 0
+        self.variables: Dict[str, Any] = {k: self._broadcast(v) for k, v in self.initial_variables.items()}
+        self._constants = {i: self._broadcast(n.value) for i, n in enumerate(self.netlist) if n.module == "Constant"}
+
+    def _apply(self, node: SimNode, fn: Callable[..., Any], args: List[Any]) -> Any:
+        vector_fn = self._vector_ops.get(node.module)
+        if vector_fn is not None and all(self._is_numeric(a) for a in args):
+            return np.asarray(vector_fn(*args), dtype=np.float64)
+        try:
+            values = [fn(*row) for row in zip(*(self._to_list(a) for a in args))]
+        except Exception as e:
+            raise SimulationError(
+                "节点求值失败", context={"node_id": node.id, "node_type": node.module}, original_error=e
+            )
+        return self._from_list([_normalize_value(v) for v in values])
+
+    def step(self, inputs: Optional[Mapping[str, Any]] = None) -> Dict[str, Any]:
+        """推进一个 tick，返回 {输出名: 整列输出}。未给出的输入使用默认值（存档中的 Value 或 0）。"""
+        inputs = inputs or {}
+        zero = self._broadcast(0.0)
+        dt = 1.0 / self.tps
+        outputs: Dict[str, Any] = {}
+        writes: List[Tuple[str, Any, Any]] = []
+        values: Dict[int, List[Any]] = {}
+
+        def arg(src: Optional[Tuple[int, int]]) -> Any:
+            return zero if src is None else values[src[0]][src[1]]
+
+        for i in self._order:
+            node = self.netlist[i]
+            module = node.module
+            args = [arg(src) for src in node.sources]
+            if module == "Constant":
+                values[i] = [self._constants[i]]
+            elif module == "Input":
+                raw = inputs.get(node.name, self.input_defaults.get(node.name, 0.0))
+                values[i] = [self._input_column(node.name, raw)] * max(node.n_outputs, 1)
+            elif module == "Output":
+                outputs[node.name] = args[0] if args else zero
+                values[i] = []
+            elif module == "Variable":
+                values[i] = [self.variables[node.name]] * max(node.n_outputs, 1)
+                if len(node.sources) >= 2 and node.sources[0] is not None and node.sources[1] is not None:
+                    writes.append((node.name, args[0], args[1]))
+            elif module == "Time":
+                t = self.tick * dt
+                values[i] = [self._broadcast(v) for v in (t, dt, math.sin(t), math.cos(t))]
+            elif module == "Random":
+                lo, hi = args
+                if self._is_numeric(lo) and self._is_numeric(hi):
+                    # 与 python 后端共用 random.Random 的序列（同 random.uniform 的公式），结果与后端无关
+                    n = self.batch_size
+                    u = np.fromiter((self._rng.random() for _ in range(n)), np.float64, n)
+                    values[i] = [lo + (hi - lo) * u]
+                else:
+                    rows = zip(self._to_list(lo), self._to_list(hi))
+                    values[i] = [self._from_list([self._rng.uniform(float(a), float(b)) for a, b in rows])]
+            elif module == "Split":
+                vecs = self._apply(node, _vec, args[:1])
+                values[i] = [self._from_list([v[k] for v in self._to_list(vecs)]) for k in range(node.n_outputs)]
+            else:
+                values[i] = [self._apply(node, SCALAR_OPS[module], args)]
+
+        # 变量写入在 tick 结束时统一生效
+        for name, value, trigger in writes:
+            old = self.variables[name]
+            if self._is_numeric(value) and self._is_numeric(trigger) and self._is_numeric(old):
+                self.variables[name] = np.where(trigger != 0.0, value, old)
+            else:
+                rows = zip(self._to_list(trigger), self._to_list(value), self._to_list(old))
+                self.variables[name] = self._from_list(
+                    [_normalize_value(v) if float(t) != 0.0 else o for t, v, o in rows]
+                )
+        self.tick += 1
+        return outputs
+
+    def run(
+        self,
+        inputs: Mapping[str, Any] | Callable[[int], Mapping[str, Any]] | None = None,
+        ticks: int = 1,
+        *,
+        batch_size: Optional[int] = None,
+    ) -> SimulationResult:
+        """
+        从初始状态开始运行 ticks 个 tick。
+        inputs 可以是固定的 {输入名: 标量或整列}，也可以是 tick -> 该 tick 输入 的函数；
+        场景数默认取输入中第一列的长度。
+        """
+        first = inputs(0) if callable(inputs) else (inputs or {})
+        self.reset(batch_size if batch_size is not None else self._batch_size_of(first))
+        result = SimulationResult(outputs={name: [] for name in self.output_names})
+        for t in range(ticks):
+            tick_inputs = inputs(t) if callable(inputs) else first
+            for name, col in self.step(tick_inputs).items():
+                result.outputs.setdefault(name, []).append(col)
+        result.variables = dict(self.variables)
+        return result
+
+
+__all__ = [
+    "ChipSimulator",
+    "SimNode",
+    "SimulationResult",
+    "SCALAR_OPS",
+    "HAS_NUMPY",
+    "NUMPY_MIN_BATCH",
+]
@@ -17,7 +17,8 @@ from collections import Counter
 from dataclasses import dataclass
 from typing import Any, Dict, Iterable, List, Optional, Tuple
 
-from src.utils import fuzzy_match, normalize
+from src.fuzzy import match_port_position
+from src.utils import normalize
 from src.config import FUZZY_CUTOFF_PORT
 
 
@@ -137,9 +138,7 @@ def _port_index(port_name: str, port_list: List[str]) -> int | None:
     if isinstance(port_name, str) and port_name.isdigit():
         idx = int(port_name)
         return idx if 0 <= idx < len(port_list) else None
-    normalized_ports = [normalize(p) for p in port_list]
-    best = fuzzy_match(normalize(str(port_name)), normalized_ports, FUZZY_CUTOFF_PORT)
-    return normalized_ports.index(best) if best is not None else None
+    return match_port_position(port_name, port_list, FUZZY_CUTOFF_PORT)
 
 
 @dataclass(frozen=True)
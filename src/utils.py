@@ -8,10 +8,12 @@ src.utils
 """
 
 import json
+import os
+import pickle
 import re
 import sys
+import tempfile
 from pathlib import Path
-from difflib import get_close_matches
 from typing import Any, List
 
 
@@ -28,17 +30,79 @@ def load_json(path: Path, desc: str) -> Any:
         sys.exit(f"错误：{desc} 文件 \"{path}\" 解析失败：{e}")
 
 
+def read_pickle_cache(path: Path) -> Any | None:
+    """读取 pickle 缓存；文件不存在或已损坏时返回 None（缓存只是加速手段）。"""
+    try:
+        with path.open("rb") as f:
+            return pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError, ValueError):
+        return None
+
+
+def write_pickle_atomic(path: Path, payload: Any) -> bool:
+    """
+    原子写入 pickle 缓存（先写临时文件再 os.replace），并发构建时不会读到半截文件。
+    写入失败（如只读目录）时返回 False 而不抛出。
+    """
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=str(path.parent), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_name, path)
+        except BaseException:
+            try:
+                os.unlink(tmp_name)
+            except OSError:
+                pass
+            raise
+    except OSError:
+        return False
+    return True
+
+
 def normalize(s: str) -> str:
     """将字符串转为小写并移除非字母数字字符，用于构建模糊匹配 key。"""
     return re.sub(r"[^a-z0-9]+", "", s.lower())
 
 
+def as_bool_flag(value: Any, default: bool = True) -> bool:
+    """
+    将 moduledef.json 中的布尔型字段（bool / 数字 / "true" / "no" 等字符串）统一转为 bool。
+    无法识别时返回 default。
+    """
+    if isinstance(value, bool):
+        return value
+    if value is None:
+        return default
+    if isinstance(value, (int, float)):
+        return bool(value)
+    if isinstance(value, str):
+        v = value.strip().lower()
+        if v in {"true", "1", "yes", "y", "on"}:
+            return True
+        if v in {"false", "0", "no", "n", "off", ""}:
+            return False
+    return default
+
+
 def fuzzy_match(name: str, candidates: List[str], cutoff: float) -> str | None:
     """
-    使用 difflib 做一次简单的“最接近匹配”，找不到时返回 None。
+    “最接近匹配”（基于 difflib 相似度，先查精确 / 归一化命中），找不到时返回 None。
+    同一候选列表的索引与查询结果会被缓存，见 src.fuzzy。
     """
-    return (get_close_matches(name, candidates, n=1, cutoff=cutoff) or [None])[0]
+    from src.fuzzy import get_matcher
+
+    return get_matcher(tuple(candidates)).match(name, cutoff)
 
 
-__all__ = ["load_json", "normalize", "fuzzy_match"]
+__all__ = [
+    "load_json",
+    "read_pickle_cache",
+    "write_pickle_atomic",
+    "normalize",
+    "as_bool_flag",
+    "fuzzy_match",
+]
 
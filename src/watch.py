@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+src.watch
+=========
+
+监视模式（`python main.py --watch`）：常驻进程，输入文件一变化就增量重建。
+
+进程内常驻（“热”）的状态：
+- 模块目录（ModuleCatalog）与数据类型规则；
+- 底包存档（data.json）的原始字节，每次建模块时从内存解析，不再读盘；
+- 布局缓存对象（其条目常驻内存，拓扑不变的重建直接复用坐标）；
+- 增量 DSL 转换器（src.converter.incremental），只重新访问第一条变化语句之后的部分；
+- 上一次成功构建的 graph 结构指纹、常量值、node_map 与已连线 / 已布局的存档。
+
+每次轮询到 DSL / moduledef.json / data.json / 规则文件的变化后：
+- moduledef.json、规则或底包存档变化：重新加载对应的热数据，然后完整重建；
+- DSL 变化：先转换并优化 graph，与上次比较结构指纹（忽略 Constant 节点的具体取值，但保留取值的种类）：
+  - 结构与常量都没变（例如只改了注释）：什么也不做；
+  - 只有常量取值变化：跳过建模块 / 改类型 / 连线 / 布局，直接把新常量值写进缓存的存档后重新打包；
+  - 其它变化：用热数据完整重建。
+
+文件变化通过轮询 mtime / 大小检测（仅用标准库）；输出固定写到 output_dir/<DSL 文件名>.melsave。
+出错时只打印错误并继续监视，不退出进程。
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Optional, Set, Tuple
+
+from archive_creator import run_archive_creation_stage
+from constantvalue import apply_constant_modifications
+from src.build_context import BuildContext
+from src.converter.incremental import IncrementalConverter
+from src.error_handler import ChipSynthesisError, FileIOError, PipelineError
+from src.layout_cache import LayoutCache
+from src.module_catalog import ModuleCatalog
+from src.pipeline import (
+    BuildResult,
+    generate_constant_instructions,
+    run_build_stages,
+    run_graph_optimizations,
+    run_stage0_convert_dsl_to_graph,
+)
+from src.utils import load_json
+
+DEFAULT_POLL_INTERVAL = 0.5
+
+# rebuild() 的结果
+REBUILD_FULL = "full"
+REBUILD_CONSTANTS = "constants"
+REBUILD_UNCHANGED = "unchanged"
+
+
+def _value_kind(value: Any) -> Any:
+    """常量取值的“种类”：类型推断只看种类（数字 / 字符串 / 向量 / 数组元素种类），不看具体数值。"""
+    if isinstance(value, bool):
+        return "bool"
+    if isinstance(value, (int, float)):
+        return "number"
+    if isinstance(value, str):
+        return "string"
+    if isinstance(value, dict):
+        return ["dict", sorted(value)]
+    if isinstance(value, (list, tuple)):
+        kinds = []
+        for item in value:
+            kind = _value_kind(item)
+            if kind not in kinds:
+                kinds.append(kind)
+        return ["list", kinds]
+    return type(value).__name__
+
+
+def _is_constant(node: Dict[str, Any]) -> bool:
+    return str(node.get("type", "")).strip().lower() == "constant" and "value" in node.get("attrs", {})
+
+
+def _without_line(item: Dict[str, Any]) -> Dict[str, Any]:
+    return {k: v for k, v in item.items() if k != "line"}
+
+
+def graph_fingerprint(graph: dict) -> str:
+    """
+    graph 的结构指纹：Constant 节点的 value 只保留种类，其余内容（节点、边、变量）全部参与。
+    只用于报错提示的字段（源码行号 line、Constant 节点随取值变化的 label）不参与，
+    因此只改注释 / 空行或只改常量取值时指纹不变。
+    """
+    nodes = []
+    for node in graph.get("nodes", []):
+        node = _without_line(node)
+        if _is_constant(node):
+            attrs = dict(node["attrs"])
+            attrs["value"] = _value_kind(attrs["value"])
+            node = {**node, "attrs": attrs}
+            node.pop("label", None)
+        nodes.append(node)
+    payload = {
+        "nodes": nodes,
+        "edges": [_without_line(e) for e in graph.get("edges", [])],
+        "variables": graph.get("variables", []),
+    }
+    raw = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def constant_values(graph: dict) -> Dict[str, Any]:
+    return {node["id"]: node["attrs"]["value"] for node in graph.get("nodes", []) if _is_constant(node)}
+
+
+@dataclass
+class _LastBuild:
+    fingerprint: str
+    constants: Dict[str, Any]
+    result: BuildResult
+
+
+class WatchSession:
+    """
+    一个监视会话：持有热数据与上一次构建结果。
+    rebuild() 可单独调用（测试 / 服务模式），run() 则循环轮询文件变化。
+    """
+
+    def __init__(self, ctx: BuildContext):
+        self.ctx = ctx.replace(melsave_name=ctx.melsave_name or ctx.dsl_path.stem)
+        self.catalog: Optional[ModuleCatalog] = None
+        self.rules: Optional[Dict[str, Any]] = None
+        self.base_save: Optional[bytes] = None
+        self.layout_cache: Optional[LayoutCache] = (
+            LayoutCache(self.ctx.layout_cache_path) if self.ctx.layout_cache_path is not None else None
+        )
+        self.converter = IncrementalConverter()
+        self._last: Optional[_LastBuild] = None
+        self._stamps: Dict[str, Optional[Tuple[int, int]]] = {}
+
+    # ------------------------------------------------------------------
+    # 文件变化
+    # ------------------------------------------------------------------
+
+    def _watched(self) -> Dict[str, Path]:
+        return {
+            "dsl": self.ctx.dsl_path,
+            "moduledef": self.ctx.module_def_path,
+            "data": self.ctx.data_path,
+            "rules": self.ctx.rules_path,
+        }
+
+    def poll_changes(self) -> Set[str]:
+        """返回自上次轮询以来 mtime 或大小发生变化的输入（首次调用时返回全部）。"""
+        changed = set()
+        for name, path in self._watched().items():
+            try:
+                st = path.stat()
+                stamp: Optional[Tuple[int, int]] = (st.st_mtime_ns, st.st_size)
+            except OSError:
+                stamp = None
+            if name not in self._stamps or self._stamps[name] != stamp:
+                changed.add(name)
+            self._stamps[name] = stamp
+        return changed
+
+    # ------------------------------------------------------------------
+    # 热数据
+    # ------------------------------------------------------------------
+
+    def _refresh(self, changed: Set[str]) -> None:
+        ctx = self.ctx
+        if self.catalog is None or "moduledef" in changed:
+            self.catalog = ModuleCatalog.load(ctx.module_def_path, cache_dir=ctx.cache_dir)
+            self._last = None
+        if self.rules is None or "rules" in changed:
+            self.rules = load_json(ctx.rules_path, "数据类型规则文件")
+            self._last = None
+        if self.base_save is None or "data" in changed:
+            try:
+                self.base_save = ctx.data_path.read_bytes()
+            except OSError as e:
+                raise FileIOError("读取底包存档失败", file_path=str(ctx.data_path), original_error=e)
+            self._last = None
+
+    # ------------------------------------------------------------------
+    # 重建
+    # ------------------------------------------------------------------
+
+    def rebuild(self, changed: Optional[Set[str]] = None) -> str:
+        """
+        按变化的输入做最少的工作，返回 REBUILD_FULL / REBUILD_CONSTANTS / REBUILD_UNCHANGED。
+        changed 为 None 时视为全部输入都变了。失败时抛出异常，且不破坏上一次的构建结果。
+        """
+        changed = set(self._watched()) if changed is None else changed
+        self._refresh(changed)
+        ctx = self.ctx
+
+        graph = run_stage0_convert_dsl_to_graph(ctx, self.converter)
+        run_graph_optimizations(graph, self.catalog, ctx)
+        fingerprint = graph_fingerprint(graph)
+        constants = constant_values(graph)
+
+        last = self._last
+        if last is not None and last.fingerprint == fingerprint:
+            if last.constants == constants:
+                return REBUILD_UNCHANGED
+            print("\n--- 仅常量变化：跳过建模块 / 连线 / 布局，直接修改缓存的存档 ---")
+            instructions = generate_constant_instructions(graph, last.result.node_map)
+            apply_constant_modifications(
+                game_data=last.result.save, instructions=instructions, verbosity=ctx.verbosity
+            )
+            last.constants = constants
+            last.result.graph = graph
+            self._archive(last.result)
+            return REBUILD_CONSTANTS
+
+        # 结构变化：完整重建前先丢弃旧结果，避免失败后拿过期的 node_map 去打常量补丁
+        self._last = None
+        result = run_build_stages(
+            ctx,
+            self.catalog,
+            self.rules,
+            layout_cache=self.layout_cache,
+            base_save=self.base_save,
+            graph=graph,
+        )
+        self._archive(result)
+        self._last = _LastBuild(fingerprint=fingerprint, constants=constants, result=result)
+        return REBUILD_FULL
+
+    def _archive(self, result: BuildResult) -> None:
+        if not run_archive_creation_stage(result.save.flush(), self.ctx):
+            raise PipelineError("创建 .melsave 归档失败", stage="归档")
+
+    # ------------------------------------------------------------------
+    # 主循环
+    # ------------------------------------------------------------------
+
+    def run(self, interval: float = DEFAULT_POLL_INTERVAL, max_builds: Optional[int] = None) -> None:
+        """轮询输入文件并在变化时重建；Ctrl+C 退出。max_builds 用于测试时限制重建次数。"""
+        builds = 0
+        print(f"👀 正在监视 {self.ctx.dsl_path}（Ctrl+C 退出）")
+        try:
+            while max_builds is None or builds < max_builds:
+                changed = self.poll_changes()
+                if changed:
+                    builds += 1
+                    self._rebuild_and_report(changed)
+                time.sleep(interval)
+        except KeyboardInterrupt:
+            print("\n👋 已退出监视模式")
+
+    def _rebuild_and_report(self, changed: Set[str]) -> None:
+        started = time.perf_counter()
+        try:
+            mode = self.rebuild(changed)
+        except ChipSynthesisError as e:
+            print(f"\n❌ {e}\n   修改后保存即可重试")
+            return
+        except Exception as e:  # noqa: BLE001 - 监视模式下任何失败都不应结束进程
+            print(f"\n❌ 重建失败: {type(e).__name__}: {e}\n   修改后保存即可重试")
+            return
+        elapsed = time.perf_counter() - started
+        labels = {
+            REBUILD_FULL: "完整重建",
+            REBUILD_CONSTANTS: "仅更新常量",
+            REBUILD_UNCHANGED: "结构与常量均未变化，跳过",
+        }
+        target = self.ctx.output_dir / f"{self.ctx.melsave_name}.melsave"
+        suffix = "" if mode == REBUILD_UNCHANGED else f" -> {target}"
+        print(f"\n✔ [{', '.join(sorted(changed))}] {labels[mode]}（{elapsed:.2f}s）{suffix}")
+
+
+def run_watch(ctx: BuildContext, interval: float = DEFAULT_POLL_INTERVAL) -> None:
+    WatchSession(ctx).run(interval)
+
+
+__all__ = [
+    "WatchSession",
+    "run_watch",
+    "graph_fingerprint",
+    "constant_values",
+    "REBUILD_FULL",
+    "REBUILD_CONSTANTS",
+    "REBUILD_UNCHANGED",
+]
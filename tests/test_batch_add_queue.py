@@ -0,0 +1,73 @@
+import json
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import batch_add_modules
+from batch_add_modules import add_modules
+from src.module_catalog import ModuleCatalog
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def _make_game_data(variables):
+    return {
+        "saveObjectContainers": [
+            {
+                "saveObjects": {
+                    "saveMetaDatas": [
+                        {"key": "chip_graph", "stringValue": json.dumps({"Nodes": []})},
+                        {"key": "chip_variables", "stringValue": json.dumps(variables)},
+                    ],
+                    "mechanicData": [],
+                }
+            }
+        ]
+    }
+
+
+def _section(game_data, key):
+    for meta in game_data["saveObjectContainers"][0]["saveObjects"]["saveMetaDatas"]:
+        if meta["key"] == key:
+            return json.loads(meta["stringValue"])
+    raise KeyError(key)
+
+
+class TestBatchAddQueue(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        module_defs = json.loads((ROOT / "moduledef.json").read_text(encoding="utf-8"))
+        cls.catalog = ModuleCatalog(module_defs)
+
+    def _add(self, modules, variables=()):
+        game_data = _make_game_data(list(variables))
+        _, created = add_modules(modules, game_data, self.catalog.module_defs, catalog=self.catalog)
+        return game_data, created
+
+    def test_repeated_names_are_matched_once_and_keep_order(self) -> None:
+        real = batch_add_modules.fuzzy_best_match
+        with mock.patch.object(batch_add_modules, "fuzzy_best_match", side_effect=real) as spy:
+            _, created = self._add(["Add", "Multiply", "qqzzxxjj", "Add", "qqzzxxjj", "Multiply"] * 50)
+        self.assertEqual(spy.call_count, 3)
+        self.assertEqual(len(created), 200)
+        names = [c["class_name"] for c in created[:4]]
+        self.assertEqual(names[0], names[2])
+        self.assertNotEqual(names[0], names[1])
+
+    def test_variable_definitions_are_indexed_by_key(self) -> None:
+        existing = [{"Key": "hp", "GateDataType": 2, "SerializedValue": "1"}]
+        modules = [
+            {"type": "variable", "key": "hp", "gateDataType": "Number", "value": 5.0},
+            {"type": "variable", "key": "hp", "gateDataType": "Number", "value": None},
+            {"type": "variable", "key": "mp", "gateDataType": "Number", "value": 2.0},
+            {"type": "variable", "key": "mp", "gateDataType": "Number", "value": None},
+        ]
+        game_data, created = self._add(modules, existing)
+        self.assertEqual(len(created), 4)
+        variables = _section(game_data, "chip_variables")
+        self.assertEqual([v["Key"] for v in variables], ["hp", "mp"])
+        self.assertNotEqual(variables[0]["SerializedValue"], "1")
+
+
+if __name__ == "__main__":
+    unittest.main()
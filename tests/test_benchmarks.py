@@ -0,0 +1,61 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from benchmarks.generators import SHAPES, generate
+from benchmarks.run import CaseResult, compare_to_baseline, load_baseline, run_benchmarks, save_baseline
+from src.converter.api import convert_dsl_to_graph_dict
+from src.module_catalog import ModuleCatalog
+
+
+class TestBenchmarkGenerators(unittest.TestCase):
+    def test_every_shape_converts_and_scales(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            for shape in SHAPES:
+                with self.subTest(shape=shape):
+                    counts = []
+                    for n in (10, 100):
+                        path = Path(tmp) / f"{shape}_{n}.py"
+                        path.write_text(generate(shape, n), encoding="utf-8")
+                        counts.append(len(convert_dsl_to_graph_dict(path)["nodes"]))
+                    self.assertEqual(generate(shape, 100), generate(shape, 100))
+                    self.assertGreater(counts[1], counts[0] * 5)
+
+    def test_unknown_shape(self) -> None:
+        with self.assertRaises(ValueError):
+            generate("nope", 10)
+
+
+class TestBenchmarkBaseline(unittest.TestCase):
+    def test_small_run_and_regression_check(self) -> None:
+        catalog = ModuleCatalog.load(cache_dir=None)
+        results, skipped = run_benchmarks(["deep_chain"], [10], repeat=1, catalog=catalog)
+        self.assertEqual(skipped, [])
+        (result,) = results
+        self.assertGreater(result.nodes, 0)
+        self.assertIn("layout", result.stages)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "baseline.json"
+            save_baseline(path, results)
+            baseline = load_baseline(path)
+        self.assertEqual(compare_to_baseline(results, baseline), [])
+
+        slow = CaseResult(
+            result.shape,
+            result.size,
+            result.nodes,
+            {name: t * 3 + 0.1 for name, t in result.stages.items()},
+        )
+        regressions = compare_to_baseline([slow], baseline)
+        self.assertEqual({r.stage for r in regressions}, set(result.stages))
+
+    def test_budget_skips_larger_sizes(self) -> None:
+        catalog = ModuleCatalog.load(cache_dir=None)
+        results, skipped = run_benchmarks(["fan_in"], [10, 100000], repeat=1, budget=1e-9, catalog=catalog)
+        self.assertEqual([r.key for r in results], ["fan_in/10"])
+        self.assertEqual(skipped, ["fan_in/100000"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+import os
+import tempfile
+import unittest
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import redirect_stdout
+from io import StringIO
+from pathlib import Path
+
+from archive_creator import run_archive_creation_stage
+from src.build_context import BuildContext
+from src.module_catalog import ModuleCatalog
+from src.pipeline import build_save_document
+from src.utils import load_json
+
+ROOT = Path(__file__).resolve().parents[1]
+
+DSL = """\
+a = INPUT("A", "Number")
+
+if __name__ == "__main__":
+    OUTPUT(ADD(a, {k}), "Out{k}")
+"""
+
+
+class TestBuildContext(unittest.TestCase):
+    def test_derived_paths_follow_output_dir(self) -> None:
+        ctx = BuildContext.for_output_dir("/tmp/build-a", layout_cache=True)
+        self.assertEqual(ctx.graph_path, Path("/tmp/build-a/graph.json"))
+        self.assertEqual(ctx.final_save_path, Path("/tmp/build-a/ungraph.json"))
+        self.assertEqual(ctx.layout_cache_path.parent, Path("/tmp/build-a/.cache"))
+        self.assertIsNone(ctx.replace(layout_cache=False).layout_cache_path)
+        self.assertEqual(BuildContext().metadata_path, ROOT / "MetaData")
+
+    def test_concurrent_builds_do_not_share_files(self) -> None:
+        catalog = ModuleCatalog.load(cache_dir=None)
+        rules = load_json(ROOT / "data_type_rules.json", "数据类型规则文件")
+        cwd = os.getcwd()
+        with tempfile.TemporaryDirectory() as tmp:
+            tmp_path = Path(tmp)
+
+            def build(k: int) -> Path:
+                dsl = tmp_path / f"design{k}.py"
+                dsl.write_text(DSL.format(k=k), encoding="utf-8")
+                ctx = BuildContext.for_output_dir(
+                    tmp_path / f"out{k}",
+                    dsl_path=dsl,
+                    data_path=ROOT / "Data.json",
+                    debug_artifacts=True,
+                    melsave_name=f"design{k}",
+                )
+                save = build_save_document(ctx, catalog, rules)
+                self.assertTrue(run_archive_creation_stage(save.flush(), ctx))
+                return ctx.output_dir
+
+            # MetaData / Icon 按项目根目录查找，与当前工作目录无关
+            os.chdir(tmp)
+            try:
+                with redirect_stdout(StringIO()), ThreadPoolExecutor(max_workers=4) as pool:
+                    out_dirs = list(pool.map(build, range(4)))
+            finally:
+                os.chdir(cwd)
+
+            for k, out_dir in enumerate(out_dirs):
+                graph = load_json(out_dir / "graph.json", "graph")
+                self.assertIn(f"Out{k}", str(graph))
+                self.assertTrue((out_dir / "ungraph.json").exists())
+                with zipfile.ZipFile(out_dir / f"design{k}.melsave") as zf:
+                    self.assertEqual(sorted(zf.namelist()), ["Data", "Icon", "MetaData"])
+
+
+if __name__ == "__main__":
+    unittest.main()
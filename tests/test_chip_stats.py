@@ -0,0 +1,71 @@
+import ast
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from src.chip_stats import analyze_chip, load_chip_graph
+from src.converter.dedup_converter import DedupConverter
+from src.module_catalog import ModuleCatalog
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def _graph(code: str) -> dict:
+    cvt = DedupConverter()
+    cvt.visit(ast.parse(code))
+    cvt.resolve_unresolved()
+    cvt.finalize_outputs()
+    return cvt.g.to_dict()
+
+
+class TestChipStats(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.catalog = ModuleCatalog.load(cache_dir=None)
+
+    def test_converter_graph(self) -> None:
+        g = _graph(
+            """\
+a = INPUT("A", "Number")
+b = INPUT("B", "Number")
+
+if __name__ == "__main__":
+    s = a + b
+    OUTPUT(ToString(s * s + a), "T")
+    OUTPUT(s, "S")
+"""
+        )
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "graph.json"
+            path.write_text(json.dumps(g), encoding="utf-8")
+            chip = load_chip_graph(path, self.catalog)
+        stats = analyze_chip(chip, costs={"ToString": 10.0}, top=1, tps=60)
+
+        counts = {item["module"]: item["count"] for item in stats.gates_by_type}
+        self.assertEqual(counts["Add"], 2)
+        self.assertEqual(counts["Multiply"], 1)
+        self.assertEqual(counts["ToString"], 1)
+        # Input -> Add -> Multiply -> Add -> ToString -> Output
+        self.assertEqual(stats.depth, 6)
+        self.assertEqual(
+            [item["module"] for item in stats.critical_path],
+            ["Input", "Add", "Multiply", "Add", "ToString", "Output"],
+        )
+        self.assertEqual(stats.fan_out[0]["module"], "Add")
+        self.assertEqual(stats.fan_out[0]["fan_out"], 3)
+        self.assertEqual(stats.cost_per_tick, 2 + 1 + 10)
+        self.assertEqual(stats.cost_per_second, 13 * 60)
+        json.dumps(stats.to_dict())
+
+    def test_save_chip_graph(self) -> None:
+        chip = load_chip_graph(ROOT / "ungraph.json", self.catalog)
+        stats = analyze_chip(chip)
+        self.assertEqual(stats.node_count, len(chip.node_ids))
+        self.assertEqual(sum(item["count"] for item in stats.gates_by_type), stats.node_count)
+        self.assertEqual(stats.chip_tps, 240)
+        self.assertGreaterEqual(stats.depth, stats.layout_columns)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+import json
+import tempfile
+import unittest
+import zipfile
+from pathlib import Path
+
+from src.build_context import BuildContext
+from src.compile_many import (
+    EXIT_FAILED,
+    EXIT_OK,
+    compile_many,
+    discover_sources,
+    plan_jobs,
+    write_summary,
+)
+from src.module_catalog import ModuleCatalog
+
+ROOT = Path(__file__).resolve().parents[1]
+
+GOOD = """\
+a = INPUT("A", "Number")
+b = INPUT("B", "Number")
+
+if __name__ == "__main__":
+    OUTPUT(ADD(a, b), "Sum")
+"""
+
+BAD = """\
+a = INPUT("A", "Number")
+
+if __name__ == "__main__":
+    OUTPUT(a +, "Broken")
+"""
+
+
+class TestCompileMany(unittest.TestCase):
+    def test_discover_and_unique_job_names(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            tmp_path = Path(tmp)
+            (tmp_path / "sub").mkdir()
+            for rel in ("x.py", "y.py", "sub/x.py", "sub/x_2.py"):
+                (tmp_path / rel).write_text(GOOD, encoding="utf-8")
+            sources = discover_sources([str(tmp_path), str(tmp_path / "**" / "*.py")])
+            self.assertEqual(len(sources), 4)
+            jobs = plan_jobs(sources, tmp_path / "out")
+            self.assertEqual([j.name for j in jobs], ["x", "y", "x_2", "x_2_2"])
+            self.assertEqual(len({j.out_dir for j in jobs}), 4)
+            # 后缀名与真实文件名冲突时继续递增，而不是复用
+            jobs = plan_jobs([Path("a/x.py"), Path("c/x_2.py"), Path("b/x.py"), Path("d/X.py")], tmp_path / "out")
+            self.assertEqual([j.name for j in jobs], ["x", "x_2", "x_3", "X_4"])
+
+    def test_parallel_jobs_report_their_own_status(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            tmp_path = Path(tmp)
+            (tmp_path / "good.py").write_text(GOOD, encoding="utf-8")
+            (tmp_path / "bad.py").write_text(BAD, encoding="utf-8")
+            out_root = tmp_path / "out"
+            jobs = plan_jobs(discover_sources([str(tmp_path)]), out_root)
+
+            results = compile_many(
+                jobs,
+                workers=2,
+                base_ctx=BuildContext(data_path=ROOT / "Data.json"),
+                catalog=ModuleCatalog.load(cache_dir=None),
+            )
+            by_name = {r.name: r for r in results}
+            self.assertEqual(by_name["good"].exit_code, EXIT_OK)
+            self.assertEqual(by_name["bad"].exit_code, EXIT_FAILED)
+            self.assertIn("line 4", by_name["bad"].error)
+
+            with zipfile.ZipFile(by_name["good"].melsave) as zf:
+                self.assertIn("Data", zf.namelist())
+            self.assertTrue((out_root / "bad" / "build.log").read_text(encoding="utf-8"))
+
+            summary = json.loads(write_summary(results, out_root).read_text(encoding="utf-8"))
+            self.assertEqual(summary["failed"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,123 @@
+import asyncio
+import base64
+import io
+import json
+import tempfile
+import unittest
+import urllib.request
+import zipfile
+from pathlib import Path
+
+from src.build_context import BuildContext
+from src.compile_server import (
+    COMPILE_FAILED,
+    INVALID_PARAMS,
+    METHOD_NOT_FOUND,
+    PARSE_ERROR,
+    CompileServer,
+    call,
+    layout_nodes,
+)
+from src.error_handler import CompileServerError
+from src.module_catalog import ModuleCatalog
+
+ROOT = Path(__file__).resolve().parents[1]
+
+GOOD = """\
+a = INPUT("A", "Number")
+b = INPUT("B", "Number")
+
+if __name__ == "__main__":
+    OUTPUT(ADD(a, b), "Sum")
+"""
+
+BAD = """\
+a = INPUT("A", "Number")
+
+if __name__ == "__main__":
+    OUTPUT(a +, "Broken")
+"""
+
+
+class TestCompileServer(unittest.TestCase):
+    def test_compile_check_layout_over_http(self) -> None:
+        async def scenario(tmp: Path) -> None:
+            server = CompileServer(
+                BuildContext.for_output_dir(tmp, data_path=ROOT / "Data.json"),
+                workers=1,
+                catalog=ModuleCatalog.load(cache_dir=None),
+            )
+            await server.start(port=0)
+            url = server.address
+            loop = asyncio.get_running_loop()
+
+            def rpc(method, params):
+                return loop.run_in_executor(None, lambda: call(method, params, url=url, timeout=60))
+
+            try:
+                compiled = await rpc("compile", {"source": GOOD, "name": "demo"})
+                data = base64.b64decode(compiled["melsave"])
+                self.assertEqual(len(data), compiled["size"])
+                with zipfile.ZipFile(io.BytesIO(data)) as zf:
+                    self.assertIn("Data", zf.namelist())
+
+                checked = await rpc("check", {"source": BAD})
+                self.assertFalse(checked["ok"])
+                self.assertEqual(checked["diagnostics"][0]["line"], 4)
+                self.assertTrue((await rpc("check", {"source": GOOD}))["ok"])
+
+                with self.assertRaises(CompileServerError) as caught:
+                    await rpc("compile", {"source": BAD})
+                self.assertEqual(caught.exception.context["code"], COMPILE_FAILED)
+                self.assertTrue(caught.exception.context["data"]["diagnostics"])
+
+                graph = {
+                    "nodes": [{"id": "a", "type": "INPUT"}, {"id": "b", "type": "Add"}],
+                    "edges": [{"from_node": "a", "to_node": "b"}],
+                }
+                positions = (await rpc("layout", {"graph": graph}))["positions"]
+                self.assertEqual(set(positions), {"a", "b"})
+                self.assertLess(positions["a"]["x"], positions["b"]["x"])
+
+                for method, params, code in (
+                    ("nope", {}, METHOD_NOT_FOUND),
+                    ("compile", {}, INVALID_PARAMS),
+                    ("check", {"source": GOOD, "options": {"inline": True}}, INVALID_PARAMS),
+                    ("layout", {"graph": [1, 2]}, INVALID_PARAMS),
+                ):
+                    with self.assertRaises(CompileServerError) as caught:
+                        await rpc(method, params)
+                    self.assertEqual(caught.exception.context["code"], code)
+
+                health = await loop.run_in_executor(
+                    None, lambda: json.loads(urllib.request.urlopen(url + "health", timeout=10).read())
+                )
+                self.assertEqual(health["status"], "ok")
+            finally:
+                await server.close()
+
+        with tempfile.TemporaryDirectory() as tmp:
+            asyncio.run(scenario(Path(tmp)))
+
+    def test_batch_and_notifications(self) -> None:
+        server = CompileServer(workers=1)
+        body = json.dumps(
+            [
+                {"jsonrpc": "2.0", "id": 1, "method": "missing"},
+                {"jsonrpc": "2.0", "method": "missing"},
+                {"id": 2},
+            ]
+        ).encode("utf-8")
+        replies = asyncio.run(server.handle_rpc(body))
+        self.assertEqual([r["id"] for r in replies], [1, None])
+        self.assertEqual(asyncio.run(server.handle_rpc(b"{"))["error"]["code"], PARSE_ERROR)
+
+    def test_layout_nodes_accepts_chip_graph(self) -> None:
+        nodes = [{"Id": "x", "Inputs": []}]
+        self.assertIs(layout_nodes({"Nodes": nodes}), nodes)
+        with self.assertRaises(CompileServerError):
+            layout_nodes({"Nodes": [{"id": "x"}]})
+
+
+if __name__ == "__main__":
+    unittest.main()
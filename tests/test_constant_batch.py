@@ -0,0 +1,85 @@
+import io
+import json
+import unittest
+from contextlib import redirect_stdout
+
+from constantvalue import apply_constant_modifications
+
+
+def _make_game_data_with_chip_graph(nodes):
+    return {
+        "saveObjectContainers": [
+            {
+                "saveObjects": {
+                    "saveMetaDatas": [
+                        {
+                            "key": "chip_graph",
+                            "stringValue": json.dumps({"Nodes": nodes}, separators=(",", ":")),
+                        }
+                    ],
+                    "mechanicData": [],
+                }
+            }
+        ]
+    }
+
+
+def _constant_node(node_id):
+    return {
+        "Id": node_id,
+        "OperationType": 257,
+        "GateDataType": 2,
+        "Inputs": [],
+        "Outputs": [{"DataType": 2}],
+        "SaveData": json.dumps({"DataValue": "0.0"}, separators=(",", ":")),
+    }
+
+
+class TestConstantBatch(unittest.TestCase):
+    def test_batch_applies_every_instruction_and_keeps_schema(self) -> None:
+        ids = [f"ConstantNodeViewModel : uuid-{i}" for i in range(200)]
+        game_data = _make_game_data_with_chip_graph([_constant_node(i) for i in ids])
+        instructions = [
+            {"node_id": node_id, "new_value": [float(i)] * 64, "value_type": "array_number"}
+            for i, node_id in enumerate(ids)
+        ]
+        # 旧接口兼容：只给出 Id 片段时按子串匹配
+        instructions.append({"node_id": "uuid-7", "new_value": "seven", "value_type": "string"})
+
+        buf = io.StringIO()
+        with redirect_stdout(buf):
+            updated = apply_constant_modifications(game_data, instructions)
+
+        # 默认日志级别只输出汇总，不打印大数组
+        self.assertEqual(buf.getvalue().strip().splitlines(), ["常量修改完成: 201/201 个成功。"])
+
+        nodes = json.loads(
+            updated["saveObjectContainers"][0]["saveObjects"]["saveMetaDatas"][0]["stringValue"]
+        )["Nodes"]
+        self.assertEqual(nodes[3]["GateDataType"], 128)
+        self.assertEqual(json.loads(json.loads(nodes[3]["SaveData"])["DataValue"]), [3.0] * 64)
+        self.assertEqual(nodes[7]["GateDataType"], 4)
+        self.assertEqual(json.loads(nodes[7]["SaveData"])["DataValue"], "seven")
+
+    def test_verbose_logging_truncates_arrays_unless_full(self) -> None:
+        node_id = "ConstantNodeViewModel : big"
+        instructions = [{"node_id": node_id, "new_value": list(range(1000)), "value_type": "array_number"}]
+
+        buf = io.StringIO()
+        with redirect_stdout(buf):
+            apply_constant_modifications(
+                _make_game_data_with_chip_graph([_constant_node(node_id)]), instructions, verbosity=1
+            )
+        self.assertIn("<1000 个元素>", buf.getvalue())
+        self.assertNotIn("999", buf.getvalue())
+
+        buf = io.StringIO()
+        with redirect_stdout(buf):
+            apply_constant_modifications(
+                _make_game_data_with_chip_graph([_constant_node(node_id)]), instructions, verbosity=2
+            )
+        self.assertIn("999", buf.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()
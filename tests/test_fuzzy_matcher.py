@@ -0,0 +1,62 @@
+import random
+import unittest
+from difflib import get_close_matches
+
+from src.config import FUZZY_CUTOFF_NODE, FUZZY_CUTOFF_PORT
+from src.fuzzy import FuzzyMatcher, get_matcher, match_port_position
+from src.module_catalog import load_module_catalog
+from src.utils import normalize
+
+
+class TestFuzzyMatcher(unittest.TestCase):
+    def test_matches_difflib_on_chip_keys(self) -> None:
+        keys = list(load_module_catalog().chip_index.keys())
+        matcher = FuzzyMatcher(keys)
+        rng = random.Random(1234)
+        queries = list(keys)
+        for _ in range(300):
+            base = rng.choice(keys)
+            chars = list(base)
+            for _ in range(rng.randint(1, 4)):
+                op = rng.randrange(3)
+                pos = rng.randrange(len(chars) + 1)
+                if op == 0:
+                    chars.insert(pos, rng.choice("abcdefghijklmnopqrstuvwxyz0123456789"))
+                elif chars and op == 1:
+                    del chars[min(pos, len(chars) - 1)]
+                elif chars:
+                    chars[min(pos, len(chars) - 1)] = rng.choice("aeiouxyz")
+            queries.append("".join(chars))
+        for q in queries:
+            for cutoff in (FUZZY_CUTOFF_NODE, 0.6, 0.9):
+                expected = (get_close_matches(q, keys, n=1, cutoff=cutoff) or [None])[0]
+                self.assertEqual(matcher.match(q, cutoff), expected, (q, cutoff))
+
+    def test_tie_breaks_like_difflib(self) -> None:
+        candidates = ["abx", "aby", "abz"]
+        self.assertEqual(FuzzyMatcher(candidates).match("ab", 0.1), "abz")
+        self.assertEqual(get_close_matches("ab", candidates, n=1, cutoff=0.1), ["abz"])
+
+    def test_normalized_hit_and_cache(self) -> None:
+        matcher = get_matcher(("arrays get", "add"))
+        self.assertIs(matcher, get_matcher(("arrays get", "add")))
+        self.assertEqual(matcher.match("ArraysGet", 0.9), "arrays get")
+        self.assertIsNone(matcher.match("zzzz", 0.9))
+        self.assertIn(("zzzz", 0.9), matcher._cache)
+
+    def test_port_position(self) -> None:
+        ports = ["If", "A", "B"]
+        self.assertEqual(match_port_position("b", ports, FUZZY_CUTOFF_PORT), 2)
+        self.assertEqual(match_port_position("if", ports, FUZZY_CUTOFF_PORT), 0)
+        dup = ["Value", "value"]
+        self.assertEqual(match_port_position("VALUE", dup, FUZZY_CUTOFF_PORT), 0)
+        self.assertIsNone(match_port_position("xyz", ["Dividend", "Divider"], FUZZY_CUTOFF_PORT))
+        normalized = [normalize(p) for p in ["Dividend", "Divider"]]
+        self.assertEqual(
+            match_port_position("divdr", ["Dividend", "Divider"], FUZZY_CUTOFF_PORT),
+            normalized.index(get_close_matches("divdr", normalized, n=1, cutoff=FUZZY_CUTOFF_PORT)[0]),
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
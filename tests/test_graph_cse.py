@@ -0,0 +1,96 @@
+import ast
+import unittest
+
+from src.converter.dedup_converter import DedupConverter
+from src.graph_passes import eliminate_common_subexpressions
+from src.module_catalog import ModuleCatalog
+
+
+def _graph(code: str) -> dict:
+    cvt = DedupConverter()
+    cvt.visit(ast.parse(code))
+    cvt.resolve_unresolved()
+    cvt.finalize_outputs()
+    return cvt.g.to_dict()
+
+
+def _types(graph: dict) -> list:
+    return sorted(n["type"] for n in graph["nodes"])
+
+
+class TestGraphCSE(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.catalog = ModuleCatalog.load(cache_dir=None)
+
+    def test_duplicate_chains_collapse(self) -> None:
+        g = _graph(
+            """\
+a = INPUT("A", "Number")
+b = INPUT("B", "Number")
+v = INPUT("V", "Vector")
+
+if __name__ == "__main__":
+    t1 = ToString(a + b)
+    t2 = ToString(a + b)
+    p = Split(v)
+    q = Split(v)
+    OUTPUT(t1, "T1")
+    OUTPUT(t2, "T2")
+    OUTPUT(p["X"] + q["Y"], "XY")
+"""
+        )
+        report = eliminate_common_subexpressions(g, self.catalog)
+
+        self.assertEqual(len(report.removed_nodes), 3)
+        self.assertEqual(_types(g).count("ToString"), 1)
+        self.assertEqual(_types(g).count("Split"), 1)
+        node_ids = {n["id"] for n in g["nodes"]}
+        for e in g["edges"]:
+            self.assertIn(e["from_node"], node_ids)
+            self.assertIn(e["to_node"], node_ids)
+        split = next(n for n in g["nodes"] if n["type"] == "Split")
+        self.assertEqual([p["name"] for p in split["outputs"]], ["X", "Y"])
+        # 两个 OUTPUT 都接到同一个 ToString 上
+        tostring_id = next(n["id"] for n in g["nodes"] if n["type"] == "ToString")
+        sources = [e["from_node"] for e in g["edges"] if e["to_node"].startswith("output_")]
+        self.assertEqual(sources.count(tostring_id), 2)
+
+    def test_commutative_inputs_only_for_commutative_modules(self) -> None:
+        g = _graph(
+            """\
+a = INPUT("A", "Number")
+b = INPUT("B", "Number")
+
+if __name__ == "__main__":
+    OUTPUT(a == b, "E1")
+    OUTPUT(b == a, "E2")
+    OUTPUT(a - b, "S1")
+    OUTPUT(b - a, "S2")
+"""
+        )
+        eliminate_common_subexpressions(g, self.catalog)
+        self.assertEqual(_types(g).count("EQUAL"), 1)
+        self.assertEqual(_types(g).count("Subtract"), 2)
+
+    def test_side_effecting_nodes_are_kept(self) -> None:
+        g = _graph(
+            """\
+a = INPUT("A", "Number")
+b = INPUT("B", "Number")
+x: Number = 0
+
+if __name__ == "__main__":
+    OUTPUT(Random(a, b) + Random(a, b), "R")
+    OUTPUT(x, "X1")
+    OUTPUT(x, "X2")
+"""
+        )
+        before = _types(g)
+        report = eliminate_common_subexpressions(g, self.catalog)
+        self.assertEqual(report.removed_nodes, [])
+        self.assertEqual(_types(g), before)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+import ast
+import unittest
+
+from src.converter.dedup_converter import DedupConverter
+from src.graph_passes import eliminate_dead_nodes
+from src.module_catalog import ModuleCatalog
+
+
+def _graph(code: str) -> dict:
+    cvt = DedupConverter()
+    cvt.visit(ast.parse(code))
+    cvt.resolve_unresolved()
+    cvt.finalize_outputs()
+    return cvt.g.to_dict()
+
+
+def _types(graph: dict) -> list:
+    return sorted(n["type"] for n in graph["nodes"])
+
+
+class TestGraphDCE(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.catalog = ModuleCatalog.load(cache_dir=None)
+
+    def test_unused_helpers_are_removed(self) -> None:
+        g = _graph(
+            """\
+a = INPUT("A", "Number")
+
+if __name__ == "__main__":
+    dead = ToString(a * 3 + Random(0, 1))
+    OUTPUT(a + 1, "S")
+"""
+        )
+        report = eliminate_dead_nodes(g, self.catalog)
+
+        self.assertEqual(_types(g), ["Add", "Constant", "INPUT", "OUTPUT"])
+        # 常量 1 同时被 a + 1 使用（DedupConverter 去重），因此只删掉 3 与 0
+        removed_types = sorted(item["type"] for item in report.details["removed"])
+        self.assertEqual(
+            removed_types,
+            ["Add", "Constant", "Constant", "Multiply", "Random", "ToString"],
+        )
+        node_ids = {n["id"] for n in g["nodes"]}
+        for e in g["edges"]:
+            self.assertIn(e["from_node"], node_ids)
+            self.assertIn(e["to_node"], node_ids)
+
+    def test_variable_writes_and_side_effects_are_roots(self) -> None:
+        g = _graph(
+            """\
+a = INPUT("A", "Number")
+hp: Number = 0
+
+if __name__ == "__main__":
+    hp = hp + a * 2
+"""
+        )
+        before = _types(g)
+        report = eliminate_dead_nodes(g, self.catalog)
+        self.assertEqual(report.removed_nodes, [])
+        self.assertEqual(_types(g), before)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,129 @@
+import ast
+import unittest
+
+from src.converter.dedup_converter import DedupConverter
+from src.graph_passes import fold_constants
+from src.graph_passes.fold import evaluate
+from src.module_catalog import ModuleCatalog
+
+
+def _graph(code: str) -> dict:
+    cvt = DedupConverter()
+    cvt.visit(ast.parse(code))
+    cvt.resolve_unresolved()
+    cvt.finalize_outputs()
+    return cvt.g.to_dict()
+
+
+def _output_values(graph: dict) -> dict:
+    """OUTPUT 名称 -> 上游常量值（上游不是常量时为 None）。"""
+    nodes = {n["id"]: n for n in graph["nodes"]}
+    out = {}
+    for e in graph["edges"]:
+        dst = nodes[e["to_node"]]
+        if dst["type"] != "OUTPUT":
+            continue
+        src = nodes[e["from_node"]]
+        out[dst["attrs"]["name"]] = src["attrs"].get("value") if src["type"] == "Constant" else None
+    return out
+
+
+class TestGraphFold(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.catalog = ModuleCatalog.load(cache_dir=None)
+
+    def test_constant_subtrees_collapse(self) -> None:
+        g = _graph(
+            """\
+a = INPUT("A", "Number")
+K: Final[Number] = 4
+
+if __name__ == "__main__":
+    OUTPUT((2 + 3) * K, "Scaled")
+    OUTPUT(7 % -3, "M1")
+    OUTPUT(-7 % 3, "M2")
+    OUTPUT(2 > 1 and not 0, "Flag")
+    OUTPUT("ab" + "cd", "S")
+    OUTPUT(a + 1, "Live")
+"""
+        )
+        report = fold_constants(g, self.catalog)
+
+        values = _output_values(g)
+        self.assertEqual(values["Scaled"], 20)
+        # 游戏的 Mod 为截断取余（符号跟随被除数），不是 Python 的 %
+        self.assertEqual(values["M1"], 1)
+        self.assertEqual(values["M2"], -1)
+        self.assertEqual(values["Flag"], 1.0)
+        self.assertEqual(values["S"], "abcd")
+        self.assertIsNone(values["Live"])
+        self.assertTrue(report.removed_nodes)
+
+        types = [n["type"] for n in g["nodes"]]
+        self.assertEqual(types.count("Add"), 1)  # 只剩 a + 1
+        self.assertNotIn("Multiply", types)
+        node_ids = {n["id"] for n in g["nodes"]}
+        for e in g["edges"]:
+            self.assertIn(e["from_node"], node_ids)
+            self.assertIn(e["to_node"], node_ids)
+        # 不再被使用的输入常量（2、3、K=4 等）随之删除，剩余常量都有下游
+        used = {e["from_node"] for e in g["edges"]}
+        for n in g["nodes"]:
+            if n["type"] == "Constant":
+                self.assertIn(n["id"], used)
+
+    def test_folded_value_reuses_existing_constant(self) -> None:
+        g = _graph(
+            """\
+a = INPUT("A", "Number")
+
+if __name__ == "__main__":
+    OUTPUT(a + 5, "X")
+    OUTPUT(2 + 3, "Y")
+"""
+        )
+        five = next(n["id"] for n in g["nodes"] if n["type"] == "Constant" and n["attrs"]["value"] == 5)
+        fold_constants(g, self.catalog)
+        fives = [n for n in g["nodes"] if n["type"] == "Constant" and n["attrs"].get("value") == 5]
+        self.assertEqual([n["id"] for n in fives], [five])
+
+    def test_unsafe_operations_are_not_folded(self) -> None:
+        for module, args in [
+            ("Divide", [1, 0]),
+            ("Remainder", [1, 0]),
+            ("Sqrt", [-1]),
+            ("Log", [8, 1]),
+            ("Equal", [1.0, 1.0000001]),
+            ("Add", ["a", 1]),
+            ("Random", [0, 1]),
+        ]:
+            with self.subTest(module=module):
+                with self.assertRaises(Exception):
+                    evaluate(module, args)
+        self.assertEqual(evaluate("Round", [2.5]), 2.0)
+        self.assertEqual(evaluate("Equal", [1.0, 2.0]), 0.0)
+
+    def test_near_ordered_comparison_is_left_to_runtime(self) -> None:
+        # 双精度下 0.1 + 0.2 > 0.3 为真，游戏的单精度结果为假
+        g = _graph(
+            """\
+if __name__ == "__main__":
+    OUTPUT(0.1 + 0.2 > 0.3, "Near")
+    OUTPUT(0.5 + 0.25 <= 0.75, "Exact")
+    OUTPUT(3 > 2, "Far")
+"""
+        )
+        fold_constants(g, self.catalog)
+        values = _output_values(g)
+        self.assertIsNone(values["Near"])
+        self.assertIsNone(values["Exact"])
+        self.assertEqual(values["Far"], 1.0)
+        for module in ("Greater", "Less", "GreaterOrEqual", "LessOrEqual"):
+            with self.subTest(module=module):
+                with self.assertRaises(Exception):
+                    evaluate(module, [0.30000000000000004, 0.3])
+
+
+if __name__ == "__main__":
+    unittest.main()
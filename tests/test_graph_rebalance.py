@@ -0,0 +1,89 @@
+import ast
+import unittest
+
+from src.converter.dedup_converter import DedupConverter
+from src.graph_passes import rebalance_associative_chains
+from src.graph_passes.common import critical_path_depth
+from src.module_catalog import ModuleCatalog
+
+
+def _graph(code: str) -> dict:
+    cvt = DedupConverter()
+    cvt.visit(ast.parse(code))
+    cvt.resolve_unresolved()
+    cvt.finalize_outputs()
+    return cvt.g.to_dict()
+
+
+def _expr(graph: dict, output_name: str) -> str:
+    """把 OUTPUT 上游的表达式还原成带括号的字符串，用于检查操作数顺序与结合方式。"""
+    nodes = {n["id"]: n for n in graph["nodes"]}
+    incoming = {}
+    for e in graph["edges"]:
+        incoming.setdefault(e["to_node"], {})[e["to_port"]] = e["from_node"]
+
+    def show(nid: str) -> str:
+        node = nodes[nid]
+        if node["type"] == "INPUT":
+            return node["attrs"]["name"]
+        ports = incoming[nid]
+        return "(" + f" {node['type']} ".join(show(ports[p]) for p in sorted(ports)) + ")"
+
+    out = next(n["id"] for n in graph["nodes"] if n["type"] == "OUTPUT" and n["attrs"]["name"] == output_name)
+    return show(incoming[out]["0"])
+
+
+class TestGraphRebalance(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.catalog = ModuleCatalog.load(cache_dir=None)
+
+    def test_left_deep_chain_becomes_balanced(self) -> None:
+        g = _graph(
+            """\
+a = INPUT("A", "String")
+b = INPUT("B", "String")
+c = INPUT("C", "String")
+d = INPUT("D", "String")
+e = INPUT("E", "String")
+
+if __name__ == "__main__":
+    OUTPUT(a + b + c + d + e, "S")
+"""
+        )
+        node_count = len(g["nodes"])
+        report = rebalance_associative_chains(g, self.catalog)
+
+        self.assertEqual(report.details["chains"], 1)
+        self.assertEqual(report.details["depth_before"], 6)
+        self.assertEqual(report.details["depth_after"], 5)
+        self.assertEqual(critical_path_depth(g), 5)
+        self.assertEqual(len(g["nodes"]), node_count)
+        # 操作数顺序不变（字符串拼接仍是 a b c d e），只改变结合方式
+        self.assertEqual(_expr(g, "S"), "((A Add B) Add (C Add (D Add E)))")
+
+    def test_shared_intermediate_and_mixed_modules_stop_chain(self) -> None:
+        g = _graph(
+            """\
+a = INPUT("A", "Number")
+b = INPUT("B", "Number")
+c = INPUT("C", "Number")
+d = INPUT("D", "Number")
+
+if __name__ == "__main__":
+    ab = a + b
+    OUTPUT(ab, "AB")
+    OUTPUT(ab + c + d, "Sum")
+    OUTPUT(a * b - c * d, "Mixed")
+"""
+        )
+        before = _expr(g, "Sum"), _expr(g, "Mixed")
+        report = rebalance_associative_chains(g, self.catalog)
+        # ab 被两个地方使用，链只剩 (ab + c) + d 两层，已是最优
+        self.assertEqual(report.details["chains"], 0)
+        self.assertFalse(report.changed)
+        self.assertEqual((_expr(g, "Sum"), _expr(g, "Mixed")), before)
+
+
+if __name__ == "__main__":
+    unittest.main()
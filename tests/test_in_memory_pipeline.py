@@ -0,0 +1,92 @@
+import json
+import tempfile
+import unittest
+import zipfile
+from pathlib import Path
+
+from archive_creator import create_melsave_archive_from_data
+from batch_connect import apply_connections_to_data
+
+
+def _make_game_data_with_chip_graph(nodes):
+    return {
+        "saveObjectContainers": [
+            {
+                "saveObjects": {
+                    "saveMetaDatas": [
+                        {
+                            "key": "chip_graph",
+                            "stringValue": json.dumps({"Nodes": nodes}, separators=(",", ":")),
+                        }
+                    ],
+                    "mechanicData": [],
+                }
+            }
+        ]
+    }
+
+
+class TestInMemoryPipeline(unittest.TestCase):
+    def test_apply_connections_to_data_updates_chip_graph_in_place(self) -> None:
+        game_data = _make_game_data_with_chip_graph(
+            [
+                {
+                    "Id": "RootNodeViewModel : a",
+                    "Inputs": [],
+                    "Outputs": [{"Id": "a-out", "ConnectedInputsIds": []}],
+                },
+                {
+                    "Id": "ExitNodeViewModel : b",
+                    "Inputs": [{"Id": "b-in", "connectedOutputIdModel": None}],
+                    "Outputs": [],
+                },
+            ]
+        )
+
+        ok = apply_connections_to_data(
+            game_data,
+            [
+                {
+                    # 指令中的空格与存档不一致时也应匹配成功
+                    "from_node_id": "RootNodeViewModel:a",
+                    "from_port_index": 0,
+                    "to_node_id": "ExitNodeViewModel : b",
+                    "to_port_index": 0,
+                }
+            ],
+        )
+
+        self.assertTrue(ok)
+        nodes = json.loads(
+            game_data["saveObjectContainers"][0]["saveObjects"]["saveMetaDatas"][0]["stringValue"]
+        )["Nodes"]
+        self.assertEqual(
+            nodes[1]["Inputs"][0]["connectedOutputIdModel"],
+            {"Id": "a-out", "NodeId": "RootNodeViewModel : a"},
+        )
+        self.assertEqual(
+            nodes[0]["Outputs"][0]["ConnectedInputsIds"],
+            [{"Id": "b-in", "NodeId": "ExitNodeViewModel : b"}],
+        )
+
+    def test_archive_from_data_writes_data_entry_without_ungraph_file(self) -> None:
+        game_data = _make_game_data_with_chip_graph([])
+        with tempfile.TemporaryDirectory() as tmp:
+            tmp_dir = Path(tmp)
+            (tmp_dir / "MetaData").write_bytes(b"meta")
+            (tmp_dir / "Icon").write_bytes(b"icon")
+            out_path = tmp_dir / "out.melsave"
+
+            ok = create_melsave_archive_from_data(
+                game_data, tmp_dir / "MetaData", tmp_dir / "Icon", out_path
+            )
+
+            self.assertTrue(ok)
+            self.assertFalse((tmp_dir / "ungraph.json").exists())
+            with zipfile.ZipFile(out_path) as zf:
+                self.assertEqual(sorted(zf.namelist()), ["Data", "Icon", "MetaData"])
+                self.assertEqual(json.loads(zf.read("Data")), game_data)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from src.converter.api import convert_dsl_to_graph_dict
+from src.converter.incremental import IncrementalConverter
+from src.error_handler import DSLError
+
+STEPS = 60
+
+
+def _design(values=None, extra="", steps=STEPS) -> str:
+    values = values or {}
+    lines = ['a = INPUT("A", "Number")', 'b = INPUT("B", "Number")', "", 'if __name__ == "__main__":', "    x0 = ADD(a, b)"]
+    for k in range(1, steps):
+        lines.append(f"    x{k} = ADD(x{k - 1}, {values.get(k, k)})")
+        if k == steps // 2 and extra:
+            lines.append(f"    {extra}")
+    lines.append(f'    OUTPUT(x{steps - 1}, "Result")')
+    return "\n".join(lines) + "\n"
+
+
+def _dump(graph: dict) -> str:
+    return json.dumps(graph, sort_keys=True)
+
+
+class TestIncrementalConverter(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.dsl = Path(self._tmp.name) / "input.py"
+        self.converter = IncrementalConverter(min_interval=4)
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+
+    def _convert(self, source: str) -> dict:
+        self.dsl.write_text(source, encoding="utf-8")
+        graph = self.converter.convert(self.dsl)
+        self.assertEqual(_dump(graph), _dump(convert_dsl_to_graph_dict(self.dsl)))
+        return graph
+
+    def test_edits_match_full_conversion(self) -> None:
+        sources = [
+            _design(),
+            _design({50: 7}),                                   # 后部常量
+            _design({50: 7}, extra="y = MULTIPLY(x3, 2)"),      # 中部插入语句
+            _design({50: 7, 5: 9}, extra="y = MULTIPLY(x3, 2)"),  # 前部常量
+            _design({50: 7, 5: 9}),                             # 删除语句
+            _design({50: 7, 5: 9}),                             # 没有变化
+            _design({50: 7, 5: 9}, steps=40),                   # 截短
+            _design(),
+        ]
+        for source in sources:
+            self._convert(source)
+        self.assertGreater(self.converter.stats.reused, 0)
+
+    def test_late_edit_reuses_prefix_with_stable_ids(self) -> None:
+        before = self._convert(_design())
+        self.assertEqual(self.converter.stats.reused, 0)
+
+        after = self._convert(_design({55: 0.5}))
+        stats = self.converter.stats
+        self.assertEqual(stats.first_changed_line, 5 + 55)
+        self.assertGreater(stats.reused, STEPS // 2)
+        self.assertLess(stats.visited, STEPS // 2)
+        # 节点 ID 不变，只有被修改的常量节点内容不同
+        self.assertEqual([n["id"] for n in before["nodes"]], [n["id"] for n in after["nodes"]])
+        changed = [old["id"] for old, new in zip(before["nodes"], after["nodes"]) if old != new]
+        self.assertEqual(len(changed), 1)
+        self.assertEqual(before["edges"], after["edges"])
+
+        self._convert(_design({55: 0.5}))
+        self.assertIsNone(self.converter.stats.first_changed_line)
+        self.assertEqual(self.converter.stats.reused, self.converter.stats.statements - self.converter.stats.visited)
+
+    def test_syntax_error_keeps_cache(self) -> None:
+        self._convert(_design())
+        self.dsl.write_text(_design() + "    OUTPUT(x1 +, 'Broken')\n", encoding="utf-8")
+        with self.assertRaises(DSLError):
+            self.converter.convert(self.dsl)
+        self._convert(_design({58: 3}))
+        self.assertGreater(self.converter.stats.reused, STEPS // 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
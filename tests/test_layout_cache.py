@@ -0,0 +1,104 @@
+import io
+import shutil
+import tempfile
+import unittest
+import uuid
+from contextlib import redirect_stdout
+from pathlib import Path
+from unittest import mock
+
+import layout_chip
+from src.layout_cache import LayoutCache, layout_signature
+
+
+def _chain_nodes(op_types, extra_edges=()):
+    """按顺序串联的节点（i-1 -> i），每次调用生成新的随机 Id。"""
+    ids = [f"{op} : {uuid.uuid4()}" for op in op_types]
+    nodes = []
+    for i, (nid, op) in enumerate(zip(ids, op_types)):
+        inputs = []
+        if i > 0:
+            inputs.append({"connectedOutputIdModel": {"NodeId": ids[i - 1]}})
+        for src, dst in extra_edges:
+            if dst == i:
+                inputs.append({"connectedOutputIdModel": {"NodeId": ids[src]}})
+        nodes.append({"Id": nid, "OperationType": op, "Inputs": inputs, "Outputs": []})
+    return nodes
+
+
+def _layout(nodes, seed_y=None):
+    with redirect_stdout(io.StringIO()):
+        return layout_chip.run_layout_engine(nodes, seed_y)
+
+
+class TestLayoutCache(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.tmp, ignore_errors=True)
+        self.cache_path = self.tmp / "layout_cache.pickle"
+
+    def test_signature_ignores_node_ids(self) -> None:
+        ops = ["Input", "Add", "Multiply", "Add", "Output"]
+        a = layout_signature(_chain_nodes(ops, [(0, 3)]))
+        b = layout_signature(_chain_nodes(ops, [(0, 3)]))
+        self.assertEqual(a, b)
+        c = layout_signature(_chain_nodes(ops, [(0, 4)]))
+        self.assertNotEqual(a.digest, c.digest)
+
+    def test_exact_hit_reuses_positions_across_processes(self) -> None:
+        ops = ["Input", "Add", "Multiply", "Add", "Output"]
+        first = _chain_nodes(ops, [(0, 3)])
+        positions = _layout(first)
+        LayoutCache(self.cache_path).store(layout_signature(first), first, positions)
+
+        rebuilt = _chain_nodes(ops, [(0, 3)])
+        cache = LayoutCache(self.cache_path)  # 重新从磁盘加载
+        with mock.patch.object(layout_chip, "run_layout_engine", side_effect=AssertionError("relayout")):
+            hit = cache.lookup(layout_signature(rebuilt), rebuilt)
+        self.assertEqual(
+            [hit[n["Id"]] for n in rebuilt],
+            [positions[n["Id"]] for n in first],
+        )
+
+    def test_changed_topology_returns_seed_for_matched_nodes(self) -> None:
+        ops = ["Input"] + ["Add"] * 30 + ["Output"]
+        old = _chain_nodes(ops)
+        cache = LayoutCache(self.cache_path)
+        cache.store(layout_signature(old), old, _layout(old))
+
+        # 在链中部多挂一个输出：只有附近几个节点的结构键会改变
+        new = _chain_nodes(ops + ["Output"], [(10, len(ops))])
+        sig = layout_signature(new)
+        self.assertIsNone(cache.lookup(sig, new))
+        seed = cache.seed(sig, new)
+        self.assertIsNotNone(seed)
+        self.assertGreaterEqual(len(seed), len(new) // 2)
+        self.assertTrue(set(seed) <= {n["Id"] for n in new})
+        self.assertEqual(len(_layout(new, seed)), len(new))
+
+    def test_processes_sharing_a_file_keep_each_others_entries(self) -> None:
+        # 两个工作进程各自先加载（空的）缓存文件，再先后写入不同的芯片
+        worker_a, worker_b = LayoutCache(self.cache_path), LayoutCache(self.cache_path)
+        small = _chain_nodes(["Input", "Output"])
+        large = _chain_nodes(["Input", "Add", "Output"])
+        self.assertIsNone(worker_a.lookup(layout_signature(small), small))
+        self.assertIsNone(worker_b.lookup(layout_signature(large), large))
+        worker_a.store(layout_signature(small), small, _layout(small))
+        worker_b.store(layout_signature(large), large, _layout(large))
+
+        reloaded = LayoutCache(self.cache_path)
+        self.assertIsNotNone(reloaded.lookup(layout_signature(small), small))
+        self.assertIsNotNone(reloaded.lookup(layout_signature(large), large))
+        self.assertIsNotNone(worker_b.lookup(layout_signature(small), small))
+
+    def test_corrupt_cache_file_is_ignored(self) -> None:
+        self.cache_path.write_bytes(b"garbage")
+        nodes = _chain_nodes(["Input", "Output"])
+        cache = LayoutCache(self.cache_path)
+        self.assertIsNone(cache.lookup(layout_signature(nodes), nodes))
+        self.assertTrue(cache.store(layout_signature(nodes), nodes, _layout(nodes)))
+        self.assertIsNotNone(LayoutCache(self.cache_path).lookup(layout_signature(nodes), nodes))
+
+
+if __name__ == "__main__":
+    unittest.main()
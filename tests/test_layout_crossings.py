@@ -0,0 +1,111 @@
+import random
+import time
+import unittest
+
+from layout_chip import (
+    FISHSCHOOL_MAX_PASSES,
+    _bary_sweeps_with_dummies,
+    _count_greater_pairs,
+    _fishschool_local_swaps,
+    _insert_dummies_and_build_adj,
+    _rebuild_order_maps,
+    count_bilayer_crossings,
+    count_layer_crossings,
+    run_layout_engine,
+)
+
+
+def _brute_force_crossings(edges):
+    n = 0
+    for i, (a1, b1) in enumerate(edges):
+        for a2, b2 in edges[i + 1:]:
+            if (a1 - a2) * (b1 - b2) < 0:
+                n += 1
+    return n
+
+
+def _random_layered_graph(rng, n_cols, per_col, fanout):
+    cols = {c: [f"n{c}_{i}" for i in range(per_col)] for c in range(n_cols)}
+    col_node = {nid: c for c, arr in cols.items() for nid in arr}
+    successors = {}
+    predecessors = {}
+    for c in range(n_cols - 1):
+        for u in cols[c]:
+            for _ in range(fanout):
+                v = rng.choice(cols[rng.randint(c + 1, min(n_cols - 1, c + 2))])
+                successors.setdefault(u, []).append(v)
+                predecessors.setdefault(v, []).append(u)
+    return cols, col_node, predecessors, successors
+
+
+def _chip_nodes(predecessors, all_ids):
+    nodes = []
+    for nid in all_ids:
+        inputs = [{"connectedOutputIdModel": {"NodeId": p}} for p in predecessors.get(nid, [])]
+        nodes.append({"Id": nid, "Inputs": inputs, "Outputs": []})
+    return nodes
+
+
+class TestLayoutCrossings(unittest.TestCase):
+    def test_bilayer_count_matches_brute_force(self) -> None:
+        rng = random.Random(7)
+        for _ in range(200):
+            upper, lower = rng.randint(1, 12), rng.randint(1, 12)
+            edges = [(rng.randrange(upper), rng.randrange(lower)) for _ in range(rng.randint(0, 30))]
+            self.assertEqual(count_bilayer_crossings(edges, lower), _brute_force_crossings(edges))
+
+    def test_count_greater_pairs_matches_pairwise(self) -> None:
+        rng = random.Random(11)
+        for _ in range(100):
+            A = sorted(rng.randrange(10) for _ in range(rng.randint(0, 8)))
+            B = sorted(rng.randrange(10) for _ in range(rng.randint(0, 8)))
+            expected = sum(1 for ra in A for rb in B if ra > rb)
+            self.assertEqual(_count_greater_pairs(A, B), expected)
+
+    def test_sweeps_never_increase_crossings(self) -> None:
+        rng = random.Random(3)
+        for _ in range(20):
+            cols, col_node, preds, succs = _random_layered_graph(rng, 5, 8, 2)
+            col_node_aug = dict(col_node)
+            cols_aug, pred_adj, succ_adj = _insert_dummies_and_build_adj(preds, succs, col_node_aug, cols)
+            before = count_layer_crossings(cols_aug, col_node_aug, succ_adj)
+            after = _bary_sweeps_with_dummies(cols_aug, col_node_aug, pred_adj, succ_adj, passes=4)
+            self.assertLessEqual(after, before)
+            self.assertEqual(after, count_layer_crossings(cols_aug, col_node_aug, succ_adj))
+            self.assertEqual(_rebuild_order_maps(cols_aug).keys(), cols_aug.keys())
+
+    def test_fishschool_converges_and_reports_gain(self) -> None:
+        rng = random.Random(9)
+        cols, _, preds, succs = _random_layered_graph(rng, 6, 12, 2)
+        positions = {}
+        for c, arr in cols.items():
+            ys = list(range(len(arr)))
+            rng.shuffle(ys)
+            for nid, y in zip(arr, ys):
+                positions[nid] = {"x": c * 800.0, "y": y * 600.0}
+        ys_before = {c: sorted(positions[n]["y"] for n in arr) for c, arr in cols.items()}
+        all_ids = [nid for c in sorted(cols) for nid in cols[c]]
+
+        positions, stats = _fishschool_local_swaps(preds, succs, {}, [all_ids], positions)
+
+        # 只在列内交换 y，不改变每列占用的 y 集合
+        self.assertEqual({c: sorted(positions[n]["y"] for n in arr) for c, arr in cols.items()}, ys_before)
+        self.assertGreater(stats["swaps"], 0)
+        self.assertGreater(stats["score_gain"], 0)
+        self.assertLess(stats["crossings_after"], stats["crossings_before"])
+        # 收敛：在达到轮数上限之前就出现了一轮无交换
+        self.assertLess(stats["passes"], FISHSCHOOL_MAX_PASSES)
+
+    def test_large_chip_layout_scales(self) -> None:
+        rng = random.Random(5)
+        cols, _, preds, _ = _random_layered_graph(rng, 40, 250, 2)
+        all_ids = [nid for c in sorted(cols) for nid in cols[c]]
+        start = time.perf_counter()
+        positions = run_layout_engine(_chip_nodes(preds, all_ids))
+        elapsed = time.perf_counter() - start
+        self.assertEqual(len(positions), len(all_ids))
+        self.assertLess(elapsed, 60.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,50 @@
+import random
+import unittest
+
+from layout_chip import _bary_sweeps_with_dummies, _insert_dummies_and_build_adj
+from src.layout_numpy import HAS_NUMPY, _count_sequence_inversions, bary_sweeps_numpy
+
+
+def _random_graph(rng, n_cols, per_col, fanout):
+    cols = {c: [f"n{c}_{i}" for i in range(per_col)] for c in range(n_cols)}
+    successors, predecessors = {}, {}
+    for c in range(n_cols - 1):
+        for u in cols[c]:
+            for _ in range(fanout):
+                v = rng.choice(cols[rng.randint(c + 1, min(n_cols - 1, c + 3))])
+                successors.setdefault(u, []).append(v)
+                predecessors.setdefault(v, []).append(u)
+    return cols, predecessors, successors
+
+
+@unittest.skipUnless(HAS_NUMPY, "NumPy 未安装")
+class TestLayoutNumpyBackend(unittest.TestCase):
+    def test_sequence_inversions_match_brute_force(self) -> None:
+        import numpy as np
+
+        rng = random.Random(4)
+        for _ in range(100):
+            seq = [rng.randrange(12) for _ in range(rng.randint(0, 40))]
+            expected = sum(1 for i in range(len(seq)) for j in range(i + 1, len(seq)) if seq[i] > seq[j])
+            self.assertEqual(_count_sequence_inversions(np.asarray(seq, dtype=np.int64)), expected)
+
+    def test_numpy_sweeps_match_python_sweeps(self) -> None:
+        rng = random.Random(21)
+        for _ in range(15):
+            cols, preds, succs = _random_graph(rng, rng.randint(2, 7), rng.randint(1, 15), rng.randint(1, 3))
+            col_node = {nid: c for c, arr in cols.items() for nid in arr}
+
+            py_col_node = dict(col_node)
+            py_cols, py_pred, py_succ = _insert_dummies_and_build_adj(preds, succs, py_col_node, cols)
+            py_result = _bary_sweeps_with_dummies(py_cols, py_col_node, py_pred, py_succ, passes=4)
+
+            np_col_node = dict(col_node)
+            np_cols, np_pred, np_succ = _insert_dummies_and_build_adj(preds, succs, np_col_node, cols)
+            np_result = bary_sweeps_numpy(np_cols, np_col_node, np_pred, np_succ, passes=4)
+
+            self.assertEqual(np_result, py_result)
+            self.assertEqual(np_cols, py_cols)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+import json
+import unittest
+from pathlib import Path
+
+from modifier import (
+    _resolve_moduledef_key,
+    apply_data_type_modifications,
+    build_moduledef_key_index,
+)
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def _linear_resolve(op_type, module_defs):
+    """旧版逐个扫描 module_defs 的实现，用作对照。"""
+    raw = str(op_type)
+    if raw in module_defs or not isinstance(op_type, str):
+        return raw
+    key_norm = op_type.strip().lower()
+    for mid, mod in module_defs.items():
+        si = mod.get("source_info") or {}
+        for cand in (si.get("datatype_map_nodename"), si.get("chip_names_friendly_name")):
+            if isinstance(cand, str) and cand.strip().lower() == key_norm:
+                return str(mid)
+    return raw
+
+
+class TestModifierIndex(unittest.TestCase):
+    def test_index_resolution_matches_linear_scan_for_every_module(self) -> None:
+        module_defs = json.loads((ROOT / "moduledef.json").read_text(encoding="utf-8"))
+        key_index = build_moduledef_key_index(module_defs)
+
+        queries = ["Add", " add ", "Remainder", "Mod", "ToString", "Unknown", 2304, "2304"]
+        for mod in module_defs.values():
+            si = mod.get("source_info") or {}
+            queries.extend(v for v in (si.get("datatype_map_nodename"), si.get("chip_names_friendly_name")) if v)
+
+        for q in queries:
+            self.assertEqual(
+                _resolve_moduledef_key(q, module_defs, key_index),
+                _linear_resolve(q, module_defs),
+                msg=f"query={q!r}",
+            )
+
+    def test_bulk_modification_resolves_many_nodes_by_id(self) -> None:
+        nodes = [
+            {
+                "Id": f"AddNumbersNodeViewModel : n{i}",
+                "OperationType": "Add",
+                "GateDataType": "Number",
+                "Inputs": [{"DataType": "Number"}, {"DataType": "Number"}],
+                "Outputs": [{"DataType": "Number"}],
+                "SaveData": None,
+            }
+            for i in range(50)
+        ]
+        game_data = {
+            "saveObjectContainers": [
+                {
+                    "saveObjects": {
+                        "saveMetaDatas": [
+                            {"key": "chip_graph", "stringValue": json.dumps({"Nodes": nodes})}
+                        ],
+                        "mechanicData": [],
+                    }
+                }
+            ]
+        }
+        module_defs = {
+            "2304": {
+                "source_info": {"datatype_map_nodename": "Add", "chip_names_friendly_name": "Add"},
+                "inputs": [{"name": "A", "type": "DECIMAL"}, {"name": "B", "type": "DECIMAL"}],
+                "outputs": [{"name": "A + B", "type": "DECIMAL"}],
+                "can_modify_data_type": True,
+            }
+        }
+        rules = {"2304": {"inputs": ["same", "same"], "outputs": ["same"]}}
+        instructions = [
+            {"node_id": f"AddNumbersNodeViewModel : n{i}", "new_data_type": 8} for i in range(0, 50, 2)
+        ]
+
+        updated = apply_data_type_modifications(
+            game_data,
+            instructions,
+            rules,
+            module_defs,
+            moduledef_key_index=build_moduledef_key_index(module_defs),
+        )
+
+        out_nodes = json.loads(
+            updated["saveObjectContainers"][0]["saveObjects"]["saveMetaDatas"][0]["stringValue"]
+        )["Nodes"]
+        for i, node in enumerate(out_nodes):
+            expected = "Vector" if i % 2 == 0 else "Number"
+            self.assertEqual(node["GateDataType"], expected)
+            self.assertEqual(node["Outputs"][0]["DataType"], expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
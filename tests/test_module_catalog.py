@@ -0,0 +1,83 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from src import module_catalog
+from src.module_catalog import CATALOG_CACHE_FILENAME, ModuleCatalog
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+class TestModuleCatalog(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.tmp, ignore_errors=True)
+        self.moduledef = self.tmp / "moduledef.json"
+        shutil.copyfile(ROOT / "moduledef.json", self.moduledef)
+        self.cache_dir = self.tmp / ".cache"
+        # 清空进程内缓存，保证每个用例都走磁盘缓存逻辑
+        patcher = mock.patch.dict(module_catalog._LOADED, clear=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _load(self) -> ModuleCatalog:
+        module_catalog._LOADED.clear()
+        return ModuleCatalog.load(self.moduledef, cache_dir=self.cache_dir)
+
+    def test_tables_match_moduledef(self) -> None:
+        catalog = self._load()
+        module_defs = json.loads(self.moduledef.read_text(encoding="utf-8"))
+        self.assertEqual(catalog.module_defs, module_defs)
+        self.assertIn("remainder", catalog.chip_index)
+        self.assertIs(catalog.chip_index["modulo"], catalog.chip_index["remainder"])
+        self.assertIn("variable", catalog.chip_index)
+        self.assertEqual(catalog.candidate_names, list(catalog.candidate_map))
+        add_key = catalog.moduledef_key_index["add"]
+        self.assertEqual(catalog.port_position("Add", "B"), 1)
+        self.assertEqual(catalog.resolve_key("Add"), add_key)
+
+    def test_warm_load_skips_json_parse(self) -> None:
+        first = self._load()
+        self.assertTrue((self.cache_dir / CATALOG_CACHE_FILENAME).exists())
+        with mock.patch.object(module_catalog.json, "loads", side_effect=AssertionError("re-parsed")):
+            second = self._load()
+        self.assertEqual(second.chip_index.keys(), first.chip_index.keys())
+
+    def test_touched_file_with_same_content_reuses_cache(self) -> None:
+        self._load()
+        st = self.moduledef.stat()
+        os.utime(self.moduledef, ns=(st.st_atime_ns, st.st_mtime_ns + 10_000_000_000))
+        with mock.patch.object(module_catalog.json, "loads", side_effect=AssertionError("re-parsed")):
+            self._load()
+
+    def test_content_change_invalidates_cache(self) -> None:
+        self._load()
+        data = json.loads(self.moduledef.read_text(encoding="utf-8"))
+        data["9999999"] = {
+            "id": "9999999",
+            "source_info": {
+                "datatype_map_nodename": "TestOnlyNode",
+                "allmod_viewmodel": "TestOnlyNodeViewModel",
+                "chip_names_friendly_name": "Test Only Node",
+            },
+            "inputs": [],
+            "outputs": [{"name": "Out", "type": 2}],
+        }
+        self.moduledef.write_text(json.dumps(data), encoding="utf-8")
+        catalog = self._load()
+        self.assertEqual(catalog.candidate_map["testonlynodeviewmodel"], "9999999")
+        self.assertIn("testonlynode", catalog.chip_index)
+
+    def test_corrupt_cache_is_rebuilt(self) -> None:
+        self.cache_dir.mkdir(parents=True)
+        (self.cache_dir / CATALOG_CACHE_FILENAME).write_bytes(b"not a pickle")
+        catalog = self._load()
+        self.assertIn("add", catalog.moduledef_key_index)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,107 @@
+import json
+import time
+import unittest
+import uuid
+from pathlib import Path
+
+import add_module
+from add_module import IdAllocator, NodeFactory, create_new_node
+from batch_add_modules import add_modules
+from src.module_catalog import ModuleCatalog
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def _make_game_data_with_chip_graph(nodes):
+    return {
+        "saveObjectContainers": [
+            {
+                "saveObjects": {
+                    "saveMetaDatas": [
+                        {
+                            "key": "chip_graph",
+                            "stringValue": json.dumps({"Nodes": nodes}, separators=(",", ":")),
+                        }
+                    ],
+                    "mechanicData": [],
+                }
+            }
+        ]
+    }
+
+
+def _strip_ids(node):
+    return {
+        **node,
+        "Id": node["Id"].split(" : ")[0],
+        "Inputs": [{**p, "Id": None} for p in node["Inputs"]],
+        "Outputs": [{**p, "Id": None} for p in node["Outputs"]],
+    }
+
+
+class TestNodeFactory(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        module_defs = json.loads((ROOT / "moduledef.json").read_text(encoding="utf-8"))
+        cls.catalog = ModuleCatalog(module_defs)
+
+    def _info(self, name):
+        key = self.catalog.candidate_map[name.lower()]
+        info = self.catalog.module_defs[key]
+        return info["source_info"]["allmod_viewmodel"], info
+
+    def test_factory_matches_sequential_create_new_node(self) -> None:
+        requests = [self._info(n) for n in ("Add", "Multiply", "Add", "Constant", "Add")]
+        existing = [{"Id": "X : 0", "OperationType": 1, "VisualPosition": {"y": 640.0}}]
+
+        sequential = list(existing)
+        for name, info in requests:
+            sequential.append(create_new_node(name, info, sequential))
+
+        factory = NodeFactory(existing)
+        batched = [factory.create(name, info) for name, info in requests]
+
+        self.assertEqual([_strip_ids(n) for n in batched], [_strip_ids(n) for n in sequential[1:]])
+        self.assertEqual([n["VisualPosition"]["y"] for n in batched], [840.0, 1040.0, 1240.0, 1440.0, 1640.0])
+
+    def test_observed_string_node_switches_schema(self) -> None:
+        name, info = self._info("Add")
+        factory = NodeFactory([])
+        self.assertIsInstance(factory.create(name, info)["OperationType"], int)
+        # Variable 节点不触发 string schema
+        factory.observe({"OperationType": "Variable", "GateDataType": "Number"})
+        self.assertFalse(factory.use_string)
+        factory.observe({"OperationType": "Add", "GateDataType": "Number"})
+        node = factory.create(name, info)
+        self.assertIsInstance(node["OperationType"], str)
+        self.assertIsInstance(node["Inputs"][0]["DataType"], str)
+
+    def test_seeded_allocator_is_deterministic(self) -> None:
+        a = IdAllocator(seed=7, batch_size=4)
+        b = IdAllocator(seed=7, batch_size=4)
+        ids_a = [a.new_id() for _ in range(10)]
+        self.assertEqual(ids_a, [b.new_id() for _ in range(10)])
+        self.assertEqual(len(set(ids_a)), 10)
+        for s in ids_a:
+            self.assertEqual(uuid.UUID(s).version, 4)
+
+    def test_bulk_add_modules_is_linear(self) -> None:
+        count = 10_000
+        game_data = _make_game_data_with_chip_graph([])
+        start = time.perf_counter()
+        _, created = add_modules(["Add"] * count, game_data, self.catalog.module_defs, catalog=self.catalog)
+        elapsed = time.perf_counter() - start
+
+        self.assertEqual(len(created), count)
+        nodes = json.loads(
+            game_data["saveObjectContainers"][0]["saveObjects"]["saveMetaDatas"][0]["stringValue"]
+        )["Nodes"]
+        self.assertEqual(len({n["Id"] for n in nodes}), count)
+        ys = [n["VisualPosition"]["y"] for n in nodes]
+        self.assertEqual(ys[:2], [180.0, 180.0 + add_module.Y_SPACING])
+        self.assertEqual(ys[-1], 180.0 + add_module.Y_SPACING * (count - 1))
+        self.assertLess(elapsed, 30.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,54 @@
+import csv
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from src.profiling import PipelineProfiler
+
+
+class TestPipelineProfiler(unittest.TestCase):
+    def test_disabled_profiler_records_nothing(self) -> None:
+        profiler = PipelineProfiler(False)
+        with profiler:
+            with profiler.stage("a"):
+                pass
+        self.assertEqual(profiler.stages, [])
+
+    def test_stages_reports_and_cprofile_dumps(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            tmp_path = Path(tmp)
+            profiler = PipelineProfiler(True, tmp_path / "prof")
+            with profiler:
+                with profiler.stage("build list"):
+                    data = [object() for _ in range(20000)]
+                with self.assertRaises(ValueError):
+                    with profiler.stage("fails"):
+                        raise ValueError("boom")
+
+            first, second = profiler.stages
+            self.assertEqual(first.name, "build list")
+            self.assertTrue(first.ok)
+            self.assertFalse(second.ok)
+            self.assertGreater(first.peak_alloc_bytes, 0)
+            self.assertGreaterEqual(first.gc_objects_delta, 0)
+            self.assertGreaterEqual(first.wall_s, 0.0)
+            del data
+
+            self.assertEqual(
+                sorted(p.name for p in (tmp_path / "prof").iterdir()),
+                ["01_build_list.prof", "02_fails.prof"],
+            )
+
+            profiler.write_json(tmp_path / "profile.json")
+            profiler.write_csv(tmp_path / "profile.csv")
+            report = json.loads((tmp_path / "profile.json").read_text(encoding="utf-8"))
+            self.assertEqual([s["name"] for s in report["stages"]], ["build list", "fails"])
+            with (tmp_path / "profile.csv").open(encoding="utf-8") as f:
+                rows = list(csv.DictReader(f))
+            self.assertEqual(rows[0]["name"], "build list")
+            self.assertIn("peak_alloc_bytes", rows[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,112 @@
+import json
+import unittest
+
+from batch_connect import apply_connections_to_data
+from constantvalue import apply_constant_modifications
+from src.save_document import SaveDocument
+
+
+def _make_game_data(nodes, inputs_string):
+    return {
+        "saveObjectContainers": [
+            {
+                "saveObjects": {
+                    "saveMetaDatas": [
+                        {
+                            "key": "chip_graph",
+                            "stringValue": json.dumps({"Nodes": nodes}, separators=(",", ":")),
+                        },
+                        {"key": "chip_inputs", "stringValue": inputs_string},
+                    ],
+                    "mechanicData": [],
+                }
+            }
+        ]
+    }
+
+
+class TestSaveDocument(unittest.TestCase):
+    def _nodes(self):
+        return [
+            {
+                "Id": "ConstantNodeViewModel : c0",
+                "OperationType": "Constant",
+                "GateDataType": "Number",
+                "Inputs": [],
+                "Outputs": [{"Id": "c0-out", "DataType": "Number", "ConnectedInputsIds": []}],
+                "SaveData": None,
+            },
+            {
+                "Id": "ExitNodeViewModel : o0",
+                "OperationType": "Exit",
+                "GateDataType": "Number",
+                "Inputs": [{"Id": "o0-in", "DataType": "Number", "connectedOutputIdModel": None}],
+                "Outputs": [],
+                "SaveData": None,
+            },
+        ]
+
+    def test_stages_share_one_decode_and_only_dirty_sections_are_reencoded(self) -> None:
+        # 故意使用带缩进的 chip_inputs：未被修改的分区应保持原字符串不变
+        inputs_string = json.dumps([{"Key": "in"}], indent=2)
+        game_data = _make_game_data(self._nodes(), inputs_string)
+        doc = SaveDocument(game_data)
+
+        graph = doc.chip_graph
+        apply_constant_modifications(
+            doc, [{"node_id": "ConstantNodeViewModel : c0", "new_value": 3, "value_type": "decimal"}]
+        )
+        apply_connections_to_data(
+            doc,
+            [
+                {
+                    "from_node_id": "ConstantNodeViewModel : c0",
+                    "from_port_index": 0,
+                    "to_node_id": "ExitNodeViewModel : o0",
+                    "to_port_index": 0,
+                }
+            ],
+        )
+
+        # 各阶段操作的是同一个已解码对象，尚未回写到字符串
+        self.assertIs(doc.chip_graph, graph)
+        self.assertTrue(doc.is_dirty("chip_graph"))
+        raw_graph = json.loads(game_data["saveObjectContainers"][0]["saveObjects"]["saveMetaDatas"][0]["stringValue"])
+        self.assertIsNone(raw_graph["Nodes"][1]["Inputs"][0]["connectedOutputIdModel"])
+
+        data = doc.flush()
+        metas = data["saveObjectContainers"][0]["saveObjects"]["saveMetaDatas"]
+        nodes = json.loads(metas[0]["stringValue"])["Nodes"]
+        self.assertEqual(json.loads(nodes[0]["SaveData"])["DataValue"], "3.0")
+        self.assertEqual(nodes[1]["Inputs"][0]["connectedOutputIdModel"]["NodeId"], "ConstantNodeViewModel : c0")
+        self.assertEqual(metas[1]["stringValue"], inputs_string)
+        self.assertFalse(doc.is_dirty("chip_graph"))
+
+    def test_missing_section_is_created_on_request(self) -> None:
+        doc = SaveDocument(_make_game_data([], "[]"))
+
+        self.assertIsNone(doc.section("chip_variables"))
+        variables = doc.section("chip_variables", create=True)
+        variables.append({"Key": "v"})
+        doc.mark_dirty("chip_variables")
+        data = doc.flush()
+
+        metas = data["saveObjectContainers"][0]["saveObjects"]["saveMetaDatas"]
+        self.assertEqual(metas[-1]["key"], "chip_variables")
+        self.assertEqual(json.loads(metas[-1]["stringValue"]), [{"Key": "v"}])
+
+    def test_mark_dirty_keeps_requested_indent(self) -> None:
+        doc = SaveDocument(_make_game_data([], '[{"Key":"a"}]'))
+        inputs = doc.section("chip_inputs")
+        inputs[0]["GateDataType"] = 2
+        doc.mark_dirty("chip_inputs", indent=2)
+        metas = doc.flush()["saveObjectContainers"][0]["saveObjects"]["saveMetaDatas"]
+        self.assertEqual(metas[1]["stringValue"], json.dumps(inputs, indent=2))
+
+        doc.mark_dirty("chip_inputs")
+        doc.flush()
+        self.assertEqual(metas[1]["stringValue"], json.dumps(inputs, separators=(",", ":")))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,200 @@
+import ast
+import contextlib
+import io
+import math
+import tempfile
+import unittest
+from pathlib import Path
+
+from src.build_context import BuildContext
+from src.converter.dedup_converter import DedupConverter
+from src.error_handler import SimulationError
+from src.module_catalog import ModuleCatalog
+from src.pipeline import build_save_document
+from src.simulator import HAS_NUMPY, ChipSimulator
+from src.utils import load_json
+
+ROOT = Path(__file__).resolve().parents[1]
+
+DSL = """\
+a = INPUT("A", "Number")
+b = INPUT("B", "Number")
+v = INPUT("V", "Vector")
+hp: Number = 0
+
+if __name__ == "__main__":
+    hp = hp + a
+    p = Split(v)
+    OUTPUT(hp, "HP")
+    OUTPUT(a / b, "Q")
+    OUTPUT(a % b, "M")
+    OUTPUT(a > b and b > 0, "L")
+    OUTPUT(Branch(a == b, Sqrt(a), Round(b / 2)), "BR")
+    OUTPUT(p["Y"] * a, "PY")
+    OUTPUT(Floor(a / b), "FL")
+    OUTPUT(Round(b / a), "RD")
+    OUTPUT(Random(a, 10), "RND")
+"""
+
+
+SAVE_DSL = """\
+a = INPUT("A", "Number")
+b = INPUT("B", "Number")
+acc: Number = 2
+
+if __name__ == "__main__":
+    acc = acc + a
+    OUTPUT(acc, "Acc")
+    OUTPUT(a / b, "Q")
+    OUTPUT(Floor(a / b), "F")
+"""
+
+
+EDGE_DSL = """\
+a = INPUT("A", "Number")
+b = INPUT("B", "Number")
+
+if __name__ == "__main__":
+    OUTPUT(Pow(a, b), "POW")
+    OUTPUT(a % b, "MOD")
+    OUTPUT(Max(a, b), "MAX")
+    OUTPUT(Floor(a / b), "FL")
+    OUTPUT(Ceil(a / b), "CE")
+    OUTPUT(Round(a / b), "RD")
+    OUTPUT((a / b) % b, "IMOD")
+"""
+
+# 0 与负零、负数、非整数、大数、inf 与 NaN
+EDGE_VALUES = [0.0, -0.0, 1.0, -1.0, 2.0, -2.5, 0.4, -0.4, -3.0, 1e308, math.inf, -math.inf, math.nan]
+
+
+def _graph(code: str) -> dict:
+    cvt = DedupConverter()
+    cvt.visit(ast.parse(code))
+    cvt.resolve_unresolved()
+    cvt.finalize_outputs()
+    return cvt.g.to_dict()
+
+
+def _same(xs, ys) -> bool:
+    return all(x == y or (math.isnan(x) and math.isnan(y)) for x, y in zip(xs, ys))
+
+
+def _same_bits(x: float, y: float) -> bool:
+    """inf / NaN / 零的符号必须一致；有限值允许末位差别（math 与 NumPy 的底层数学库不同）。"""
+    if math.isnan(x) or math.isnan(y) or math.isinf(x) or math.isinf(y) or x == 0.0 or y == 0.0:
+        return (math.isnan(x) and math.isnan(y)) or (x == y and math.copysign(1.0, x) == math.copysign(1.0, y))
+    return math.isclose(x, y, rel_tol=1e-12)
+
+
+class TestSimulator(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.catalog = ModuleCatalog.load(cache_dir=None)
+        cls.graph = _graph(DSL)
+
+    def test_batched_semantics(self) -> None:
+        sim = ChipSimulator.from_graph(self.graph, self.catalog, backend="python")
+        result = sim.run({"A": [1, -7, 5, 4], "B": [0, 3, 2, 4], "V": (9, 8, 7)}, ticks=3)
+        last = {name: cols[-1] for name, cols in result.outputs.items()}
+
+        self.assertEqual(last["Q"][0], math.inf)          # 除零得到 inf，而不是报错
+        self.assertEqual(last["Q"][2], 2.5)
+        self.assertTrue(math.isnan(last["M"][0]))
+        self.assertEqual(last["M"][1], -1.0)              # 截断取余
+        self.assertEqual(last["L"], [0.0, 0.0, 1.0, 0.0])
+        self.assertEqual(last["BR"], [0.0, 2.0, 1.0, 2.0])  # Round 为四舍六入五成双
+        self.assertEqual(last["PY"], [8.0, -56.0, 40.0, 32.0])
+        # 取整类运算把除零得到的 inf 原样传出
+        self.assertEqual(last["FL"], [math.inf, -3.0, 2.0, 1.0])
+        self.assertEqual(last["RD"], [0.0, -0.0, 0.0, 1.0])
+        # 变量在 tick 结束时写入：第 3 个 tick 读到的是前两个 tick 累加的结果
+        self.assertEqual(last["HP"], [2.0, -14.0, 10.0, 8.0])
+        self.assertEqual(result.variables["hp"], [3.0, -21.0, 15.0, 12.0])
+
+    def test_step_and_errors(self) -> None:
+        sim = ChipSimulator.from_graph(self.graph, self.catalog, backend="python")
+        sim.reset(batch_size=2)
+        self.assertEqual(sim.step({"A": [1, 2], "B": 1})["HP"], [0.0, 0.0])
+        self.assertEqual(sim.step({"A": [1, 2], "B": 1})["HP"], [1.0, 2.0])
+        with self.assertRaises(SimulationError):
+            sim.step({"A": [1, 2, 3]})
+        with self.assertRaises(SimulationError):
+            ChipSimulator.from_graph(
+                _graph('e = INPUT("E", "Entity")\n\nif __name__ == "__main__":\n    OUTPUT(Mass(e), "M")\n'),
+                self.catalog,
+            )
+
+    def test_save_chip_graph(self) -> None:
+        sim = ChipSimulator.load(ROOT / "ungraph.json", self.catalog)
+        self.assertEqual(sim.tps, 240)
+        self.assertEqual(sim.initial_variables, {"PrevError": 0.0, "IntegralError": 1.0})
+        self.assertEqual(sim.output_names, [])
+        # 该芯片每个 tick 把 kp 写入 PrevError（Set 接常量 1），IntegralError 保持存档中的初值
+        result = sim.run({"kp_bb2b": [3.5, -2.0]}, ticks=2)
+        self.assertEqual(result.variables, {"PrevError": [3.5, -2.0], "IntegralError": [1.0, 1.0]})
+
+    def test_compiled_save_matches_graph(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            dsl = Path(tmp) / "design.py"
+            dsl.write_text(SAVE_DSL, encoding="utf-8")
+            ctx = BuildContext.for_output_dir(Path(tmp) / "out", dsl_path=dsl, data_path=ROOT / "Data.json")
+            with contextlib.redirect_stdout(io.StringIO()):
+                save = build_save_document(ctx, self.catalog, load_json(ctx.rules_path, "数据类型规则文件"))
+        sim = ChipSimulator.from_save(save, self.catalog, backend="python")
+        self.assertEqual(sim.initial_variables, {"acc": 2.0})
+        # 存档中的端口名为小写名 + 随机后缀（如 a_5cc8）
+        port = {name.rsplit("_", 1)[0]: name for name in sim.input_names + sim.output_names}
+        self.assertEqual(sorted(port), ["a", "acc", "b", "f", "q"])
+        result = sim.run({port["a"]: [1.0, 3.0], port["b"]: [2.0, 0.0]}, ticks=3)
+        self.assertEqual(result.outputs[port["acc"]], [[2.0, 2.0], [3.0, 5.0], [4.0, 8.0]])
+        self.assertEqual(result.outputs[port["q"]][-1], [0.5, math.inf])
+        self.assertEqual(result.outputs[port["f"]][-1], [0.0, math.inf])
+        self.assertEqual(result.variables, {"acc": [5.0, 11.0]})
+
+    def test_edge_values(self) -> None:
+        sim = ChipSimulator.from_graph(_graph(EDGE_DSL), self.catalog, backend="python")
+        result = sim.run({"A": [0.0, -0.0, -2.0, math.inf, 1.0], "B": [-1.0, -1.0, 0.5, 2.0, math.nan]}, ticks=1)
+        last = {name: cols[-1] for name, cols in result.outputs.items()}
+        # 0 的负数次幂为 ±inf（与 Mathf.Pow 相同），负数的非整数次幂为 NaN
+        self.assertEqual(last["POW"][:2], [math.inf, -math.inf])
+        self.assertTrue(math.isnan(last["POW"][2]))
+        # inf 取余得到 NaN，而不是报错
+        self.assertTrue(math.isnan(last["MOD"][3]))
+        self.assertTrue(math.isnan(last["IMOD"][3]))
+        # Max 的任一输入为 NaN 时得到 NaN
+        self.assertTrue(math.isnan(last["MAX"][4]))
+        self.assertEqual(last["MAX"][:4], [0.0, -0.0, 0.5, math.inf])
+        self.assertEqual(math.copysign(1.0, last["CE"][0]), -1.0)  # Ceil(0 / -1) 为 -0.0
+
+    @unittest.skipUnless(HAS_NUMPY, "NumPy 未安装")
+    def test_numpy_backend_matches_python_on_edge_values(self) -> None:
+        pairs = [(a, b) for a in EDGE_VALUES for b in EDGE_VALUES]
+        inputs = {"A": [a for a, _ in pairs], "B": [b for _, b in pairs]}
+        graph = _graph(EDGE_DSL)
+        expected = ChipSimulator.from_graph(graph, self.catalog, backend="python").run(inputs, ticks=1)
+        actual = ChipSimulator.from_graph(graph, self.catalog, backend="numpy").run(inputs, ticks=1)
+        for name, cols in expected.outputs.items():
+            for (a, b), x, y in zip(pairs, cols[-1], actual.outputs[name][-1].tolist()):
+                self.assertTrue(_same_bits(x, y), f"{name}({a}, {b}): python={x} numpy={y}")
+
+    @unittest.skipUnless(HAS_NUMPY, "NumPy 未安装")
+    def test_numpy_backend_matches_python(self) -> None:
+        import random
+
+        rng = random.Random(3)
+        inputs = {
+            "A": [float(rng.randint(-5, 5)) for _ in range(200)],
+            "B": [float(rng.randint(-5, 5)) for _ in range(200)],
+            "V": (1.0, 2.0, 3.0),
+        }
+        expected = ChipSimulator.from_graph(self.graph, self.catalog, backend="python", seed=7).run(inputs, ticks=4)
+        actual = ChipSimulator.from_graph(self.graph, self.catalog, backend="numpy", seed=7).run(inputs, ticks=4)
+        self.assertIn(0.0, inputs["B"])  # 覆盖除零后取整（FL / RD）
+        for name, cols in expected.outputs.items():
+            for tick, col in enumerate(cols):
+                self.assertTrue(_same(col, actual.outputs[name][tick].tolist()), f"{name} @ tick {tick}")
+
+
+if __name__ == "__main__":
+    unittest.main()
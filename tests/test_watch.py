@@ -0,0 +1,61 @@
+import json
+import tempfile
+import unittest
+import zipfile
+from pathlib import Path
+
+from src.build_context import BuildContext
+from src.watch import REBUILD_CONSTANTS, REBUILD_FULL, REBUILD_UNCHANGED, WatchSession, graph_fingerprint
+
+ROOT = Path(__file__).resolve().parents[1]
+
+DESIGN = """\
+a = INPUT("A", "Number")
+
+if __name__ == "__main__":
+    OUTPUT(ADD(a, {value}), "Sum")
+"""
+
+
+def _melsave_values(path: Path) -> str:
+    with zipfile.ZipFile(path) as zf:
+        return zf.read("Data").decode("utf-8")
+
+
+class TestWatchSession(unittest.TestCase):
+    def test_constant_edit_patches_cached_save(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            tmp_path = Path(tmp)
+            dsl = tmp_path / "design.py"
+            dsl.write_text(DESIGN.format(value="12345.5"), encoding="utf-8")
+            session = WatchSession(
+                BuildContext.for_output_dir(tmp_path / "out", dsl_path=dsl, data_path=ROOT / "Data.json")
+            )
+            melsave = tmp_path / "out" / "design.melsave"
+
+            self.assertEqual(session.rebuild(), REBUILD_FULL)
+            self.assertIn("12345.5", _melsave_values(melsave))
+
+            dsl.write_text(DESIGN.format(value="67890.25"), encoding="utf-8")
+            self.assertEqual(session.rebuild({"dsl"}), REBUILD_CONSTANTS)
+            data = _melsave_values(melsave)
+            self.assertIn("67890.25", data)
+            self.assertNotIn("12345.5", data)
+            json.loads(data)
+
+            dsl.write_text("# 只改注释\n" + DESIGN.format(value="67890.25"), encoding="utf-8")
+            self.assertEqual(session.rebuild({"dsl"}), REBUILD_UNCHANGED)
+
+            dsl.write_text(DESIGN.format(value="a"), encoding="utf-8")
+            self.assertEqual(session.rebuild({"dsl"}), REBUILD_FULL)
+
+    def test_fingerprint_keeps_constant_kind(self) -> None:
+        def graph(value):
+            return {"nodes": [{"id": "c", "type": "Constant", "attrs": {"value": value}}], "edges": []}
+
+        self.assertEqual(graph_fingerprint(graph(1)), graph_fingerprint(graph(2.5)))
+        self.assertNotEqual(graph_fingerprint(graph(1)), graph_fingerprint(graph("1")))
+
+
+if __name__ == "__main__":
+    unittest.main()